@@ -1,16 +1,37 @@
 import streamlit as st
 import os
 import sys
+import tempfile
 
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 import pandas as pd
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 # surveys 모듈 import
-from surveys.basic_survey import show_basic_survey
-from surveys.nutrition_survey import show_nutrition_survey
-from surveys.satisfaction_survey import show_satisfaction_survey
+# 설문 모듈은 import할 때 설문지 블록을 등록 (surveys.survey_engine)
+import surveys.basic_survey
+import surveys.satisfaction_survey
+from surveys.nutrition_survey import MEALS, SURVEY_DAYS, fetch_meal_item_stats
+from surveys.questionnaire import list_questionnaires, load_questionnaire, refresh_questionnaires
+from surveys.survey_engine import show_survey
+from surveys.cache import (
+    LRUTTLCache, cached_progress, facility_key, get_table_rows, invalidate_roster,
+    remember_progress, roster_contains, store_facility_roster
+)
+from surveys.schema_registry import refresh_table_columns
+from surveys.admin_tables import facility_filter, paginated_table
+from surveys.draft_store import DraftStore, SyncWorker
+from surveys.bulk_import import CSV_ENCODINGS, IMPORT_TABLES, ImportFileError, import_rows, iter_file_rows
+from surveys.bulk_export import EXPORT_FORMATS, ExportError, export_responses
+from surveys.storage import create_storage
+from surveys.connection_pool import PooledTransport, create_http_client
+from surveys.tracing import TraceRecorder, TracedClient, bucket_labels
+from surveys.analytics import (
+    COHORT_DIMENSIONS, COHORT_METRICS, analytics_key, histogram_frame, load_cohort_analytics, summary_frame
+)
+from surveys.products import RATING_FIELDS, fetch_product_ranking, refresh_product_catalog
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 KST = ZoneInfo('Asia/Seoul')
 
@@ -18,9 +39,41 @@ def get_kst_now():
     """현재 한국 시간 반환 (ISO 8601 형식)"""
     return datetime.now(KST).isoformat()
     
-# Supabase 초기화
+def get_setting(name, default=None):
+    """설정값 조회 (Streamlit secrets 우선, 없으면 환경 변수)"""
+    try:
+        if hasattr(st, 'secrets') and name in st.secrets:
+            return st.secrets[name]
+    except Exception:
+        pass
+    return os.getenv(name, default)
+
+# Supabase 요청용 연결 풀 (모든 세션이 공유, 사용 현황은 관리자 대시보드에 표시)
+@st.cache_resource
+def init_http_transport():
+    return PooledTransport(
+        max_connections=int(get_setting("SUPABASE_POOL_SIZE", 20)),
+        max_keepalive=int(get_setting("SUPABASE_KEEPALIVE", 10)),
+        keepalive_expiry=float(get_setting("SUPABASE_KEEPALIVE_EXPIRY", 30)),
+        retries=int(get_setting("SUPABASE_RETRIES", 2)),
+        backoff=float(get_setting("SUPABASE_RETRY_BACKOFF", 0.2)),
+        http2=str(get_setting("SUPABASE_HTTP2", "true")).lower() in ("1", "true", "yes")
+    )
+
+# 저장소 초기화 (STORAGE_BACKEND: supabase(기본) | postgres | sqlite)
+# postgres/sqlite는 supabase 클라이언트와 같은 메서드를 가진 어댑터를 반환하므로 나머지 코드는 그대로 사용합니다.
 @st.cache_resource
 def init_supabase():
+    backend = get_setting("STORAGE_BACKEND", "supabase")
+    if backend != "supabase":
+        return create_storage(
+            backend,
+            database_url=get_setting("DATABASE_URL"),
+            pool_size=int(get_setting("DATABASE_POOL_SIZE", 10)),
+            sqlite_path=get_setting("SQLITE_PATH", ":memory:"),
+            sample_data=str(get_setting("SQLITE_SAMPLE_DATA", "")).lower() in ("1", "true", "yes")
+        )
+    
     url = None
     key = None
     
@@ -37,7 +90,8 @@ def init_supabase():
         st.error("⚠️ Supabase 설정이 필요합니다. Streamlit Cloud의 Secrets 또는 로컬 .env 파일을 확인해주세요.")
         st.stop()
     
-    return create_client(url, key)
+    http_client = create_http_client(init_http_transport(), timeout=float(get_setting("SUPABASE_TIMEOUT", 15)))
+    return create_client(url, key, options=ClientOptions(httpx_client=http_client))
 
 try:
     supabase = init_supabase()
@@ -46,6 +100,93 @@ except Exception as e:
     st.info("💡 Streamlit Cloud Settings → Secrets에 SUPABASE_URL과 SUPABASE_KEY를 추가했는지 확인해주세요.")
     st.stop()
 
+# 서버 연결 풀 (Supabase: HTTP 연결 풀, postgres: 데이터베이스 연결 풀, sqlite: 없음)
+if get_setting("STORAGE_BACKEND", "supabase") == "supabase":
+    connection_pool = init_http_transport()
+else:
+    connection_pool = supabase if hasattr(supabase, 'slots') else None
+
+def current_page():
+    """데이터 호출 추적용 현재 화면 이름 (스크립트 실행 밖의 호출은 background)"""
+    if get_script_run_ctx() is None:
+        return 'background'
+    state = st.session_state
+    if not state.get('logged_in'):
+        return 'login'
+    if state.get('is_admin'):
+        return 'admin'
+    survey = state.get('current_survey')
+    if survey is None:
+        return 'dashboard'
+    return f"{survey}:{state.get(f'{survey}_page', 1)}"
+
+# 데이터 호출 추적 (모든 세션이 공유, 관리자 대시보드 "성능" 탭에 표시, DB_TRACING=false로 끔)
+@st.cache_resource
+def init_trace_recorder():
+    return TraceRecorder(current_page, max_events=int(get_setting("TRACE_MAX_EVENTS", 5000)))
+
+trace_recorder = None
+# 응답마다 JSON 직렬화로 크기를 재므로 필요할 때만 켭니다
+if str(get_setting("DB_TRACING", "false")).lower() in ("1", "true", "yes"):
+    trace_recorder = init_trace_recorder()
+    supabase = TracedClient(supabase, trace_recorder)
+
+# 요양원/조사원/어르신 명단 캐시 (모든 세션이 공유)
+@st.cache_resource
+def init_roster_cache():
+    return LRUTTLCache(
+        max_size=int(get_setting("ROSTER_CACHE_MAX_FACILITIES", 256)),
+        ttl=float(get_setting("ROSTER_CACHE_TTL", 300))
+    )
+
+roster_cache = init_roster_cache()
+
+# 관리자 화면 목록 페이지 캐시 (명단 캐시와 따로 두어 페이지를 넘겨도 로그인용 요양원 명단이 밀려나지 않음)
+@st.cache_resource
+def init_admin_page_cache():
+    return LRUTTLCache(
+        max_size=int(get_setting("ADMIN_PAGE_CACHE_MAX_PAGES", 64)),
+        ttl=float(get_setting("ADMIN_PAGE_CACHE_TTL", 300))
+    )
+
+admin_page_cache = init_admin_page_cache()
+
+# 코호트 분석 결과 캐시 (요양원별, 데이터 버전이 바뀌면 다시 집계)
+@st.cache_resource
+def init_analytics_cache():
+    return LRUTTLCache(
+        max_size=int(get_setting("ANALYTICS_CACHE_MAX_FACILITIES", 64)),
+        ttl=float(get_setting("ANALYTICS_CACHE_TTL", 3600))
+    )
+
+analytics_cache = init_analytics_cache()
+# 이 시간(초) 안에 다시 보면 데이터 버전도 확인하지 않고 캐시 사용
+ANALYTICS_RECHECK = float(get_setting("ANALYTICS_RECHECK", 30))
+
+# 앱 서버의 로컬 임시 저장소 + 백그라운드 동기화 (앱 서버와 Supabase 사이의 연결 장애 대비)
+# DRAFT_DB_PATH를 설정했을 때만 사용하며, 재시작/재배포 후에도 남는 디스크의 경로여야 합니다.
+@st.cache_resource
+def init_sync_worker():
+    path = get_setting("DRAFT_DB_PATH", "")
+    if not path:
+        return None
+    worker = SyncWorker(
+        DraftStore(path),
+        supabase,
+        batch_size=int(get_setting("SYNC_BATCH_SIZE", 20)),
+        interval=float(get_setting("SYNC_INTERVAL", 5)),
+        max_attempts=int(get_setting("SYNC_MAX_ATTEMPTS", 20))
+    )
+    worker.start()
+    return worker
+
+try:
+    sync_worker = init_sync_worker()
+except Exception as e:
+    sync_worker = None
+    st.warning(f"⚠️ 로컬 임시 저장소를 열 수 없어 제출 시 바로 서버에 저장합니다: {str(e)}")
+draft_store = sync_worker.store if sync_worker else None
+
 # 페이지 설정
 st.set_page_config(
     page_title="요양원 건강 및 블루푸드 설문조사",
@@ -67,27 +208,49 @@ if 'nursing_home_id' not in st.session_state:
 if 'current_survey' not in st.session_state:
     st.session_state.current_survey = None
 
+# 로그인 실패 사유별 메시지 (survey_login 함수의 error 코드)
+LOGIN_ERROR_MESSAGES = {
+    'nursing_home': "요양원 ID가 존재하지 않습니다.",
+    'surveyor': "조사원 ID가 존재하지 않거나 해당 요양원에 속하지 않습니다.",
+    'elderly': "어르신 ID가 존재하지 않거나 해당 요양원에 속하지 않습니다.",
+}
+
 # 로그인 확인 함수
 def verify_login(nursing_home_id, surveyor_id, elderly_id):
+    """요양원/조사원/어르신 검증과 진행 상황 조회/생성을 한 번의 호출로 처리
+    
+    (성공 여부, 메시지, 설문 진행 상황) 튜플을 반환합니다.
+    명단 캐시에 있는 조합이고 진행 상황도 캐시에 있으면 DB 호출 없이 통과시킵니다.
+    그 밖에는 survey_login 1회로 확인하며, 명단이 캐시에 없거나 오래되었을 수 있으면
+    같은 응답에 명단도 받아 캐시를 채웁니다.
+    """
+    roster = roster_cache.get(facility_key(nursing_home_id))
+    known = roster is not None and roster_contains(roster, surveyor_id, elderly_id)
+    if known:
+        progress = cached_progress(roster, elderly_id)
+        if progress is not None:
+            return True, "로그인 성공", progress
+    
     try:
-        # 요양원 확인
-        nh_response = supabase.table('nursing_homes').select('*').eq('id', nursing_home_id).execute()
-        if not nh_response.data:
-            return False, "요양원 ID가 존재하지 않습니다."
-        
-        # 조사원 확인
-        surveyor_response = supabase.table('surveyors').select('*').eq('id', surveyor_id).eq('nursing_home_id', nursing_home_id).execute()
-        if not surveyor_response.data:
-            return False, "조사원 ID가 존재하지 않거나 해당 요양원에 속하지 않습니다."
-        
-        # 어르신 확인
-        elderly_response = supabase.table('elderly_residents').select('*').eq('id', elderly_id).eq('nursing_home_id', nursing_home_id).execute()
-        if not elderly_response.data:
-            return False, "어르신 ID가 존재하지 않거나 해당 요양원에 속하지 않습니다."
+        response = supabase.rpc('survey_login', {
+            'p_nursing_home_id': nursing_home_id,
+            'p_surveyor_id': surveyor_id,
+            'p_elderly_id': elderly_id,
+            'p_include_roster': not known
+        }).execute()
+        result = response.data or {}
         
-        return True, "로그인 성공"
+        if not result.get('ok'):
+            return False, LOGIN_ERROR_MESSAGES.get(result.get('error'), "로그인에 실패했습니다."), None
     except Exception as e:
-        return False, f"오류 발생: {str(e)}"
+        return False, f"오류 발생: {str(e)}", None
+    
+    # 같은 요양원의 다음 로그인부터는 캐시로 검증
+    if result.get('roster'):
+        store_facility_roster(roster_cache, nursing_home_id, result['roster'])
+    remember_progress(roster_cache, nursing_home_id, result.get('progress'))
+    
+    return True, "로그인 성공", result.get('progress')
 
 # 설문 진행 상황 조회/생성
 def get_or_create_survey_progress(elderly_id, surveyor_id, nursing_home_id):
@@ -133,9 +296,11 @@ def login_page():
     
     if st.button("로그인", type="primary"):
         if nursing_home_id and surveyor_id and elderly_id:
-            success, message = verify_login(nursing_home_id, surveyor_id, elderly_id)
+            success, message, progress = verify_login(nursing_home_id, surveyor_id, elderly_id)
             if success:
                 st.session_state.logged_in = True
+                # 로그인 시 받아온 진행 상황은 대시보드 첫 화면에서 재사용
+                st.session_state.survey_progress = progress
                 st.session_state.nursing_home_id = nursing_home_id
                 st.session_state.surveyor_id = surveyor_id
                 st.session_state.elderly_id = elderly_id
@@ -152,11 +317,8 @@ def login_page():
     with st.expander("관리자 로그인"):
         admin_password = st.text_input("관리자 비밀번호", type="password", key="admin_pw")
         if st.button("관리자 로그인"):
-            # Streamlit secrets 우선 확인
-            if hasattr(st, 'secrets') and 'ADMIN_PASSWORD' in st.secrets:
-                correct_password = st.secrets["ADMIN_PASSWORD"]
-            else:
-                correct_password = os.getenv("ADMIN_PASSWORD", "admin123")
+            # Streamlit secrets 우선 확인 (secrets 파일이 없으면 환경 변수)
+            correct_password = get_setting("ADMIN_PASSWORD", "admin123")
             
             if admin_password == correct_password:
                 st.session_state.is_admin = True
@@ -181,56 +343,62 @@ def survey_dashboard():
     
     st.markdown("---")
     
-    # 설문 진행 상황 조회
-    progress = get_or_create_survey_progress(
-        st.session_state.elderly_id,
-        st.session_state.surveyor_id,
-        st.session_state.nursing_home_id
-    )
-    
+    # 설문 진행 상황 조회 (로그인 직후에는 로그인 응답이나 명단 캐시의 진행 상황을 그대로 사용)
+    progress = st.session_state.pop('survey_progress', None)
+    if progress is None:
+        progress = get_or_create_survey_progress(
+            st.session_state.elderly_id,
+            st.session_state.surveyor_id,
+            st.session_state.nursing_home_id
+        )
+        # 제출 후 돌아올 때마다 갱신되므로 다음 로그인은 캐시의 진행 상황을 사용
+        remember_progress(roster_cache, st.session_state.nursing_home_id, progress)
+    
+    # 서버에 연결할 수 없어도 설문은 진행할 수 있도록 로컬 기록만으로 표시
     if not progress:
-        st.error("설문 진행 상황을 불러올 수 없습니다.")
-        return
+        st.warning("📡 서버에서 진행 상황을 불러오지 못했습니다. 작성한 내용은 이 기기에 저장되고 연결되면 전송됩니다.")
+        progress = {}
+    
+    # 이 기기에서 제출했지만 아직 전송되지 않은 설문 (전송 실패 포함)
+    try:
+        pending = draft_store.pending_surveys(st.session_state.elderly_id) if draft_store else set()
+        rejected = draft_store.pending_surveys(st.session_state.elderly_id, failed=True) if draft_store else set()
+    except Exception:
+        pending, rejected = set(), set()
     
-    # 설문 상태 표시
+    # 설문 상태 표시 (설문지 정의 순서, surveys/questionnaires)
     st.subheader("📊 설문 진행 현황")
-    col1, col2, col3 = st.columns(3)
+    questionnaires = [load_questionnaire(name) for name in list_questionnaires()]
     
-    with col1:
-        status = "✅ 완료" if progress.get('basic_survey_completed') else "⏳ 미완료"
-        st.metric("1. 기초 조사표", status)
-    with col2:
-        status = "✅ 완료" if progress.get('nutrition_survey_completed') else "⏳ 미완료"
-        st.metric("2. 영양 조사표", status)
-    with col3:
-        status = "✅ 완료" if progress.get('satisfaction_survey_completed') else "⏳ 미완료"
-        st.metric("3. 만족도 및 선호도 조사표", status)
+    def survey_status(survey):
+        if progress.get(f'{survey}_survey_completed'):
+            return "✅ 완료"
+        if survey in pending:
+            return "📡 전송 대기"
+        if survey in rejected:
+            return "⚠️ 전송 실패"
+        return "⏳ 미완료"
+    
+    for col, questionnaire in zip(st.columns(len(questionnaires)), questionnaires):
+        with col:
+            st.metric(questionnaire.title, survey_status(questionnaire.name))
     
     st.markdown("---")
     
-    # 전체 완료 상태
+    # 전체 완료 상태 (전송 대기 중인 설문 포함)
     if progress.get('all_surveys_completed'):
         st.success("🎉 모든 설문이 완료되었습니다!")
+    elif all(survey_status(questionnaire.name) != "⏳ 미완료" for questionnaire in questionnaires):
+        st.success("🎉 모든 설문이 완료되었습니다! (일부는 연결되면 자동 전송됩니다)")
     
     # 설문 선택 버튼
     st.subheader("설문 선택")
     
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if st.button("📝 1. 기초 조사표", use_container_width=True, type="primary"):
-            st.session_state.current_survey = "basic"
-            st.rerun()
-    
-    with col2:
-        if st.button("🥗 2. 영양 조사표", use_container_width=True, type="primary"):
-            st.session_state.current_survey = "nutrition"
-            st.rerun()
-    
-    with col3:
-        if st.button("😊 3. 만족도 및 선호도 조사표", use_container_width=True, type="primary"):
-            st.session_state.current_survey = "satisfaction"
-            st.rerun()
+    for col, questionnaire in zip(st.columns(len(questionnaires)), questionnaires):
+        with col:
+            if st.button(f"{questionnaire.icon} {questionnaire.title}", use_container_width=True, type="primary"):
+                st.session_state.current_survey = questionnaire.name
+                st.rerun()
     
     st.markdown("---")
     
@@ -244,19 +412,92 @@ def survey_dashboard():
 def admin_dashboard():
     st.title("🔐 관리자 대시보드")
     
-    tabs = st.tabs(["요양원 관리", "조사원 관리", "어르신 관리", "설문 진행 현황"])
+    # 명단 캐시 / 목록 페이지 캐시 상태
+    stats = roster_cache.stats()
+    pages = admin_page_cache.stats()
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        st.caption(
+            f"🗂️ 명단 캐시: 적중 {stats['hits']}회 · 미적중 {stats['misses']}회 · "
+            f"제거 {stats['evictions']}회 · {stats['size']}/{stats['max_size']}개 (TTL {stats['ttl']:.0f}초)"
+        )
+        st.caption(
+            f"📄 목록 페이지 캐시: 적중 {pages['hits']}회 · 미적중 {pages['misses']}회 · "
+            f"제거 {pages['evictions']}회 · {pages['size']}/{pages['max_size']}개 (TTL {pages['ttl']:.0f}초)"
+        )
+    with col2:
+        if st.button("🔄 캐시 새로고침", use_container_width=True, help="명단 캐시, 설문 테이블 컬럼 정보, 제품 목록과 설문지 정의를 다시 읽어옵니다."):
+            invalidate_roster(roster_cache, page_cache=admin_page_cache)
+            refresh_table_columns()
+            refresh_product_catalog()
+            refresh_questionnaires()
+            st.rerun()
+    
+    # 로컬 임시 저장소 / 전송 대기열 상태
+    if sync_worker:
+        try:
+            sync = draft_store.stats()
+            caption = (
+                f"📡 전송 대기열: 대기 {sync['pending']}건 (재시도 {sync['retrying']}건) · "
+                f"전송 실패 {sync['failed']}건 · 작성 중 {sync['drafts']}건 · 전송 완료 {sync_worker.synced}건"
+            )
+            if sync_worker.skipped:
+                caption += f" (더 최근 저장이 있어 건너뜀 {sync_worker.skipped}건)"
+            if sync['last_error']:
+                caption += f" · 최근 오류: {sync['last_error']}"
+            st.caption(caption)
+            
+            # 서버가 거부했거나 정해진 횟수만큼 보내지 못한 제출
+            if sync['failed']:
+                with st.expander(f"⚠️ 전송 실패 {sync['failed']}건", expanded=True):
+                    st.caption(
+                        "다시 전송: 같은 내용을 바로 다시 보냅니다. (연결 문제였던 경우) · "
+                        "다시 작성: 대기열에서 지우고, 해당 어르신으로 로그인해 설문을 열면 작성하던 답변부터 고쳐서 다시 제출합니다."
+                    )
+                    for item in draft_store.failed_items():
+                        col1, col2, col3 = st.columns([4, 1, 1])
+                        with col1:
+                            st.write(f"**{item['elderly_id']}** · {load_questionnaire(item['survey']).title} · {item['attempts']}회 시도 · {item['last_error']}")
+                        with col2:
+                            if st.button("다시 전송", key=f"retry_failed_{item['id']}", use_container_width=True):
+                                draft_store.retry_failed([item['id']])
+                                st.rerun()
+                        with col3:
+                            if st.button("다시 작성", key=f"reopen_failed_{item['id']}", use_container_width=True):
+                                draft_store.reopen_failed([item['id']])
+                                st.rerun()
+        except Exception as e:
+            st.error(f"전송 대기열 조회 오류: {str(e)}")
+    
+    # 서버 연결 풀 사용 현황
+    if connection_pool is not None:
+        pool = connection_pool.stats()
+        caption = (
+            f"🔌 연결 풀: 사용 중 {pool['in_use']}/{pool['size']} (최대 {pool['peak']}) · "
+            f"대기 {pool['waiting']}건 (평균 {pool['avg_wait_ms']:.0f}ms, 시간 초과 {pool['timeouts']}건) · "
+            f"재시도 {pool['retries']}회 · 실패 {pool['failures']}회"
+        )
+        if 'connections' in pool:
+            caption += f" · 열린 연결 {pool['connections']}개 (유휴 {pool['idle']}개)"
+        st.caption(caption)
+    
+    tabs = st.tabs(["요양원 관리", "조사원 관리", "어르신 관리", "설문 진행 현황", "명단 일괄 등록", "응답 내보내기", "성능", "코호트 분석", "제품 평가"])
+    
+    # 필터용 요양원 목록 (캐시)
+    try:
+        nursing_homes = get_table_rows(roster_cache, supabase, 'nursing_homes', 'id,name')
+    except Exception as e:
+        nursing_homes = []
+        st.error(f"데이터 조회 오류: {str(e)}")
     
     # 요양원 관리
     with tabs[0]:
         st.subheader("🏥 요양원 목록")
         try:
-            response = supabase.table('nursing_homes').select('*').execute()
-            if response.data:
-                df = pd.DataFrame(response.data)
-                st.dataframe(df, use_container_width=True)
-                st.metric("전체 요양원 수", len(df))
-            else:
-                st.info("등록된 요양원이 없습니다.")
+            paginated_table(
+                supabase, 'admin_nursing_homes', 'nursing_homes', 'id,name,created_at',
+                cache=admin_page_cache, empty_message="등록된 요양원이 없습니다.", count_label="전체 요양원 수"
+            )
         except Exception as e:
             st.error(f"데이터 조회 오류: {str(e)}")
     
@@ -264,13 +505,11 @@ def admin_dashboard():
     with tabs[1]:
         st.subheader("👤 조사원 목록")
         try:
-            response = supabase.table('surveyors').select('*').execute()
-            if response.data:
-                df = pd.DataFrame(response.data)
-                st.dataframe(df, use_container_width=True)
-                st.metric("전체 조사원 수", len(df))
-            else:
-                st.info("등록된 조사원이 없습니다.")
+            filters = facility_filter(nursing_homes, 'admin_surveyors')
+            paginated_table(
+                supabase, 'admin_surveyors', 'surveyors', 'id,name,nursing_home_id,created_at', filters,
+                cache=admin_page_cache, empty_message="등록된 조사원이 없습니다.", count_label="전체 조사원 수"
+            )
         except Exception as e:
             st.error(f"데이터 조회 오류: {str(e)}")
     
@@ -278,13 +517,11 @@ def admin_dashboard():
     with tabs[2]:
         st.subheader("👴 어르신 목록")
         try:
-            response = supabase.table('elderly_residents').select('*').execute()
-            if response.data:
-                df = pd.DataFrame(response.data)
-                st.dataframe(df, use_container_width=True)
-                st.metric("전체 어르신 수", len(df))
-            else:
-                st.info("등록된 어르신이 없습니다.")
+            filters = facility_filter(nursing_homes, 'admin_residents')
+            paginated_table(
+                supabase, 'admin_residents', 'elderly_residents', 'id,name,nursing_home_id,created_at', filters,
+                cache=admin_page_cache, empty_message="등록된 어르신이 없습니다.", count_label="전체 어르신 수"
+            )
         except Exception as e:
             st.error(f"데이터 조회 오류: {str(e)}")
     
@@ -292,32 +529,333 @@ def admin_dashboard():
     with tabs[3]:
         st.subheader("📊 설문 진행 현황")
         try:
-            response = supabase.table('survey_progress').select('*').execute()
-            if response.data:
-                df = pd.DataFrame(response.data)
-                st.dataframe(df, use_container_width=True)
+            # 서버에서 집계한 요양원별/전체 통계만 조회
+            response = supabase.table('survey_progress_stats').select('*').execute()
+            stats_rows = response.data or []
+            overall = next((row for row in stats_rows if row.get('is_total')), None)
+            
+            if overall and overall['total']:
+                total = overall['total']
                 
                 # 통계
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
-                    st.metric("전체 응답자", len(df))
+                    st.metric("전체 응답자", total)
                 with col2:
-                    completed = df['basic_survey_completed'].sum()
-                    st.metric("기초 조사표 완료", f"{completed} ({completed/len(df)*100:.1f}%)")
+                    completed = overall['basic_completed']
+                    st.metric("기초 조사표 완료", f"{completed} ({completed/total*100:.1f}%)")
                 with col3:
-                    completed = df['nutrition_survey_completed'].sum()
-                    st.metric("영양 조사표 완료", f"{completed} ({completed/len(df)*100:.1f}%)")
+                    completed = overall['nutrition_completed']
+                    st.metric("영양 조사표 완료", f"{completed} ({completed/total*100:.1f}%)")
                 with col4:
-                    completed = df['satisfaction_survey_completed'].sum()
-                    st.metric("만족도 조사표 완료", f"{completed} ({completed/len(df)*100:.1f}%)")
+                    completed = overall['satisfaction_completed']
+                    st.metric("만족도 조사표 완료", f"{completed} ({completed/total*100:.1f}%)")
                 
                 # 전체 완료율
-                all_completed = df['all_surveys_completed'].sum()
-                st.metric("전체 완료", f"{all_completed} ({all_completed/len(df)*100:.1f}%)")
+                all_completed = overall['all_completed']
+                st.metric("전체 완료", f"{all_completed} ({all_completed/total*100:.1f}%)")
+                
+                # 요양원별 통계
+                st.markdown("#### 🏥 요양원별 완료 현황")
+                df = pd.DataFrame([row for row in stats_rows if not row.get('is_total')])
+                df = df.sort_values('nursing_home_id')
+                for column in ['basic_completed', 'nutrition_completed', 'satisfaction_completed', 'all_completed']:
+                    df[f"{column}_rate"] = (df[column] / df['total'] * 100).round(1)
+                st.dataframe(
+                    df.drop(columns=['is_total']).rename(columns={
+                        'nursing_home_id': '요양원 ID',
+                        'nursing_home_name': '요양원명',
+                        'total': '응답자',
+                        'basic_completed': '기초 완료',
+                        'nutrition_completed': '영양 완료',
+                        'satisfaction_completed': '만족도 완료',
+                        'all_completed': '전체 완료',
+                        'basic_completed_rate': '기초 완료율(%)',
+                        'nutrition_completed_rate': '영양 완료율(%)',
+                        'satisfaction_completed_rate': '만족도 완료율(%)',
+                        'all_completed_rate': '전체 완료율(%)'
+                    }),
+                    use_container_width=True,
+                    hide_index=True
+                )
             else:
                 st.info("설문 진행 현황이 없습니다.")
         except Exception as e:
             st.error(f"데이터 조회 오류: {str(e)}")
+        
+        # 끼니별 섭취 현황 (서버에서 끼니 칸 테이블을 집계)
+        st.markdown("#### 🍚 끼니별 섭취 현황")
+        try:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                stats_day = st.selectbox("일차", list(range(1, SURVEY_DAYS + 1)),
+                                         format_func=lambda day: f"{day}일차", key="admin_meal_day")
+            with col2:
+                meal_names = {meal_key: f"{icon} {name}" for meal_key, name, icon, _ in MEALS}
+                stats_meal = st.selectbox("끼니", list(meal_names), format_func=meal_names.get, key="admin_meal")
+            with col3:
+                meal_filter = facility_filter(nursing_homes, 'admin_meal_stats')
+            
+            meal_stats = fetch_meal_item_stats(supabase, stats_day, stats_meal, meal_filter.get('nursing_home_id'))
+            if meal_stats.empty:
+                st.info("영양 조사표 응답이 없습니다.")
+            else:
+                st.dataframe(
+                    meal_stats.drop(columns=['slot']).rename(columns={
+                        'label': '음식',
+                        'served': '제공 인원',
+                        'portion_g_sum': '제공량 합계(g)',
+                        'waste_g_sum': '잔반량 합계(g)',
+                        'avg_waste_level': '평균 잔반 단계(0~4)',
+                        'intake_rate': '섭취율(%)'
+                    }),
+                    use_container_width=True,
+                    hide_index=True
+                )
+        except Exception as e:
+            st.error(f"데이터 조회 오류: {str(e)}")
+        
+        # 어르신별 진행 상황 (현재 페이지만 조회)
+        st.markdown("#### 👴 어르신별 진행 상황")
+        try:
+            filters = facility_filter(nursing_homes, 'admin_progress')
+            paginated_table(
+                supabase, 'admin_progress', 'survey_progress',
+                'id,elderly_id,surveyor_id,nursing_home_id,basic_survey_completed,'
+                'nutrition_survey_completed,satisfaction_survey_completed,all_surveys_completed,last_updated',
+                filters, empty_message="설문 진행 현황이 없습니다.", count_label="전체 응답자"
+            )
+        except Exception as e:
+            st.error(f"데이터 조회 오류: {str(e)}")
+    
+    # 명단 일괄 등록 (CSV/XLSX)
+    with tabs[4]:
+        st.subheader("📥 명단 일괄 등록")
+        st.caption("요양원 → 조사원 → 어르신 순서로 등록하세요. 첫 행은 머리글(ID, 이름, 요양원 ID)이어야 합니다.")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            table_name = st.selectbox(
+                "등록할 명단", list(IMPORT_TABLES.keys()),
+                format_func=lambda name: IMPORT_TABLES[name]['label'], key="import_table"
+            )
+            encoding = st.selectbox(
+                "CSV 인코딩", CSV_ENCODINGS, key="import_encoding",
+                help="엑셀에서 'CSV(쉼표로 분리)'로 저장한 파일은 cp949를 선택하세요."
+            )
+        with col2:
+            on_conflict = st.radio(
+                "이미 등록된 ID", ['skip', 'update'], key="import_conflict",
+                format_func=lambda option: "건너뛰기" if option == 'skip' else "이름/소속 갱신"
+            )
+            dry_run = st.checkbox("검증만 하기 (저장하지 않음)", key="import_dry_run")
+        
+        uploaded = st.file_uploader("CSV 또는 XLSX 파일", type=['csv', 'xlsx'], key="import_file")
+        
+        if uploaded is not None and st.button("등록 시작", type="primary", key="import_run"):
+            progress_bar = st.progress(0.0, text="등록 중...")
+            total_bytes = max(uploaded.size, 1)
+            
+            def show_progress(rows):
+                done = min(uploaded.tell() / total_bytes, 1.0)
+                progress_bar.progress(done, text=f"{rows:,}행 처리 중...")
+            
+            try:
+                uploaded.seek(0)
+                report = import_rows(
+                    supabase, table_name, iter_file_rows(uploaded, uploaded.name, encoding),
+                    on_conflict=on_conflict, dry_run=dry_run, progress=show_progress
+                )
+                progress_bar.progress(1.0, text=f"완료 ({report['elapsed']:.1f}초)")
+                if not dry_run:
+                    invalidate_roster(roster_cache, page_cache=admin_page_cache)
+                
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("읽은 행", f"{report['rows']:,}")
+                with col2:
+                    st.metric("유효", f"{report['valid']:,}")
+                with col3:
+                    st.metric("검증만" if dry_run else "저장", "-" if dry_run else f"{report['written']:,}")
+                with col4:
+                    st.metric("오류", f"{report['invalid']:,}")
+                if report['progress_created']:
+                    st.caption(f"설문 진행 상황 {report['progress_created']:,}건을 함께 만들었습니다.")
+                
+                if report['errors']:
+                    st.warning(f"⚠️ 오류 행 {report['invalid']:,}건은 등록하지 않았습니다.")
+                    st.dataframe(pd.DataFrame(report['errors']), use_container_width=True, hide_index=True)
+                else:
+                    st.success("✅ 모든 행이 유효합니다." if dry_run else "✅ 등록이 완료되었습니다.")
+            except ImportFileError as e:
+                progress_bar.empty()
+                st.error(f"파일 오류: {str(e)}")
+            except UnicodeDecodeError:
+                progress_bar.empty()
+                st.error("파일 인코딩이 맞지 않습니다. CSV 인코딩을 바꿔 다시 시도하세요.")
+            except Exception as e:
+                progress_bar.empty()
+                st.error(f"등록 오류: {str(e)}")
+    
+    # 설문 응답 내보내기 (어르신 한 명당 한 행, JSON 문항은 컬럼으로 펼침)
+    with tabs[5]:
+        st.subheader("📤 응답 내보내기")
+        st.caption("세 설문의 응답을 어르신 ID로 합쳐 파일로 만듭니다. 어르신 1,000명 단위로 조회해 바로 파일에 기록합니다.")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            file_format = st.radio("파일 형식", EXPORT_FORMATS, key="export_format", horizontal=True,
+                                   format_func=lambda option: "Parquet" if option == 'parquet' else "CSV (엑셀)")
+            include_empty = st.checkbox("응답이 없는 어르신도 포함", key="export_include_empty")
+        with col2:
+            export_filter = facility_filter(nursing_homes, 'admin_export')
+        
+        if st.button("내보내기 파일 만들기", type="primary", key="export_run"):
+            # 이전에 만든 파일은 지우고 새로 작성
+            previous = st.session_state.pop('export_file', None)
+            if previous and os.path.exists(previous['path']):
+                os.remove(previous['path'])
+            
+            fd, path = tempfile.mkstemp(suffix=f".{file_format}", prefix="survey_responses_")
+            os.close(fd)
+            status = st.empty()
+            try:
+                written = export_responses(
+                    supabase, path, file_format,
+                    nursing_home_id=export_filter.get('nursing_home_id'),
+                    include_empty=include_empty,
+                    progress=lambda rows: status.caption(f"어르신 {rows:,}명 기록 중...")
+                )
+                status.empty()
+                st.session_state.export_file = {
+                    'path': path, 'format': file_format, 'rows': written,
+                    'name': f"survey_responses_{datetime.now(KST).strftime('%Y%m%d_%H%M')}.{file_format}"
+                }
+            except ExportError as e:
+                os.remove(path)
+                st.error(f"내보내기 오류: {str(e)}")
+            except Exception as e:
+                os.remove(path)
+                st.error(f"데이터 조회 오류: {str(e)}")
+        
+        export_file = st.session_state.get('export_file')
+        if export_file and os.path.exists(export_file['path']):
+            if export_file['rows']:
+                st.success(f"✅ 어르신 {export_file['rows']:,}명의 응답을 내보냈습니다.")
+                with open(export_file['path'], 'rb') as f:
+                    st.download_button(
+                        "⬇️ 파일 내려받기", f, file_name=export_file['name'],
+                        mime="text/csv" if export_file['format'] == 'csv' else "application/octet-stream",
+                        key="export_download"
+                    )
+            else:
+                st.info("내보낼 응답이 없습니다.")
+    
+    # 데이터 호출 성능 (화면·호출 위치별 지연 시간)
+    with tabs[6]:
+        st.subheader("⏱️ 데이터 호출 성능")
+        if trace_recorder is None:
+            st.info("데이터 호출 추적이 꺼져 있습니다. 측정하려면 DB_TRACING=true로 설정하세요.")
+        else:
+            summary = trace_recorder.summary()
+            if not summary:
+                st.info("기록된 데이터 호출이 없습니다.")
+            else:
+                st.caption(f"서버 시작 후 호출 {sum(row['count'] for row in summary):,}건 · 지연 시간 합계가 큰 순서 "
+                           f"(p95는 히스토그램 구간으로 추정)")
+                st.dataframe(pd.DataFrame(summary).rename(columns={
+                    'page': "화면", 'call': "호출", 'caller': "호출 위치", 'count': "횟수", 'errors': "오류",
+                    'total_ms': "합계(ms)", 'avg_ms': "평균(ms)", 'p95_ms': "p95(ms)", 'max_ms': "최대(ms)",
+                    'avg_rows': "평균 행 수", 'avg_request_bytes': "평균 요청(B)", 'avg_response_bytes': "평균 응답(B)"
+                }), use_container_width=True, hide_index=True)
+                
+                histograms = trace_recorder.page_histograms()
+                page = st.selectbox("화면별 지연 시간 분포", sorted(histograms), key="trace_page")
+                st.bar_chart(pd.DataFrame({"호출 수": histograms[page]}, index=bucket_labels()), sort=False)
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.download_button(
+                        "⬇️ 최근 호출 기록 내려받기 (JSON Lines)", trace_recorder.export_jsonl(),
+                        file_name=f"db_calls_{datetime.now(KST).strftime('%Y%m%d_%H%M')}.jsonl",
+                        mime="application/x-ndjson", key="trace_download"
+                    )
+                with col2:
+                    if st.button("기록 초기화", key="trace_reset"):
+                        trace_recorder.reset()
+                        st.rerun()
+    
+    # 코호트 분석 (서버에서 집계한 요양원/등급/식사 유형별 분포, 요양원별 캐시)
+    with tabs[7]:
+        st.subheader("📈 코호트 분석")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            analytics_filter = facility_filter(nursing_homes, 'admin_analytics')
+        with col2:
+            metric = st.selectbox("지표", list(COHORT_METRICS), format_func=lambda key: COHORT_METRICS[key][0],
+                                  key="analytics_metric")
+        with col3:
+            dimension = st.selectbox("집계 기준", list(COHORT_DIMENSIONS), format_func=COHORT_DIMENSIONS.get,
+                                     key="analytics_dimension")
+        
+        try:
+            nursing_home_id = analytics_filter.get('nursing_home_id')
+            analytics = load_cohort_analytics(analytics_cache, supabase, nursing_home_id, recheck=ANALYTICS_RECHECK)
+            overall = summary_frame(analytics, metric, 'all')
+            if overall.empty:
+                st.info("집계할 응답이 없습니다.")
+            else:
+                stats = overall.iloc[0]
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("응답자", f"{int(stats['n']):,}명")
+                with col2:
+                    st.metric("평균", f"{stats['mean']:.1f}")
+                with col3:
+                    st.metric("중앙값", f"{stats['median']:.1f}")
+                with col4:
+                    st.metric("사분위 범위", f"{stats['p25']:.1f} ~ {stats['p75']:.1f}")
+                
+                st.markdown(f"#### {COHORT_METRICS[metric][0]} 분포")
+                st.bar_chart(histogram_frame(analytics, metric), sort=False)
+                
+                st.markdown(f"#### {COHORT_DIMENSIONS[dimension]}별 요약")
+                st.dataframe(summary_frame(analytics, metric, dimension).rename(columns={
+                    'grp': COHORT_DIMENSIONS[dimension], 'n': "응답자", 'mean': "평균", 'min': "최소",
+                    'p25': "하위 25%", 'median': "중앙값", 'p75': "상위 25%", 'max': "최대"
+                }), use_container_width=True, hide_index=True)
+            
+            cache_stats = analytics_cache.stats()
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.caption(
+                    f"🗂️ 분석 캐시: 적중 {cache_stats['hits']}회 · "
+                    f"미적중 {cache_stats['misses']}회 (응답이 제출되면 {ANALYTICS_RECHECK:.0f}초 안에 다시 집계)"
+                )
+            with col2:
+                if st.button("🔄 다시 집계", key="analytics_refresh", use_container_width=True):
+                    analytics_cache.invalidate(analytics_key(nursing_home_id))
+                    st.rerun()
+        except Exception as e:
+            st.error(f"데이터 조회 오류: {str(e)}")
+    
+    # 제품 평가 순위 (서버가 저장할 때마다 갱신하는 요양원·제품별 합계만 조회)
+    with tabs[8]:
+        st.subheader("🐟 고령친화우수식품 평가 순위")
+        try:
+            product_filter = facility_filter(nursing_homes, 'admin_products')
+            ranking = fetch_product_ranking(supabase, product_filter.get('nursing_home_id'))
+            if ranking.empty:
+                st.info("제품 평가 응답이 없습니다.")
+            else:
+                st.bar_chart(ranking.set_index('name')[['avg_score']].rename(columns={'avg_score': "평균 평점"}),
+                             sort=False, horizontal=True)
+                st.dataframe(ranking.drop(columns=['product_id']).rename(columns=dict(
+                    {'rank': "순위", 'name': "제품", 'responses': "평가 인원", 'avg_score': "평균 평점"},
+                    **RATING_FIELDS
+                )), use_container_width=True, hide_index=True)
+        except Exception as e:
+            st.error(f"데이터 조회 오류: {str(e)}")
     
     st.markdown("---")
     if st.button("로그아웃"):
@@ -340,15 +878,9 @@ def main():
     # 일반 사용자인 경우
     if st.session_state.current_survey is None:
         survey_dashboard()
-    elif st.session_state.current_survey == "basic":
-        show_basic_survey(supabase, st.session_state.elderly_id, 
-                         st.session_state.surveyor_id, st.session_state.nursing_home_id)
-    elif st.session_state.current_survey == "nutrition":
-        show_nutrition_survey(supabase, st.session_state.elderly_id,
-                            st.session_state.surveyor_id, st.session_state.nursing_home_id)
-    elif st.session_state.current_survey == "satisfaction":
-        show_satisfaction_survey(supabase, st.session_state.elderly_id,
-                               st.session_state.surveyor_id, st.session_state.nursing_home_id)
+    else:
+        show_survey(st.session_state.current_survey, supabase, st.session_state.elderly_id,
+                    st.session_state.surveyor_id, st.session_state.nursing_home_id, draft_store)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1 @@
+# 성능 측정(벤치마크) 모듈
@@ -0,0 +1,113 @@
+"""설문 응답 내보내기 벤치마크 (테이블 전체 조회 후 병합 vs 페이지 단위 스트리밍)
+
+어르신 N명이 세 설문을 모두 작성한 인메모리 대체 클라이언트에서
+- 기존 방식: 세 테이블을 통째로 읽어 pandas로 병합 후 한 번에 저장
+- 스트리밍: surveys.bulk_export 로 어르신 1,000명 단위 조회 → 파일에 바로 기록
+의 실행 시간, 왕복 횟수와 최대 메모리(tracemalloc)를 비교합니다.
+
+실행 예:
+    python -m benchmarks.bulk_export_benchmark --residents 20000 --latency-ms 20
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.fake_supabase import FakeSupabase
+from surveys.basic_survey import DISEASE_OPTIONS, MEDICATION_OPTIONS
+from surveys.bulk_export import EXPORT_FORMATS, build_frame, export_responses, load_column_types, SURVEY_TABLES
+from surveys.nutrition_survey import MEAL_GRID
+from surveys.satisfaction_survey import COOKING_METHOD_OPTIONS, FOOD_GROUP_OPTIONS
+
+def seed_responses(client, rng):
+    """모든 어르신의 세 설문 응답 생성 (JSON 문항은 앱처럼 JSON 문자열로 저장)"""
+    for resident in client.tables['elderly_residents']:
+        base = {'elderly_id': resident['id'], 'nursing_home_id': resident['nursing_home_id'],
+                'surveyor_id': f"{resident['nursing_home_id'].replace('NH', 'SV')}01",
+                'created_at': '2026-10-01T10:00:00', 'updated_at': '2026-10-02T15:30:00.123456',
+                'submitted_at': '2026-10-02T15:30:00.123456'}
+        client.insert_row('basic_survey', dict(
+            base, gender=rng.choice(['남', '여']), age=rng.randint(65, 99), height=round(rng.uniform(140, 180), 1),
+            weight=round(rng.uniform(35, 80), 1), care_grade=f"{rng.randint(1, 5)}등급",
+            diseases=json.dumps(rng.sample(DISEASE_OPTIONS[1:-1], 3), ensure_ascii=False),
+            medications=json.dumps(rng.sample(MEDICATION_OPTIONS[1:-1], 2), ensure_ascii=False),
+            chewing_difficulty=rng.random() < 0.3, k_mbi_score=rng.randint(0, 100), mmse_score=rng.randint(0, 30)
+        ))
+        portions = {key: rng.choice([0, 50, 100, 150, 200]) for key in MEAL_GRID.keys()}
+        waste = {f"{key}_waste": value * rng.choice([0, 0.25, 0.5]) for key, value in portions.items()}
+        client.insert_row('nutrition_survey', dict(
+            base, meal_portions=json.dumps(portions), plate_waste=json.dumps(waste),
+            appetite_change=rng.randint(0, 2), mobility=rng.randint(0, 2), walking_days=rng.randint(0, 7)
+        ))
+        client.insert_row('satisfaction_survey', dict(
+            base, overall_satisfaction=rng.randint(1, 5), food_quality=rng.randint(1, 5),
+            preferred_food_groups=json.dumps(rng.sample(FOOD_GROUP_OPTIONS, 2), ensure_ascii=False),
+            preferred_cooking_methods=json.dumps(rng.sample(COOKING_METHOD_OPTIONS, 2), ensure_ascii=False),
+            improvement_suggestions="국이 조금 더 따뜻했으면 좋겠습니다."
+        ))
+
+def full_table_export(supabase, path, file_format):
+    """세 테이블과 명단을 통째로 읽어 한 번에 변환/저장"""
+    column_types = {table_name: load_column_types(supabase, table_name) for _, table_name in SURVEY_TABLES}
+    residents = supabase.table('elderly_residents').select('id,name,nursing_home_id').execute().data
+    answers = {
+        survey: {row['elderly_id']: row for row in supabase.table(table_name).select('*').execute().data}
+        for survey, table_name in SURVEY_TABLES
+    }
+    frame = build_frame(residents, answers, column_types)
+    if file_format == 'csv':
+        frame.to_csv(path, index=False, encoding='utf-8-sig')
+    else:
+        frame.to_parquet(path, index=False)
+    return len(frame)
+
+def measure(client, function):
+    """(행 수, 실행 시간, 왕복 횟수, 최대 메모리) - 시간은 tracemalloc 없이 따로 측정"""
+    client.round_trips = 0
+    start = time.perf_counter()
+    rows = function()
+    elapsed = time.perf_counter() - start
+    round_trips = client.round_trips
+    
+    latency, client.latency = client.latency, 0.0
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        client.latency = latency
+    return rows, elapsed, round_trips, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="설문 응답 내보내기 벤치마크")
+    parser.add_argument('--residents', type=int, default=20000)
+    parser.add_argument('--homes', type=int, default=40)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    
+    client = FakeSupabase().seed(homes=args.homes, surveyors_per_home=1,
+                                 residents_per_home=max(1, args.residents // args.homes))
+    seed_responses(client, random.Random(args.seed))
+    client.latency = args.latency_ms / 1000
+    print(f"어르신 {len(client.tables['elderly_residents']):,}명 × 설문 3종")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for file_format in EXPORT_FORMATS:
+            path = os.path.join(tmp, f"export.{file_format}")
+            for label, function in (
+                ("전체 조회", lambda: full_table_export(client, path, file_format)),
+                ("스트리밍", lambda: export_responses(client, path, file_format)),
+            ):
+                rows, elapsed, round_trips, peak = measure(client, function)
+                print(f"{file_format:7s} {label}: {elapsed:6.2f}초 | 왕복 {round_trips:3d}회 | "
+                      f"최대 메모리 {peak / 1024 / 1024:7.1f}MB | {rows:,}행 {os.path.getsize(path) / 1024 / 1024:.1f}MB")
+
+if __name__ == "__main__":
+    main()
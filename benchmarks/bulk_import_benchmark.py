@@ -0,0 +1,73 @@
+"""명단 일괄 등록 벤치마크
+
+어르신 N명(기본 10만 명)의 CSV 파일을 만들어 인메모리 대체 클라이언트에 등록하며 다음을 측정합니다.
+- 검증만 실행(dry run)할 때의 최대 메모리: 행 단위 스트리밍 vs pandas로 파일 전체 읽기
+- 실제 등록 시간과 서버 왕복 횟수 (청크 크기별)
+
+실행 예:
+    python -m benchmarks.bulk_import_benchmark --residents 100000 --latency-ms 20
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.fake_supabase import FakeSupabase
+from surveys.bulk_import import import_rows, iter_file_rows
+
+def write_residents_csv(path, residents, homes):
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['어르신 ID', '이름', '요양원 ID'])
+        for i in range(residents):
+            writer.writerow([f"EL{i:07d}", f"어르신{i}", f"NH{i % homes + 1:03d}"])
+
+def peak_memory(function):
+    tracemalloc.start()
+    try:
+        result = function()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="명단 일괄 등록 벤치마크")
+    parser.add_argument('--residents', type=int, default=100000)
+    parser.add_argument('--homes', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--chunk-sizes', default="500,1000,5000")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'residents.csv')
+        write_residents_csv(path, args.residents, args.homes)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"어르신 {args.residents:,}명 CSV ({size_mb:.1f}MB), 요양원 {args.homes}곳")
+        
+        client = FakeSupabase().seed(homes=args.homes, surveyors_per_home=2, residents_per_home=0)
+        
+        def stream_validate():
+            with open(path, 'rb') as f:
+                return import_rows(client, 'elderly_residents', iter_file_rows(f, path), dry_run=True)
+        report, streamed = peak_memory(stream_validate)
+        _, loaded = peak_memory(lambda: pd.read_csv(path, encoding='utf-8-sig', dtype=str))
+        print(f"검증만 실행 최대 메모리: 스트리밍 {streamed / 1024 / 1024:6.1f}MB | "
+              f"pandas 전체 읽기 {loaded / 1024 / 1024:6.1f}MB (유효 {report['valid']:,}행)")
+        
+        for chunk_size in [int(size) for size in args.chunk_sizes.split(',')]:
+            client = FakeSupabase(latency=args.latency_ms / 1000).seed(
+                homes=args.homes, surveyors_per_home=2, residents_per_home=0
+            )
+            start = time.perf_counter()
+            with open(path, 'rb') as f:
+                report = import_rows(client, 'elderly_residents', iter_file_rows(f, path), chunk_size=chunk_size)
+            elapsed = time.perf_counter() - start
+            print(f"청크 {chunk_size:5d}행: {elapsed:6.2f}초 | 왕복 {client.round_trips:4d}회 | "
+                  f"등록 {report['written']:,}행 | 진행 상황 {report['progress_created']:,}행")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""동시 제출 벤치마크 (요청마다 새 연결 / 기본 httpx 클라이언트 / 연결 풀 전송 계층)
+
+로컬 HTTP 서버(keep-alive 지원)에 조사원 수만큼의 스레드가 동시에 submit_survey 서버 함수 호출(POST /rest/v1/rpc/submit_survey)을
+보내며 다음 세 방식을 비교합니다.
+- 새 연결: 요청마다 httpx 클라이언트를 만들어 연결을 새로 엶
+- 기본: 설정 없이 만든 httpx 클라이언트 하나를 공유 (변경 전 supabase 클라이언트와 같은 방식, 재시도 없음)
+- 연결 풀: surveys.connection_pool.PooledTransport (풀 크기 제한, keep-alive, 재시도)
+서버는 새 연결마다 --connect-ms(TLS 연결 수립 비용), 요청마다 --latency-ms만큼 지연하고
+--error-rate 비율의 요청에 503을 돌려주어 일시적인 서버 오류를 흉내 냅니다.
+
+실행 예:
+    python -m benchmarks.connection_pool_benchmark --surveyors 30 --requests 10
+    python -m benchmarks.connection_pool_benchmark --surveyors 60 --pool-size 20 --error-rate 0.05
+"""
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from surveys.connection_pool import PooledTransport, create_http_client
+
+class SurveyServer(ThreadingHTTPServer):
+    daemon_threads = True
+    
+    def __init__(self, connect_delay, latency, error_rate, seed=0):
+        super().__init__(('127.0.0.1', 0), SurveyHandler)
+        self.connect_delay = connect_delay
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.connections = 0
+    
+    def reset(self):
+        with self.lock:
+            self.connections = 0
+            self.rng.seed(0)
+    
+    def fail_next(self):
+        with self.lock:
+            return self.rng.random() < self.error_rate
+
+class SurveyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        time.sleep(self.server.connect_delay)
+    
+    def log_message(self, *args):
+        pass
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.server.latency)
+        if self.server.fail_next():
+            status, body = 503, b'{"message": "Service Unavailable"}'
+        else:
+            status, body = 200, b'{"all_surveys_completed": false}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def run(mode, server, surveyors, requests, pool_size, retries):
+    """방식 하나로 동시 제출 실행 → (전체 시간, 요청별 시간 목록, 실패 수, 열린 연결 수, 풀 사용 현황)"""
+    server.reset()
+    url = f"http://127.0.0.1:{server.server_port}/rest/v1/rpc/submit_survey"
+    payload = json.dumps({'p_survey': 'basic', 'p_payload': {'elderly_id': 'EL0010001'}})
+    transport = None
+    if mode == 'pooled':
+        transport = PooledTransport(max_connections=pool_size, max_keepalive=pool_size,
+                                    retries=retries, backoff=0.05)
+        shared = create_http_client(transport, timeout=30)
+    elif mode == 'default':
+        shared = httpx.Client(timeout=30)
+    else:
+        shared = None
+    
+    timings, failures = [], []
+    lock = threading.Lock()
+    
+    def surveyor():
+        for _ in range(requests):
+            start = time.perf_counter()
+            try:
+                if shared is None:
+                    with httpx.Client(timeout=30) as client:
+                        response = client.post(url, content=payload)
+                else:
+                    response = shared.post(url, content=payload)
+                ok = response.is_success
+            except httpx.HTTPError:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                timings.append(elapsed)
+                if not ok:
+                    failures.append(elapsed)
+    
+    threads = [threading.Thread(target=surveyor) for _ in range(surveyors)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    total = time.perf_counter() - start
+    stats = transport.stats() if transport else None
+    if shared is not None:
+        shared.close()
+    return total, timings, len(failures), server.connections, stats
+
+def summarize(name, total, timings, failures, connections, stats):
+    timings_ms = sorted(t * 1000 for t in timings)
+    p95 = timings_ms[max(0, int(len(timings_ms) * 0.95) - 1)]
+    line = (f"{name:<8} 전체 {total:6.2f}초 | 평균 {statistics.mean(timings_ms):7.1f}ms | p95 {p95:7.1f}ms | "
+            f"실패 {failures:3d}건 | 연결 {connections:4d}개")
+    if stats:
+        line += (f" | 최대 사용 {stats['peak']}/{stats['size']} · 대기 {stats['waited']}건 "
+                 f"(평균 {stats['avg_wait_ms']:.0f}ms) · 재시도 {stats['retries']}회")
+    print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="동시 제출 연결 풀 벤치마크")
+    parser.add_argument('--surveyors', type=int, default=30, help="동시에 제출하는 조사원 수")
+    parser.add_argument('--requests', type=int, default=10, help="조사원 1명당 제출 횟수")
+    parser.add_argument('--pool-size', type=int, default=20, help="연결 풀 크기")
+    parser.add_argument('--retries', type=int, default=2, help="연결 풀 재시도 횟수")
+    parser.add_argument('--connect-ms', type=float, default=50.0, help="새 연결 1개당 수립 지연 (ms)")
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="요청 1회당 서버 처리 지연 (ms)")
+    parser.add_argument('--error-rate', type=float, default=0.02, help="503 응답 비율")
+    args = parser.parse_args()
+    
+    server = SurveyServer(args.connect_ms / 1000, args.latency_ms / 1000, args.error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        print(f"조사원 {args.surveyors}명 × {args.requests}회 제출, 연결 수립 {args.connect_ms:.0f}ms, "
+              f"처리 {args.latency_ms:.0f}ms, 503 비율 {args.error_rate:.0%}")
+        for mode, name in (('fresh', "새 연결"), ('default', "기본"), ('pooled', "연결 풀")):
+            summarize(name, *run(mode, server, args.surveyors, args.requests, args.pool_size, args.retries))
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
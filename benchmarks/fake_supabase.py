@@ -0,0 +1,420 @@
+"""벤치마크용 인메모리 Supabase 대체 클라이언트
+
+실제 Supabase(PostgREST) 대신 메모리 상의 테이블을 사용하며,
+execute() 한 번마다 지정한 왕복 지연(latency)을 더해 네트워크 왕복 횟수에 따른
+지연을 재현합니다. 서버 함수(rpc)는 서버 안에서 실행되므로 왕복 1회로 계산합니다.
+"""
+import copy
+import json
+import re
+import time
+
+from surveys.sqlite_storage import MEAL_SLOTS
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+class FakeQuery:
+    """supabase.table(...) 이 반환하는 쿼리 빌더의 최소 구현"""
+    
+    def __init__(self, client, table_name):
+        self.client = client
+        self.table_name = table_name
+        self.operation = 'select'
+        self.columns = '*'
+        self.filters = []
+        self.payload = None
+        self.row_limit = None
+        self.order_column = None
+        self.count = None
+        self.on_conflict = 'id'
+        self.ignore_duplicates = False
+        self.returning = 'representation'
+    
+    def select(self, columns='*', count=None):
+        self.operation = 'select'
+        self.columns = columns
+        self.count = count
+        return self
+    
+    def insert(self, payload):
+        self.operation = 'insert'
+        self.payload = payload
+        return self
+    
+    def update(self, payload):
+        self.operation = 'update'
+        self.payload = payload
+        return self
+    
+    def upsert(self, payload, on_conflict='id', ignore_duplicates=False, returning='representation', count=None):
+        self.operation = 'upsert'
+        self.payload = payload
+        self.on_conflict = on_conflict
+        self.ignore_duplicates = ignore_duplicates
+        self.returning = returning
+        self.count = count
+        return self
+    
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+    
+    def gt(self, column, value):
+        self.filters.append((column, ('gt', value)))
+        return self
+    
+    def in_(self, column, values):
+        self.filters.append((column, ('in', set(values))))
+        return self
+    
+    def order(self, column, desc=False):
+        self.order_column = (column, desc)
+        return self
+    
+    def limit(self, count):
+        self.row_limit = count
+        return self
+    
+    def _matches(self, row):
+        for column, value in self.filters:
+            if isinstance(value, tuple) and value[0] == 'gt':
+                if row.get(column) is None or not row.get(column) > value[1]:
+                    return False
+            elif isinstance(value, tuple) and value[0] == 'in':
+                if row.get(column) not in value[1]:
+                    return False
+            elif row.get(column) != value:
+                return False
+        return True
+    
+    def execute(self):
+        self.client.round_trip()
+        if self.table_name in VIEW_FUNCTIONS:
+            rows = VIEW_FUNCTIONS[self.table_name](self.client)
+        else:
+            rows = self.client.tables.setdefault(self.table_name, [])
+        
+        if self.operation == 'select':
+            matched = [row for row in rows if self._matches(row)]
+            if self.order_column:
+                column, desc = self.order_column
+                matched.sort(key=lambda row: row.get(column), reverse=desc)
+            count = len(matched) if self.count else None
+            if self.row_limit is not None:
+                matched = matched[:self.row_limit]
+            return FakeResponse([self.client.project(row, self.columns) for row in matched], count)
+        
+        payloads = self.payload if isinstance(self.payload, list) else [self.payload]
+        
+        if self.operation == 'insert':
+            return FakeResponse([self.client.insert_row(self.table_name, p) for p in payloads])
+        
+        if self.operation == 'update':
+            self.client.indexes.pop(self.table_name, None)
+            updated = []
+            for row in rows:
+                if self._matches(row):
+                    row.update(copy.deepcopy(self.payload))
+                    updated.append(copy.deepcopy(row))
+            return FakeResponse(updated)
+        
+        # upsert
+        result = []
+        for p in payloads:
+            existing = self.client.find_row(self.table_name, self.on_conflict, p.get(self.on_conflict))
+            if existing is None:
+                result.append(self.client.insert_row(self.table_name, p))
+            elif not self.ignore_duplicates:
+                existing.update(copy.deepcopy(p))
+                result.append(copy.deepcopy(existing))
+        count = len(result) if self.count else None
+        return FakeResponse([] if self.returning == 'minimal' else result, count)
+
+class FakeRPC:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params
+    
+    def execute(self):
+        self.client.round_trip()
+        function = self.client.functions[self.name]
+        return FakeResponse(function(self.client, **self.params))
+
+class FakeSupabase:
+    """supabase.Client 대신 사용하는 인메모리 클라이언트"""
+    
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.round_trips = 0
+        self.tables = {}
+        self.next_ids = {}
+        # 테이블별 {컬럼: {값: 행}} 조회 색인 (find_row 가 처음 찾을 때 생성)
+        self.indexes = {}
+        self.functions = dict(RPC_FUNCTIONS)
+    
+    def round_trip(self):
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+    
+    def table(self, table_name):
+        return FakeQuery(self, table_name)
+    
+    def rpc(self, name, params=None):
+        return FakeRPC(self, name, params or {})
+    
+    @staticmethod
+    def project(row, columns):
+        if columns == '*':
+            return copy.deepcopy(row)
+        names = [c.strip() for c in columns.split(',')]
+        return {name: copy.deepcopy(row.get(name)) for name in names}
+    
+    def find_row(self, table_name, column, value):
+        table_indexes = self.indexes.setdefault(table_name, {})
+        if column not in table_indexes:
+            index = {}
+            for row in self.tables.setdefault(table_name, []):
+                index.setdefault(row.get(column), row)
+            table_indexes[column] = index
+        return table_indexes[column].get(value)
+    
+    def insert_row(self, table_name, payload):
+        row = copy.deepcopy(payload)
+        if 'id' not in row and table_name in SERIAL_TABLES:
+            self.next_ids[table_name] = self.next_ids.get(table_name, 0) + 1
+            row['id'] = self.next_ids[table_name]
+        self.tables.setdefault(table_name, []).append(row)
+        for column, index in self.indexes.get(table_name, {}).items():
+            index.setdefault(row.get(column), row)
+        return copy.deepcopy(row)
+    
+    def seed(self, homes=10, surveyors_per_home=5, residents_per_home=100):
+        """요양원/조사원/어르신 샘플 데이터 생성"""
+        for h in range(1, homes + 1):
+            home_id = f"NH{h:03d}"
+            self.insert_row('nursing_homes', {'id': home_id, 'name': f"요양원{h}"})
+            for s in range(1, surveyors_per_home + 1):
+                self.insert_row('surveyors', {
+                    'id': f"SV{h:03d}{s:02d}", 'name': f"조사원{s}", 'nursing_home_id': home_id
+                })
+            for e in range(1, residents_per_home + 1):
+                self.insert_row('elderly_residents', {
+                    'id': f"EL{h:03d}{e:04d}", 'name': f"어르신{e}", 'nursing_home_id': home_id
+                })
+        return self
+
+# id가 SERIAL인 테이블
+SERIAL_TABLES = {'survey_progress', 'basic_survey', 'nutrition_survey', 'satisfaction_survey'}
+
+def _new_progress(elderly_id, surveyor_id, nursing_home_id):
+    return {
+        'elderly_id': elderly_id,
+        'surveyor_id': surveyor_id,
+        'nursing_home_id': nursing_home_id,
+        'basic_survey_completed': False,
+        'nutrition_survey_completed': False,
+        'satisfaction_survey_completed': False,
+        'all_surveys_completed': False
+    }
+
+def rpc_survey_login(client, p_nursing_home_id, p_surveyor_id, p_elderly_id, p_include_roster=False):
+    """database_schema.sql 의 survey_login 함수와 같은 동작"""
+    if client.find_row('nursing_homes', 'id', p_nursing_home_id) is None:
+        return {'ok': False, 'error': 'nursing_home'}
+    
+    surveyor = client.find_row('surveyors', 'id', p_surveyor_id)
+    if surveyor is None or surveyor.get('nursing_home_id') != p_nursing_home_id:
+        return {'ok': False, 'error': 'surveyor'}
+    
+    elderly = client.find_row('elderly_residents', 'id', p_elderly_id)
+    if elderly is None or elderly.get('nursing_home_id') != p_nursing_home_id:
+        return {'ok': False, 'error': 'elderly'}
+    
+    progress = client.find_row('survey_progress', 'elderly_id', p_elderly_id)
+    if progress is None:
+        progress = client.insert_row('survey_progress', _new_progress(p_elderly_id, p_surveyor_id, p_nursing_home_id))
+    
+    result = {'ok': True, 'progress': copy.deepcopy(progress)}
+    if p_include_roster:
+        result['roster'] = rpc_get_facility_roster(client, p_nursing_home_id)
+    return result
+
+def rpc_get_facility_roster(client, p_nursing_home_id):
+    """database_schema.sql 의 get_facility_roster 함수와 같은 동작"""
+    def members(table_name):
+        rows = [r for r in client.tables.get(table_name, []) if r.get('nursing_home_id') == p_nursing_home_id]
+        return copy.deepcopy(sorted(rows, key=lambda r: r['id']))
+    
+    return {
+        'nursing_home': copy.deepcopy(client.find_row('nursing_homes', 'id', p_nursing_home_id)),
+        'surveyors': members('surveyors'),
+        'residents': members('elderly_residents')
+    }
+
+def rpc_save_survey_draft(client, p_survey, p_payload):
+    """database_schema.sql 의 save_survey_draft 함수와 같은 동작 (응답 upsert만)"""
+    if p_survey not in ('basic', 'nutrition', 'satisfaction'):
+        raise ValueError(f"unknown survey: {p_survey}")
+    table_name = f"{p_survey}_survey"
+    payload = {k: v for k, v in p_payload.items() if k not in ('id', 'created_at', 'submitted_at')}
+    
+    existing = client.find_row(table_name, 'elderly_id', payload['elderly_id'])
+    if existing is None:
+        client.insert_row(table_name, payload)
+    else:
+        existing.update(copy.deepcopy(payload))
+
+def rpc_submit_survey(client, p_survey, p_payload):
+    """database_schema.sql 의 submit_survey 함수와 같은 동작 (응답 upsert + 진행 상황 갱신)"""
+    rpc_save_survey_draft(client, p_survey, p_payload)
+    payload = p_payload
+    elderly_id = payload['elderly_id']
+    client.find_row(f"{p_survey}_survey", 'elderly_id', elderly_id)['submitted_at'] = (
+        payload.get('updated_at') or time.strftime('%Y-%m-%d %H:%M:%S'))
+    
+    progress = client.find_row('survey_progress', 'elderly_id', elderly_id)
+    if progress is None:
+        client.insert_row('survey_progress', _new_progress(elderly_id, payload.get('surveyor_id'), payload.get('nursing_home_id')))
+        progress = client.find_row('survey_progress', 'elderly_id', elderly_id)
+    progress[f"{p_survey}_survey_completed"] = True
+    progress['last_updated'] = payload.get('updated_at')
+    progress['all_surveys_completed'] = bool(
+        progress['basic_survey_completed']
+        and progress['nutrition_survey_completed']
+        and progress['satisfaction_survey_completed']
+    )
+    return copy.deepcopy(progress)
+
+def rpc_submit_surveys_batch(client, p_items):
+    """database_schema.sql 의 submit_surveys_batch 함수와 같은 동작 (항목별 결과 반환)"""
+    results = []
+    for item in p_items:
+        try:
+            # 대기열에 넣은 뒤 다른 기기에서 저장한 행은 덮어쓰지 않음 (시각 문자열의 'T'/공백 구분 통일)
+            row = client.find_row(f"{item['survey']}_survey", 'elderly_id', item['payload']['elderly_id'])
+            if item.get('queued_at') and row and row.get('updated_at') and \
+                    str(row['updated_at']).replace('T', ' ') > str(item['queued_at']).replace('T', ' '):
+                results.append({'id': item['id'], 'ok': True, 'skipped': 'stale'})
+                continue
+            rpc_submit_survey(client, item['survey'], item['payload'])
+            results.append({'id': item['id'], 'ok': True})
+        except Exception as e:
+            results.append({'id': item['id'], 'ok': False, 'error': str(e)})
+    return results
+
+def rpc_init_survey_progress(client, p_elderly_ids):
+    """database_schema.sql 의 init_survey_progress 함수와 같은 동작 (새로 만든 행 수 반환)"""
+    first_surveyor = {}
+    for row in sorted(client.tables.get('surveyors', []), key=lambda r: r['id']):
+        first_surveyor.setdefault(row.get('nursing_home_id'), row['id'])
+    
+    created = 0
+    for elderly_id in p_elderly_ids:
+        resident = client.find_row('elderly_residents', 'id', elderly_id)
+        if resident is None or client.find_row('survey_progress', 'elderly_id', elderly_id) is not None:
+            continue
+        surveyor_id = first_surveyor.get(resident.get('nursing_home_id'))
+        if surveyor_id is None:
+            continue
+        client.insert_row('survey_progress', _new_progress(elderly_id, surveyor_id, resident.get('nursing_home_id')))
+        created += 1
+    return created
+
+def rpc_survey_table_columns(client, p_table):
+    """컬럼 정보가 없으므로 None 반환 (앱은 기본 컬럼 목록을 사용)"""
+    return None
+
+def view_survey_progress_stats(client):
+    """database_schema.sql 의 survey_progress_stats 뷰와 같은 결과"""
+    names = {row['id']: row.get('name') for row in client.tables.get('nursing_homes', [])}
+    groups = {}
+    for row in client.tables.get('survey_progress', []):
+        groups.setdefault(row.get('nursing_home_id'), []).append(row)
+    
+    def summarize(nursing_home_id, rows, is_total):
+        return {
+            'nursing_home_id': nursing_home_id,
+            'nursing_home_name': names.get(nursing_home_id),
+            'is_total': is_total,
+            'total': len(rows),
+            'basic_completed': sum(bool(r.get('basic_survey_completed')) for r in rows),
+            'nutrition_completed': sum(bool(r.get('nutrition_survey_completed')) for r in rows),
+            'satisfaction_completed': sum(bool(r.get('satisfaction_survey_completed')) for r in rows),
+            'all_completed': sum(bool(r.get('all_surveys_completed')) for r in rows)
+        }
+    
+    result = [summarize(key, rows, False) for key, rows in groups.items()]
+    result.append(summarize(None, client.tables.get('survey_progress', []), True))
+    return result
+
+MEAL_ITEM_KEY = re.compile(r'^day([0-9]+)_([a-z]+[0-9]*)(?:_([a-z]+[0-9]*))?$')
+
+def _json_object(value):
+    if isinstance(value, str):
+        value = json.loads(value) if value.lstrip().startswith('{') else {}
+    return value if isinstance(value, dict) else {}
+
+def view_nutrition_meal_item_stats(client):
+    """database_schema.sql 의 nutrition_meal_items 테이블 + nutrition_meal_item_stats 뷰와 같은 결과"""
+    groups = {}
+    for row in client.tables.get('nutrition_survey', []):
+        if not row.get('submitted_at'):
+            continue
+        portions = _json_object(row.get('meal_portions'))
+        waste = _json_object(row.get('plate_waste'))
+        stored_levels = row.get('plate_waste_levels')
+        if isinstance(stored_levels, str):
+            stored_levels = json.loads(stored_levels)
+        for key, portion in portions.items():
+            match = MEAL_ITEM_KEY.match(key)
+            if not match:
+                continue
+            portion = portion if isinstance(portion, (int, float)) else 0
+            waste_g = waste.get(f"{key}_waste")
+            waste_g = waste_g if isinstance(waste_g, (int, float)) else 0
+            # 저장된 목측 단계 (없으면 잔반량 비율로 환산)
+            level = None
+            item = key.split('_', 1)[1]
+            if stored_levels and item in MEAL_SLOTS:
+                position = (int(match[1]) - 1) * len(MEAL_SLOTS) + MEAL_SLOTS.index(item)
+                level = stored_levels[position] if position < len(stored_levels) else None
+            if level is None and portion > 0:
+                level = min(4, max(0, round(waste_g * 4 / portion)))
+            group = (row.get('nursing_home_id'), int(match[1]), match[2], match[3] or '')
+            groups.setdefault(group, []).append((portion, waste_g, level))
+    
+    result = []
+    for (nursing_home_id, day, meal, slot), items in groups.items():
+        portion_sum = sum(p for p, _, _ in items)
+        waste_sum = sum(w for _, w, _ in items)
+        levels = [level for p, _, level in items if p > 0]
+        result.append({
+            'nursing_home_id': nursing_home_id, 'day': day, 'meal': meal, 'slot': slot,
+            'served': len(levels),
+            'portion_g_sum': portion_sum,
+            'waste_g_sum': waste_sum,
+            'avg_waste_level': round(sum(levels) / len(levels), 2) if levels else None,
+            'intake_rate': round(100 * (portion_sum - waste_sum) / portion_sum, 1) if portion_sum else None,
+        })
+    return result
+
+VIEW_FUNCTIONS = {
+    'survey_progress_stats': view_survey_progress_stats,
+    'nutrition_meal_item_stats': view_nutrition_meal_item_stats,
+}
+
+RPC_FUNCTIONS = {
+    'survey_login': rpc_survey_login,
+    'get_facility_roster': rpc_get_facility_roster,
+    'save_survey_draft': rpc_save_survey_draft,
+    'submit_survey': rpc_submit_survey,
+    'submit_surveys_batch': rpc_submit_surveys_batch,
+    'survey_table_columns': rpc_survey_table_columns,
+    'survey_table_column_types': rpc_survey_table_columns,
+    'init_survey_progress': rpc_init_survey_progress,
+}
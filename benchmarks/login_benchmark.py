@@ -0,0 +1,142 @@
+"""로그인 지연 시간 벤치마크 (기존 4회 왕복 vs survey_login 1회 호출 vs 명단 캐시)
+
+인메모리 Supabase 대체 클라이언트에 왕복 지연을 주고,
+기존 로그인 경로(요양원/조사원/어르신 조회 + 진행 상황 조회/생성),
+survey_login 서버 함수 경로, 명단 캐시 경로의 로그인 1건당 지연 시간과 왕복 횟수를 비교합니다.
+모든 경로는 대시보드 첫 화면에 필요한 진행 상황을 얻을 때까지를 잽니다.
+
+명단 캐시 경로는 두 가지를 따로 보여 줍니다.
+- 캐시(이전): 캐시 적중 시 진행 상황은 대시보드에서 따로 조회하고, 미적중 시 get_facility_roster를 한 번 더 호출
+- 캐시: app.verify_login 과 같은 순서 (survey_login 응답에 명단을 받고, 진행 상황도 캐시)
+
+실행 예:
+    python -m benchmarks.login_benchmark --latency-ms 30 --logins 50
+"""
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.fake_supabase import FakeSupabase
+from surveys.cache import (
+    LRUTTLCache, cached_progress, facility_key, load_facility_roster,
+    remember_progress, roster_contains, store_facility_roster
+)
+
+def legacy_login(supabase, nursing_home_id, surveyor_id, elderly_id):
+    """변경 전 app.verify_login + get_or_create_survey_progress 의 호출 순서"""
+    if not supabase.table('nursing_homes').select('*').eq('id', nursing_home_id).execute().data:
+        return None
+    if not supabase.table('surveyors').select('*').eq('id', surveyor_id).eq('nursing_home_id', nursing_home_id).execute().data:
+        return None
+    if not supabase.table('elderly_residents').select('*').eq('id', elderly_id).eq('nursing_home_id', nursing_home_id).execute().data:
+        return None
+    
+    response = supabase.table('survey_progress').select('*').eq('elderly_id', elderly_id).execute()
+    if response.data:
+        return response.data[0]
+    new_progress = {
+        'elderly_id': elderly_id,
+        'surveyor_id': surveyor_id,
+        'nursing_home_id': nursing_home_id,
+        'basic_survey_completed': False,
+        'nutrition_survey_completed': False,
+        'satisfaction_survey_completed': False,
+        'all_surveys_completed': False
+    }
+    return supabase.table('survey_progress').insert(new_progress).execute().data[0]
+
+def rpc_login(supabase, nursing_home_id, surveyor_id, elderly_id):
+    """변경 후 app.verify_login 의 호출 (survey_login 서버 함수 1회)"""
+    result = supabase.rpc('survey_login', {
+        'p_nursing_home_id': nursing_home_id,
+        'p_surveyor_id': surveyor_id,
+        'p_elderly_id': elderly_id
+    }).execute().data
+    return result.get('progress') if result.get('ok') else None
+
+def previous_cached_login(cache):
+    """명단 캐시를 처음 넣었을 때의 app.verify_login + 대시보드 진행 상황 조회"""
+    def login(supabase, nursing_home_id, surveyor_id, elderly_id):
+        roster = cache.get(facility_key(nursing_home_id))
+        if roster is not None and roster_contains(roster, surveyor_id, elderly_id):
+            response = supabase.table('survey_progress').select('*').eq('elderly_id', elderly_id).execute()
+            if response.data:
+                return response.data[0]
+            new_progress = {'elderly_id': elderly_id, 'surveyor_id': surveyor_id, 'nursing_home_id': nursing_home_id}
+            return supabase.table('survey_progress').insert(new_progress).execute().data[0]
+        progress = rpc_login(supabase, nursing_home_id, surveyor_id, elderly_id)
+        if progress is not None:
+            load_facility_roster(cache, supabase, nursing_home_id)
+        return progress
+    return login
+
+def cached_login(cache):
+    """변경 후 app.verify_login 의 호출 (캐시에 없을 때만 survey_login 1회, 명단은 같은 응답으로)"""
+    def login(supabase, nursing_home_id, surveyor_id, elderly_id):
+        roster = cache.get(facility_key(nursing_home_id))
+        known = roster is not None and roster_contains(roster, surveyor_id, elderly_id)
+        if known and cached_progress(roster, elderly_id) is not None:
+            return cached_progress(roster, elderly_id)
+        result = supabase.rpc('survey_login', {
+            'p_nursing_home_id': nursing_home_id,
+            'p_surveyor_id': surveyor_id,
+            'p_elderly_id': elderly_id,
+            'p_include_roster': not known
+        }).execute().data
+        if not result.get('ok'):
+            return None
+        if result.get('roster'):
+            store_facility_roster(cache, nursing_home_id, result['roster'])
+        remember_progress(cache, nursing_home_id, result.get('progress'))
+        return result.get('progress')
+    return login
+
+def sample_logins(count, homes, surveyors_per_home, residents_per_home, seed=0):
+    rng = random.Random(seed)
+    logins = []
+    for _ in range(count):
+        h = rng.randint(1, homes)
+        logins.append((
+            f"NH{h:03d}",
+            f"SV{h:03d}{rng.randint(1, surveyors_per_home):02d}",
+            f"EL{h:03d}{rng.randint(1, residents_per_home):04d}"
+        ))
+    return logins
+
+def run(login_function, logins, latency, homes, surveyors_per_home, residents_per_home):
+    client = FakeSupabase(latency=latency).seed(homes, surveyors_per_home, residents_per_home)
+    timings = []
+    for nursing_home_id, surveyor_id, elderly_id in logins:
+        start = time.perf_counter()
+        progress = login_function(client, nursing_home_id, surveyor_id, elderly_id)
+        timings.append(time.perf_counter() - start)
+        assert progress is not None
+    return timings, client.round_trips
+
+def summarize(name, timings, round_trips):
+    timings_ms = sorted(t * 1000 for t in timings)
+    p95 = timings_ms[max(0, int(len(timings_ms) * 0.95) - 1)]
+    print(f"{name:<10} 평균 {statistics.mean(timings_ms):7.1f}ms | "
+          f"p95 {p95:7.1f}ms | 로그인당 왕복 {round_trips / len(timings):.2f}회")
+
+def main():
+    parser = argparse.ArgumentParser(description="로그인 지연 시간 벤치마크")
+    parser.add_argument('--latency-ms', type=float, default=30.0, help="왕복 1회당 지연 (ms)")
+    parser.add_argument('--logins', type=int, default=50, help="로그인 횟수")
+    parser.add_argument('--homes', type=int, default=10)
+    parser.add_argument('--surveyors-per-home', type=int, default=5)
+    parser.add_argument('--residents-per-home', type=int, default=100)
+    args = parser.parse_args()
+    
+    logins = sample_logins(args.logins, args.homes, args.surveyors_per_home, args.residents_per_home)
+    setup = (args.latency_ms / 1000, args.homes, args.surveyors_per_home, args.residents_per_home)
+    
+    print(f"왕복 지연 {args.latency_ms:.0f}ms, 로그인 {args.logins}회")
+    summarize("기존", *run(legacy_login, logins, *setup))
+    summarize("RPC", *run(rpc_login, logins, *setup))
+    summarize("캐시(이전)", *run(previous_cached_login(LRUTTLCache()), logins, *setup))
+    summarize("캐시", *run(cached_login(LRUTTLCache()), logins, *setup))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""영양 조사표 페이지 전송량 / 렌더링 시간 벤치마크
+
+Streamlit 테스트 도구(AppTest)로 1·2페이지를 그린 뒤
+화면 요소(Delta) 전체를 직렬화한 바이트 수와 스크립트 1회 실행 시간을 측정합니다.
+바이트 수는 재실행 1회마다 브라우저로 전송되는 페이지 본문 크기에 해당합니다.
+
+실행 예:
+    python -m benchmarks.page_payload_benchmark --runs 10
+"""
+import argparse
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+SETUP = '''
+import json
+import streamlit as st
+from surveys.nutrition_survey import MEAL_GRID
+
+if 'nutrition_data' not in st.session_state:
+    st.session_state.nutrition_data = {
+        'meal_portions': json.dumps(MEAL_GRID.to_dict(MEAL_GRID.zeros() + 150))
+    }
+'''
+
+PAGES = {
+    "1페이지 (제공량)": SETUP + '''
+from surveys.nutrition_survey import show_page1_meal_portions
+st.session_state.nutrition_page = 1
+show_page1_meal_portions()
+''',
+    "2페이지 (잔반량)": SETUP + '''
+from surveys.nutrition_survey import show_page2_plate_waste_visual
+st.session_state.nutrition_page = 2
+show_page2_plate_waste_visual()
+''',
+}
+
+def payload_stats(node):
+    """화면 트리의 (요소 수, 직렬화 바이트 수, 마크다운 바이트 수)"""
+    elements, total, markdown = 0, 0, 0
+    children = getattr(node, 'children', None)
+    if children is not None:
+        for child in children.values():
+            e, t, m = payload_stats(child)
+            elements, total, markdown = elements + e, total + t, markdown + m
+        return elements, total, markdown
+    proto = getattr(node, 'proto', None)
+    if proto is None:
+        return 0, 0, 0
+    size = len(proto.SerializeToString())
+    return 1, size, size if getattr(node, 'type', '') == 'markdown' else 0
+
+def measure(script, runs):
+    at = AppTest.from_string(script, default_timeout=60)
+    at.run()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - start)
+    return payload_stats(at._tree), timings
+
+def main():
+    parser = argparse.ArgumentParser(description="영양 조사표 페이지 전송량 벤치마크")
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+    
+    for name, script in PAGES.items():
+        (elements, total, markdown), timings = measure(script, args.runs)
+        timings_ms = [t * 1000 for t in timings]
+        print(f"{name:<14} 요소 {elements:5d}개 | 전체 {total / 1024:7.1f}KB | "
+              f"마크다운 {markdown / 1024:7.1f}KB | 실행 평균 {statistics.mean(timings_ms):7.1f}ms")
+
+if __name__ == "__main__":
+    main()
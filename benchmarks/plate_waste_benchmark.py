@@ -0,0 +1,101 @@
+"""잔반 선택기 탭 → 화면 갱신 지연 시간 벤치마크
+
+Streamlit 테스트 도구(AppTest)로 영양 조사표 2페이지를 그려 다음을 측정합니다.
+- 변경 전: 기준 커밋(--baseline-rev)의 영양 조사표 2페이지에서 탭 1회
+  (버튼 클릭 처리 + st.rerun 으로 전체 페이지가 두 번 실행됨)
+- 전체 페이지: 현재 코드의 스크립트 전체 재실행 1회 (선택기 100개 + 가이드)
+- 변경 후: 일차별 fragment(선택기 20개 + 누적 합계) 1회 실행
+
+기준 커밋의 surveys/nutrition_survey.py는 git show로 임시 디렉터리에 꺼내 그대로 실행합니다.
+AppTest는 fragment도 전체 스크립트로 실행하므로 일차 블록은 별도 스크립트로 측정합니다.
+
+실행 예:
+    python -m benchmarks.plate_waste_benchmark --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+# 잔반 선택기를 fragment로 나누기 전 커밋
+BASELINE_REV = 'ed5a93b'
+BASELINE_MODULE = 'baseline_nutrition_survey'
+
+SETUP = '''
+import json
+import streamlit as st
+from surveys.nutrition_survey import MEAL_GRID
+
+if 'nutrition_data' not in st.session_state:
+    st.session_state.nutrition_data = {
+        'meal_portions': json.dumps(MEAL_GRID.to_dict(MEAL_GRID.zeros() + 150))
+    }
+    st.session_state.nutrition_page = 2
+'''
+
+FULL_PAGE = SETUP + '''
+from surveys.nutrition_survey import show_page2_plate_waste_visual
+show_page2_plate_waste_visual()
+'''
+
+DAY_BLOCK = SETUP + '''
+from surveys.nutrition_survey import show_waste_day
+portions = MEAL_GRID.to_array(st.session_state.nutrition_data['meal_portions'])
+show_waste_day(0, portions[0], MEAL_GRID.zeros(dtype=int)[0], float(portions.sum()))
+'''
+
+def baseline_page(baseline_dir):
+    """기준 커밋의 2페이지를 그리는 스크립트"""
+    return SETUP + f'''
+import sys
+sys.path.insert(0, {baseline_dir!r})
+from {BASELINE_MODULE} import show_page2_plate_waste_visual
+show_page2_plate_waste_visual()
+'''
+
+def export_baseline(rev, directory):
+    """기준 커밋의 영양 조사표 모듈을 임시 디렉터리에 저장"""
+    source = subprocess.run(
+        ['git', 'show', f'{rev}:surveys/nutrition_survey.py'],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        check=True, capture_output=True
+    ).stdout
+    with open(os.path.join(directory, f'{BASELINE_MODULE}.py'), 'wb') as f:
+        f.write(source)
+
+def measure(script, runs, tap_key):
+    """탭 후 화면 갱신까지의 시간 목록 (st.rerun 으로 이어지는 재실행 포함)"""
+    at = AppTest.from_string(script, default_timeout=60)
+    at.run()
+    timings = []
+    for i in range(runs):
+        at.button(key=f"{tap_key}_radio_{i % 5}").click()
+        start = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def summarize(name, timings):
+    timings_ms = [t * 1000 for t in timings]
+    print(f"{name:<28} 평균 {statistics.mean(timings_ms):8.1f}ms | 최대 {max(timings_ms):8.1f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="잔반 선택기 탭 지연 시간 벤치마크")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--baseline-rev', default=BASELINE_REV, help="변경 전으로 측정할 git 커밋")
+    args = parser.parse_args()
+    
+    tap_key = "day1_breakfast_rice_waste"
+    with tempfile.TemporaryDirectory() as baseline_dir:
+        export_baseline(args.baseline_rev, baseline_dir)
+        before = measure(baseline_page(baseline_dir), args.runs, tap_key)
+    summarize(f"변경 전 탭 1회 ({args.baseline_rev})", before)
+    summarize("전체 페이지 1회 실행", measure(FULL_PAGE, args.runs, tap_key))
+    summarize("변경 후 탭 1회 (일차 블록)", measure(DAY_BLOCK, args.runs, tap_key))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""임상 척도 일괄 채점 벤치마크 (어르신별 반복 vs score_frame)
+
+무작위 basic_survey 행을 만들어 IPAQ-SF/MNA-SF/K-MBI/MMSE-K 점수를
+어르신 한 명씩 score_* 함수로 계산할 때와 score_frame으로 한 번에 계산할 때의 시간을 비교하고,
+두 방식의 결과가 같은지 확인합니다.
+
+실행 예:
+    python -m benchmarks.scoring_benchmark --residents 10000
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from surveys.scoring import (
+    IPAQ_FIELDS, IPAQ_LEVELS, KMBI_FIELDS, KMBI_OPTIONS, MMSE_DOMAINS, MNA_FIELDS,
+    score_frame, score_ipaq, score_kmbi, score_mmse, score_mna
+)
+
+EDUCATION_OPTIONS = ["무학", "초등학교 졸업", "중학교 졸업", "고등학교 졸업", "대학교(전문대 포함) 졸업 이상", None]
+
+def sample_rows(count, seed=0):
+    """무작위 basic_survey 행 (K-MBI는 절반을 화면과 같은 수행 수준 문자열로)"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        row = {'elderly_id': f"EL{i:07d}", 'education': rng.choice(EDUCATION_OPTIONS)}
+        for field in IPAQ_FIELDS:
+            row[field] = rng.randint(0, 7) if field.endswith('days') else rng.randint(0, 120)
+        for field in MNA_FIELDS:
+            row[field] = rng.randint(0, 3)
+        for field in KMBI_FIELDS:
+            level = rng.randint(0, 4)
+            row[field] = KMBI_OPTIONS[level] if i % 2 else level
+        for field, max_score in MMSE_DOMAINS.items():
+            row[field] = rng.randint(0, max_score)
+        rows.append(row)
+    return rows
+
+def score_each(rows):
+    """어르신 한 명씩 채점 (화면과 같은 경로)"""
+    result = []
+    for row in rows:
+        mna_score, mna_status = score_mna(row)
+        kmbi_raw, kmbi_score, kmbi_status = score_kmbi(row)
+        mmse_score, _, mmse_status = score_mmse(row)
+        result.append((score_ipaq(row)['level_name'], mna_score, kmbi_score, mmse_score, mmse_status))
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="임상 척도 일괄 채점 벤치마크")
+    parser.add_argument('--residents', type=int, default=10000, help="채점할 어르신 수")
+    args = parser.parse_args()
+    
+    rows = sample_rows(args.residents)
+    frame = pd.DataFrame(rows)
+    
+    start = time.perf_counter()
+    each = score_each(rows)
+    each_ms = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    scores = score_frame(frame)
+    frame_ms = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    score_frame(rows)
+    rows_ms = (time.perf_counter() - start) * 1000
+    
+    batch = list(zip(scores['ipaq_level'], scores['mna_score'], scores['k_mbi_score'],
+                     scores['mmse_score'], scores['mmse_status']))
+    assert batch == each, "일괄 채점 결과가 어르신별 채점과 다릅니다."
+    assert set(scores['ipaq_level']) <= set(IPAQ_LEVELS)
+    
+    print(f"어르신 {args.residents:,}명")
+    print(f"어르신별 반복         {each_ms:8.1f}ms")
+    print(f"score_frame(DataFrame) {frame_ms:8.1f}ms")
+    print(f"score_frame(행 목록)   {rows_ms:8.1f}ms (DataFrame 변환 포함)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""설문 페이지 렌더링 / 페이지 이동 / 제출 지연 시간 벤치마크 (기준값 비교)
+
+Streamlit 테스트 도구(AppTest)로 기초/영양/만족도 조사표를 첫 페이지부터 제출까지 진행하며
+페이지마다 다음을 측정합니다.
+- render_ms: 입력 없이 스크립트 1회 실행 시간 (중앙값)
+- widgets: 페이지의 입력 위젯 수
+- next_ms / reruns / round_trips: "다음" 버튼 1회 처리 시간, 스크립트 실행 횟수(st.rerun 포함), 서버 왕복 횟수
+- submit_ms: 마지막 페이지 "제출" 버튼 처리 시간 (submit_survey 서버 함수 호출 포함)
+
+기본은 왕복마다 지연을 주는 인메모리 Supabase 대체 클라이언트를 사용하며,
+--url/--key를 주면 실제 Supabase(로컬 `supabase start` 포함)에, --database-url을 주면 PostgreSQL에 직접,
+--sqlite를 주면 database_schema.sql로 만든 메모리 SQLite에 연결합니다. (PostgreSQL/SQLite는 로그인 ID를 미리 등록)
+저장소마다 시간이 다르므로 기준값 파일도 --baseline으로 따로 지정합니다.
+결과는 기준값 파일(survey_baselines.json)과 비교하여 시간은 허용 비율(--tolerance)을 넘을 때,
+위젯 수/실행 횟수/왕복 횟수는 기준보다 늘었을 때 회귀로 표시하고 종료 코드 1을 반환합니다.
+시간은 실행 환경에 따라 달라지므로 기준값은 같은 환경에서 --update-baseline으로 다시 기록합니다.
+
+실행 예:
+    python -m benchmarks.survey_benchmark --runs 5
+    python -m benchmarks.survey_benchmark --update-baseline
+    python -m benchmarks.survey_benchmark --url http://localhost:54321 --key <anon key> --elderly-id EL0010001
+    python -m benchmarks.survey_benchmark --sqlite --baseline sqlite_baselines.json --update-baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.element_tree import Widget
+
+from benchmarks.fake_supabase import FakeSupabase
+from surveys.storage import PostgresStorage
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'survey_baselines.json')
+
+# 설문별 (표시 함수 모듈, 함수 이름, 페이지 상태 키, 답변 상태 키)
+SURVEYS = {
+    'basic': ('surveys.basic_survey', 'show_basic_survey', 'basic_page', 'basic_data'),
+    'nutrition': ('surveys.nutrition_survey', 'show_nutrition_survey', 'nutrition_page', 'nutrition_data'),
+    'satisfaction': ('surveys.satisfaction_survey', 'show_satisfaction_survey', 'satisfaction_page', 'satisfaction_data'),
+}
+
+# 제출 전에 채우는 답변 (기초 조사표는 필수 항목이 비어 있으면 제출되지 않음)
+SUBMIT_ANSWERS = {
+    'basic': {'gender': '여성', 'age': 85, 'care_grade': '3등급',
+              'k_mbi_score': 60, 'mmse_score': 20, 'mna_score': 10},
+    'nutrition': {},
+    'satisfaction': {},
+}
+
+# 기준값 비교 항목 (시간 항목은 허용 비율, 나머지는 기준보다 늘면 회귀)
+TIME_METRICS = ('render_ms', 'next_ms', 'submit_ms')
+COUNT_METRICS = ('widgets', 'reruns', 'round_trips')
+
+SCRIPT = '''
+import importlib
+import streamlit as st
+
+st.session_state.bench_script_runs = st.session_state.get('bench_script_runs', 0) + 1
+module_name, function_name = st.session_state.bench_target
+show_survey = getattr(importlib.import_module(module_name), function_name)
+show_survey(st.session_state.bench_client, *st.session_state.bench_login)
+'''
+
+def seed_login(storage, elderly_id, surveyor_id, nursing_home_id):
+    """측정용 요양원/조사원/어르신 등록 (이미 있으면 그대로)"""
+    for table_name, row in (
+        ('nursing_homes', {'id': nursing_home_id, 'name': "벤치마크 요양원"}),
+        ('surveyors', {'id': surveyor_id, 'name': "벤치마크 조사원", 'nursing_home_id': nursing_home_id}),
+        ('elderly_residents', {'id': elderly_id, 'name': "벤치마크 어르신", 'nursing_home_id': nursing_home_id}),
+    ):
+        storage.table(table_name).upsert(row, on_conflict='id', ignore_duplicates=True).execute()
+
+def count_widgets(node):
+    """화면 트리의 입력 위젯 수"""
+    if isinstance(node, Widget):
+        return 1
+    children = getattr(node, 'children', None)
+    if children is None:
+        return 0
+    return sum(count_widgets(child) for child in children.values())
+
+def find_button(at, label):
+    for button in at.button:
+        if label in button.label:
+            return button
+    return None
+
+def timed_run(at, client):
+    """스크립트 실행 1회(이어지는 st.rerun 포함)의 (시간, 실행 횟수, 왕복 횟수)"""
+    runs_before = at.session_state['bench_script_runs']
+    trips_before = client.round_trips if isinstance(client, FakeSupabase) else 0
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    trips = client.round_trips - trips_before if isinstance(client, FakeSupabase) else None
+    return elapsed * 1000, at.session_state['bench_script_runs'] - runs_before, trips
+
+def measure_survey(survey, client, login, runs):
+    """설문 하나를 첫 페이지부터 제출까지 진행하며 페이지별 측정값 dict 반환"""
+    module_name, function_name, page_key, data_key = SURVEYS[survey]
+    at = AppTest.from_string(SCRIPT, default_timeout=60)
+    at.session_state['bench_target'] = (module_name, function_name)
+    at.session_state['bench_client'] = client
+    at.session_state['bench_login'] = login
+    at.session_state['bench_script_runs'] = 0
+    at.run()
+    
+    results = {}
+    while True:
+        page = at.session_state[page_key]
+        render = [timed_run(at, client)[0] for _ in range(runs)]
+        metrics = {'render_ms': statistics.median(render), 'widgets': count_widgets(at._tree)}
+        
+        next_button = find_button(at, "다음")
+        if next_button is None:
+            at.session_state[data_key].update(SUBMIT_ANSWERS[survey])
+            submit_button = find_button(at, "제출")
+            if submit_button is None:
+                raise RuntimeError(f"{survey} {page}페이지에 제출 버튼이 없습니다.")
+            submit_button.click()
+            metrics['submit_ms'], metrics['reruns'], metrics['round_trips'] = timed_run(at, client)
+            # 화면 안내용 오류(예: 섭취량 부족)도 있으므로 저장 성공 메시지로 확인
+            if not at.success:
+                raise RuntimeError(f"{survey} 제출 실패: {[e.value for e in at.error]}")
+            results[f"page{page}"] = metrics
+            return results
+        
+        next_button.click()
+        metrics['next_ms'], metrics['reruns'], metrics['round_trips'] = timed_run(at, client)
+        results[f"page{page}"] = metrics
+        if at.session_state[page_key] == page:
+            raise RuntimeError(f"{survey} {page}페이지에서 다음 페이지로 이동하지 못했습니다.")
+
+def compare(results, baselines, tolerance, min_delta_ms=10.0):
+    """기준값보다 나빠진 항목 목록 [(설문, 페이지, 항목, 기준값, 측정값)]
+    
+    시간 항목은 기준 대비 tolerance 비율과 min_delta_ms를 모두 넘어야 회귀로 봅니다(짧은 페이지의 측정 잡음 제외).
+    """
+    regressions = []
+    for survey, pages in results.items():
+        for page, metrics in pages.items():
+            baseline = baselines.get(survey, {}).get(page)
+            if not baseline:
+                continue
+            for name, value in metrics.items():
+                expected = baseline.get(name)
+                if value is None or expected is None:
+                    continue
+                if name in TIME_METRICS and value > expected * (1 + tolerance) and value - expected > min_delta_ms:
+                    regressions.append((survey, page, name, expected, value))
+                elif name in COUNT_METRICS and value > expected:
+                    regressions.append((survey, page, name, expected, value))
+    return regressions
+
+def format_metrics(metrics):
+    parts = [f"렌더 {metrics['render_ms']:7.1f}ms", f"위젯 {metrics['widgets']:4d}개"]
+    if 'next_ms' in metrics:
+        parts.append(f"다음 {metrics['next_ms']:7.1f}ms")
+    if 'submit_ms' in metrics:
+        parts.append(f"제출 {metrics['submit_ms']:7.1f}ms")
+    parts.append(f"실행 {metrics['reruns']}회")
+    if metrics['round_trips'] is not None:
+        parts.append(f"왕복 {metrics['round_trips']}회")
+    return " | ".join(parts)
+
+def main():
+    parser = argparse.ArgumentParser(description="설문 페이지 렌더링/제출 지연 시간 벤치마크")
+    parser.add_argument('--runs', type=int, default=5, help="페이지당 렌더링 측정 횟수")
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="대체 클라이언트의 왕복 1회당 지연 (ms)")
+    parser.add_argument('--surveys', nargs='+', choices=list(SURVEYS), default=list(SURVEYS))
+    parser.add_argument('--url', help="Supabase URL (주지 않으면 인메모리 대체 클라이언트 사용)")
+    parser.add_argument('--key', help="Supabase 키")
+    parser.add_argument('--database-url', help="PostgreSQL 연결 문자열 (직접 연결)")
+    parser.add_argument('--sqlite', action='store_true', help="메모리 SQLite 저장소 사용")
+    parser.add_argument('--nursing-home-id', default='NH001')
+    parser.add_argument('--surveyor-id', default='SV00101')
+    parser.add_argument('--elderly-id', default='EL0010001')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="기준값 파일")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="시간 항목 허용 증가 비율")
+    parser.add_argument('--min-delta-ms', type=float, default=10.0, help="시간 항목 허용 증가량 (ms)")
+    parser.add_argument('--update-baseline', action='store_true', help="측정 결과를 기준값으로 저장")
+    args = parser.parse_args()
+    
+    login = (args.elderly_id, args.surveyor_id, args.nursing_home_id)
+    if args.url:
+        from supabase import create_client
+        client = create_client(args.url, args.key)
+    elif args.database_url or args.sqlite:
+        if args.database_url:
+            client = PostgresStorage(args.database_url)
+        else:
+            from surveys.sqlite_storage import SqliteStorage
+            client = SqliteStorage()
+        seed_login(client, *login)
+    else:
+        client = FakeSupabase(latency=args.latency_ms / 1000).seed(1, 1, 1)
+    
+    results = {}
+    for survey in args.surveys:
+        results[survey] = measure_survey(survey, client, login, args.runs)
+        for page, metrics in results[survey].items():
+            print(f"{survey:<12} {page:<6} {format_metrics(metrics)}")
+    
+    if args.update_baseline:
+        baselines = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baselines = json.load(f)
+        baselines.update({
+            survey: {page: {name: round(value, 1) if isinstance(value, float) else value
+                            for name, value in metrics.items()}
+                     for page, metrics in pages.items()}
+            for survey, pages in results.items()
+        })
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"기준값 저장: {args.baseline}")
+        return
+    
+    if not os.path.exists(args.baseline):
+        print("기준값 파일이 없습니다. --update-baseline으로 먼저 기록하세요.")
+        return
+    with open(args.baseline, encoding='utf-8') as f:
+        baselines = json.load(f)
+    regressions = compare(results, baselines, args.tolerance, args.min_delta_ms)
+    for survey, page, name, expected, value in regressions:
+        print(f"⚠️ 회귀: {survey} {page} {name} 기준 {expected} → {round(value, 1)}")
+    if regressions:
+        sys.exit(1)
+    print("기준값 대비 회귀 없음")
+
+if __name__ == "__main__":
+    main()
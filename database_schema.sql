@@ -69,12 +69,27 @@ CREATE TABLE basic_survey (
     diastolic_bp INTEGER,
     k_mbi_score INTEGER,
     mmse_score INTEGER,
+    mna_score INTEGER,
+    
+    -- 파생 점수/분류 (앱이 저장할 때 surveys/scoring.py로 계산하여 함께 기록)
+    bmi NUMERIC(5,2),
+    ipaq_vigorous_met NUMERIC(8,1),
+    ipaq_moderate_met NUMERIC(8,1),
+    ipaq_walking_met NUMERIC(8,1),
+    ipaq_total_met NUMERIC(8,1),
+    activity_level TEXT,
+    mna_status TEXT,
+    k_mbi_status TEXT,
+    mmse_status TEXT,
     
     -- 시설 특성
     facility_capacity INTEGER,
     facility_location TEXT,
     nutritionist_present BOOLEAN,
     
+    -- 제출 시각 (페이지 이동 때 부분 저장만 된 작성 중인 행은 NULL)
+    submitted_at TIMESTAMP,
+    
     created_at TIMESTAMP DEFAULT NOW(),
     updated_at TIMESTAMP DEFAULT NOW()
 );
@@ -89,6 +104,8 @@ CREATE TABLE nutrition_survey (
     -- 5일간 식사 데이터 (JSON 형태로 저장)
     meal_portions JSONB,
     plate_waste JSONB,
+    -- 목측 단계 0~4 (끼니 칸 100개, 저장 키 순서: 1일차 아침 밥 → 5일차 저녁 김치)
+    plate_waste_levels SMALLINT[],
     
     -- 신체 활동 수준
     vigorous_activity_days INTEGER,
@@ -107,6 +124,9 @@ CREATE TABLE nutrition_survey (
     neuropsychological_problem INTEGER,
     bmi_category INTEGER,
     
+    -- 제출 시각 (페이지 이동 때 부분 저장만 된 작성 중인 행은 NULL)
+    submitted_at TIMESTAMP,
+    
     created_at TIMESTAMP DEFAULT NOW(),
     updated_at TIMESTAMP DEFAULT NOW()
 );
@@ -163,6 +183,10 @@ CREATE TABLE satisfaction_survey (
     overall_product_satisfaction INTEGER,
     desired_cooking_types JSONB,
     desired_seafood_types JSONB,
+    product_evaluations JSONB,
+    
+    -- 제출 시각 (페이지 이동 때 부분 저장만 된 작성 중인 행은 NULL)
+    submitted_at TIMESTAMP,
     
     created_at TIMESTAMP DEFAULT NOW(),
     updated_at TIMESTAMP DEFAULT NOW()
@@ -173,3 +197,1014 @@ CREATE INDEX idx_survey_progress_elderly ON survey_progress(elderly_id);
 CREATE INDEX idx_basic_survey_elderly ON basic_survey(elderly_id);
 CREATE INDEX idx_nutrition_survey_elderly ON nutrition_survey(elderly_id);
 CREATE INDEX idx_satisfaction_survey_elderly ON satisfaction_survey(elderly_id);
+
+-- 로그인 검증 + 설문 진행 상황 조회/생성 (단일 호출)
+-- 요양원/조사원/어르신 확인과 survey_progress 조회/생성을 한 번의 왕복으로 처리합니다.
+-- p_include_roster가 참이면 요양원 명단(get_facility_roster)도 같은 응답에 담아 앱의 명단 캐시를 채웁니다.
+DROP FUNCTION IF EXISTS survey_login(TEXT, TEXT, TEXT);
+
+CREATE OR REPLACE FUNCTION survey_login(
+    p_nursing_home_id TEXT,
+    p_surveyor_id TEXT,
+    p_elderly_id TEXT,
+    p_include_roster BOOLEAN DEFAULT FALSE
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_progress survey_progress%ROWTYPE;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM nursing_homes WHERE id = p_nursing_home_id) THEN
+        RETURN jsonb_build_object('ok', FALSE, 'error', 'nursing_home');
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM surveyors
+        WHERE id = p_surveyor_id AND nursing_home_id = p_nursing_home_id
+    ) THEN
+        RETURN jsonb_build_object('ok', FALSE, 'error', 'surveyor');
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM elderly_residents
+        WHERE id = p_elderly_id AND nursing_home_id = p_nursing_home_id
+    ) THEN
+        RETURN jsonb_build_object('ok', FALSE, 'error', 'elderly');
+    END IF;
+
+    -- 없으면 생성
+    INSERT INTO survey_progress (elderly_id, surveyor_id, nursing_home_id)
+    VALUES (p_elderly_id, p_surveyor_id, p_nursing_home_id)
+    ON CONFLICT (elderly_id) DO NOTHING;
+
+    SELECT * INTO v_progress FROM survey_progress WHERE elderly_id = p_elderly_id;
+
+    IF p_include_roster THEN
+        RETURN jsonb_build_object(
+            'ok', TRUE,
+            'progress', to_jsonb(v_progress),
+            'roster', get_facility_roster(p_nursing_home_id)
+        );
+    END IF;
+
+    RETURN jsonb_build_object('ok', TRUE, 'progress', to_jsonb(v_progress));
+END;
+$$;
+
+-- 요양원별 명단 조회 (요양원 + 소속 조사원 + 소속 어르신을 한 번에 반환)
+-- 앱의 명단 캐시가 미적중일 때 사용합니다.
+-- (nursing_home_id, id) 인덱스는 id 순 명단 조회와 관리자 목록/응답 내보내기의 요양원별 키셋 페이지네이션에 함께 쓰입니다.
+CREATE INDEX IF NOT EXISTS idx_surveyors_nursing_home_id ON surveyors(nursing_home_id, id);
+CREATE INDEX IF NOT EXISTS idx_elderly_residents_nursing_home_id ON elderly_residents(nursing_home_id, id);
+-- 위 인덱스가 대신하는 이전 단일 컬럼 인덱스
+DROP INDEX IF EXISTS idx_surveyors_nursing_home;
+DROP INDEX IF EXISTS idx_elderly_residents_nursing_home;
+
+CREATE OR REPLACE FUNCTION get_facility_roster(p_nursing_home_id TEXT)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'nursing_home', (SELECT to_jsonb(n) FROM nursing_homes n WHERE n.id = p_nursing_home_id),
+        'surveyors', COALESCE((
+            SELECT jsonb_agg(to_jsonb(s) ORDER BY s.id)
+            FROM surveyors s WHERE s.nursing_home_id = p_nursing_home_id
+        ), '[]'::jsonb),
+        'residents', COALESCE((
+            SELECT jsonb_agg(to_jsonb(e) ORDER BY e.id)
+            FROM elderly_residents e WHERE e.nursing_home_id = p_nursing_home_id
+        ), '[]'::jsonb)
+    );
+$$;
+
+-- 제출 완료 표시 (이전 스키마로 만든 데이터베이스에 컬럼 추가, 다시 실행해도 안전)
+-- 부분 저장 행과 제출한 행이 같은 테이블에 있으므로 내보내기/분석은 submitted_at이 있는 행만 사용합니다.
+-- 기존 행은 survey_progress에서 완료로 표시된 설문만 제출한 것으로 채웁니다.
+ALTER TABLE basic_survey ADD COLUMN IF NOT EXISTS submitted_at TIMESTAMP;
+ALTER TABLE nutrition_survey ADD COLUMN IF NOT EXISTS submitted_at TIMESTAMP;
+ALTER TABLE satisfaction_survey ADD COLUMN IF NOT EXISTS submitted_at TIMESTAMP;
+
+UPDATE basic_survey s SET submitted_at = COALESCE(s.updated_at, p.last_updated)
+FROM survey_progress p
+WHERE p.elderly_id = s.elderly_id AND p.basic_survey_completed AND s.submitted_at IS NULL;
+UPDATE nutrition_survey s SET submitted_at = COALESCE(s.updated_at, p.last_updated)
+FROM survey_progress p
+WHERE p.elderly_id = s.elderly_id AND p.nutrition_survey_completed AND s.submitted_at IS NULL;
+UPDATE satisfaction_survey s SET submitted_at = COALESCE(s.updated_at, p.last_updated)
+FROM survey_progress p
+WHERE p.elderly_id = s.elderly_id AND p.satisfaction_survey_completed AND s.submitted_at IS NULL;
+
+-- 작성 중인 설문 부분 저장 (응답 upsert만, 진행 상황과 제출 시각은 바꾸지 않음)
+-- p_survey: 'basic' | 'nutrition' | 'satisfaction'
+-- p_payload의 키 중 해당 설문 테이블에 실제로 있는 컬럼만 저장합니다.
+-- 앱은 페이지 이동 시 바뀐 항목과 updated_at만 보내며, submit_survey도 이 함수로 응답을 저장합니다.
+CREATE OR REPLACE FUNCTION save_survey_draft(p_survey TEXT, p_payload JSONB)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_table TEXT;
+    v_columns TEXT;
+    v_updates TEXT;
+BEGIN
+    IF p_survey NOT IN ('basic', 'nutrition', 'satisfaction') THEN
+        RAISE EXCEPTION 'unknown survey: %', p_survey;
+    END IF;
+    v_table := p_survey || '_survey';
+
+    SELECT
+        string_agg(quote_ident(c.column_name), ', ' ORDER BY c.ordinal_position),
+        string_agg(format('%1$I = EXCLUDED.%1$I', c.column_name), ', ' ORDER BY c.ordinal_position)
+    INTO v_columns, v_updates
+    FROM information_schema.columns c
+    WHERE c.table_schema = 'public'
+      AND c.table_name = v_table
+      AND c.column_name NOT IN ('id', 'created_at', 'submitted_at')
+      AND p_payload ? c.column_name;
+
+    EXECUTE format(
+        'INSERT INTO %1$I (%2$s) SELECT %2$s FROM jsonb_populate_record(NULL::%1$I, $1) '
+        'ON CONFLICT (elderly_id) DO UPDATE SET %3$s',
+        v_table, v_columns, v_updates
+    ) USING p_payload;
+END;
+$$;
+
+-- 설문 제출 (응답 upsert + 진행 상황 갱신을 한 트랜잭션으로 처리)
+-- p_survey: 'basic' | 'nutrition' | 'satisfaction'
+-- p_payload의 키 중 해당 설문 테이블에 실제로 있는 컬럼만 저장하며, 갱신된 진행 상황을 반환합니다.
+CREATE OR REPLACE FUNCTION submit_survey(p_survey TEXT, p_payload JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_elderly_id TEXT := p_payload->>'elderly_id';
+    v_updated_at TIMESTAMP := COALESCE((p_payload->>'updated_at')::TIMESTAMP, NOW());
+    v_progress survey_progress%ROWTYPE;
+BEGIN
+    PERFORM save_survey_draft(p_survey, p_payload);
+
+    EXECUTE format('UPDATE %I SET submitted_at = $2 WHERE elderly_id = $1', p_survey || '_survey')
+    USING v_elderly_id, v_updated_at;
+
+    INSERT INTO survey_progress (elderly_id, surveyor_id, nursing_home_id)
+    VALUES (v_elderly_id, p_payload->>'surveyor_id', p_payload->>'nursing_home_id')
+    ON CONFLICT (elderly_id) DO NOTHING;
+
+    EXECUTE format(
+        'UPDATE survey_progress SET %1$I = TRUE, last_updated = $2 WHERE elderly_id = $1',
+        p_survey || '_survey_completed'
+    ) USING v_elderly_id, v_updated_at;
+
+    UPDATE survey_progress
+    SET all_surveys_completed = basic_survey_completed
+        AND nutrition_survey_completed
+        AND satisfaction_survey_completed
+    WHERE elderly_id = v_elderly_id
+    RETURNING * INTO v_progress;
+
+    RETURN to_jsonb(v_progress);
+END;
+$$;
+
+-- 테이블 컬럼 목록 조회 (앱이 프로세스당 1회 호출하여 캐시)
+CREATE OR REPLACE FUNCTION survey_table_columns(p_table TEXT)
+RETURNS TEXT[]
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT array_agg(column_name::TEXT ORDER BY ordinal_position)
+    FROM information_schema.columns
+    WHERE table_schema = 'public' AND table_name = p_table;
+$$;
+
+-- 설문 테이블 컬럼 이름과 자료형 (응답 내보내기에서 컬럼 형을 정할 때 사용)
+CREATE OR REPLACE FUNCTION survey_table_column_types(p_table TEXT)
+RETURNS TABLE (column_name TEXT, data_type TEXT)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT c.column_name::TEXT, c.data_type::TEXT
+    FROM information_schema.columns c
+    WHERE c.table_schema = 'public' AND c.table_name = p_table
+    ORDER BY c.ordinal_position;
+$$;
+
+-- 설문 진행 현황 통계 (요양원별 + 전체 합계)
+-- 관리자 대시보드는 survey_progress 전체 대신 이 뷰의 작은 결과만 읽습니다.
+CREATE OR REPLACE VIEW survey_progress_stats AS
+SELECT
+    sp.nursing_home_id,
+    nh.name AS nursing_home_name,
+    GROUPING(sp.nursing_home_id) = 1 AS is_total,
+    COUNT(*) AS total,
+    COUNT(*) FILTER (WHERE sp.basic_survey_completed) AS basic_completed,
+    COUNT(*) FILTER (WHERE sp.nutrition_survey_completed) AS nutrition_completed,
+    COUNT(*) FILTER (WHERE sp.satisfaction_survey_completed) AS satisfaction_completed,
+    COUNT(*) FILTER (WHERE sp.all_surveys_completed) AS all_completed
+FROM survey_progress sp
+LEFT JOIN nursing_homes nh ON nh.id = sp.nursing_home_id
+GROUP BY GROUPING SETS ((sp.nursing_home_id, nh.name), ());
+
+-- 관리자 목록 키셋 페이지네이션 (요양원별 필터 + id 순서)
+CREATE INDEX IF NOT EXISTS idx_survey_progress_nursing_home ON survey_progress(nursing_home_id, id);
+
+-- 설문 제출 일괄 처리 (태블릿 전송 대기열 동기화용)
+-- p_items: [{"id": 대기열 번호, "survey": 'basic' | 'nutrition' | 'satisfaction', "payload": {...}, "queued_at": 대기열에 넣은 시각}, ...]
+-- 항목마다 submit_survey를 별도 세이브포인트에서 실행하여 한 항목의 오류가 나머지 저장을 막지 않으며,
+-- 항목별 결과 [{"id", "ok", "error"}]를 반환합니다.
+-- 설문 행이 queued_at 이후에 (다른 기기에서) 저장되었으면 덮어쓰지 않고 {"id", "ok": true, "skipped": "stale"}를 반환합니다.
+CREATE OR REPLACE FUNCTION submit_surveys_batch(p_items JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_item JSONB;
+    v_newer BOOLEAN;
+    v_results JSONB := '[]'::JSONB;
+BEGIN
+    FOR v_item IN SELECT * FROM jsonb_array_elements(p_items)
+    LOOP
+        BEGIN
+            v_newer := FALSE;
+            IF v_item->>'queued_at' IS NOT NULL THEN
+                EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE elderly_id = $1 AND updated_at > $2)',
+                               (v_item->>'survey') || '_survey')
+                INTO v_newer
+                USING v_item->'payload'->>'elderly_id', (v_item->>'queued_at')::TIMESTAMP;
+            END IF;
+
+            IF v_newer THEN
+                v_results := v_results || jsonb_build_object('id', v_item->'id', 'ok', TRUE, 'skipped', 'stale');
+            ELSE
+                PERFORM submit_survey(v_item->>'survey', v_item->'payload');
+                v_results := v_results || jsonb_build_object('id', v_item->'id', 'ok', TRUE);
+            END IF;
+        EXCEPTION WHEN OTHERS THEN
+            v_results := v_results || jsonb_build_object('id', v_item->'id', 'ok', FALSE, 'error', SQLERRM);
+        END;
+    END LOOP;
+
+    RETURN v_results;
+END;
+$$;
+
+-- 일괄 등록한 어르신의 설문 진행 상황 초기화 (sample_data.sql 의 조인과 같은 방식)
+-- 같은 요양원 조사원 중 ID가 가장 빠른 조사원을 담당자로 지정하며, 이미 있는 행은 건너뜁니다.
+-- 새로 만든 행 수를 반환합니다.
+CREATE OR REPLACE FUNCTION init_survey_progress(p_elderly_ids TEXT[])
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_created INTEGER;
+BEGIN
+    INSERT INTO survey_progress (elderly_id, surveyor_id, nursing_home_id)
+    SELECT DISTINCT ON (e.id) e.id, s.id, e.nursing_home_id
+    FROM elderly_residents e
+    JOIN surveyors s ON e.nursing_home_id = s.nursing_home_id
+    WHERE e.id = ANY(p_elderly_ids)
+    ORDER BY e.id, s.id
+    ON CONFLICT (elderly_id) DO NOTHING;
+
+    GET DIAGNOSTICS v_created = ROW_COUNT;
+    RETURN v_created;
+END;
+$$;
+
+-- 목측 단계 저장 (이전 스키마로 만든 데이터베이스에 컬럼 추가, 다시 실행해도 안전)
+-- 잔반량(g)과 함께 저장하여 설문을 다시 열면 선택한 단계가 그대로 표시되고,
+-- 제공량을 고치면 앱이 고친 칸의 잔반량만 단계 × 제공량으로 다시 계산합니다.
+ALTER TABLE nutrition_survey ADD COLUMN IF NOT EXISTS plate_waste_levels SMALLINT[];
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'nutrition_survey_plate_waste_levels_check') THEN
+        ALTER TABLE nutrition_survey ADD CONSTRAINT nutrition_survey_plate_waste_levels_check
+            CHECK (0 <= ALL(plate_waste_levels) AND 4 >= ALL(plate_waste_levels));
+    END IF;
+END;
+$$;
+
+-- 영양 조사 끼니 칸별 식사량/잔반 (nutrition_survey.meal_portions/plate_waste JSON을 칸마다 한 행으로 펼친 테이블)
+-- 어르신 간 집계(예: 2일차 점심 밥 평균 잔반)는 JSON을 매번 풀지 않고 이 테이블과 인덱스로 처리합니다.
+-- nutrition_survey에 저장/삭제되면 트리거가 해당 어르신의 행을 다시 만들거나 지웁니다. (제출한 행만, submitted_at)
+-- (nutrition_survey에서 파생되는 테이블이라 외래키를 두지 않아 한 명당 100행 저장 시 검사 비용을 줄임)
+-- meal: breakfast, snack1, lunch, snack2, dinner / slot: rice, soup, main, side1, side2, kimchi (칸이 하나인 간식은 '')
+-- waste_level: 목측 단계 0~4 (조사원이 고른 plate_waste_levels, 이 값이 없는 이전 응답은 잔반량/제공량 비율을 환산, 제공량이 0이면 NULL)
+CREATE TABLE IF NOT EXISTS nutrition_meal_items (
+    elderly_id TEXT NOT NULL,
+    nursing_home_id TEXT,
+    day SMALLINT NOT NULL,
+    meal TEXT NOT NULL,
+    slot TEXT NOT NULL DEFAULT '',
+    portion_g NUMERIC NOT NULL DEFAULT 0,
+    waste_level SMALLINT,
+    waste_g NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (elderly_id, day, meal, slot)
+);
+
+-- 끼니/칸/일차 조건의 집계를 인덱스만으로 처리
+CREATE INDEX IF NOT EXISTS idx_nutrition_meal_items_cohort
+    ON nutrition_meal_items (meal, slot, day) INCLUDE (nursing_home_id, portion_g, waste_g, waste_level);
+
+-- 어르신별 5일 섭취 합계 (nutrition_meal_items를 어르신별로 합친 테이블, refresh_nutrition_meal_items가 함께 갱신)
+-- 코호트 분석이 어르신 100행씩을 매번 합치지 않도록 미리 집계해 둡니다.
+-- intake_rate: (제공량 - 잔반량) / 제공량 × 100 (제공량이 0이면 NULL)
+CREATE TABLE IF NOT EXISTS nutrition_intake (
+    elderly_id TEXT PRIMARY KEY,
+    nursing_home_id TEXT,
+    portion_g NUMERIC NOT NULL DEFAULT 0,
+    waste_g NUMERIC NOT NULL DEFAULT 0,
+    intake_rate NUMERIC(5,1)
+);
+
+CREATE INDEX IF NOT EXISTS idx_nutrition_intake_nursing_home ON nutrition_intake(nursing_home_id);
+
+-- JSONB 객체 꺼내기 (앱이 JSON 문자열로 저장한 값도 객체로 변환, 객체가 아니면 빈 객체)
+CREATE OR REPLACE FUNCTION survey_json_object(p_value JSONB)
+RETURNS JSONB
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT CASE
+        WHEN jsonb_typeof(p_value) = 'object' THEN p_value
+        WHEN jsonb_typeof(p_value) = 'string' AND left(ltrim(p_value #>> '{}'), 1) = '{' THEN (p_value #>> '{}')::JSONB
+        ELSE '{}'::JSONB
+    END;
+$$;
+
+-- plate_waste_levels(일차 → 칸 순서로 펼친 목측 단계 배열)에서 일차/칸의 위치 (1부터, 모르는 칸이면 NULL)
+-- 칸 순서는 앱의 MealGrid(surveys/nutrition_survey.py의 MEALS)와 같아야 합니다.
+CREATE OR REPLACE FUNCTION nutrition_level_index(p_day INTEGER, p_item TEXT)
+RETURNS INTEGER
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT (p_day - 1) * cardinality(s.items) + array_position(s.items, p_item)
+    FROM (SELECT ARRAY[
+        'breakfast_rice', 'breakfast_soup', 'breakfast_main', 'breakfast_side1', 'breakfast_side2', 'breakfast_kimchi',
+        'snack1',
+        'lunch_rice', 'lunch_soup', 'lunch_main', 'lunch_side1', 'lunch_side2', 'lunch_kimchi',
+        'snack2',
+        'dinner_rice', 'dinner_soup', 'dinner_main', 'dinner_side1', 'dinner_side2', 'dinner_kimchi'
+    ] AS items) s;
+$$;
+
+-- 어르신별 끼니 칸 행과 섭취 합계 다시 만들기 (p_elderly_ids가 NULL이면 전체), 만든 끼니 칸 행 수를 반환합니다.
+-- 저장 키 형식: 'day{일차}_{끼니}_{칸}' (간식은 'day{일차}_{끼니}'), 잔반량은 같은 키 + '_waste'
+CREATE OR REPLACE FUNCTION refresh_nutrition_meal_items(p_elderly_ids TEXT[] DEFAULT NULL)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_created INTEGER;
+BEGIN
+    -- 조건을 elderly_id = ANY(...) 하나로 두어 트리거의 한 명 갱신이 인덱스를 타도록 함
+    IF p_elderly_ids IS NULL THEN
+        DELETE FROM nutrition_meal_items;
+        DELETE FROM nutrition_intake;
+        p_elderly_ids := ARRAY(SELECT elderly_id FROM nutrition_survey);
+    ELSE
+        DELETE FROM nutrition_meal_items WHERE elderly_id = ANY(p_elderly_ids);
+        DELETE FROM nutrition_intake WHERE elderly_id = ANY(p_elderly_ids);
+    END IF;
+
+    -- JSON 문자열은 어르신마다 한 번만 풀도록 먼저 객체로 변환
+    WITH j AS MATERIALIZED (
+        SELECT
+            n.elderly_id,
+            n.nursing_home_id,
+            survey_json_object(n.meal_portions) AS portions,
+            survey_json_object(n.plate_waste) AS waste,
+            n.plate_waste_levels AS levels
+        FROM nutrition_survey n
+        WHERE n.elderly_id = ANY(p_elderly_ids) AND n.submitted_at IS NOT NULL
+    )
+    INSERT INTO nutrition_meal_items (elderly_id, nursing_home_id, day, meal, slot, portion_g, waste_level, waste_g)
+    SELECT
+        j.elderly_id,
+        j.nursing_home_id,
+        substr(k.parts[1], 4)::SMALLINT,
+        k.parts[2],
+        COALESCE(k.parts[3], ''),
+        k.portion_g,
+        -- 목측 단계는 저장된 plate_waste_levels를 쓰고, 없는 이전 응답만 잔반량/제공량 비율로 환산
+        CASE WHEN k.portion_g > 0
+             THEN COALESCE(
+                 j.levels[nutrition_level_index(substr(k.parts[1], 4)::INTEGER, substr(k.key, strpos(k.key, '_') + 1))],
+                 LEAST(4, GREATEST(0, ROUND(k.waste_g * 4 / k.portion_g)))::SMALLINT
+             )
+        END,
+        k.waste_g
+    FROM j
+    CROSS JOIN LATERAL (
+        SELECT
+            p.key,
+            string_to_array(p.key, '_') AS parts,
+            CASE WHEN jsonb_typeof(p.value) = 'number' THEN p.value::NUMERIC ELSE 0 END AS portion_g,
+            CASE WHEN jsonb_typeof(j.waste -> (p.key || '_waste')) = 'number'
+                 THEN (j.waste -> (p.key || '_waste'))::NUMERIC ELSE 0 END AS waste_g
+        FROM jsonb_each(j.portions) p
+    ) k
+    WHERE k.parts[1] ~ '^day[0-9]+$' AND cardinality(k.parts) <= 3;
+
+    GET DIAGNOSTICS v_created = ROW_COUNT;
+
+    INSERT INTO nutrition_intake (elderly_id, nursing_home_id, portion_g, waste_g, intake_rate)
+    SELECT
+        elderly_id,
+        MIN(nursing_home_id),
+        SUM(portion_g),
+        SUM(waste_g),
+        ROUND(100 * (SUM(portion_g) - SUM(waste_g)) / NULLIF(SUM(portion_g), 0), 1)
+    FROM nutrition_meal_items
+    WHERE elderly_id = ANY(p_elderly_ids)
+    GROUP BY elderly_id;
+
+    RETURN v_created;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION sync_nutrition_meal_items()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM refresh_nutrition_meal_items(ARRAY[NEW.elderly_id]);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM refresh_nutrition_meal_items(ARRAY[OLD.elderly_id]);
+    -- 식사량/잔반과 관계없는 항목만 부분 저장한 경우는 건너뜀
+    ELSIF NEW.meal_portions IS DISTINCT FROM OLD.meal_portions
+       OR NEW.plate_waste IS DISTINCT FROM OLD.plate_waste
+       OR NEW.plate_waste_levels IS DISTINCT FROM OLD.plate_waste_levels
+       OR NEW.submitted_at IS DISTINCT FROM OLD.submitted_at
+       OR NEW.nursing_home_id IS DISTINCT FROM OLD.nursing_home_id
+       OR NEW.elderly_id IS DISTINCT FROM OLD.elderly_id THEN
+        PERFORM refresh_nutrition_meal_items(ARRAY[OLD.elderly_id, NEW.elderly_id]);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_nutrition_meal_items ON nutrition_survey;
+CREATE TRIGGER trg_nutrition_meal_items
+AFTER INSERT OR UPDATE OR DELETE ON nutrition_survey
+FOR EACH ROW EXECUTE FUNCTION sync_nutrition_meal_items();
+
+-- 기존 nutrition_survey 행 옮기기 (아직 펼치지 않은 어르신만, 다시 실행해도 안전)
+SELECT refresh_nutrition_meal_items(ARRAY(
+    SELECT n.elderly_id FROM nutrition_survey n
+    WHERE NOT EXISTS (SELECT 1 FROM nutrition_meal_items i WHERE i.elderly_id = n.elderly_id)
+));
+
+-- 제출 완료 표시 이전에 펼친 작성 중인 어르신의 행 지우기 (다시 실행해도 안전)
+SELECT refresh_nutrition_meal_items(ARRAY(
+    SELECT n.elderly_id FROM nutrition_survey n
+    WHERE n.submitted_at IS NULL
+      AND EXISTS (SELECT 1 FROM nutrition_meal_items i WHERE i.elderly_id = n.elderly_id)
+));
+
+-- 목측 단계를 잔반량 비율로만 환산하던 때 펼친 어르신의 단계 바로잡기 (다시 실행해도 안전)
+WITH stored AS (
+    SELECT
+        i.elderly_id, i.day, i.meal, i.slot,
+        n.plate_waste_levels[nutrition_level_index(i.day, i.meal || CASE WHEN i.slot = '' THEN '' ELSE '_' || i.slot END)] AS level
+    FROM nutrition_meal_items i
+    JOIN nutrition_survey n ON n.elderly_id = i.elderly_id
+    WHERE i.portion_g > 0 AND n.plate_waste_levels IS NOT NULL
+)
+UPDATE nutrition_meal_items i
+SET waste_level = stored.level
+FROM stored
+WHERE (i.elderly_id, i.day, i.meal, i.slot) = (stored.elderly_id, stored.day, stored.meal, stored.slot)
+  AND stored.level IS NOT NULL
+  AND stored.level IS DISTINCT FROM i.waste_level;
+
+-- 섭취 합계 테이블 이전에 펼친 어르신의 합계 채우기 (다시 실행해도 안전)
+INSERT INTO nutrition_intake (elderly_id, nursing_home_id, portion_g, waste_g, intake_rate)
+SELECT
+    elderly_id,
+    MIN(nursing_home_id),
+    SUM(portion_g),
+    SUM(waste_g),
+    ROUND(100 * (SUM(portion_g) - SUM(waste_g)) / NULLIF(SUM(portion_g), 0), 1)
+FROM nutrition_meal_items
+GROUP BY elderly_id
+ON CONFLICT (elderly_id) DO NOTHING;
+
+-- 요양원/일차/끼니/칸별 섭취 집계 (조건은 인덱스로 처리, 요양원 전체 합계는 합계 컬럼을 더해 계산)
+CREATE OR REPLACE VIEW nutrition_meal_item_stats AS
+SELECT
+    nursing_home_id,
+    day,
+    meal,
+    slot,
+    COUNT(*) FILTER (WHERE portion_g > 0) AS served,
+    SUM(portion_g) AS portion_g_sum,
+    SUM(waste_g) AS waste_g_sum,
+    ROUND(AVG(waste_level), 2) AS avg_waste_level,
+    ROUND(100 * (SUM(portion_g) - SUM(waste_g)) / NULLIF(SUM(portion_g), 0), 1) AS intake_rate
+FROM nutrition_meal_items
+GROUP BY nursing_home_id, day, meal, slot;
+
+-- 기초 조사 파생 점수/분류 (이전 스키마로 만든 데이터베이스에 컬럼 추가, 다시 실행해도 안전)
+-- 앱이 저장할 때 surveys/scoring.py로 계산하여 함께 기록하므로 분석마다 원 문항에서 다시 계산하지 않고,
+-- "영양불량 위험이면서 활동 수준 낮음" 같은 코호트 조건은 아래 인덱스로 처리합니다.
+-- activity_level: low, moderate, high (IPAQ-SF)
+-- mna_status: malnourished, at_risk, normal (MNA-SF)
+-- k_mbi_status: total, severe, moderate, mild, independent (K-MBI 의존도)
+-- mmse_status: impaired, mild, normal (MMSE-K, 학력별 기준 점수)
+ALTER TABLE basic_survey ADD COLUMN IF NOT EXISTS bmi NUMERIC(5,2);
+ALTER TABLE basic_survey ADD COLUMN IF NOT EXISTS ipaq_vigorous_met NUMERIC(8,1);
+ALTER TABLE basic_survey ADD COLUMN IF NOT EXISTS ipaq_moderate_met NUMERIC(8,1);
+ALTER TABLE basic_survey ADD COLUMN IF NOT EXISTS ipaq_walking_met NUMERIC(8,1);
+ALTER TABLE basic_survey ADD COLUMN IF NOT EXISTS ipaq_total_met NUMERIC(8,1);
+ALTER TABLE basic_survey ADD COLUMN IF NOT EXISTS activity_level TEXT;
+ALTER TABLE basic_survey ADD COLUMN IF NOT EXISTS mna_status TEXT;
+ALTER TABLE basic_survey ADD COLUMN IF NOT EXISTS k_mbi_status TEXT;
+ALTER TABLE basic_survey ADD COLUMN IF NOT EXISTS mmse_status TEXT;
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'basic_survey_derived_status_check') THEN
+        ALTER TABLE basic_survey ADD CONSTRAINT basic_survey_derived_status_check CHECK (
+            activity_level IN ('low', 'moderate', 'high')
+            AND mna_status IN ('malnourished', 'at_risk', 'normal')
+            AND k_mbi_status IN ('total', 'severe', 'moderate', 'mild', 'independent')
+            AND mmse_status IN ('impaired', 'mild', 'normal')
+        );
+    END IF;
+END;
+$$;
+
+-- 영양 상태 × 활동 수준, 인지 기능 × 일상생활 의존도 코호트 조회
+CREATE INDEX IF NOT EXISTS idx_basic_survey_mna_activity
+    ON basic_survey (mna_status, activity_level) INCLUDE (nursing_home_id, elderly_id);
+CREATE INDEX IF NOT EXISTS idx_basic_survey_mmse_kmbi
+    ON basic_survey (mmse_status, k_mbi_status) INCLUDE (nursing_home_id, elderly_id);
+
+-- 어르신별 파생 점수/분류 다시 계산 (p_elderly_ids가 NULL이면 전체), 갱신한 행 수를 반환합니다.
+-- surveys/scoring.py와 같은 기준입니다. (기준을 바꾸면 두 곳을 함께 고칠 것)
+-- 문항 컬럼이 없는 데이터베이스에서도 실행되도록 행을 JSONB로 바꿔 문항 값을 꺼내며,
+-- 문항이 없으면 저장된 총점(mna_score, k_mbi_score, mmse_score)으로 분류합니다.
+CREATE OR REPLACE FUNCTION refresh_basic_survey_scores(p_elderly_ids TEXT[] DEFAULT NULL)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_updated INTEGER;
+BEGIN
+    WITH answers AS (
+        SELECT
+            b.id,
+            b.education,
+            CASE WHEN b.height > 0 AND b.weight > 0 THEN ROUND(b.weight / (b.height / 100) ^ 2, 2) END AS bmi,
+            COALESCE((r.j->>'vigorous_activity_days')::NUMERIC, 0) AS vigorous_days,
+            COALESCE((r.j->>'moderate_activity_days')::NUMERIC, 0) + COALESCE((r.j->>'walking_days')::NUMERIC, 0) AS moderate_walking_days,
+            COALESCE((r.j->>'vigorous_activity_days')::NUMERIC * (r.j->>'vigorous_activity_time')::NUMERIC * 8.0, 0) AS vigorous_met,
+            COALESCE((r.j->>'moderate_activity_days')::NUMERIC * (r.j->>'moderate_activity_time')::NUMERIC * 4.0, 0) AS moderate_met,
+            COALESCE((r.j->>'walking_days')::NUMERIC * (r.j->>'walking_time')::NUMERIC * 3.3, 0) AS walking_met,
+            COALESCE(r.j->>'vigorous_activity_days', r.j->>'vigorous_activity_time', r.j->>'moderate_activity_days',
+                     r.j->>'moderate_activity_time', r.j->>'walking_days', r.j->>'walking_time') IS NOT NULL AS has_ipaq,
+            COALESCE(
+                (SELECT SUM((r.j->>f)::NUMERIC) FROM unnest(ARRAY[
+                    'mna_appetite_change', 'mna_weight_change', 'mna_mobility',
+                    'mna_stress_illness', 'mna_neuropsychological_problem', 'mna_bmi_category'
+                ]) f),
+                (r.j->>'mna_score')::NUMERIC
+            ) AS mna_total,
+            COALESCE(
+                (SELECT ROUND(SUM((r.j->>('kmbi_' || i))::NUMERIC) / 44 * 100, 1) FROM generate_series(1, 11) i),
+                (r.j->>'k_mbi_score')::NUMERIC
+            ) AS kmbi_score,
+            COALESCE(
+                (SELECT SUM((r.j->>f)::NUMERIC) FROM unnest(ARRAY[
+                    'mmse_time_orientation', 'mmse_place_orientation', 'mmse_registration',
+                    'mmse_attention_calculation', 'mmse_recall', 'mmse_naming', 'mmse_comprehension',
+                    'mmse_drawing', 'mmse_repetition', 'mmse_reading', 'mmse_writing'
+                ]) f),
+                (r.j->>'mmse_score')::NUMERIC
+            ) AS mmse_total,
+            CASE
+                WHEN b.education LIKE '%무학%' THEN 19
+                WHEN b.education LIKE '%초등학교%' THEN 22
+                ELSE 24
+            END AS mmse_cutoff
+        FROM basic_survey b
+        CROSS JOIN LATERAL (SELECT to_jsonb(b) AS j) r
+        WHERE p_elderly_ids IS NULL OR b.elderly_id = ANY(p_elderly_ids)
+    ),
+    scores AS (
+        SELECT a.*, a.vigorous_met + a.moderate_met + a.walking_met AS total_met
+        FROM answers a
+    )
+    UPDATE basic_survey b
+    SET
+        bmi = s.bmi,
+        ipaq_vigorous_met = CASE WHEN s.has_ipaq THEN ROUND(s.vigorous_met, 1) END,
+        ipaq_moderate_met = CASE WHEN s.has_ipaq THEN ROUND(s.moderate_met, 1) END,
+        ipaq_walking_met = CASE WHEN s.has_ipaq THEN ROUND(s.walking_met, 1) END,
+        ipaq_total_met = CASE WHEN s.has_ipaq THEN ROUND(s.total_met, 1) END,
+        activity_level = CASE
+            WHEN NOT s.has_ipaq THEN NULL
+            WHEN s.total_met >= 3000 OR (s.vigorous_days >= 3 AND s.vigorous_met >= 1500) THEN 'high'
+            WHEN s.total_met >= 600 OR s.vigorous_days >= 3
+                 OR (s.moderate_walking_days >= 5 AND s.moderate_met + s.walking_met >= 600) THEN 'moderate'
+            ELSE 'low'
+        END,
+        mna_status = CASE
+            WHEN s.mna_total IS NULL THEN NULL
+            WHEN s.mna_total < 8 THEN 'malnourished'
+            WHEN s.mna_total < 12 THEN 'at_risk'
+            ELSE 'normal'
+        END,
+        k_mbi_status = CASE
+            WHEN s.kmbi_score IS NULL THEN NULL
+            WHEN s.kmbi_score < 40 THEN 'total'
+            WHEN s.kmbi_score < 60 THEN 'severe'
+            WHEN s.kmbi_score < 75 THEN 'moderate'
+            WHEN s.kmbi_score < 90 THEN 'mild'
+            ELSE 'independent'
+        END,
+        mmse_status = CASE
+            WHEN s.mmse_total IS NULL THEN NULL
+            WHEN s.mmse_total >= s.mmse_cutoff THEN 'normal'
+            WHEN s.mmse_total >= s.mmse_cutoff - 4 THEN 'mild'
+            ELSE 'impaired'
+        END
+    FROM scores s
+    WHERE b.id = s.id;
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    RETURN v_updated;
+END;
+$$;
+
+-- 기존 basic_survey 행 채우기 (파생 컬럼이 모두 비어 있는 어르신만, 다시 실행해도 안전)
+SELECT refresh_basic_survey_scores(ARRAY(
+    SELECT elderly_id FROM basic_survey
+    WHERE bmi IS NULL AND activity_level IS NULL AND mna_status IS NULL
+      AND k_mbi_status IS NULL AND mmse_status IS NULL
+));
+
+-- 코호트 분석 (관리자 대시보드 분석 탭)
+-- 요양원/장기요양등급/식사 유형별 MNA-SF, MMSE-K, K-MBI, BMI, 섭취율 분포를 서버에서 한 번에 집계합니다.
+ALTER TABLE basic_survey ADD COLUMN IF NOT EXISTS mna_score INTEGER;
+
+-- 요양원별 최신 제출 시각 조회 (분석 결과 캐시 무효화 확인)
+CREATE INDEX IF NOT EXISTS idx_basic_survey_nursing_home_submitted ON basic_survey(nursing_home_id, submitted_at);
+CREATE INDEX IF NOT EXISTS idx_nutrition_survey_nursing_home_submitted ON nutrition_survey(nursing_home_id, submitted_at);
+DROP INDEX IF EXISTS idx_basic_survey_nursing_home_updated;
+DROP INDEX IF EXISTS idx_nutrition_survey_nursing_home_updated;
+
+-- 분석 데이터 버전 (기초/영양 조사표의 최신 submitted_at과 제출한 행 수, p_nursing_home_id가 NULL이면 전체)
+-- 응답이 제출·삭제되면 값이 바뀌므로 앱은 같은 버전의 캐시된 결과를 그대로 사용합니다.
+-- (작성 중인 부분 저장은 분석에 포함하지 않으므로 버전도 바꾸지 않음)
+CREATE OR REPLACE FUNCTION cohort_analytics_version(p_nursing_home_id TEXT DEFAULT NULL)
+RETURNS TEXT
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT concat_ws('/',
+        b.updated_at, b.rows,
+        n.updated_at, n.rows
+    )
+    FROM (
+        SELECT MAX(submitted_at) AS updated_at, COUNT(submitted_at) AS rows FROM basic_survey
+        WHERE p_nursing_home_id IS NULL OR nursing_home_id = p_nursing_home_id
+    ) b, (
+        SELECT MAX(submitted_at) AS updated_at, COUNT(submitted_at) AS rows FROM nutrition_survey
+        WHERE p_nursing_home_id IS NULL OR nursing_home_id = p_nursing_home_id
+    ) n;
+$$;
+
+-- 코호트 분석 집계 (p_nursing_home_id가 NULL이면 전체 요양원)
+-- p_version이 현재 버전과 같으면 {"version", "unchanged": true}만 반환하여 캐시를 그대로 쓰게 합니다.
+-- p_bins: {"지표": [구간 하한, ...], ...} 히스토그램 구간 (첫 하한보다 작은 값은 첫 구간, 마지막 구간은 상한 없음)
+-- 반환: {
+--   "version": 버전,
+--   "summary": [{"dimension": 'facility' | 'care_grade' | 'meal_type' | 'all', "grp", "metric",
+--                "stats": {"n", "mean", "min", "max", "quartiles": [p25, 중앙값, p75]}}, ...],
+--   "histograms": [{"metric", "bucket"(1부터), "n"}, ...] (조회 범위 전체의 분포)
+-- }
+-- 지표: mna_score, mmse_score, k_mbi_score, bmi, intake_rate (어르신별 5일 섭취율 %, nutrition_intake)
+-- 제출한 응답만 집계합니다. (nutrition_intake는 제출한 영양 조사표만 펼침)
+-- 어르신 한 명당 한 행에서 지표별 집계를 한 번에 계산합니다. (지표마다 행을 펼치면 정렬할 행이 5배로 늘어남)
+CREATE OR REPLACE FUNCTION cohort_analytics(
+    p_nursing_home_id TEXT DEFAULT NULL,
+    p_version TEXT DEFAULT NULL,
+    p_bins JSONB DEFAULT '{}'::JSONB
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+STABLE
+SET work_mem = '64MB'
+AS $$
+DECLARE
+    v_version TEXT := cohort_analytics_version(p_nursing_home_id);
+    v_mna_bins FLOAT8[] := ARRAY(SELECT jsonb_array_elements_text(p_bins->'mna_score')::FLOAT8);
+    v_mmse_bins FLOAT8[] := ARRAY(SELECT jsonb_array_elements_text(p_bins->'mmse_score')::FLOAT8);
+    v_kmbi_bins FLOAT8[] := ARRAY(SELECT jsonb_array_elements_text(p_bins->'k_mbi_score')::FLOAT8);
+    v_bmi_bins FLOAT8[] := ARRAY(SELECT jsonb_array_elements_text(p_bins->'bmi')::FLOAT8);
+    v_intake_bins FLOAT8[] := ARRAY(SELECT jsonb_array_elements_text(p_bins->'intake_rate')::FLOAT8);
+    v_result JSONB;
+BEGIN
+    IF p_version IS NOT DISTINCT FROM v_version THEN
+        RETURN jsonb_build_object('version', v_version, 'unchanged', TRUE);
+    END IF;
+
+    WITH basic AS (
+        SELECT elderly_id, nursing_home_id, care_grade, meal_type, mna_score, mmse_score, k_mbi_score, bmi
+        FROM basic_survey
+        WHERE submitted_at IS NOT NULL
+          AND (p_nursing_home_id IS NULL OR nursing_home_id = p_nursing_home_id)
+    ),
+    intake AS (
+        SELECT elderly_id, nursing_home_id, intake_rate FROM nutrition_intake
+        WHERE p_nursing_home_id IS NULL OR nursing_home_id = p_nursing_home_id
+    ),
+    -- 어르신 한 명당 한 행 (집계 키는 "C" 정렬로 비교, 지표는 실수로 변환하여 정렬/평균 비용을 줄임)
+    residents AS MATERIALIZED (
+        SELECT
+            COALESCE(b.nursing_home_id, i.nursing_home_id) COLLATE "C" AS nursing_home_id,
+            COALESCE(NULLIF(b.care_grade, ''), '미입력') COLLATE "C" AS care_grade,
+            COALESCE(NULLIF(b.meal_type, ''), '미입력') COLLATE "C" AS meal_type,
+            b.mna_score::FLOAT8 AS mna_score,
+            b.mmse_score::FLOAT8 AS mmse_score,
+            b.k_mbi_score::FLOAT8 AS k_mbi_score,
+            b.bmi::FLOAT8 AS bmi,
+            i.intake_rate::FLOAT8 AS intake_rate
+        FROM basic b
+        FULL JOIN intake i ON i.elderly_id = b.elderly_id
+    ),
+    grouped AS (
+        SELECT
+            CASE
+                WHEN GROUPING(nursing_home_id) = 0 THEN 'facility'
+                WHEN GROUPING(care_grade) = 0 THEN 'care_grade'
+                WHEN GROUPING(meal_type) = 0 THEN 'meal_type'
+                ELSE 'all'
+            END AS dimension,
+            COALESCE(nursing_home_id, care_grade, meal_type) AS grp,
+            jsonb_build_object(
+                'n', COUNT(mna_score), 'mean', ROUND(AVG(mna_score)::NUMERIC, 2), 'min', MIN(mna_score), 'max', MAX(mna_score),
+                'quartiles', percentile_cont(ARRAY[0.25, 0.5, 0.75]) WITHIN GROUP (ORDER BY mna_score)
+            ) AS mna_score,
+            jsonb_build_object(
+                'n', COUNT(mmse_score), 'mean', ROUND(AVG(mmse_score)::NUMERIC, 2), 'min', MIN(mmse_score), 'max', MAX(mmse_score),
+                'quartiles', percentile_cont(ARRAY[0.25, 0.5, 0.75]) WITHIN GROUP (ORDER BY mmse_score)
+            ) AS mmse_score,
+            jsonb_build_object(
+                'n', COUNT(k_mbi_score), 'mean', ROUND(AVG(k_mbi_score)::NUMERIC, 2), 'min', MIN(k_mbi_score), 'max', MAX(k_mbi_score),
+                'quartiles', percentile_cont(ARRAY[0.25, 0.5, 0.75]) WITHIN GROUP (ORDER BY k_mbi_score)
+            ) AS k_mbi_score,
+            jsonb_build_object(
+                'n', COUNT(bmi), 'mean', ROUND(AVG(bmi)::NUMERIC, 2), 'min', MIN(bmi), 'max', MAX(bmi),
+                'quartiles', percentile_cont(ARRAY[0.25, 0.5, 0.75]) WITHIN GROUP (ORDER BY bmi)
+            ) AS bmi,
+            jsonb_build_object(
+                'n', COUNT(intake_rate), 'mean', ROUND(AVG(intake_rate)::NUMERIC, 2), 'min', MIN(intake_rate), 'max', MAX(intake_rate),
+                'quartiles', percentile_cont(ARRAY[0.25, 0.5, 0.75]) WITHIN GROUP (ORDER BY intake_rate)
+            ) AS intake_rate
+        FROM residents
+        GROUP BY GROUPING SETS ((nursing_home_id), (care_grade), (meal_type), ())
+    ),
+    summary AS (
+        SELECT g.dimension, g.grp, v.metric, v.stats
+        FROM grouped g
+        CROSS JOIN LATERAL (VALUES
+            ('mna_score', g.mna_score),
+            ('mmse_score', g.mmse_score),
+            ('k_mbi_score', g.k_mbi_score),
+            ('bmi', g.bmi),
+            ('intake_rate', g.intake_rate)
+        ) v(metric, stats)
+        WHERE (v.stats->>'n')::INTEGER > 0
+    ),
+    -- 지표별 구간 번호 (1부터, 첫 하한보다 작은 값은 1구간, GREATEST는 NULL을 무시하므로 값이 없으면 NULL로 둠)
+    buckets AS (
+        SELECT
+            CASE WHEN mna_score IS NOT NULL THEN GREATEST(width_bucket(mna_score, v_mna_bins), 1) END AS mna_score,
+            CASE WHEN mmse_score IS NOT NULL THEN GREATEST(width_bucket(mmse_score, v_mmse_bins), 1) END AS mmse_score,
+            CASE WHEN k_mbi_score IS NOT NULL THEN GREATEST(width_bucket(k_mbi_score, v_kmbi_bins), 1) END AS k_mbi_score,
+            CASE WHEN bmi IS NOT NULL THEN GREATEST(width_bucket(bmi, v_bmi_bins), 1) END AS bmi,
+            CASE WHEN intake_rate IS NOT NULL THEN GREATEST(width_bucket(intake_rate, v_intake_bins), 1) END AS intake_rate
+        FROM residents
+    ),
+    histograms AS (
+        SELECT
+            CASE
+                WHEN GROUPING(mna_score) = 0 THEN 'mna_score'
+                WHEN GROUPING(mmse_score) = 0 THEN 'mmse_score'
+                WHEN GROUPING(k_mbi_score) = 0 THEN 'k_mbi_score'
+                WHEN GROUPING(bmi) = 0 THEN 'bmi'
+                ELSE 'intake_rate'
+            END AS metric,
+            COALESCE(mna_score, mmse_score, k_mbi_score, bmi, intake_rate) AS bucket,
+            COUNT(*) AS n
+        FROM buckets
+        GROUP BY GROUPING SETS ((mna_score), (mmse_score), (k_mbi_score), (bmi), (intake_rate))
+    )
+    SELECT jsonb_build_object(
+        'version', v_version,
+        'summary', (SELECT COALESCE(jsonb_agg(s), '[]'::JSONB) FROM summary s),
+        'histograms', (SELECT COALESCE(jsonb_agg(h), '[]'::JSONB) FROM histograms h WHERE h.bucket IS NOT NULL)
+    ) INTO v_result;
+    RETURN v_result;
+END;
+$$;
+
+-- 고령친화우수식품 제품 목록 (만족도 조사표 3페이지에 display_order 순서로 표시, active가 FALSE면 숨김)
+-- 제품을 추가하거나 내릴 때는 이 테이블의 행만 바꾸면 됩니다. (앱은 제품 목록을 5분간 캐시)
+-- product_1 ~ product_4는 satisfaction_survey의 이전 product_N_* 컬럼과 같은 이름입니다.
+CREATE TABLE IF NOT EXISTS products (
+    product_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    short_name TEXT,
+    display_order INTEGER NOT NULL DEFAULT 0,
+    active BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+INSERT INTO products (product_id, name, short_name, display_order) VALUES
+    ('product_1', '고운오징어젓', '고운오징어젓', 1),
+    ('product_2', '화덕에 미치다 500도 고등어구이', '화덕에 미치다', 2),
+    ('product_3', '오쉐프 간편 고등어구이', '오쉐프 고등어', 3),
+    ('product_4', '해물동그랑땡 행복한맛남', '해물동그랑땡', 4)
+ON CONFLICT (product_id) DO NOTHING;
+
+-- 제품 평가 응답 (이전 스키마로 만든 데이터베이스에 컬럼 추가, 다시 실행해도 안전)
+-- {"제품 ID": {"taste", "chewing", "swallowing", "satisfaction", "repurchase"}, ...} (각 1~5점)
+ALTER TABLE satisfaction_survey ADD COLUMN IF NOT EXISTS product_evaluations JSONB;
+
+-- 제품 평가 (satisfaction_survey.product_evaluations를 어르신·제품마다 한 행으로 펼친 테이블)
+-- satisfaction_survey에 저장/삭제되면 트리거가 해당 어르신의 행을 다시 만들거나 지웁니다. (파생 테이블이라 외래키 없음)
+-- 다섯 항목이 모두 1~5점인 평가만 담습니다.
+CREATE TABLE IF NOT EXISTS product_ratings (
+    elderly_id TEXT NOT NULL,
+    product_id TEXT NOT NULL,
+    nursing_home_id TEXT,
+    taste SMALLINT NOT NULL,
+    chewing SMALLINT NOT NULL,
+    swallowing SMALLINT NOT NULL,
+    satisfaction SMALLINT NOT NULL,
+    repurchase SMALLINT NOT NULL,
+    PRIMARY KEY (elderly_id, product_id)
+);
+
+-- 제품별/요양원별 평가 조회를 인덱스만으로 처리
+CREATE INDEX IF NOT EXISTS idx_product_ratings_product
+    ON product_ratings (product_id) INCLUDE (nursing_home_id, taste, chewing, swallowing, satisfaction, repurchase);
+CREATE INDEX IF NOT EXISTS idx_product_ratings_nursing_home ON product_ratings(nursing_home_id, product_id);
+
+-- 요양원·제품별 평가 합계 (refresh_product_ratings가 바뀐 만큼만 더하고 빼서 갱신)
+-- 관리자 대시보드의 제품 순위는 product_ratings 전체를 집계하지 않고 이 작은 테이블만 읽습니다.
+-- nursing_home_id: 요양원이 없는 응답은 ''
+CREATE TABLE IF NOT EXISTS product_rating_totals (
+    nursing_home_id TEXT NOT NULL DEFAULT '',
+    product_id TEXT NOT NULL,
+    responses INTEGER NOT NULL DEFAULT 0,
+    taste_sum INTEGER NOT NULL DEFAULT 0,
+    chewing_sum INTEGER NOT NULL DEFAULT 0,
+    swallowing_sum INTEGER NOT NULL DEFAULT 0,
+    satisfaction_sum INTEGER NOT NULL DEFAULT 0,
+    repurchase_sum INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (nursing_home_id, product_id)
+);
+
+-- satisfaction_survey.product_evaluations에서 만든 제품 평가 행 (제출한 행만, 저장하지 않고 반환만)
+CREATE OR REPLACE FUNCTION survey_product_ratings(p_elderly_ids TEXT[])
+RETURNS SETOF product_ratings
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        s.elderly_id, e.key, s.nursing_home_id,
+        r.taste::SMALLINT, r.chewing::SMALLINT, r.swallowing::SMALLINT, r.satisfaction::SMALLINT, r.repurchase::SMALLINT
+    FROM satisfaction_survey s
+    CROSS JOIN LATERAL jsonb_each(survey_json_object(s.product_evaluations)) e
+    CROSS JOIN LATERAL (
+        SELECT
+            CASE WHEN jsonb_typeof(e.value -> 'taste') = 'number' THEN (e.value ->> 'taste')::NUMERIC END AS taste,
+            CASE WHEN jsonb_typeof(e.value -> 'chewing') = 'number' THEN (e.value ->> 'chewing')::NUMERIC END AS chewing,
+            CASE WHEN jsonb_typeof(e.value -> 'swallowing') = 'number' THEN (e.value ->> 'swallowing')::NUMERIC END AS swallowing,
+            CASE WHEN jsonb_typeof(e.value -> 'satisfaction') = 'number' THEN (e.value ->> 'satisfaction')::NUMERIC END AS satisfaction,
+            CASE WHEN jsonb_typeof(e.value -> 'repurchase') = 'number' THEN (e.value ->> 'repurchase')::NUMERIC END AS repurchase
+        WHERE jsonb_typeof(e.value) = 'object'
+    ) r
+    WHERE s.elderly_id = ANY(p_elderly_ids) AND s.submitted_at IS NOT NULL
+      AND r.taste IN (1, 2, 3, 4, 5) AND r.chewing IN (1, 2, 3, 4, 5) AND r.swallowing IN (1, 2, 3, 4, 5)
+      AND r.satisfaction IN (1, 2, 3, 4, 5) AND r.repurchase IN (1, 2, 3, 4, 5);
+$$;
+
+-- 어르신별 제품 평가 행과 평가 합계 다시 만들기 (p_elderly_ids가 NULL이면 전체), 만든 평가 행 수를 반환합니다.
+-- 합계는 새 행과 지울 행의 차이를 한 문장에서 요양원·제품 순서로 더하므로
+-- 같은 요양원의 동시 제출이 합계 행을 서로 다른 순서로 잠그지 않습니다.
+-- 트리거로 한 명씩 호출되므로 계획은 한 번만 세워 재사용합니다. (매번 세우면 저장 1건당 약 1ms 추가)
+CREATE OR REPLACE FUNCTION refresh_product_ratings(p_elderly_ids TEXT[] DEFAULT NULL)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SET plan_cache_mode = force_generic_plan
+AS $$
+DECLARE
+    v_created INTEGER;
+BEGIN
+    IF p_elderly_ids IS NULL THEN
+        p_elderly_ids := ARRAY(SELECT elderly_id FROM satisfaction_survey UNION SELECT elderly_id FROM product_ratings);
+    END IF;
+
+    -- 평가 합계: 새 행은 더하고 지울 행은 뺌
+    INSERT INTO product_rating_totals AS t (
+        nursing_home_id, product_id, responses,
+        taste_sum, chewing_sum, swallowing_sum, satisfaction_sum, repurchase_sum
+    )
+    SELECT
+        COALESCE(d.nursing_home_id, ''),
+        d.product_id,
+        SUM(d.sign),
+        SUM(d.sign * d.taste),
+        SUM(d.sign * d.chewing),
+        SUM(d.sign * d.swallowing),
+        SUM(d.sign * d.satisfaction),
+        SUM(d.sign * d.repurchase)
+    FROM (
+        SELECT 1 AS sign, f.* FROM survey_product_ratings(p_elderly_ids) f
+        UNION ALL
+        SELECT -1, r.* FROM product_ratings r WHERE r.elderly_id = ANY(p_elderly_ids)
+    ) d
+    GROUP BY COALESCE(d.nursing_home_id, ''), d.product_id
+    ORDER BY 1, 2
+    ON CONFLICT (nursing_home_id, product_id) DO UPDATE SET
+        responses = t.responses + EXCLUDED.responses,
+        taste_sum = t.taste_sum + EXCLUDED.taste_sum,
+        chewing_sum = t.chewing_sum + EXCLUDED.chewing_sum,
+        swallowing_sum = t.swallowing_sum + EXCLUDED.swallowing_sum,
+        satisfaction_sum = t.satisfaction_sum + EXCLUDED.satisfaction_sum,
+        repurchase_sum = t.repurchase_sum + EXCLUDED.repurchase_sum;
+
+    DELETE FROM product_ratings WHERE elderly_id = ANY(p_elderly_ids);
+    INSERT INTO product_ratings SELECT * FROM survey_product_ratings(p_elderly_ids);
+    GET DIAGNOSTICS v_created = ROW_COUNT;
+
+    RETURN v_created;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION sync_product_ratings()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM refresh_product_ratings(ARRAY[NEW.elderly_id]);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM refresh_product_ratings(ARRAY[OLD.elderly_id]);
+    -- 제품 평가와 관계없는 항목만 부분 저장한 경우는 건너뜀
+    ELSIF NEW.product_evaluations IS DISTINCT FROM OLD.product_evaluations
+       OR NEW.submitted_at IS DISTINCT FROM OLD.submitted_at
+       OR NEW.nursing_home_id IS DISTINCT FROM OLD.nursing_home_id
+       OR NEW.elderly_id IS DISTINCT FROM OLD.elderly_id THEN
+        PERFORM refresh_product_ratings(ARRAY[OLD.elderly_id, NEW.elderly_id]);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- 이전 product_N_* 컬럼의 평가를 product_evaluations로 옮기기 (아직 옮기지 않은 행만, 다시 실행해도 안전)
+-- 행을 JSONB로 바꿔 꺼내므로 이전 컬럼이 없는 데이터베이스에서도 실행됩니다.
+-- 어르신마다 트리거가 돌지 않도록 트리거를 지운 상태에서 옮기고, 평가 행은 아래에서 한 번에 만듭니다.
+DROP TRIGGER IF EXISTS trg_product_ratings ON satisfaction_survey;
+UPDATE satisfaction_survey s
+SET product_evaluations = (
+    SELECT jsonb_object_agg(p.product_id, jsonb_build_object(
+        'taste', j.r -> (p.product_id || '_taste'),
+        'chewing', j.r -> (p.product_id || '_chewing'),
+        'swallowing', j.r -> (p.product_id || '_swallowing'),
+        'satisfaction', j.r -> (p.product_id || '_satisfaction'),
+        'repurchase', j.r -> (p.product_id || '_repurchase')
+    ))
+    FROM products p
+    CROSS JOIN LATERAL (SELECT to_jsonb(s) AS r) j
+    WHERE jsonb_typeof(j.r -> (p.product_id || '_taste')) = 'number'
+)
+WHERE s.product_evaluations IS NULL
+  AND jsonb_strip_nulls(to_jsonb(s)) ?| ARRAY(SELECT product_id || '_taste' FROM products);
+
+CREATE TRIGGER trg_product_ratings
+AFTER INSERT OR UPDATE OR DELETE ON satisfaction_survey
+FOR EACH ROW EXECUTE FUNCTION sync_product_ratings();
+
+-- 옮긴 평가와 트리거 이전에 저장된 평가 펼치기 (아직 펼치지 않은 어르신만, 다시 실행해도 안전)
+SELECT refresh_product_ratings(ARRAY(
+    SELECT s.elderly_id FROM satisfaction_survey s
+    WHERE s.product_evaluations IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM product_ratings r WHERE r.elderly_id = s.elderly_id)
+));
+
+-- 제출 완료 표시 이전에 펼친 작성 중인 어르신의 평가 지우기 (합계에서도 빠짐, 다시 실행해도 안전)
+SELECT refresh_product_ratings(ARRAY(
+    SELECT DISTINCT r.elderly_id FROM product_ratings r
+    JOIN satisfaction_survey s ON s.elderly_id = r.elderly_id
+    WHERE s.submitted_at IS NULL
+));
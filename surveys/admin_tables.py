@@ -0,0 +1,82 @@
+"""관리자 대시보드 목록 표 (키셋 페이지네이션)
+
+현재 화면에 보이는 페이지만 조회합니다. OFFSET 대신 마지막 키 이후의 행을 읽으므로
+테이블이 커져도 페이지 조회 시간이 일정합니다.
+"""
+import streamlit as st
+import pandas as pd
+
+PAGE_SIZE_OPTIONS = [25, 50, 100]
+
+def fetch_page(supabase, table_name, columns, page_size, after=None, key_column='id', filters=None):
+    """key_column 이 after 보다 큰 행을 key_column 순으로 page_size개 조회
+
+    (행 목록, 다음 페이지 존재 여부, 추정 전체 행 수) 튜플을 반환합니다.
+    """
+    query = supabase.table(table_name).select(columns, count='estimated')
+    for column, value in (filters or {}).items():
+        query = query.eq(column, value)
+    if after is not None:
+        query = query.gt(key_column, after)
+    response = query.order(key_column).limit(page_size + 1).execute()
+    rows = response.data or []
+    return rows[:page_size], len(rows) > page_size, getattr(response, 'count', None)
+
+def paginated_table(supabase, state_key, table_name, columns, filters=None,
+                    key_column='id', cache=None, empty_message="데이터가 없습니다.", count_label="전체 수"):
+    """페이지 이동 버튼이 있는 목록 표
+
+    cache(LRUTTLCache)를 주면 같은 페이지는 캐시에서 읽습니다.
+    """
+    cursors_key = f"{state_key}_cursors"
+    filters_key = f"{state_key}_filters"
+    filters = filters or {}
+    
+    # 필터가 바뀌면 첫 페이지로
+    if st.session_state.get(filters_key) != filters or cursors_key not in st.session_state:
+        st.session_state[filters_key] = filters
+        st.session_state[cursors_key] = [None]
+    
+    cursors = st.session_state[cursors_key]
+    page_size = st.selectbox("페이지당 행 수", PAGE_SIZE_OPTIONS, index=1, key=f"{state_key}_page_size")
+    
+    page_key = ('page', table_name, tuple(sorted(filters.items())), cursors[-1], page_size)
+    page = cache.get(page_key) if cache is not None else None
+    if page is None:
+        page = fetch_page(supabase, table_name, columns, page_size, cursors[-1], key_column, filters)
+        if cache is not None:
+            cache.set(page_key, page)
+    rows, has_next, total = page
+    
+    if not rows:
+        st.info(empty_message)
+        return
+    
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if len(cursors) > 1 and st.button("⬅️ 이전 페이지", key=f"{state_key}_prev", use_container_width=True):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        caption = f"페이지 {len(cursors)}"
+        if total is not None:
+            caption += f" · {count_label} 약 {total:,}"
+        st.caption(caption)
+    with col3:
+        if has_next and st.button("다음 페이지 ➡️", key=f"{state_key}_next", use_container_width=True):
+            cursors.append(rows[-1][key_column])
+            st.rerun()
+
+def facility_filter(nursing_homes, state_key):
+    """요양원 선택 필터 (선택 안 하면 빈 dict)"""
+    options = [None] + [row['id'] for row in nursing_homes]
+    names = {row['id']: row.get('name') for row in nursing_homes}
+    selected = st.selectbox(
+        "요양원",
+        options,
+        format_func=lambda value: "전체" if value is None else f"{value} ({names.get(value) or '-'})",
+        key=f"{state_key}_facility"
+    )
+    return {'nursing_home_id': selected} if selected else {}
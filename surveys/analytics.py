@@ -0,0 +1,156 @@
+"""코호트 분석 (요양원/장기요양등급/식사 유형별 MNA-SF, MMSE-K, K-MBI, BMI, 섭취율 분포)
+
+집계는 서버 함수 cohort_analytics가 어르신 한 명당 한 행으로 한 번에 계산하고,
+앱은 요양원별 결과를 데이터 버전(기초/영양 조사표의 최신 submitted_at과 제출한 행 수)과 함께 캐시합니다.
+- recheck초 안의 재조회: 서버 호출 없이 캐시 사용
+- 그 뒤의 재조회: 캐시된 버전을 보내 바뀌지 않았으면 버전만 받음 (집계하지 않음)
+- 응답이 저장·삭제되어 버전이 바뀌면 다시 집계
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from surveys.scoring import MNA_BMI_BOUNDS
+
+# 지표: (이름, 히스토그램 구간 하한) - 첫 하한보다 작은 값은 첫 구간, 마지막 구간은 상한 없음
+COHORT_METRICS = {
+    'mna_score': ("MNA-SF 점수", tuple(range(0, 15))),
+    'mmse_score': ("MMSE-K 점수", tuple(range(0, 30, 3))),
+    'k_mbi_score': ("K-MBI 점수", tuple(range(0, 100, 10))),
+    'bmi': ("BMI", (0,) + MNA_BMI_BOUNDS + (25, 30)),
+    'intake_rate': ("섭취율(%)", tuple(range(0, 100, 10)))
+}
+
+# 집계 기준 ('all'은 조회 범위 전체)
+COHORT_DIMENSIONS = {
+    'facility': "요양원",
+    'care_grade': "장기요양등급",
+    'meal_type': "식사 유형"
+}
+
+QUARTILES = (0.25, 0.5, 0.75)
+
+def cohort_bins():
+    """cohort_analytics의 p_bins 인자 {지표: [구간 하한, ...]}"""
+    return {metric: list(bins) for metric, (_, bins) in COHORT_METRICS.items()}
+
+def bucket_labels(bins):
+    """구간 이름 (예: 0~10, ..., 90~, 폭이 1인 정수 구간은 값 그대로)"""
+    labels = []
+    for i, low in enumerate(bins):
+        if i + 1 == len(bins):
+            labels.append(f"{low}~")
+        elif bins[i + 1] - low == 1:
+            labels.append(str(low))
+        else:
+            labels.append(f"{low}~{bins[i + 1]}")
+    return labels
+
+def analytics_key(nursing_home_id):
+    return ('analytics', nursing_home_id)
+
+def load_cohort_analytics(cache, supabase, nursing_home_id=None, recheck=30.0, clock=time.monotonic):
+    """코호트 분석 결과 조회 (요양원별 캐시, nursing_home_id가 None이면 전체)
+    
+    반환: {'version', 'summary', 'histograms', 'checked'(마지막 확인 시각)}
+    """
+    key = analytics_key(nursing_home_id)
+    entry = cache.get(key)
+    now = clock()
+    if entry is not None and now - entry['checked'] < recheck:
+        return entry
+    
+    response = supabase.rpc('cohort_analytics', {
+        'p_nursing_home_id': nursing_home_id,
+        'p_version': entry['version'] if entry else None,
+        'p_bins': cohort_bins()
+    }).execute()
+    data = response.data or {}
+    if entry is not None and data.get('unchanged'):
+        entry = dict(entry, checked=now)
+    else:
+        entry = {
+            'version': data.get('version'),
+            'summary': data.get('summary') or [],
+            'histograms': data.get('histograms') or [],
+            'checked': now
+        }
+    cache.set(key, entry)
+    return entry
+
+def summary_frame(result, metric, dimension='facility'):
+    """지표 하나의 집계 기준별 요약 DataFrame (grp, n, mean, min, p25, median, p75, max)"""
+    rows = []
+    for row in result['summary']:
+        if row['metric'] != metric or row['dimension'] != dimension:
+            continue
+        stats = row['stats']
+        quartiles = stats.get('quartiles') or [None] * len(QUARTILES)
+        rows.append({
+            'grp': row['grp'],
+            'n': stats['n'],
+            'mean': stats['mean'],
+            'min': stats['min'],
+            'p25': quartiles[0],
+            'median': quartiles[1],
+            'p75': quartiles[2],
+            'max': stats['max']
+        })
+    columns = ['grp', 'n', 'mean', 'min', 'p25', 'median', 'p75', 'max']
+    frame = pd.DataFrame(rows, columns=columns)
+    frame[columns[2:]] = frame[columns[2:]].astype(float).round(2)
+    return frame.sort_values('grp', ignore_index=True)
+
+def histogram_frame(result, metric):
+    """지표 하나의 구간별 인원 DataFrame (구간 이름 인덱스, 빈 구간은 0)"""
+    bins = COHORT_METRICS[metric][1]
+    counts = [0] * len(bins)
+    for row in result['histograms']:
+        if row['metric'] == metric and 1 <= row['bucket'] <= len(bins):
+            counts[row['bucket'] - 1] = row['n']
+    return pd.DataFrame({"인원": counts}, index=bucket_labels(bins))
+
+def metric_stats(values):
+    """값 목록 → cohort_analytics의 지표 요약 {n, mean, min, max, quartiles} (값이 없으면 None)"""
+    values = np.asarray([value for value in values if value is not None], dtype=float)
+    if not len(values):
+        return None
+    return {
+        'n': int(len(values)),
+        'mean': round(float(values.mean()), 2),
+        'min': float(values.min()),
+        'max': float(values.max()),
+        # percentile_cont와 같은 선형 보간
+        'quartiles': [float(q) for q in np.quantile(values, QUARTILES)]
+    }
+
+def summarize_residents(residents, bins):
+    """어르신별 지표 행 목록 → cohort_analytics 결과의 summary/histograms (서버 함수가 없는 저장소용)
+    
+    residents: [{'nursing_home_id', 'care_grade', 'meal_type', 지표...}, ...] (등급/식사 유형이 없으면 '미입력')
+    """
+    groups = {('all', None): residents}
+    for dimension in COHORT_DIMENSIONS:
+        column = 'nursing_home_id' if dimension == 'facility' else dimension
+        for row in residents:
+            groups.setdefault((dimension, row[column]), []).append(row)
+    
+    summary = []
+    for (dimension, grp), rows in groups.items():
+        for metric in COHORT_METRICS:
+            stats = metric_stats(row[metric] for row in rows)
+            if stats:
+                summary.append({'dimension': dimension, 'grp': grp, 'metric': metric, 'stats': stats})
+    
+    histograms = []
+    for metric in COHORT_METRICS:
+        lower_bounds = np.asarray(bins.get(metric) or [], dtype=float)
+        values = np.asarray([row[metric] for row in residents if row[metric] is not None], dtype=float)
+        if not len(values):
+            continue
+        # width_bucket과 같은 구간 번호 (1부터, 첫 하한보다 작은 값은 1)
+        buckets = np.maximum(np.searchsorted(lower_bounds, values, side='right'), 1)
+        for bucket, count in zip(*np.unique(buckets, return_counts=True)):
+            histograms.append({'metric': metric, 'bucket': int(bucket), 'n': int(count)})
+    return {'summary': summary, 'histograms': histograms}
@@ -1,583 +1,90 @@
+"""기초 조사표 (건강설문 조사표)
+
+문항과 페이지는 surveys/questionnaires/basic.json에 정의되어 있고 surveys.survey_engine이 표시/저장합니다.
+이 모듈은 점수 계산이 필요한 블록(BMI, IPAQ-SF/MNA-SF/K-MBI/MMSE-K 요약)과 저장 형식 변환만 담당합니다.
+"""
 import streamlit as st
 import json
-from datetime import datetime
-from zoneinfo import ZoneInfo
-
-KST = ZoneInfo('Asia/Seoul')
+from collections import defaultdict
 
-def get_kst_now():
-    """현재 한국 시간 반환"""
-    return datetime.now(KST).strftime('%Y-%m-%d %H:%M:%S')
-
-def show_basic_survey(supabase, elderly_id, surveyor_id, nursing_home_id):
-    st.title("📝 1. 기초 조사표 (건강설문 조사표)")
-    
-    # 진행 상태 초기화
-    if 'basic_page' not in st.session_state:
-        st.session_state.basic_page = 1
-    
-    # 기존 데이터 불러오기
-    if 'basic_data' not in st.session_state:
-        try:
-            response = supabase.table('basic_survey').select('*').eq('elderly_id', elderly_id).execute()
-            if response.data:
-                st.session_state.basic_data = response.data[0]
-            else:
-                st.session_state.basic_data = {}
-        except:
-            st.session_state.basic_data = {}
-    
-    # 페이지 진행 표시 (7페이지에서 9페이지로 증가)
-    total_pages = 9
-    st.progress(st.session_state.basic_page / total_pages)
-    st.caption(f"페이지 {st.session_state.basic_page} / {total_pages}")
-    
-    # 페이지별 내용
-    if st.session_state.basic_page == 1:
-        show_page1()
-    elif st.session_state.basic_page == 2:
-        show_page2()
-    elif st.session_state.basic_page == 3:
-        show_page3()
-    elif st.session_state.basic_page == 4:
-        show_page4()
-    elif st.session_state.basic_page == 5:
-        show_page5_ipaq()  # 신체 활동 수준 조사 (IPAQ-SF)
-    elif st.session_state.basic_page == 6:
-        show_page6_mna()  # 영양 상태 평가 (MNA-SF)
-    elif st.session_state.basic_page == 7:
-        show_page7_kmbi()  # K-MBI 평가
-    elif st.session_state.basic_page == 8:
-        show_page8_mmse()  # MMSE-K 평가
-    elif st.session_state.basic_page == 9:
-        show_page9(supabase, elderly_id, surveyor_id, nursing_home_id)  # 시설 특성 및 제출
+from surveys.schema_registry import get_table_columns
+from surveys.questionnaire import choice_index, field_options
+from surveys.survey_engine import get_kst_now, show_survey, survey_block, survey_payload
+from surveys.scoring import (
+    KMBI_FIELDS, KMBI_SCORE_MAPPING, MNA_STATUS, MNA_THRESHOLDS, body_mass_index, classify,
+    derived_scores, mmse_cutoff, mna_bmi_category, option_score, score_ipaq, score_kmbi,
+    score_mmse, score_mna
+)
 
-def show_page1():
-    """1페이지: 인구통계학적 특성"""
-    st.subheader("인구통계학적 특성")
-    
-    data = st.session_state.basic_data
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        gender = st.radio(
-            "1. 귀하의 성별은 선택해 주십시오",
-            options=["남자", "여자"],
-            index=0 if data.get('gender') == "남자" else 1 if data.get('gender') == "여자" else 0,
-            key="gender"
-        )
-        
-        age = st.number_input(
-            "2. 귀하의 연령을 작성해 주십시오(만 나이)",
-            min_value=0,
-            max_value=120,
-            value=int(data.get('age', 0)) if data.get('age') else 0,
-            key="age"
-        )
-        
-        care_grade = st.selectbox(
-            "3. 다음 중 귀하가 받으신 장기요양등급을 선택해 주십시오",
-            options=["1등급", "2등급", "3등급", "4등급 이상"],
-            index=0,
-            key="care_grade"
-        )
-    
-    with col2:
-        residence_duration = st.selectbox(
-            "4. 귀하가 현재 요양시설에 거주하신 기간은 얼마나 되셨습니까?",
-            options=["1년 미만", "1년 이상 ~ 3년 미만", "3년 이상 ~ 5년 미만", "5년 이상 ~ 10년 미만", "10년 이상"],
-            index=0,
-            key="residence_duration"
-        )
-        
-        education = st.selectbox(
-            "5. 귀하의 최종 학력을 선택해 주십시오",
-            options=["무학", "초등학교 졸업", "중학교 졸업", "고등학교 졸업", "대학교(전문대 포함) 졸업 이상"],
-            index=0,
-            key="education"
-        )
-        
-        drinking_smoking = st.selectbox(
-            "6. 귀하는 음주 및 흡연을 하고 계십니까?",
-            options=["둘 다 안함", "과거에 음주를 했음", "과거에 흡연을 했음", "현재 음주하고 있음", "현재 흡연하고 있음", "둘 다 하고 있음"],
-            index=0,
-            key="drinking_smoking"
-        )
-    
-    # 데이터 저장
-    st.session_state.basic_data.update({
-        'gender': gender,
-        'age': age,
-        'care_grade': care_grade,
-        'residence_duration': residence_duration,
-        'education': education,
-        'drinking_smoking': drinking_smoking
-    })
-    
-    navigation_buttons()
+# 질환 / 복용 약물 선택지 (7, 8번 문항, 응답 내보내기에서 선택지별 컬럼으로 펼침)
+DISEASE_OPTIONS = list(field_options('basic', 'diseases'))
+MEDICATION_OPTIONS = list(field_options('basic', 'medications'))
 
-def show_page2():
-    """2페이지: 질환 정보"""
-    st.subheader("질환 정보")
-    
-    data = st.session_state.basic_data
-    
-    st.write("**7. 귀하가 현재 보유하고 계신 질환을 모두 선택해 주십시오**")
-    
-    disease_options = [
-        "없음", "고혈압", "당뇨병", "고지혈증", "심혈관 질환(심근경색, 협심증, 부정맥 등)",
-        "뇌혈관 질환(뇌졸중, 뇌경색, 뇌출혈 등)", "갑상선 질환", "골다공증", "골관절염/류마티스 관절염",
-        "암", "만성 폐쇄성 폐질환", "신장 질환", "간 질환", "위장 질환", "빈혈", "치매",
-        "파킨슨병", "우울증", "기타"
-    ]
-    
-    existing_diseases = data.get('diseases', [])
-    if isinstance(existing_diseases, str):
-        existing_diseases = json.loads(existing_diseases) if existing_diseases else []
-    
-    col1, col2, col3 = st.columns(3)
-    selected_diseases = []
-    
-    for i, disease in enumerate(disease_options):
-        with [col1, col2, col3][i % 3]:
-            if st.checkbox(disease, value=disease in existing_diseases, key=f"disease_{i}"):
-                selected_diseases.append(disease)
-    
-    if "기타" in selected_diseases:
-        other_disease = st.text_input("기타 질환 입력", key="other_disease")
-        if other_disease:
-            selected_diseases.append(f"기타: {other_disease}")
-    
-    st.markdown("---")
-    
-    st.write("**8. 현재 복용 중인 약물 (복수 선택 가능)**")
-    
-    medication_options = [
-        "복용하지 않음", "고혈압약", "당뇨병약", "고지혈증약", "항혈전제", "심장약",
-        "갑상선약", "골다공증약", "진통소염제", "항암제", "천식약",
-        "신장약", "간약", "위장약", "철분제", "치매약",
-        "파킨슨약", "항우울제", "기타"
-    ]
-    
-    existing_medications = data.get('medications', [])
-    if isinstance(existing_medications, str):
-        existing_medications = json.loads(existing_medications) if existing_medications else []
-    
-    col1, col2, col3 = st.columns(3)
-    selected_medications = []
-    
-    for i, medication in enumerate(medication_options):
-        with [col1, col2, col3][i % 3]:
-            if st.checkbox(medication, value=medication in existing_medications, key=f"med_{i}"):
-                selected_medications.append(medication)
-    
-    if "기타" in selected_medications:
-        other_medication = st.text_input("기타 약물 입력", key="other_medication")
-        if other_medication:
-            selected_medications.append(f"기타: {other_medication}")
-    
-    st.markdown("---")
-    
-    medication_count = st.selectbox(
-        "9. 약물 복용 개수",
-        options=["1개", "2개", "3개", "4개 이상"],
-        index=0,
-        key="medication_count"
-    )
-    
-    # 데이터 저장
-    st.session_state.basic_data.update({
-        'diseases': json.dumps(selected_diseases, ensure_ascii=False),
-        'medications': json.dumps(selected_medications, ensure_ascii=False),
-        'medication_count': medication_count
-    })
-    
-    navigation_buttons()
-
-def show_page3():
-    """3페이지: 식사 관련 특성"""
-    st.subheader("식사 관련 특성")
-    
-    data = st.session_state.basic_data
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        chewing_difficulty = st.radio(
-            "10. 귀하는 음식을 씹는 데 어려움이 있습니까?",
-            options=["예", "아니오"],
-            index=0 if data.get('chewing_difficulty') == True else 1,
-            key="chewing_difficulty"
-        )
-        
-        swallowing_difficulty = st.radio(
-            "11. 귀하는 음식을 삼키는 데 어려움이 있습니까?",
-            options=["예", "아니오"],
-            index=0 if data.get('swallowing_difficulty') == True else 1,
-            key="swallowing_difficulty"
-        )
-        
-        food_preparation_method = st.selectbox(
-            "12. 씹기 또는 삼키기에 어려움이 있다면, 귀하가 해당하는 음식 섭취 방법을 선택해 주십시오",
-            options=["어렵지 않음", "일반식", "잘게 썬 음식", "갈은 음식", "믹서 음식(유동식)", "기타"],
-            index=0,
-            key="food_preparation_method"
-        )
-    
-    with col2:
-        eating_independence = st.selectbox(
-            "13. 귀하는 평소 식사하실 때 어떻게 식사하십니까?",
-            options=["스스로 식사할 수 있음", "요양보호사 등의 부분적인 도움 필요", "요양보호사 등의 전적인 도움 필요"],
-            index=0,
-            key="eating_independence"
-        )
-        
-        meal_type = st.selectbox(
-            "14. 귀하는 평소 식사하실 때 어떤 형태의 식사를 드십니까?",
-            options=["일반식", "다진식", "연하식", "기타"],
-            index=0,
-            key="meal_type"
-        )
-    
-    # 데이터 저장
-    st.session_state.basic_data.update({
-        'chewing_difficulty': chewing_difficulty == "예",
-        'swallowing_difficulty': swallowing_difficulty == "예",
-        'food_preparation_method': food_preparation_method,
-        'eating_independence': eating_independence,
-        'meal_type': meal_type
-    })
-    
-    navigation_buttons()
+def show_basic_survey(supabase, elderly_id, surveyor_id, nursing_home_id, drafts=None):
+    show_survey('basic', supabase, elderly_id, surveyor_id, nursing_home_id, drafts)
 
-def show_page4():
-    """4페이지: 기본 건강 측정치"""
-    st.subheader("기본 건강 측정치")
-    
-    data = st.session_state.basic_data
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        height = st.number_input(
-            "15. 신장 (cm)",
-            min_value=0.0,
-            max_value=250.0,
-            value=float(data.get('height', 0)) if data.get('height') else 0.0,
-            step=0.1,
-            key="height"
-        )
-        
-        weight = st.number_input(
-            "16. 체중 (kg)",
-            min_value=0.0,
-            max_value=200.0,
-            value=float(data.get('weight', 0)) if data.get('weight') else 0.0,
-            step=0.1,
-            key="weight"
-        )
-        
-        waist = st.number_input(
-            "17. 허리둘레 (cm)",
-            min_value=0.0,
-            max_value=200.0,
-            value=float(data.get('waist_circumference', 0)) if data.get('waist_circumference') else 0.0,
-            step=0.1,
-            key="waist"
-        )
-        
-        # BMI 자동 계산
-        if height > 0 and weight > 0:
-            bmi = weight / ((height / 100) ** 2)
-            st.info(f"BMI: {bmi:.2f} kg/m²")
-    
-    with col2:
-        systolic_bp = st.number_input(
-            "18. 수축기 혈압 (mmHg)",
-            min_value=0,
-            max_value=300,
-            value=int(data.get('systolic_bp', 0)) if data.get('systolic_bp') else 0,
-            key="systolic_bp"
-        )
-        
-        diastolic_bp = st.number_input(
-            "19. 이완기 혈압 (mmHg)",
-            min_value=0,
-            max_value=200,
-            value=int(data.get('diastolic_bp', 0)) if data.get('diastolic_bp') else 0,
-            key="diastolic_bp"
-        )
-    
-    # 데이터 저장
-    st.session_state.basic_data.update({
-        'height': height,
-        'weight': weight,
-        'waist_circumference': waist,
-        'systolic_bp': systolic_bp,
-        'diastolic_bp': diastolic_bp
-    })
-    
-    navigation_buttons()
+@survey_block('bmi')
+def show_bmi(context):
+    """4페이지: BMI 자동 계산"""
+    bmi = body_mass_index(context.data.get('height'), context.data.get('weight'))
+    if bmi is not None:
+        st.info(f"BMI: {bmi:.2f} kg/m²")
 
-def show_page5_ipaq():
-    """5페이지: 신체 활동 수준 조사 (IPAQ-SF)"""
-    st.subheader("신체 활동 수준 조사 (IPAQ-SF)")
-    
-    st.info("📝 지난 7일 동안의 신체 활동에 대해 응답해주세요.")
-    
-    data = st.session_state.basic_data
-    
-    st.markdown("### 1. 격렬한 신체 활동")
-    st.caption("예: 무거운 물건 들기, 땅 파기, 에어로빅, 빠른 자전거 타기 등")
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        vigorous_days = st.number_input(
-            "지난 7일 동안 격렬한 신체 활동을 10분 이상 한 날은 며칠입니까?",
-            min_value=0,
-            max_value=7,
-            value=int(data.get('vigorous_activity_days', 0)) if data.get('vigorous_activity_days') else 0,
-            key="vigorous_days"
-        )
-    
-    with col2:
-        vigorous_time = st.number_input(
-            "그러한 날 중 하루에 보통 얼마나 많은 시간을 격렬한 신체 활동을 하는데 보냈습니까? (분)",
-            min_value=0,
-            max_value=1440,
-            value=int(data.get('vigorous_activity_time', 0)) if data.get('vigorous_activity_time') else 0,
-            key="vigorous_time"
-        )
-    
-    st.markdown("---")
-    st.markdown("### 2. 중간 정도의 신체 활동")
-    st.caption("예: 가벼운 물건 나르기, 보통 속도의 자전거 타기, 복식 테니스 등 (걷기는 제외)")
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        moderate_days = st.number_input(
-            "지난 7일 동안 중간 정도의 신체 활동을 10분 이상 한 날은 며칠입니까?",
-            min_value=0,
-            max_value=7,
-            value=int(data.get('moderate_activity_days', 0)) if data.get('moderate_activity_days') else 0,
-            key="moderate_days"
-        )
-    
-    with col2:
-        moderate_time = st.number_input(
-            "그러한 날 중 하루에 보통 얼마나 많은 시간을 중간 정도의 신체 활동을 하는데 보냈습니까? (분)",
-            min_value=0,
-            max_value=1440,
-            value=int(data.get('moderate_activity_time', 0)) if data.get('moderate_activity_time') else 0,
-            key="moderate_time"
-        )
-    
-    st.markdown("---")
-    st.markdown("### 3. 걷기")
-    st.caption("직장에서, 집에서, 장소 간 이동, 여가 시간의 모든 걷기를 포함")
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        walking_days = st.number_input(
-            "지난 7일 동안 10분 이상 걸은 날은 며칠입니까?",
-            min_value=0,
-            max_value=7,
-            value=int(data.get('walking_days', 0)) if data.get('walking_days') else 0,
-            key="walking_days"
-        )
-    
-    with col2:
-        walking_time = st.number_input(
-            "그러한 날 중 하루에 보통 얼마나 많은 시간을 걷는데 보냈습니까? (분)",
-            min_value=0,
-            max_value=1440,
-            value=int(data.get('walking_time', 0)) if data.get('walking_time') else 0,
-            key="walking_time"
-        )
-    
-    st.markdown("---")
-    st.markdown("### 4. 앉아서 보낸 시간")
-    
-    sitting_time = st.number_input(
-        "지난 7일 동안 평일 하루에 앉아서 보낸 시간은 얼마나 됩니까? (분)",
-        min_value=0,
-        max_value=1440,
-        value=int(data.get('sitting_time', 0)) if data.get('sitting_time') else 0,
-        key="sitting_time",
-        help="직장, 집, 학교에서 공부/독서, TV 시청, 친구 방문 등 앉아서 보낸 모든 시간 포함"
-    )
-    
-    # 데이터 저장
-    st.session_state.basic_data.update({
-        'vigorous_activity_days': vigorous_days,
-        'vigorous_activity_time': vigorous_time,
-        'moderate_activity_days': moderate_days,
-        'moderate_activity_time': moderate_time,
-        'walking_days': walking_days,
-        'walking_time': walking_time,
-        'sitting_time': sitting_time
-    })
-    
-    # 활동량 계산 및 표시
-    total_vigorous = vigorous_days * vigorous_time * 8.0  # MET
-    total_moderate = moderate_days * moderate_time * 4.0  # MET
-    total_walking = walking_days * walking_time * 3.3  # MET
-    total_met = total_vigorous + total_moderate + total_walking
+@survey_block('ipaq_summary')
+def show_ipaq_summary(context):
+    """5페이지: 활동량 계산 및 표시 (MET-분/주, surveys.scoring)"""
+    ipaq = score_ipaq(context.data)
     
     st.markdown("---")
     st.subheader("📊 신체 활동량 요약")
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("격렬한 활동", f"{total_vigorous:.0f} MET-분/주")
+        st.metric("격렬한 활동", f"{ipaq['vigorous_met']:.0f} MET-분/주")
     with col2:
-        st.metric("중간 활동", f"{total_moderate:.0f} MET-분/주")
+        st.metric("중간 활동", f"{ipaq['moderate_met']:.0f} MET-분/주")
     with col3:
-        st.metric("걷기", f"{total_walking:.0f} MET-분/주")
+        st.metric("걷기", f"{ipaq['walking_met']:.0f} MET-분/주")
     with col4:
-        st.metric("총 활동량", f"{total_met:.0f} MET-분/주")
-    
-    # 활동 수준 분류
-    if total_met >= 3000 or (vigorous_days >= 3 and total_vigorous >= 1500):
-        activity_level = "높음 (High)"
-    elif total_met >= 600 or (vigorous_days >= 3) or (moderate_days + walking_days >= 5 and total_moderate + total_walking >= 600):
-        activity_level = "중간 (Moderate)"
-    else:
-        activity_level = "낮음 (Low)"
-    
-    st.info(f"💪 신체 활동 수준: **{activity_level}**")
+        st.metric("총 활동량", f"{ipaq['total_met']:.0f} MET-분/주")
     
-    navigation_buttons()
+    st.info(f"💪 신체 활동 수준: **{ipaq['level_name']}**")
 
-def show_page6_mna():
-    """6페이지: 영양 상태 평가 (MNA-SF)"""
-    st.subheader("영양 상태 평가 (MNA-SF)")
-    
-    st.info("📝 간이 영양 평가 (Mini Nutritional Assessment - Short Form)")
-    
-    data = st.session_state.basic_data
-    
-    # BMI 가져오기
-    height = data.get('height', 0)
-    weight = data.get('weight', 0)
-    if height and weight and height > 0:
-        bmi = weight / ((height / 100) ** 2)
+@survey_block('mna_bmi_info')
+def show_mna_bmi_info(context):
+    """6페이지: 기초 조사표에 입력한 신장/체중의 BMI"""
+    bmi = body_mass_index(context.data.get('height'), context.data.get('weight'))
+    if bmi is not None:
         st.info(f"📊 기초 조사표 기준 BMI: {bmi:.2f} kg/m²")
-    else:
-        bmi = None
-    
-    st.markdown("### 1. 식욕 감퇴")
-    appetite_change = st.radio(
-        "지난 3개월 동안 식욕부진, 소화 문제, 씹기 또는 삼키기 어려움 등으로 음식 섭취량이 감소했습니까?",
-        options=[
-            "0 = 심하게 감소",
-            "1 = 중등도로 감소",
-            "2 = 감소하지 않음"
-        ],
-        index=int(data.get('mna_appetite_change', 2)),
-        key="mna_appetite_change"
-    )
-    
-    st.markdown("### 2. 체중 감소")
-    weight_change = st.radio(
-        "지난 3개월 동안 체중 감소가 있었습니까?",
-        options=[
-            "0 = 3kg 이상 감소",
-            "1 = 모르겠다",
-            "2 = 1-3kg 감소",
-            "3 = 체중 감소 없음"
-        ],
-        index=int(data.get('mna_weight_change', 3)),
-        key="mna_weight_change"
-    )
-    
-    st.markdown("### 3. 거동")
-    mobility = st.radio(
-        "거동 능력은 어떻습니까?",
-        options=[
-            "0 = 침대나 의자에 묶여있음",
-            "1 = 침대나 의자를 벗어날 수 있으나 외출하지 못함",
-            "2 = 자유롭게 돌아다님"
-        ],
-        index=int(data.get('mna_mobility', 2)),
-        key="mna_mobility"
-    )
-    
-    st.markdown("### 4. 스트레스 또는 급성 질환")
-    stress_illness = st.radio(
-        "지난 3개월 동안 정신적 스트레스 또는 급성 질환을 겪었습니까?",
-        options=[
-            "0 = 예",
-            "2 = 아니오"
-        ],
-        index=0 if data.get('mna_stress_illness') == 0 else 1,
-        key="mna_stress_illness"
-    )
-    
-    st.markdown("### 5. 신경정신학적 문제")
-    neuropsychological = st.radio(
-        "신경정신학적 문제가 있습니까?",
-        options=[
-            "0 = 심한 치매 또는 우울증",
-            "1 = 경도 치매",
-            "2 = 정신적 문제 없음"
-        ],
-        index=int(data.get('mna_neuropsychological_problem', 2)),
-        key="mna_neuropsychological"
-    )
-    
-    st.markdown("### 6. 체질량지수 (BMI)")
-    
+
+@survey_block('mna_bmi')
+def show_mna_bmi(context):
+    """6페이지: MNA-SF BMI 문항 (신장/체중이 있으면 자동 분류, 없으면 직접 선택)"""
+    data = context.data
+    bmi_options = [
+        "0 = BMI가 19 미만",
+        "1 = BMI가 19 이상 21 미만",
+        "2 = BMI가 21 이상 23 미만",
+        "3 = BMI가 23 이상"
+    ]
+    bmi = body_mass_index(data.get('height'), data.get('weight'))
     if bmi:
         # BMI 자동 분류
-        if bmi < 19:
-            bmi_category_default = 0
-            bmi_text = f"0 = BMI가 19 미만 (현재: {bmi:.2f})"
-        elif bmi < 21:
-            bmi_category_default = 1
-            bmi_text = f"1 = BMI가 19 이상 21 미만 (현재: {bmi:.2f})"
-        elif bmi < 23:
-            bmi_category_default = 2
-            bmi_text = f"2 = BMI가 21 이상 23 미만 (현재: {bmi:.2f})"
-        else:
-            bmi_category_default = 3
-            bmi_text = f"3 = BMI가 23 이상 (현재: {bmi:.2f})"
-        
-        st.info(bmi_text)
-        bmi_category = bmi_category_default
+        bmi_category = int(mna_bmi_category(bmi))
+        st.info(f"{bmi_options[bmi_category]} (현재: {bmi:.2f})")
     else:
         bmi_category = st.radio(
             "BMI 분류",
-            options=[
-                "0 = BMI가 19 미만",
-                "1 = BMI가 19 이상 21 미만",
-                "2 = BMI가 21 이상 23 미만",
-                "3 = BMI가 23 이상"
-            ],
+            options=bmi_options,
             index=int(data.get('mna_bmi_category', 3)),
             key="mna_bmi_category_manual"
         )
-    
-    # 점수 계산
-    appetite_score = int(appetite_change.split('=')[0].strip())
-    weight_score = int(weight_change.split('=')[0].strip())
-    mobility_score = int(mobility.split('=')[0].strip())
-    stress_score = int(stress_illness.split('=')[0].strip())
-    neuro_score = int(neuropsychological.split('=')[0].strip())
-    bmi_score = bmi_category if isinstance(bmi_category, int) else int(bmi_category.split('=')[0].strip())
-    
-    total_score = appetite_score + weight_score + mobility_score + stress_score + neuro_score + bmi_score
-    
-    # 데이터 저장
-    st.session_state.basic_data.update({
-        'mna_appetite_change': appetite_score,
-        'mna_weight_change': weight_score,
-        'mna_mobility': mobility_score,
-        'mna_stress_illness': stress_score,
-        'mna_neuropsychological_problem': neuro_score,
-        'mna_bmi_category': bmi_score,
-        'mna_score': total_score
-    })
+    data['mna_bmi_category'] = option_score(bmi_category)
+
+@survey_block('mna_summary')
+def show_mna_summary(context):
+    """6페이지: MNA-SF 총점 계산 (surveys.scoring) 및 결과"""
+    total_score, status = score_mna(context.data)
+    context.data['mna_score'] = total_score
     
     st.markdown("---")
     st.subheader("📊 MNA-SF 결과")
@@ -587,16 +94,7 @@ def show_page6_mna():
         st.metric("총점", f"{total_score}점 / 14점")
     
     with col2:
-        if total_score >= 12:
-            status = "정상 영양 상태"
-            color = "green"
-        elif total_score >= 8:
-            status = "영양불량 위험"
-            color = "orange"
-        else:
-            status = "영양불량"
-            color = "red"
-        
+        color = {"정상 영양 상태": "green", "영양불량 위험": "orange"}.get(status, "red")
         st.markdown(f"### :{color}[{status}]")
     
     st.info("""
@@ -605,85 +103,12 @@ def show_page6_mna():
     - 8-11점: 영양불량 위험
     - 0-7점: 영양불량
     """)
-    
-    navigation_buttons()
 
-def show_page7_kmbi():
-    """
-    페이지 7: K-MBI (한국판 수정 바델 지수) 평가
-    5단계 간편 평가 방식
-    """
-    st.header("📋 7. K-MBI (한국판 수정 바델 지수)")
-    
-    st.info("""
-    **K-MBI 평가 안내**
-    
-    각 항목에 대해 대상자의 현재 수행 능력을 평가해주세요.
-    """)
-    
-    # K-MBI 평가 옵션 (5단계)
-    kmbi_options = [
-        "과제를 수행할 수 없는 경우",
-        "최대의 도움이 필요한 경우",
-        "중등도의 도움이 필요한 경우",
-        "최소한의 도움이 필요하거나 감시가 필요한 경우",
-        "완전히 독립적인 경우"
-    ]
-    
-    # 점수 매핑 (5단계 → 0-4점)
-    score_mapping = {
-        "과제를 수행할 수 없는 경우": 0,
-        "최대의 도움이 필요한 경우": 1,
-        "중등도의 도움이 필요한 경우": 2,
-        "최소한의 도움이 필요하거나 감시가 필요한 경우": 3,
-        "완전히 독립적인 경우": 4
-    }
-    
-    # 11개 K-MBI 평가 항목
-    kmbi_items = [
-        {"name": "개인위생", "description": "세수, 머리 빗기, 칫솔질, 면도 등", "key": "kmbi_1"},
-        {"name": "목욕하기", "description": "목욕 또는 샤워", "key": "kmbi_2"},
-        {"name": "식사하기", "description": "음식을 먹는 동작", "key": "kmbi_3"},
-        {"name": "용변처리", "description": "화장실 사용 및 뒤처리", "key": "kmbi_4"},
-        {"name": "계단 오르기", "description": "계단 오르고 내리기", "key": "kmbi_5"},
-        {"name": "옷 입기", "description": "옷과 신발 착용", "key": "kmbi_6"},
-        {"name": "대변조절", "description": "대변 조절 능력", "key": "kmbi_7"},
-        {"name": "소변조절", "description": "소변 조절 능력", "key": "kmbi_8"},
-        {"name": "보행", "description": "실내외 이동", "key": "kmbi_9"},
-        {"name": "의자차", "description": "휠체어 사용", "key": "kmbi_10"},
-        {"name": "의자/침대 이동", "description": "의자나 침대로의 이동", "key": "kmbi_11"}
-    ]
-    
-    data = st.session_state.basic_data
-    
-    # 각 항목 평가
-    st.subheader("📝 항목별 평가")
-    
-    for idx, item in enumerate(kmbi_items, 1):
-        with st.container():
-            st.markdown(f"### {idx}. {item['name']}")
-            st.caption(f"📌 {item['description']}")
-            
-            current_value = data.get(item['key'], kmbi_options[0])
-            
-            selected = st.radio(
-                f"{item['name']} 수행 수준",
-                options=kmbi_options,
-                index=kmbi_options.index(current_value) if current_value in kmbi_options else 0,
-                key=f"radio_{item['key']}",
-                label_visibility="collapsed",
-                horizontal=False
-            )
-            
-            data[item['key']] = selected
-            st.divider()
-    
-    # 총점 계산 (0-44점 → 100점 만점으로 환산)
-    total_raw_score = sum(score_mapping.get(data.get(item['key'], kmbi_options[0]), 0) 
-                          for item in kmbi_items)
-    
-    # 100점 만점으로 환산 (44점 만점 * 100/44)
-    kmbi_score = round((total_raw_score / 44) * 100, 1)
+@survey_block('kmbi_summary')
+def show_kmbi_summary(context):
+    """7페이지: K-MBI 총점 (0-44점 → 100점 만점으로 환산, surveys.scoring)과 항목별 수행 수준 요약"""
+    data = context.data
+    total_raw_score, kmbi_score, status = score_kmbi(data)
     data['k_mbi_score'] = kmbi_score
     
     # 결과 해석
@@ -698,22 +123,7 @@ def show_page7_kmbi():
         st.metric("환산점수", f"{kmbi_score}/100점")
     
     with col3:
-        if kmbi_score >= 90:
-            status = "독립"
-            status_color = "🟢"
-        elif kmbi_score >= 75:
-            status = "경도 의존"
-            status_color = "🟡"
-        elif kmbi_score >= 60:
-            status = "중등도 의존"
-            status_color = "🟠"
-        elif kmbi_score >= 40:
-            status = "중증 의존"
-            status_color = "🔴"
-        else:
-            status = "완전 의존"
-            status_color = "⚫"
-        
+        status_color = {"독립": "🟢", "경도 의존": "🟡", "중등도 의존": "🟠", "중증 의존": "🔴"}.get(status, "⚫")
         st.metric("의존도", f"{status_color} {status}")
     
     # 상태별 해석
@@ -728,16 +138,14 @@ def show_page7_kmbi():
     **현재 평가**: {kmbi_score}점 - {status}
     """)
     
-    # 항목별 수행 수준 요약
+    # 항목별 수행 수준 요약 (수행 수준 → 항목 이름)
     st.subheader("📋 항목별 수행 수준 요약")
     
-    # 수정된 부분: defaultdict 사용
-    from collections import defaultdict
     level_groups = defaultdict(list)
-    
-    for item in kmbi_items:
-        level = data.get(item['key'], kmbi_options[0])
-        level_groups[level].append(item['name'])
+    items = [context.questionnaire.fields[field] for field in KMBI_FIELDS]
+    for item in items:
+        level = item.options[choice_index(item, data.get(item.field))]
+        level_groups[level].append(item.title)
     
     # 레벨별 항목 표시
     level_colors = {
@@ -748,120 +156,31 @@ def show_page7_kmbi():
         "과제를 수행할 수 없는 경우": "⚫"
     }
     
-    for level in kmbi_options[::-1]:  # 역순으로 표시 (독립 → 의존)
-        if level in level_groups and level_groups[level]:
+    for level in items[0].options[::-1]:  # 역순으로 표시 (독립 → 의존)
+        if level_groups[level]:
             st.markdown(f"{level_colors.get(level, '⚪')} **{level}**: {', '.join(level_groups[level])}")
-    
-    navigation_buttons()
 
-def show_page8_mmse():
-    """8페이지: MMSE-K (간이정신상태검사 한국판) 평가"""
-    st.subheader("MMSE-K (간이정신상태검사 한국판) 평가")
-    
-    st.info("📝 인지기능을 평가합니다. 각 문항에 정답이면 해당 점수를 부여합니다.")
-    
-    data = st.session_state.basic_data
-    
-    # MMSE-K 평가 항목 (11개 영역)
-    mmse_items = {
-        "mmse_time_orientation": {"name": "시간 지남력", "max_score": 5, "questions": [
-            "오늘은 몇 년도입니까?",
-            "몇 월입니까?",
-            "몇 일입니까?",
-            "무슨 요일입니까?",
-            "무슨 계절입니까?"
-        ]},
-        "mmse_place_orientation": {"name": "장소 지남력", "max_score": 5, "questions": [
-            "여기는 무슨 도(시/군)입니까?",
-            "여기는 무슨 시(군/구)입니까?",
-            "여기는 무슨 동(읍/면)입니까?",
-            "여기는 어디입니까? (요양원, 병원 등)",
-            "여기는 무엇을 하는 곳입니까?"
-        ]},
-        "mmse_registration": {"name": "기억등록", "max_score": 3, "questions": [
-            "세 가지 단어 즉시 따라하기 (나무, 자동차, 모자)"
-        ]},
-        "mmse_attention_calculation": {"name": "주의집중 및 계산", "max_score": 5, "questions": [
-            "100에서 7을 계속해서 빼세요 (또는 '삼천리강산'을 거꾸로)"
-        ]},
-        "mmse_recall": {"name": "기억회상", "max_score": 3, "questions": [
-            "아까 세 가지 단어가 무엇이었습니까?"
-        ]},
-        "mmse_naming": {"name": "이름 맞추기", "max_score": 2, "questions": [
-            "이것이 무엇입니까? (연필)",
-            "이것이 무엇입니까? (시계)"
-        ]},
-        "mmse_comprehension": {"name": "3단계 명령", "max_score": 3, "questions": [
-            "오른손으로 종이를 들어서 / 반으로 접어 / 무릎 위에 놓으세요"
-        ]},
-        "mmse_drawing": {"name": "도형 그리기", "max_score": 1, "questions": [
-            "오각형 2개가 겹쳐진 그림 따라 그리기"
-        ]},        
-        "mmse_repetition": {"name": "따라 말하기", "max_score": 1, "questions": [
-            "간장 공장 공장장"
-        ]},        
-        "mmse_reading": {"name": "이해", "max_score": 1, "questions": [
-            "왜 옷은 빨아서 입습니까?"
-        ]},
-        "mmse_writing": {"name": "판단", "max_score": 1, "questions": [
-            "길에서 주민등록증을 주웠을 때 어떻게 하면 쉽게 주인에게 돌려줄 수 있습니까?"
-        ]}
-    }
-    
-    total_score = 0
-    
-    # 각 영역별 평가
-    for key, item in mmse_items.items():
-        st.markdown(f"### {item['name']}")
-        st.caption(f"💡 최대 {item['max_score']}점")
-        
-        # 질문 표시
-        for question in item['questions']:
-            st.write(f"• {question}")
-        
-        # 점수 입력
-        score_value = st.number_input(
-            f"획득 점수 (0 ~ {item['max_score']})",
-            min_value=0,
-            max_value=item['max_score'],
-            value=int(data.get(key, 0)),
-            key=key,
-            help=f"{item['name']} 영역의 점수를 입력하세요"
-        )
-        
-        # ✅ 세션에 저장
-        data[key] = score_value
-        total_score += score_value
-        
-        st.markdown("---")
+@survey_block('mmse_summary')
+def show_mmse_summary(context):
+    """8페이지: MMSE-K 총점과 교육 수준별 정상 기준 (surveys.scoring)"""
+    data = context.data
+    total_score, cutoff, status = score_mmse(data)
     
     # 총점 표시
     st.markdown("### 📊 MMSE-K 총점")
     col1, col2 = st.columns(2)
     
     with col1:
-        st.metric("총점", f"{total_score}점 / 30점", 
+        st.metric("총점", f"{total_score}점 / 30점",
                  delta=f"{total_score - 15}점" if total_score >= 15 else None)
     
     with col2:
-        # 교육 수준별 정상 기준
-        education = data.get('education', '')
-        
-        if '무학' in education:
-            cutoff = 19
-        elif '초등학교' in education:
-            cutoff = 22
-        elif '중학교' in education or '고등학교' in education:
-            cutoff = 24
+        if status == "정상 인지기능":
+            st.success(f"✅ {status} (기준: ≥{cutoff}점)")
+        elif status == "경도 인지장애 의심":
+            st.warning(f"⚠️ {status} (기준: ≥{cutoff}점)")
         else:
-            cutoff = 24
-        
-        if total_score >= cutoff:
-            st.success(f"✅ 정상 인지기능 (기준: ≥{cutoff}점)")
-        elif total_score >= cutoff - 4:
-            st.warning(f"⚠️ 경도 인지장애 의심 (기준: ≥{cutoff}점)")
-        else:
-            st.error(f"🚨 인지장애 의심 (기준: ≥{cutoff}점)")
+            st.error(f"🚨 {status} (기준: ≥{cutoff}점)")
     
     # 교육 수준별 기준 안내
     st.info("""
@@ -873,53 +192,12 @@ def show_page8_mmse():
     
     # ✅ 총점도 세션에 저장
     data['mmse_score'] = total_score
-    
-    navigation_buttons()
 
-def show_page9(supabase, elderly_id, surveyor_id, nursing_home_id):
-    """9페이지: 시설 특성 및 제출"""
-    st.subheader("시설 특성")
-    
-    data = st.session_state.basic_data
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        facility_capacity = st.number_input(
-            "시설 규모 (어르신 수용 인원(명))",
-            min_value=0,
-            max_value=1000,
-            value=int(data.get('facility_capacity', 0)) if data.get('facility_capacity') else 0,
-            key="facility_capacity"
-        )
-        
-        facility_location = st.selectbox(
-            "시설 소재지",
-            options=["수도권(서울, 경기, 인천)", "충청권(대전, 세종, 충남, 충북)", 
-                    "호남권(광주, 전남, 전북)", "영남권(부산, 대구, 울산, 경남, 경북)", 
-                    "강원권", "제주권"],
-            index=0,
-            key="facility_location"
-        )
-    
-    with col2:
-        nutritionist_present = st.radio(
-            "영양사 배치 여부",
-            options=["예", "아니오"],
-            index=0 if data.get('nutritionist_present') == True else 1,
-            key="nutritionist_present"
-        )
-    
-    # 데이터 저장
-    st.session_state.basic_data.update({
-        'facility_capacity': facility_capacity,
-        'facility_location': facility_location,
-        'nutritionist_present': nutritionist_present == "예"
-    })
+@survey_block('basic_score_summary')
+def show_score_summary(context):
+    """9페이지: 평가 점수 요약 (K-MBI, MMSE-K, MNA-SF)"""
+    data = context.data
     
-    st.markdown("---")
-    
-    # 평가 점수 요약
     st.subheader("📊 평가 점수 요약")
     
     col1, col2, col3 = st.columns(3)
@@ -939,15 +217,7 @@ def show_page9(supabase, elderly_id, surveyor_id, nursing_home_id):
         mmse_score = data.get('mmse_score', 0)
         st.metric("MMSE-K", f"{mmse_score}점 / 30점")
         
-        education = data.get('education', '')
-        if '무학' in education:
-            cutoff = 19
-        elif '초등학교' in education:
-            cutoff = 22
-        else:
-            cutoff = 24
-        
-        if mmse_score >= cutoff:
+        if mmse_score >= mmse_cutoff(data.get('education')):
             st.success("정상 인지기능")
         else:
             st.error("인지장애 의심")
@@ -956,285 +226,150 @@ def show_page9(supabase, elderly_id, surveyor_id, nursing_home_id):
         mna_score = data.get('mna_score', 0)
         st.metric("MNA-SF", f"{mna_score}점 / 14점")
         
-        if mna_score >= 12:
-            st.success("정상 영양 상태")
-        elif mna_score >= 8:
-            st.warning("영양불량 위험")
+        mna_status = classify(mna_score, MNA_THRESHOLDS)
+        if mna_status == 2:
+            st.success(MNA_STATUS[2])
+        elif mna_status == 1:
+            st.warning(MNA_STATUS[1])
         else:
-            st.error("영양불량")
-    
-    st.markdown("---")
-    
-    # 제출 버튼
-    col1, col2, col3 = st.columns([1, 1, 1])
-    
-    with col1:
-        if st.button("⬅️ 이전", use_container_width=True):
-            st.session_state.basic_page -= 1
-            st.rerun()
-    
-    with col2:
-        if st.button("🏠 대시보드", use_container_width=True):
-            # 세션 초기화
-            if 'basic_data' in st.session_state:
-                del st.session_state.basic_data
-            if 'basic_page' in st.session_state:
-                del st.session_state.basic_page
-            st.session_state.current_survey = None
-            st.rerun()
-    
-    with col3:
-        if st.button("✅ 제출", use_container_width=True, type="primary"):
-            # 필수 항목 검증
-            required_fields = ['gender', 'age', 'care_grade', 'k_mbi_score', 'mmse_score', 'mna_score']
-            missing = [f for f in required_fields if not st.session_state.basic_data.get(f)]
-            
-            if missing:
-                st.error(f"필수 항목을 입력해주세요: {', '.join(missing)}")
-            else:
-                save_basic_survey(supabase, elderly_id, surveyor_id, nursing_home_id)
+            st.error(MNA_STATUS[0])
 
-def save_basic_survey(supabase, elderly_id, surveyor_id, nursing_home_id):
-    """
-    기초 조사 데이터를 Supabase에 저장
-    """
-    try:
-        data = st.session_state.basic_data
-        
-        # === K-MBI 텍스트→점수 매핑 ===
-        kmbi_score_mapping = {
-            "과제를 수행할 수 없는 경우": 0,
-            "최대의 도움이 필요한 경우": 1,
-            "중등도의 도움이 필요한 경우": 2,
-            "최소한의 도움이 필요하거나 감시가 필요한 경우": 3,
-            "완전히 독립적인 경우": 4
-        }
-        
-        # === 1단계: 테이블 스키마 조회 ===
-        try:
-            schema_check = supabase.table('basic_survey').select('*').limit(1).execute()
-            available_columns = set(schema_check.data[0].keys()) if schema_check.data else set()
-        except:
-            available_columns = {
-                'elderly_id', 'surveyor_id', 'nursing_home_id', 'updated_at',
-                'gender', 'age', 'care_grade', 'residence_duration', 'education',
-                'drinking_smoking', 'diseases', 'medications', 'medication_count',
-                'chewing_difficulty', 'swallowing_difficulty', 'food_preparation_method',
-                'eating_independence', 'meal_type', 'height', 'weight',
-                'waist_circumference', 'systolic_bp', 'diastolic_bp',
-                'facility_capacity', 'facility_location', 'nutritionist_present',
-                # IPAQ-SF 필드
-                'vigorous_activity_days', 'vigorous_activity_time',
-                'moderate_activity_days', 'moderate_activity_time',
-                'walking_days', 'walking_time', 'sitting_time',
-                # MNA-SF 필드
-                'mna_appetite_change', 'mna_weight_change', 'mna_mobility',
-                'mna_stress_illness', 'mna_neuropsychological_problem',
-                'mna_bmi_category', 'mna_score'
-            }
-        
-        # === 2단계: 기본 필수 데이터 ===
-        survey_data = {
-            'elderly_id': elderly_id,
-            'surveyor_id': surveyor_id,
-            'nursing_home_id': nursing_home_id,
-            'updated_at': get_kst_now()
-        }
-        
-        # === 3단계: 기존 필드 추가 ===
-        field_mapping = {
-            'gender': 'gender',
-            'age': 'age',
-            'care_grade': 'care_grade',
-            'residence_duration': 'residence_duration',
-            'education': 'education',
-            'drinking_smoking': 'drinking_smoking',
-            'chewing_difficulty': 'chewing_difficulty',
-            'swallowing_difficulty': 'swallowing_difficulty',
-            'food_preparation_method': 'food_preparation_method',
-            'eating_independence': 'eating_independence',
-            'meal_type': 'meal_type',
-            'height': 'height',
-            'weight': 'weight',
-            'waist_circumference': 'waist_circumference',
-            'systolic_bp': 'systolic_bp',
-            'diastolic_bp': 'diastolic_bp',
-            'facility_capacity': 'facility_capacity',
-            'facility_location': 'facility_location',
-            'nutritionist_present': 'nutritionist_present',
-            'medication_count': 'medication_count',
-            # IPAQ-SF 필드
-            'vigorous_activity_days': 'vigorous_activity_days',
-            'vigorous_activity_time': 'vigorous_activity_time',
-            'moderate_activity_days': 'moderate_activity_days',
-            'moderate_activity_time': 'moderate_activity_time',
-            'walking_days': 'walking_days',
-            'walking_time': 'walking_time',
-            'sitting_time': 'sitting_time',
-            # MNA-SF 필드
-            'mna_appetite_change': 'mna_appetite_change',
-            'mna_weight_change': 'mna_weight_change',
-            'mna_mobility': 'mna_mobility',
-            'mna_stress_illness': 'mna_stress_illness',
-            'mna_neuropsychological_problem': 'mna_neuropsychological_problem',
-            'mna_bmi_category': 'mna_bmi_category',
-            'mna_score': 'mna_score'
-        }
-        
-        for field_key, column_name in field_mapping.items():
-            if field_key in data and column_name in available_columns:
-                survey_data[column_name] = data[field_key]
-        
-        # === 4단계: JSON 필드 처리 ===
-        if 'diseases' in data and 'diseases' in available_columns:
-            survey_data['diseases'] = json.dumps(data['diseases'])
-        if 'medications' in data and 'medications' in available_columns:
-            survey_data['medications'] = json.dumps(data['medications'])
-        
-        # === 5단계: K-MBI 데이터 (텍스트→숫자 변환 + 정수 변환) ===
-        if 'k_mbi_score' in available_columns:
-            if 'k_mbi_score' in data:
-                # ✅ 소수점을 정수로 변환 (반올림)
-                survey_data['k_mbi_score'] = int(round(data['k_mbi_score']))
-            
-            # K-MBI 각 항목 변환 (텍스트 → 점수)
-            for i in range(1, 12):
-                col_name = f'kmbi_{i}'
-                if col_name in available_columns and col_name in data:
-                    value = data[col_name]
-                    # 텍스트인 경우 점수로 변환
-                    if isinstance(value, str):
-                        survey_data[col_name] = kmbi_score_mapping.get(value, 0)
-                    else:
-                        survey_data[col_name] = int(value) if value is not None else 0
-        else:
-            st.warning("⚠️ K-MBI 데이터는 저장되지 않았습니다. (데이터베이스 컬럼 없음)")
-        
-        # === 6단계: MMSE-K 데이터 (정수 변환) ===
-        mmse_fields = [
-            'mmse_score', 'mmse_time_orientation', 'mmse_place_orientation',
-            'mmse_registration', 'mmse_attention_calculation', 'mmse_recall',
-            'mmse_naming', 'mmse_repetition', 'mmse_comprehension',
-            'mmse_reading', 'mmse_writing', 'mmse_drawing'
-        ]
-        
-        mmse_saved = False
-        for field in mmse_fields:
-            if field in available_columns and field in data:
-                value = data[field]
-                # ✅ 정수로 변환
-                survey_data[field] = int(value) if value is not None else 0
-                mmse_saved = True
-        
-        if not mmse_saved and any(f in data for f in mmse_fields):
-            st.warning("⚠️ MMSE-K 데이터는 저장되지 않았습니다. (데이터베이스 컬럼 없음)")
-        
-        # === 7단계: 기존 데이터 확인 ===
-        existing = supabase.table('basic_survey') \
-            .select('id') \
-            .eq('elderly_id', elderly_id) \
-            .execute()
-        
-        # === 8단계: 저장 실행 ===
-        if existing.data:
-            result = supabase.table('basic_survey') \
-                .update(survey_data) \
-                .eq('elderly_id', elderly_id) \
-                .execute()
-        else:
-            result = supabase.table('basic_survey') \
-                .insert(survey_data) \
-                .execute()
-        
-        # === 9단계: 진행 상태 업데이트 ===
-        try:
-            supabase.table('survey_progress') \
-                .update({
-                    'basic_survey_completed': True,
-                    'last_updated': get_kst_now()
-                }) \
-                .eq('elderly_id', elderly_id) \
-                .execute()
-        except Exception as e:
-            st.warning(f"진행 상태 업데이트 실패: {str(e)}")
-        
-        # === 10단계: 성공 처리 ===
-        st.success("✅ 기초 조사가 성공적으로 저장되었습니다!")
-        
-        # 저장된 필드 요약
-        with st.expander("📊 저장된 데이터 항목"):
-            saved_fields = [k for k in survey_data.keys() 
-                          if k not in ['elderly_id', 'surveyor_id', 'nursing_home_id', 'updated_at']]
-            st.write(f"총 {len(saved_fields)}개 항목 저장됨")
-            
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                # K-MBI 점수 표시
-                if 'k_mbi_score' in survey_data:
-                    st.metric("K-MBI 총점", f"{survey_data['k_mbi_score']}/100점")
-            
-            with col2:
-                # MMSE-K 점수 표시
-                if 'mmse_score' in survey_data:
-                    st.metric("MMSE-K 총점", f"{survey_data['mmse_score']}/30점")
-            
-            with col3:
-                # MNA-SF 점수 표시
-                if 'mna_score' in survey_data:
-                    st.metric("MNA-SF 총점", f"{survey_data['mna_score']}/14점")
-        
-        
-        # 세션 초기화
-        if 'basic_data' in st.session_state:
-            del st.session_state.basic_data
-        if 'basic_page' in st.session_state:
-            del st.session_state.basic_page
-        st.session_state.current_survey = None
-        
-        # 대시보드로 돌아가기 버튼
-        if st.button("📊 대시보드로 돌아가기", type="primary"):
-            st.rerun()
-            
-    except Exception as e:
-        st.error(f"❌ 저장 중 오류 발생: {str(e)}")
-        
-        with st.expander("🔍 오류 상세 정보"):
-            st.write("**저장 시도한 데이터:**")
-            # 안전한 출력을 위해 변환
-            display_data = {}
-            for k, v in survey_data.items():
-                if isinstance(v, (list, dict)):
-                    display_data[k] = str(v)
-                else:
-                    display_data[k] = v
-            st.json(display_data)
-            
-            st.write("**오류 메시지:**")
-            st.code(str(e))
+@survey_block('basic_saved_summary')
+def show_saved_summary(context):
+    """제출 후: 저장되지 않은 척도 경고와 저장된 항목 요약"""
+    survey_data = context.payload
+    
+    if 'k_mbi_score' not in survey_data:
+        st.warning("⚠️ K-MBI 데이터는 저장되지 않았습니다. (데이터베이스 컬럼 없음)")
+    
+    mmse_saved = any(field in survey_data for field in MMSE_FIELDS)
+    if not mmse_saved and any(f in context.data for f in MMSE_FIELDS):
+        st.warning("⚠️ MMSE-K 데이터는 저장되지 않았습니다. (데이터베이스 컬럼 없음)")
+    
+    with st.expander("📊 저장된 데이터 항목"):
+        saved_fields = [k for k in survey_data.keys()
+                      if k not in ['elderly_id', 'surveyor_id', 'nursing_home_id', 'updated_at']]
+        st.write(f"총 {len(saved_fields)}개 항목 저장됨")
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            # K-MBI 점수 표시
+            if 'k_mbi_score' in survey_data:
+                st.metric("K-MBI 총점", f"{survey_data['k_mbi_score']}/100점")
+        
+        with col2:
+            # MMSE-K 점수 표시
+            if 'mmse_score' in survey_data:
+                st.metric("MMSE-K 총점", f"{survey_data['mmse_score']}/30점")
+        
+        with col3:
+            # MNA-SF 점수 표시
+            if 'mna_score' in survey_data:
+                st.metric("MNA-SF 총점", f"{survey_data['mna_score']}/14점")
+
+# 화면 데이터 키 → 테이블 컬럼
+FIELD_MAPPING = {
+    'gender': 'gender',
+    'age': 'age',
+    'care_grade': 'care_grade',
+    'residence_duration': 'residence_duration',
+    'education': 'education',
+    'drinking_smoking': 'drinking_smoking',
+    'chewing_difficulty': 'chewing_difficulty',
+    'swallowing_difficulty': 'swallowing_difficulty',
+    'food_preparation_method': 'food_preparation_method',
+    'eating_independence': 'eating_independence',
+    'meal_type': 'meal_type',
+    'height': 'height',
+    'weight': 'weight',
+    'waist_circumference': 'waist_circumference',
+    'systolic_bp': 'systolic_bp',
+    'diastolic_bp': 'diastolic_bp',
+    'facility_capacity': 'facility_capacity',
+    'facility_location': 'facility_location',
+    'nutritionist_present': 'nutritionist_present',
+    'medication_count': 'medication_count',
+    # IPAQ-SF 필드
+    'vigorous_activity_days': 'vigorous_activity_days',
+    'vigorous_activity_time': 'vigorous_activity_time',
+    'moderate_activity_days': 'moderate_activity_days',
+    'moderate_activity_time': 'moderate_activity_time',
+    'walking_days': 'walking_days',
+    'walking_time': 'walking_time',
+    'sitting_time': 'sitting_time',
+    # MNA-SF 필드
+    'mna_appetite_change': 'mna_appetite_change',
+    'mna_weight_change': 'mna_weight_change',
+    'mna_mobility': 'mna_mobility',
+    'mna_stress_illness': 'mna_stress_illness',
+    'mna_neuropsychological_problem': 'mna_neuropsychological_problem',
+    'mna_bmi_category': 'mna_bmi_category',
+    'mna_score': 'mna_score'
+}
+
+MMSE_FIELDS = [
+    'mmse_score', 'mmse_time_orientation', 'mmse_place_orientation',
+    'mmse_registration', 'mmse_attention_calculation', 'mmse_recall',
+    'mmse_naming', 'mmse_repetition', 'mmse_comprehension',
+    'mmse_reading', 'mmse_writing', 'mmse_drawing'
+]
 
-def navigation_buttons():
-    """페이지 이동 버튼"""
-    col1, col2, col3 = st.columns([1, 1, 1])
+def build_basic_payload(data, available_columns, elderly_id, surveyor_id, nursing_home_id):
+    """화면 데이터를 basic_survey 테이블 저장 형식으로 변환 (제출과 부분 저장에 공통 사용)"""
+    # === 기본 필수 데이터 ===
+    survey_data = {
+        'elderly_id': elderly_id,
+        'surveyor_id': surveyor_id,
+        'nursing_home_id': nursing_home_id,
+        'updated_at': get_kst_now()
+    }
     
-    with col1:
-        if st.session_state.basic_page > 1:
-            if st.button("⬅️ 이전", use_container_width=True):
-                st.session_state.basic_page -= 1
-                st.rerun()
+    # === 기존 필드 추가 ===
+    for field_key, column_name in FIELD_MAPPING.items():
+        if field_key in data and column_name in available_columns:
+            survey_data[column_name] = data[field_key]
+    
+    # === JSON 필드 처리 (2페이지에서 이미 JSON 문자열로 저장한 값은 그대로) ===
+    for column_name in ('diseases', 'medications'):
+        if column_name in data and column_name in available_columns:
+            value = data[column_name]
+            survey_data[column_name] = value if isinstance(value, str) else json.dumps(value)
+    
+    # === K-MBI 데이터 (텍스트→숫자 변환 + 정수 변환) ===
+    if 'k_mbi_score' in available_columns:
+        if 'k_mbi_score' in data:
+            # ✅ 소수점을 정수로 변환 (반올림)
+            survey_data['k_mbi_score'] = int(round(data['k_mbi_score']))
+        
+        # K-MBI 각 항목 변환 (텍스트 → 점수)
+        for i in range(1, 12):
+            col_name = f'kmbi_{i}'
+            if col_name in available_columns and col_name in data:
+                value = data[col_name]
+                # 텍스트인 경우 점수로 변환
+                if isinstance(value, str):
+                    survey_data[col_name] = KMBI_SCORE_MAPPING.get(value, 0)
+                else:
+                    survey_data[col_name] = int(value) if value is not None else 0
     
-    with col2:
-        if st.button("🏠 대시보드", use_container_width=True):
-            # 세션 초기화
-            if 'basic_data' in st.session_state:
-                del st.session_state.basic_data
-            if 'basic_page' in st.session_state:
-                del st.session_state.basic_page
-            st.session_state.current_survey = None
-            st.rerun()
+    # === MMSE-K 데이터 (정수 변환) ===
+    for field in MMSE_FIELDS:
+        if field in available_columns and field in data:
+            value = data[field]
+            # ✅ 정수로 변환
+            survey_data[field] = int(value) if value is not None else 0
     
-    with col3:
-        if st.session_state.basic_page < 9:
-            if st.button("다음 ➡️", use_container_width=True, type="primary"):
-                st.session_state.basic_page += 1
-                st.rerun()
+    # === 파생 점수/분류 (BMI, MET-분/주, 활동 수준, MNA-SF/K-MBI/MMSE-K 분류, 코호트 조회용 인덱스 컬럼) ===
+    for column_name, value in derived_scores(data).items():
+        if column_name in available_columns:
+            survey_data[column_name] = value
+    
+    return survey_data
+
+@survey_payload('basic')
+def basic_payload(context):
+    """저장 형식 변환 (테이블 컬럼은 프로세스당 1회 조회 후 캐시)"""
+    available_columns = get_table_columns(context.supabase, 'basic_survey') or set()
+    return build_basic_payload(context.data, available_columns,
+                               context.elderly_id, context.surveyor_id, context.nursing_home_id)
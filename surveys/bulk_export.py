@@ -0,0 +1,380 @@
+"""설문 응답 일괄 내보내기 (Parquet, CSV)
+
+어르신 명단을 키셋 페이지 단위로 읽고, 페이지의 어르신 ID로 세 설문 테이블을 조회해
+어르신 한 명당 한 행으로 합칩니다. (제출한 응답만, 부분 저장만 된 작성 중인 설문은 제외) JSON 컬럼은 선택지별 여부, 끼니 칸별 g, 제품별 평가 점수처럼 형이 정해진 컬럼으로 펼치고,
+페이지마다 파일에 바로 기록하므로 메모리에는 한 페이지만 올라갑니다.
+
+명령줄 실행 예:
+    python -m surveys.bulk_export --format parquet --output survey_responses.parquet
+"""
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from surveys.admin_tables import fetch_page
+from surveys.basic_survey import DISEASE_OPTIONS, MEDICATION_OPTIONS
+from surveys.nutrition_survey import MEAL_GRID, summarize_intake
+from surveys.products import RATING_FIELDS, get_product_catalog
+from surveys.satisfaction_survey import COOKING_METHOD_OPTIONS, FOOD_GROUP_OPTIONS
+
+PAGE_SIZE = 1000
+
+# 설문 테이블 조회 1회에 넣는 어르신 ID 수 (in 필터가 URL에 들어가므로 길이 제한을 넘지 않게)
+ANSWER_BATCH_SIZE = 150
+
+# (컬럼 접두어, 테이블)
+SURVEY_TABLES = [
+    ('basic', 'basic_survey'),
+    ('nutrition', 'nutrition_survey'),
+    ('satisfaction', 'satisfaction_survey'),
+]
+
+# 어르신 명단에서 가져오므로 설문 테이블에서는 제외하는 컬럼
+SKIP_COLUMNS = {'id', 'elderly_id', 'nursing_home_id'}
+
+# 설문마다 있는 컬럼 (설문 접두어를 붙여 구분, 예: basic_surveyor_id)
+META_COLUMNS = {'surveyor_id', 'created_at', 'updated_at', 'submitted_at'}
+
+# 제출 시각 (없으면 작성 중인 행, 이 컬럼이 없는 이전 스키마는 모든 행을 제출한 것으로 봄)
+SUBMITTED_COLUMN = 'submitted_at'
+
+# 여러 개 선택 문항 → 선택지 (선택지별 True/False 컬럼 + 목록에 없는 값은 '_기타입력' 컬럼)
+CHOICE_COLUMNS = {
+    'diseases': DISEASE_OPTIONS,
+    'medications': MEDICATION_OPTIONS,
+    'preferred_food_groups': FOOD_GROUP_OPTIONS,
+    'preferred_cooking_methods': COOKING_METHOD_OPTIONS,
+}
+
+# 끼니 칸별 g 문항 → 저장 키 접미사 (칸별 실수 컬럼, 예: plate_waste_day1_breakfast_rice)
+GRID_COLUMNS = {'meal_portions': '', 'plate_waste': '_waste'}
+
+# 끼니 칸별 목측 단계 정수 배열 (칸별 Int64 컬럼, 예: plate_waste_level_day1_breakfast_rice)
+LEVEL_COLUMN = 'plate_waste_levels'
+
+# 제품 평가 JSON (제품·항목별 Int64 컬럼, 예: product_1_taste)
+# 이 컬럼이 있는 데이터베이스는 이전 product_N_* 컬럼을 옮겨 두었으므로 이전 컬럼은 내보내지 않음
+EVALUATION_COLUMN = 'product_evaluations'
+LEGACY_PRODUCT_COLUMN = re.compile(r'^product_\d+_(name|taste|chewing|swallowing|satisfaction|repurchase)$')
+
+# PostgreSQL 자료형 → pandas 자료형 (그 외는 문자열)
+PANDAS_TYPES = {
+    'smallint': 'Int64', 'integer': 'Int64', 'bigint': 'Int64',
+    'numeric': 'float64', 'real': 'float64', 'double precision': 'float64',
+    'boolean': 'boolean',
+    'timestamp without time zone': 'datetime64[us]',
+    'timestamp with time zone': 'datetime64[us, UTC]',
+}
+
+EXPORT_FORMATS = ['parquet', 'csv']
+
+class ExportError(Exception):
+    """내보내기 설정 오류 (지원하지 않는 형식, 패키지 누락 등)"""
+
+def decode_json(value):
+    """JSONB 값 디코딩 (앱이 JSON 문자열로 저장한 값은 한 번 더 풂)"""
+    for _ in range(2):
+        if not isinstance(value, str):
+            break
+        try:
+            value = json.loads(value) if value else None
+        except ValueError:
+            break
+    return value
+
+def infer_type(value):
+    """컬럼 자료형 정보가 없을 때 값으로 추정 (숫자는 소수 포함 가능성 때문에 실수)"""
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, (int, float)):
+        return 'numeric'
+    if isinstance(value, (dict, list)):
+        return 'jsonb'
+    return 'text'
+
+def load_column_types(supabase, table_name):
+    """테이블 컬럼 [(이름, 자료형)] (survey_table_column_types 함수가 없으면 첫 행으로 추정)"""
+    try:
+        response = supabase.rpc('survey_table_column_types', {'p_table': table_name}).execute()
+        if response.data:
+            return [(row['column_name'], row['data_type']) for row in response.data]
+    except Exception:
+        pass
+    
+    response = supabase.table(table_name).select('*').limit(1).execute()
+    if not response.data:
+        return []
+    return [(column, infer_type(value)) for column, value in response.data[0].items()]
+
+def choice_frame(column, values, options):
+    """여러 개 선택 문항 → 선택지별 True/False + 기타 입력 (응답이 없으면 빈 값)"""
+    answers = []
+    for value in values:
+        selected = decode_json(value)
+        if selected is not None and not isinstance(selected, list):
+            selected = [selected]
+        answers.append(selected)
+    
+    frame = {
+        f"{column}_{option}": pd.array([None if a is None else option in a for a in answers], dtype='boolean')
+        for option in options
+    }
+    known = set(options)
+    frame[f"{column}_기타입력"] = pd.array([
+        None if a is None else "; ".join(str(item).removeprefix("기타: ") for item in a if item not in known) or None
+        for a in answers
+    ], dtype='string')
+    return pd.DataFrame(frame)
+
+def grid_array(values, suffix, grid=MEAL_GRID):
+    """끼니 칸별 g JSON 목록 → (명, 일차, 칸) 배열 (응답이 없는 어르신은 NaN)"""
+    keys = grid.keys(suffix)
+    empty = [np.nan] * len(keys)
+    flat = []
+    for value in values:
+        decoded = decode_json(value)
+        flat.append([decoded.get(key) or 0 for key in keys] if isinstance(decoded, dict) else empty)
+    return np.array(flat, dtype=float).reshape((len(values),) + grid.shape)
+
+def level_array(values, grid=MEAL_GRID):
+    """목측 단계 배열 목록 → (명, 칸) 배열 (저장하지 않은 어르신은 NaN)"""
+    size = grid.days * grid.slot_count
+    flat = []
+    for value in values:
+        decoded = decode_json(value)
+        flat.append([np.nan if v is None else v for v in decoded]
+                    if isinstance(decoded, list) and len(decoded) == size else [np.nan] * size)
+    return np.array(flat, dtype=float).reshape(len(values), size)
+
+def nutrition_frame(portion_values, waste_values, level_values=None, grid=MEAL_GRID):
+    """제공량/잔반량(/목측 단계) 칸별 컬럼 + 전체 섭취량/섭취율 요약"""
+    portions = grid_array(portion_values, GRID_COLUMNS['meal_portions'], grid)
+    waste = grid_array(waste_values, GRID_COLUMNS['plate_waste'], grid)
+    frame = {}
+    for column, array in (('meal_portions', portions), ('plate_waste', waste)):
+        flat = array.reshape(len(array), grid.days * grid.slot_count)
+        for i, key in enumerate(grid.keys()):
+            frame[f"{column}_{key}"] = flat[:, i]
+    if level_values is not None:
+        levels = level_array(level_values, grid)
+        for i, key in enumerate(grid.keys()):
+            frame[f"plate_waste_level_{key}"] = pd.array(levels[:, i], dtype='Int64')
+    
+    # 제공량을 입력하지 않은 어르신은 요약도 빈 값
+    summary = summarize_intake(np.nan_to_num(portions), np.nan_to_num(waste), grid)
+    answered = ~np.isnan(portions).all(axis=(1, 2))
+    for name in ('portion_g', 'waste_g', 'intake_g', 'intake_rate'):
+        frame[f"nutrition_total_{name}"] = np.where(answered, summary[f'total_{name}'], np.nan)
+    return pd.DataFrame(frame)
+
+def evaluation_frame(values, product_ids):
+    """제품 평가 JSON 목록 → 제품·항목별 점수 (평가하지 않은 제품은 빈 값)"""
+    evaluations = []
+    for value in values:
+        decoded = decode_json(value)
+        evaluations.append(decoded if isinstance(decoded, dict) else {})
+    
+    frame = {}
+    for product_id in product_ids:
+        scores = [e.get(product_id) if isinstance(e.get(product_id), dict) else {} for e in evaluations]
+        for field in RATING_FIELDS:
+            frame[f"{product_id}_{field}"] = pd.array([s.get(field) for s in scores], dtype='Int64')
+    return pd.DataFrame(frame, index=range(len(evaluations)))
+
+def convert_column(values, data_type):
+    """값 목록 → 자료형에 맞는 Series"""
+    dtype = PANDAS_TYPES.get(data_type)
+    series = pd.Series(values, dtype=object)
+    if dtype is None:
+        if data_type in ('json', 'jsonb'):
+            series = series.map(lambda v: None if v is None else json.dumps(decode_json(v), ensure_ascii=False))
+        return series.astype('string')
+    if dtype.startswith('datetime64'):
+        # 묶음마다 해상도가 달라지지 않도록 마이크로초로 고정
+        parsed = pd.to_datetime(series, errors='coerce', utc=dtype.endswith('UTC]'), format='ISO8601')
+        return parsed.astype(dtype)
+    if dtype == 'float64':
+        return pd.to_numeric(series, errors='coerce').astype('float64')
+    if dtype == 'Int64':
+        return pd.to_numeric(series, errors='coerce').round().astype('Int64')
+    return series.astype('boolean')
+
+def build_frame(residents, answers, column_types, product_ids=()):
+    """어르신 목록 + 설문별 {어르신 ID: 응답 행} → 어르신 한 명당 한 행인 DataFrame
+    
+    product_ids: 제품 평가 컬럼으로 펼칠 제품 ID (제품 목록 순서)
+    """
+    elderly_ids = [resident['id'] for resident in residents]
+    parts = [pd.DataFrame({
+        'elderly_id': pd.Series(elderly_ids, dtype='string'),
+        'name': pd.Series([r.get('name') for r in residents], dtype='string'),
+        'nursing_home_id': pd.Series([r.get('nursing_home_id') for r in residents], dtype='string'),
+    })]
+    
+    for survey, table_name in SURVEY_TABLES:
+        rows = [answers[survey].get(elderly_id) or {} for elderly_id in elderly_ids]
+        
+        def values(column):
+            return [row.get(column) for row in rows]
+        
+        table_columns = {c for c, _ in column_types[table_name]}
+        columns = {}
+        for column, data_type in column_types[table_name]:
+            if column in SKIP_COLUMNS or column in GRID_COLUMNS or column == LEVEL_COLUMN:
+                continue
+            if EVALUATION_COLUMN in table_columns and (column == EVALUATION_COLUMN or LEGACY_PRODUCT_COLUMN.match(column)):
+                continue
+            if column in CHOICE_COLUMNS:
+                parts.append(choice_frame(column, values(column), CHOICE_COLUMNS[column]))
+                continue
+            name = f"{survey}_{column}" if column in META_COLUMNS else column
+            columns[name] = convert_column(values(column), data_type)
+        if columns:
+            parts.append(pd.DataFrame(columns))
+        if EVALUATION_COLUMN in table_columns:
+            parts.append(evaluation_frame(values(EVALUATION_COLUMN), product_ids))
+        if table_name == 'nutrition_survey' and 'meal_portions' in table_columns:
+            level_values = values(LEVEL_COLUMN) if LEVEL_COLUMN in table_columns else None
+            parts.append(nutrition_frame(values('meal_portions'), values('plate_waste'), level_values))
+    
+    return pd.concat(parts, axis=1)
+
+def export_schema(column_types, product_ids=()):
+    """내보내기 파일의 Parquet 스키마 (데이터가 아니라 테이블 자료형으로 만들어 모든 묶음이 같은 스키마를 씀)"""
+    import pyarrow as pa
+    empty = build_frame([], {survey: {} for survey, _ in SURVEY_TABLES}, column_types, product_ids)
+    return pa.Schema.from_pandas(empty, preserve_index=False)
+
+def fetch_answers(supabase, table_name, elderly_ids, submitted_only=False):
+    """어르신 ID 목록의 응답 {어르신 ID: 행} (ANSWER_BATCH_SIZE명씩 나누어 조회)"""
+    answers = {}
+    for start in range(0, len(elderly_ids), ANSWER_BATCH_SIZE):
+        batch = elderly_ids[start:start + ANSWER_BATCH_SIZE]
+        response = supabase.table(table_name).select('*').in_('elderly_id', batch).execute()
+        for row in response.data or []:
+            if not submitted_only or row.get(SUBMITTED_COLUMN):
+                answers[row['elderly_id']] = row
+    return answers
+
+def iter_export_frames(supabase, page_size=PAGE_SIZE, nursing_home_id=None, include_empty=False,
+                       column_types=None, product_ids=None):
+    """어르신 page_size명 단위로 응답 DataFrame 생성
+    
+    include_empty: 세 설문 모두 응답이 없는 어르신도 포함
+    """
+    if column_types is None:
+        column_types = {table_name: load_column_types(supabase, table_name) for _, table_name in SURVEY_TABLES}
+    # 페이지마다 컬럼이 같도록 제품 목록은 한 번만 읽음
+    if product_ids is None:
+        product_ids = [product['product_id'] for product in get_product_catalog(supabase)]
+    filters = {'nursing_home_id': nursing_home_id} if nursing_home_id else None
+    after = None
+    while True:
+        residents, has_next, _ = fetch_page(
+            supabase, 'elderly_residents', 'id,name,nursing_home_id', page_size, after, filters=filters
+        )
+        if not residents:
+            return
+        
+        elderly_ids = [resident['id'] for resident in residents]
+        answers = {}
+        for survey, table_name in SURVEY_TABLES:
+            submitted_only = any(column == SUBMITTED_COLUMN for column, _ in column_types[table_name])
+            answers[survey] = fetch_answers(supabase, table_name, elderly_ids, submitted_only)
+        
+        if not include_empty:
+            residents = [r for r in residents if any(r['id'] in rows for rows in answers.values())]
+        if residents:
+            yield build_frame(residents, answers, column_types, product_ids)
+        
+        if not has_next:
+            return
+        after = elderly_ids[-1]
+
+def write_export(frames, path, file_format='parquet', progress=None, schema=None):
+    """DataFrame 묶음을 파일에 차례로 기록 (기록한 행 수 반환)
+    
+    progress: progress(누적 행 수) 콜백 (묶음마다 호출)
+    schema: Parquet 스키마 (없으면 첫 묶음으로 정함, export_schema() 참고)
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ExportError(f"지원하지 않는 형식입니다: {file_format}")
+    
+    written = 0
+    if file_format == 'csv':
+        # 엑셀에서 한글이 깨지지 않도록 BOM 포함 UTF-8
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            for frame in frames:
+                frame.to_csv(f, header=(written == 0), index=False)
+                written += len(frame)
+                if progress:
+                    progress(written)
+        return written
+    
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Parquet로 내보내려면 pyarrow 패키지가 필요합니다. (pip install pyarrow) CSV 형식은 바로 사용할 수 있습니다.")
+    
+    writer = None
+    try:
+        for frame in frames:
+            if writer is None:
+                if schema is None:
+                    schema = pa.Schema.from_pandas(frame, preserve_index=False)
+                writer = pq.ParquetWriter(path, schema, compression="zstd")
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            written += len(frame)
+            if progress:
+                progress(written)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+def export_responses(supabase, path, file_format='parquet', page_size=PAGE_SIZE,
+                     nursing_home_id=None, include_empty=False, progress=None):
+    """설문 응답 전체를 파일로 내보내기 (기록한 행 수 반환)"""
+    if file_format not in EXPORT_FORMATS:
+        raise ExportError(f"지원하지 않는 형식입니다: {file_format}")
+    column_types = {table_name: load_column_types(supabase, table_name) for _, table_name in SURVEY_TABLES}
+    product_ids = [product['product_id'] for product in get_product_catalog(supabase)]
+    schema = None
+    if file_format == 'parquet':
+        try:
+            schema = export_schema(column_types, product_ids)
+        except ImportError:
+            raise ExportError("Parquet로 내보내려면 pyarrow 패키지가 필요합니다. (pip install pyarrow) CSV 형식은 바로 사용할 수 있습니다.")
+    frames = iter_export_frames(supabase, page_size, nursing_home_id, include_empty, column_types, product_ids)
+    return write_export(frames, path, file_format, progress, schema)
+
+def main():
+    parser = argparse.ArgumentParser(description="설문 응답 일괄 내보내기")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='parquet')
+    parser.add_argument('--output', help="저장할 파일 경로 (기본: survey_responses.<형식>)")
+    parser.add_argument('--nursing-home', help="요양원 ID (없으면 전체)")
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE)
+    parser.add_argument('--include-empty', action='store_true', help="응답이 없는 어르신도 포함")
+    args = parser.parse_args()
+    
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_KEY")
+    if not url or not key:
+        parser.error("SUPABASE_URL, SUPABASE_KEY 환경 변수를 설정해주세요.")
+    
+    from supabase import create_client
+    output = args.output or f"survey_responses.{args.format}"
+    written = export_responses(
+        create_client(url, key), output, args.format, args.page_size,
+        args.nursing_home, args.include_empty,
+        progress=lambda rows: print(f"\r{rows:,}명 기록", end='', flush=True)
+    )
+    print(f"\n{output}: 어르신 {written:,}명")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""요양원/조사원/어르신 명단 일괄 등록 (CSV, XLSX)
+
+파일을 한 번에 읽지 않고 한 행씩 읽어 chunk_size 행 단위로 검증하고 upsert합니다.
+요양원 ID 외래키는 메모리 색인(기존 요양원 + 이번에 등록한 요양원)으로 확인하고,
+어르신을 등록하면 init_survey_progress 함수로 설문 진행 상황 행을 미리 만듭니다.
+"""
+import csv
+import io
+import time
+
+from surveys.admin_tables import fetch_page
+
+CHUNK_SIZE = 1000
+
+# 보고서에 남길 오류 행 수 (나머지는 건수만 집계)
+MAX_REPORTED_ERRORS = 200
+
+# 테이블별 컬럼 (필수 여부)과 한글 머리글
+IMPORT_TABLES = {
+    'nursing_homes': {
+        'label': "요양원",
+        'columns': {'id': True, 'name': True},
+        'aliases': {'요양원 ID': 'id', '요양원명': 'name'},
+    },
+    'surveyors': {
+        'label': "조사원",
+        'columns': {'id': True, 'name': True, 'nursing_home_id': True},
+        'aliases': {'조사원 ID': 'id'},
+    },
+    'elderly_residents': {
+        'label': "어르신",
+        'columns': {'id': True, 'name': False, 'nursing_home_id': True},
+        'aliases': {'어르신 ID': 'id'},
+    },
+}
+
+# 모든 테이블에 공통인 한글 머리글 (영문 컬럼명은 그대로 사용)
+HEADER_ALIASES = {
+    'ID': 'id', '아이디': 'id',
+    '이름': 'name', '성명': 'name',
+    '요양원 ID': 'nursing_home_id', '소속 요양원 ID': 'nursing_home_id', '소속 요양원': 'nursing_home_id',
+}
+
+class ImportFileError(Exception):
+    """파일 형식 오류 (머리글 누락, 지원하지 않는 형식 등)"""
+
+def normalize_header(header, table_name):
+    """파일 머리글을 테이블 컬럼 이름으로 변환 (모르는 머리글은 None)"""
+    spec = IMPORT_TABLES[table_name]
+    result = []
+    for name in header:
+        name = str(name).strip() if name is not None else ''
+        column = spec['aliases'].get(name) or HEADER_ALIASES.get(name, name)
+        result.append(column if column in spec['columns'] and column not in result else None)
+    
+    missing = [c for c, required in spec['columns'].items() if required and c not in result]
+    if missing:
+        raise ImportFileError(f"필수 머리글이 없습니다: {', '.join(missing)}")
+    return result
+
+# CSV 인코딩 (엑셀에서 저장한 한글 CSV는 보통 cp949)
+CSV_ENCODINGS = ['utf-8-sig', 'cp949']
+
+def iter_csv_rows(binary_file, encoding='utf-8-sig'):
+    """CSV 파일을 한 행씩 읽기 (첫 행은 머리글)"""
+    text = io.TextIOWrapper(binary_file, encoding=encoding, newline='')
+    try:
+        yield from csv.reader(text)
+    finally:
+        # 업로드 파일 객체는 닫지 않고 분리만
+        text.detach()
+
+def iter_xlsx_rows(binary_file):
+    """XLSX 첫 시트를 한 행씩 읽기 (read_only 모드로 전체를 메모리에 올리지 않음)"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("XLSX 파일을 읽으려면 openpyxl 패키지가 필요합니다. (pip install openpyxl)")
+    
+    workbook = load_workbook(binary_file, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ['' if value is None else value for value in row]
+    finally:
+        workbook.close()
+
+def iter_file_rows(binary_file, filename, encoding='utf-8-sig'):
+    """파일 확장자에 따라 행 단위 읽기"""
+    lower = filename.lower()
+    if lower.endswith('.csv'):
+        return iter_csv_rows(binary_file, encoding)
+    if lower.endswith('.xlsx'):
+        return iter_xlsx_rows(binary_file)
+    raise ImportFileError("CSV 또는 XLSX 파일만 등록할 수 있습니다.")
+
+def load_facility_index(supabase, page_size=1000):
+    """기존 요양원 ID 집합 (키셋 페이지 단위로 ID만 조회)"""
+    index = set()
+    after = None
+    while True:
+        rows, has_next, _ = fetch_page(supabase, 'nursing_homes', 'id', page_size, after)
+        index.update(row['id'] for row in rows)
+        if not has_next or not rows:
+            return index
+        after = rows[-1]['id']
+
+def clean_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+def import_rows(supabase, table_name, rows, on_conflict='skip', chunk_size=CHUNK_SIZE,
+                facility_index=None, dry_run=False, progress=None):
+    """명단 행 일괄 등록
+    
+    rows: 첫 행이 머리글인 행 반복자 (iter_file_rows 결과)
+    on_conflict: 'skip'(이미 있는 ID는 건너뜀) | 'update'(이름/소속 갱신)
+    dry_run: 검증만 하고 저장하지 않음
+    progress: progress(처리 행 수) 콜백 (청크마다 호출)
+    결과 보고서(dict)를 반환합니다.
+    """
+    spec = IMPORT_TABLES[table_name]
+    rows = iter(rows)
+    try:
+        header = normalize_header(next(rows), table_name)
+    except StopIteration:
+        raise ImportFileError("빈 파일입니다.")
+    
+    needs_facility = 'nursing_home_id' in spec['columns']
+    if facility_index is None and (needs_facility or table_name == 'nursing_homes'):
+        facility_index = load_facility_index(supabase)
+    
+    report = {
+        'table': table_name, 'rows': 0, 'valid': 0, 'written': 0, 'invalid': 0,
+        'progress_created': 0, 'chunks': 0, 'errors': [], 'elapsed': 0.0
+    }
+    started = time.perf_counter()
+    seen = set()
+    chunk = []
+    
+    def reject(line_number, message):
+        report['invalid'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'행': line_number, '오류': message})
+    
+    def flush():
+        if not chunk:
+            return
+        report['chunks'] += 1
+        if not dry_run:
+            response = supabase.table(table_name).upsert(
+                chunk,
+                on_conflict='id',
+                ignore_duplicates=(on_conflict == 'skip'),
+                returning='minimal',
+                count='exact'
+            ).execute()
+            report['written'] += response.count if response.count is not None else len(chunk)
+            
+            if table_name == 'elderly_residents':
+                created = supabase.rpc('init_survey_progress', {
+                    'p_elderly_ids': [row['id'] for row in chunk]
+                }).execute()
+                report['progress_created'] += created.data or 0
+        if table_name == 'nursing_homes':
+            facility_index.update(row['id'] for row in chunk)
+        chunk.clear()
+        if progress:
+            progress(report['rows'])
+    
+    for line_number, values in enumerate(rows, start=2):
+        if not any(clean_value(v) for v in values):
+            continue
+        report['rows'] += 1
+        
+        record = {}
+        for column, value in zip(header, values):
+            if column is not None:
+                record[column] = clean_value(value)
+        
+        missing = [c for c, required in spec['columns'].items() if required and not record.get(c)]
+        if missing:
+            reject(line_number, f"필수 값 누락: {', '.join(missing)}")
+            continue
+        if record['id'] in seen:
+            reject(line_number, f"파일 안에서 ID 중복: {record['id']}")
+            continue
+        if needs_facility and record['nursing_home_id'] not in facility_index:
+            reject(line_number, f"존재하지 않는 요양원 ID: {record['nursing_home_id']}")
+            continue
+        if 'name' in record and not record['name']:
+            record['name'] = None
+        
+        seen.add(record['id'])
+        report['valid'] += 1
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            flush()
+    
+    flush()
+    report['elapsed'] = time.perf_counter() - started
+    return report
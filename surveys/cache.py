@@ -0,0 +1,140 @@
+"""프로세스 공유 메모리 캐시
+
+요양원/조사원/어르신 명단처럼 자주 읽고 드물게 바뀌는 데이터를
+세션 간에 공유하여 로그인과 관리자 화면의 반복 조회를 줄입니다.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+# 명단 캐시 대상 테이블
+ROSTER_TABLES = ('nursing_homes', 'surveyors', 'elderly_residents')
+
+class LRUTTLCache:
+    """크기 제한(LRU 제거)과 유효 시간(TTL)을 가진 스레드 안전 캐시"""
+    
+    def __init__(self, max_size=256, ttl=300, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        """캐시 조회 (없거나 만료되면 None)"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and self.clock() - item[0] < self.ttl:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            if item is not None:
+                del self._items[key]
+            self.misses += 1
+            return None
+    
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (self.clock(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+    
+    def invalidate_where(self, predicate):
+        """조건에 맞는 키를 모두 무효화"""
+        with self._lock:
+            for key in [k for k in self._items if predicate(k)]:
+                del self._items[key]
+    
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._items),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+def facility_key(nursing_home_id):
+    return ('facility', nursing_home_id)
+
+def table_key(table_name):
+    return ('table', table_name)
+
+def store_facility_roster(cache, nursing_home_id, data):
+    """get_facility_roster 응답(또는 survey_login 응답의 roster)을 캐시에 저장
+    
+    progress에는 어르신별 설문 진행 상황을 담아 두어, 다시 로그인할 때 DB 호출 없이 사용합니다.
+    """
+    data = data or {}
+    roster = {
+        'nursing_home': data.get('nursing_home'),
+        'surveyors': {row['id']: row for row in data.get('surveyors') or []},
+        'residents': {row['id']: row for row in data.get('residents') or []},
+        'progress': {}
+    }
+    cache.set(facility_key(nursing_home_id), roster)
+    return roster
+
+def load_facility_roster(cache, supabase, nursing_home_id):
+    """요양원 명단을 get_facility_roster 함수 1회 호출로 읽어 캐시에 저장"""
+    response = supabase.rpc('get_facility_roster', {'p_nursing_home_id': nursing_home_id}).execute()
+    return store_facility_roster(cache, nursing_home_id, response.data)
+
+def get_facility_roster(cache, supabase, nursing_home_id):
+    """요양원별 명단 조회 (캐시 미적중 시에만 DB 조회)"""
+    roster = cache.get(facility_key(nursing_home_id))
+    if roster is None:
+        roster = load_facility_roster(cache, supabase, nursing_home_id)
+    return roster
+
+def roster_contains(roster, surveyor_id, elderly_id):
+    """캐시된 명단에 조사원과 어르신이 모두 있는지 확인"""
+    return bool(roster['nursing_home']) and surveyor_id in roster['surveyors'] and elderly_id in roster['residents']
+
+def cached_progress(roster, elderly_id):
+    """캐시된 명단에 담아 둔 어르신의 설문 진행 상황 (없으면 None)"""
+    return roster['progress'].get(elderly_id)
+
+def remember_progress(cache, nursing_home_id, progress):
+    """DB에서 받은 설문 진행 상황을 요양원 명단 캐시에 기록 (명단이 캐시에 없으면 무시)"""
+    roster = cache.get(facility_key(nursing_home_id))
+    if roster is not None and progress and progress.get('elderly_id'):
+        roster['progress'][progress['elderly_id']] = progress
+
+def get_table_rows(cache, supabase, table_name, columns='*'):
+    """명단 테이블 전체 조회 (캐시)"""
+    key = table_key(table_name) + (columns,)
+    rows = cache.get(key)
+    if rows is None:
+        rows = supabase.table(table_name).select(columns).execute().data or []
+        cache.set(key, rows)
+    return rows
+
+def invalidate_roster(cache, nursing_home_id=None, page_cache=None):
+    """명단 테이블 변경 시 호출 (nursing_home_id가 없으면 모든 요양원 명단 무효화)
+    
+    page_cache: 관리자 화면 목록 페이지를 따로 담는 캐시 (있으면 명단 테이블 페이지도 무효화)
+    """
+    if nursing_home_id is None:
+        cache.invalidate_where(lambda key: key[0] == 'facility')
+    else:
+        cache.invalidate(facility_key(nursing_home_id))
+    # 관리자 화면의 전체 목록/페이지 캐시
+    for target in (cache, page_cache):
+        if target is not None:
+            target.invalidate_where(lambda key: key[0] in ('table', 'page') and key[1] in ROSTER_TABLES)
@@ -0,0 +1,204 @@
+"""서버 연결 풀 (동시 요청 수 제한 / HTTP keep-alive / 요청 시간 제한 / 재시도)
+
+supabase 클라이언트는 기본적으로 설정 없이 만든 httpx 클라이언트 하나로 모든 세션의 요청을 보냅니다.
+PooledTransport를 넣은 httpx 클라이언트를 ClientOptions(httpx_client=)로 넘기면
+- 동시 요청 수를 풀 크기(max_connections)로 제한하고, 넘치는 요청은 풀 대기 시간까지 기다린 뒤 PoolTimeout
+- 끝난 연결은 keep-alive로 유지(max_keepalive개, keepalive_expiry초)하여 다음 요청에서 다시 사용
+- 연결 실패와 일시적인 서버 오류(502/503/504)는 지수 간격 + 무작위 지연(jitter)으로 retries회까지 재시도
+  (응답을 받지 못했을 수 있는 요청은 다시 보내도 결과가 같은 조회와 서버 함수 호출만 재시도)
+하며, 사용 현황(사용 중/최대/대기/재시도/실패/연결 수)을 stats()로 조회할 수 있습니다.
+"""
+import random
+import threading
+import time
+
+import httpx
+
+# 다시 보내면 안 되는 요청도 재시도할 수 있는 오류 (서버에 요청이 전달되기 전에 실패)
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# 요청이 서버에 전달됐을 수 있는 오류 (조회/서버 함수 호출만 재시도)
+SEND_ERRORS = (httpx.ReadError, httpx.WriteError, httpx.RemoteProtocolError)
+RETRY_STATUSES = (502, 503, 504)
+
+class ConnectionSlots:
+    """동시 요청 수 제한(세마포어)과 사용 현황 집계 (스레드 안전)"""
+    
+    def __init__(self, size):
+        self.size = size
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.peak = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.waited = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+        self.retries = 0
+        self.failures = 0
+    
+    def acquire(self, timeout=None):
+        """자리 하나 얻기 (timeout초 안에 못 얻으면 False, None이면 무한 대기)"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.waiting += 1
+            start = time.monotonic()
+            ok = self._slots.acquire(timeout=timeout)
+            waited = time.monotonic() - start
+            with self._lock:
+                self.waiting -= 1
+                self.waited += 1
+                self.wait_time += waited
+                self.max_wait = max(self.max_wait, waited)
+                if not ok:
+                    self.timeouts += 1
+                    return False
+        with self._lock:
+            self.acquired += 1
+            self.in_use += 1
+            self.peak = max(self.peak, self.in_use)
+        return True
+    
+    def release(self):
+        with self._lock:
+            self.in_use -= 1
+        self._slots.release()
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.release()
+    
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'in_use': self.in_use,
+                'utilization': self.in_use / self.size if self.size else 0.0,
+                'peak': self.peak,
+                'waiting': self.waiting,
+                'requests': self.acquired,
+                'waited': self.waited,
+                'avg_wait_ms': self.wait_time / self.waited * 1000 if self.waited else 0.0,
+                'max_wait_ms': self.max_wait * 1000,
+                'timeouts': self.timeouts,
+                'retries': self.retries,
+                'failures': self.failures
+            }
+
+class ReleasingStream(httpx.SyncByteStream):
+    """응답 본문을 다 읽고 닫을 때 풀 자리를 반환하는 스트림"""
+    
+    def __init__(self, stream, release):
+        self.stream = stream
+        self.release = release
+        self.released = False
+    
+    def __iter__(self):
+        for chunk in self.stream:
+            yield chunk
+    
+    def close(self):
+        try:
+            self.stream.close()
+        finally:
+            if not self.released:
+                self.released = True
+                self.release()
+
+class PooledTransport(httpx.HTTPTransport):
+    """동시 요청 수 제한과 재시도를 더한 httpx 전송 계층 (모든 세션이 공유)"""
+    
+    def __init__(self, max_connections=20, max_keepalive=10, keepalive_expiry=30.0,
+                 retries=2, backoff=0.2, max_backoff=2.0, http2=False):
+        super().__init__(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry
+            ),
+            http2=http2,
+            retries=0
+        )
+        self.slots = ConnectionSlots(max_connections)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+    
+    def handle_request(self, request):
+        timeout = request.extensions.get('timeout', {}).get('pool')
+        if not self.slots.acquire(timeout):
+            self.slots.record_failure()
+            raise httpx.PoolTimeout("연결 풀의 빈 자리를 기다리는 시간이 초과되었습니다.", request=request)
+        try:
+            response = self.send_with_retry(request)
+        except BaseException:
+            self.slots.release()
+            raise
+        # 본문을 다 읽을 때까지 연결을 사용하므로 스트림을 닫을 때 자리 반환
+        response.stream = ReleasingStream(response.stream, self.slots.release)
+        return response
+    
+    def send_with_retry(self, request):
+        attempt = 0
+        while True:
+            try:
+                response = super().handle_request(request)
+            except httpx.TransportError as e:
+                if attempt >= self.retries or not self.should_retry_error(request, e):
+                    self.slots.record_failure()
+                    raise
+            else:
+                if (attempt >= self.retries or response.status_code not in RETRY_STATUSES
+                        or not is_retry_safe(request)):
+                    return response
+                response.close()
+            attempt += 1
+            self.slots.record_retry()
+            time.sleep(self.retry_delay(attempt))
+    
+    def should_retry_error(self, request, error):
+        if isinstance(error, CONNECT_ERRORS):
+            return True
+        return isinstance(error, SEND_ERRORS) and is_retry_safe(request)
+    
+    def retry_delay(self, attempt):
+        """attempt번째 재시도 전 대기 시간 (지수 간격 상한 안에서 무작위, full jitter)"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+    
+    def stats(self):
+        """사용 현황 + 열린 연결 수 / 그중 keep-alive로 대기 중인 연결 수"""
+        stats = self.slots.stats()
+        connections = list(self._pool.connections)
+        stats['connections'] = len(connections)
+        stats['idle'] = sum(1 for connection in connections if connection.is_idle())
+        return stats
+
+def is_retry_safe(request):
+    """다시 보내도 결과가 같은 요청인지 (조회, 서버 함수 호출)
+    
+    앱의 서버 함수(survey_login, save_survey_draft, submit_survey 등)는 모두 upsert 방식이라 두 번 실행돼도 같은 결과입니다.
+    테이블 insert/update는 재시도하지 않습니다.
+    """
+    if request.method in ('GET', 'HEAD', 'OPTIONS'):
+        return True
+    return request.method == 'POST' and '/rpc/' in request.url.path
+
+def create_http_client(transport, timeout=15.0, connect_timeout=5.0):
+    """연결 풀 전송 계층을 쓰는 httpx 클라이언트 (요청마다 timeout초 제한, 풀 대기도 timeout초까지)"""
+    return httpx.Client(
+        transport=transport,
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        follow_redirects=True
+    )
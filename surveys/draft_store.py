@@ -0,0 +1,422 @@
+"""앱 서버의 로컬 임시 저장소와 백그라운드 동기화 (DRAFT_DB_PATH를 설정했을 때만 사용)
+
+저장소는 Streamlit 앱이 실행되는 서버의 SQLite 파일이므로, 앱 서버와 Supabase 사이의 연결이 끊긴 경우만 대비합니다.
+(태블릿과 앱 서버 사이의 연결이 끊기면 화면 자체가 동작하지 않으므로 보호되지 않음)
+파일은 재시작/재배포 후에도 남는 디스크에 두어야 하며, Streamlit Cloud처럼 디스크가 초기화되는 환경에서는 쓰지 않습니다.
+
+설문 페이지의 답변은 바뀔 때마다 파일(drafts)에 기록합니다.
+제출은 submit_survey 함수로 바로 저장하고, 서버에 닿지 못한 경우(연결 실패/시간 초과/게이트웨이 오류)에만
+전송 대기열(outbox)에 넣습니다. 백그라운드 동기화 작업자가 대기열을 여러 건씩 묶어 submit_surveys_batch 함수로 보내며,
+연결 오류는 지수 백오프(지터 포함)로 다시 시도하고, 서버가 거부한 항목(잘못된 값 등)이나
+정해진 횟수만큼 시도해도 보내지 못한 항목은 전송 실패로 옮겨 관리자 대시보드에서 다시 보내거나 다시 작성하게 합니다.
+"""
+import json
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import httpx
+import streamlit as st
+
+from surveys.connection_pool import RETRY_STATUSES
+
+KST = ZoneInfo('Asia/Seoul')
+
+# 서버에 닿지 못한 오류 (제출을 대기열에 넣고 나중에 다시 보냄)
+NETWORK_ERRORS = (httpx.TransportError, ConnectionError, TimeoutError)
+
+def is_network_error(error):
+    """연결 실패/시간 초과, 또는 게이트웨이 오류(502/503/504) 응답인지"""
+    if isinstance(error, NETWORK_ERRORS):
+        return True
+    # 게이트웨이의 HTML 오류 응답은 postgrest APIError의 code에 HTTP 상태 코드가 담김
+    try:
+        return int(getattr(error, 'code', None)) in RETRY_STATUSES
+    except (TypeError, ValueError):
+        return False
+
+def server_timestamp(value):
+    """서버 행의 updated_at(한국 시간, 시간대 없음) → epoch 초 (없거나 읽을 수 없으면 None)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=KST).timestamp()
+
+def kst_timestamp(epoch):
+    """epoch 초 → 서버 행과 같은 형식의 한국 시간 문자열 (server_timestamp의 반대)"""
+    return datetime.fromtimestamp(epoch, KST).strftime('%Y-%m-%d %H:%M:%S')
+
+def survey_state_keys(survey):
+    """설문의 세션 상태 키 (현재 페이지, 기록할 답변 키 목록 - 첫 번째가 답변 데이터)"""
+    return f"{survey}_page", (f"{survey}_data",)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    survey TEXT NOT NULL,
+    elderly_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    page INTEGER,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (survey, elderly_id)
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    survey TEXT NOT NULL,
+    elderly_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    failed_at REAL,
+    UNIQUE (survey, elderly_id)
+);
+"""
+
+class DraftStore:
+    """SQLite 기반 답변 임시 저장 + 전송 대기열 (스레드 안전)"""
+    
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        # 마지막으로 기록한 답변 (바뀌지 않은 재실행은 쓰기 생략)
+        self._saved = {}
+        # 대기열에 항목이 들어오면 설정 (동기화 작업자를 깨움)
+        self.enqueued = threading.Event()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            # 전송 실패 상태가 없던 이전 파일
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+            if 'failed_at' not in columns:
+                self._conn.execute("ALTER TABLE outbox ADD COLUMN failed_at REAL")
+    
+    def save_draft(self, survey, elderly_id, data, page=None):
+        """작성 중인 답변 기록 (이전 기록과 같으면 생략, 기록했으면 True)"""
+        encoded = json.dumps(data, ensure_ascii=False, sort_keys=True, default=str)
+        key = (survey, elderly_id)
+        with self._lock:
+            if self._saved.get(key) == (encoded, page):
+                return False
+            self._conn.execute(
+                "INSERT INTO drafts (survey, elderly_id, data, page, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (survey, elderly_id) DO UPDATE SET "
+                "data = excluded.data, page = excluded.page, updated_at = excluded.updated_at",
+                (survey, elderly_id, encoded, page, self.clock())
+            )
+            self._saved[key] = (encoded, page)
+        return True
+    
+    def load_draft(self, survey, elderly_id):
+        """저장된 답변 (data, page, updated_at) 튜플, 없으면 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, page, updated_at FROM drafts WHERE survey = ? AND elderly_id = ?",
+                (survey, elderly_id)
+            ).fetchone()
+            if row is None:
+                return None
+            self._saved[(survey, elderly_id)] = (row['data'], row['page'])
+        return json.loads(row['data']), row['page'], row['updated_at']
+    
+    def discard(self, survey, elderly_id):
+        """설문의 임시 답변과 미전송 제출 삭제 (서버에 바로 저장했을 때)"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM outbox WHERE survey = ? AND elderly_id = ?", (survey, elderly_id))
+            self._conn.execute("DELETE FROM drafts WHERE survey = ? AND elderly_id = ?", (survey, elderly_id))
+            self._saved.pop((survey, elderly_id), None)
+            self._conn.execute("COMMIT")
+    
+    def enqueue(self, survey, elderly_id, payload):
+        """제출 내용을 전송 대기열에 추가 (같은 설문의 미전송 제출은 최신 것으로 교체)"""
+        now = self.clock()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR REPLACE INTO outbox (survey, elderly_id, payload, created_at, next_attempt_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (survey, elderly_id, json.dumps(payload, ensure_ascii=False, default=str), now, now)
+            )
+        self.enqueued.set()
+        return cursor.lastrowid
+    
+    def due_items(self, limit):
+        """지금 전송할 차례인 대기열 항목 (오래된 순, 전송 실패 항목 제외)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, survey, elderly_id, payload, created_at, attempts FROM outbox "
+                "WHERE failed_at IS NULL AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (self.clock(), limit)
+            ).fetchall()
+        return [dict(row, payload=json.loads(row['payload'])) for row in rows]
+    
+    def mark_synced(self, items):
+        """전송 완료 항목 삭제 (제출 이후 다시 고치지 않은 임시 답변도 함께 삭제)"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for item in items:
+                self._conn.execute("DELETE FROM outbox WHERE id = ?", (item['id'],))
+                self._conn.execute(
+                    "DELETE FROM drafts WHERE survey = ? AND elderly_id = ? AND updated_at <= ?",
+                    (item['survey'], item['elderly_id'], item['created_at'])
+                )
+                self._saved.pop((item['survey'], item['elderly_id']), None)
+            self._conn.execute("COMMIT")
+    
+    def mark_failed(self, items, error, delay_for, max_attempts=None):
+        """전송 실패 항목의 재시도 시각 기록 (delay_for(시도 횟수) 초 뒤)
+        
+        max_attempts번째 시도까지 실패한 항목은 다시 시도하지 않고 전송 실패로 옮깁니다.
+        """
+        now = self.clock()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for item in items:
+                attempts = item['attempts'] + 1
+                failed_at = now if max_attempts and attempts >= max_attempts else None
+                self._conn.execute(
+                    "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ?, failed_at = ? WHERE id = ?",
+                    (attempts, now + delay_for(attempts), item.get('error', error), failed_at, item['id'])
+                )
+            self._conn.execute("COMMIT")
+    
+    def mark_rejected(self, items, error):
+        """서버가 거부한 항목을 바로 전송 실패로 옮김 (다시 보내도 같은 오류가 나므로 재시도하지 않음)"""
+        now = self.clock()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for item in items:
+                self._conn.execute(
+                    "UPDATE outbox SET attempts = ?, last_error = ?, failed_at = ? WHERE id = ?",
+                    (item['attempts'] + 1, item.get('error', error), now, item['id'])
+                )
+            self._conn.execute("COMMIT")
+    
+    def failed_items(self):
+        """전송 실패 항목 (최근 실패 순)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, survey, elderly_id, created_at, attempts, last_error, failed_at FROM outbox "
+                "WHERE failed_at IS NOT NULL ORDER BY failed_at DESC, id DESC"
+            ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def retry_failed(self, ids):
+        """전송 실패 항목을 대기열로 되돌려 바로 다시 전송 (시도 횟수 초기화)"""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET failed_at = NULL, attempts = 0, next_attempt_at = ? "
+                "WHERE id = ? AND failed_at IS NOT NULL",
+                [(self.clock(), item_id) for item_id in ids]
+            )
+        self.enqueued.set()
+    
+    def reopen_failed(self, ids):
+        """전송 실패 항목을 대기열에서 삭제 (작성 중 답변은 남겨 설문을 다시 열어 고친 뒤 제출)"""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM outbox WHERE id = ? AND failed_at IS NOT NULL", [(item_id,) for item_id in ids]
+            )
+    
+    def pending_surveys(self, elderly_id, failed=False):
+        """어르신의 전송 대기 중인 설문 이름 집합 (failed=True면 전송 실패한 설문)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT survey FROM outbox WHERE elderly_id = ? AND (failed_at IS NOT NULL) = ?",
+                (elderly_id, failed)
+            ).fetchall()
+        return {row['survey'] for row in rows}
+    
+    def stats(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(failed_at IS NULL), 0) AS pending, "
+                "COALESCE(SUM(failed_at IS NULL AND attempts > 0), 0) AS retrying, "
+                "COALESCE(SUM(failed_at IS NOT NULL), 0) AS failed, "
+                "MIN(CASE WHEN failed_at IS NULL THEN created_at END) AS oldest FROM outbox"
+            ).fetchone()
+            drafts = self._conn.execute("SELECT COUNT(*) FROM drafts").fetchone()[0]
+            last_error = self._conn.execute(
+                "SELECT last_error FROM outbox WHERE last_error IS NOT NULL ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+        return {
+            'drafts': drafts,
+            'pending': row['pending'],
+            'retrying': row['retrying'],
+            'failed': row['failed'],
+            'oldest_age': self.clock() - row['oldest'] if row['oldest'] is not None else None,
+            'last_error': last_error[0] if last_error else None,
+        }
+
+class SyncWorker(threading.Thread):
+    """전송 대기열을 Supabase로 보내는 백그라운드 작업자
+    
+    대기열에 항목이 들어오면 바로 깨어나고, 그 외에는 interval초마다 확인합니다.
+    한 번에 batch_size건씩 submit_surveys_batch 함수로 보내며,
+    연결 오류는 묶음 전체를 다시 시도하며 max_attempts번 실패하면 전송 실패로 옮기고,
+    서버가 거부한 항목(예: 잘못된 ID)과 연결 오류가 아닌 오류는 바로 전송 실패로 옮깁니다.
+    대기열에 넣은 시각(queued_at)을 함께 보내, 그 뒤에 다른 기기에서 저장된 설문은 서버가 덮어쓰지 않고 건너뜁니다.
+    """
+    
+    def __init__(self, store, supabase, batch_size=20, interval=5.0,
+                 base_delay=2.0, max_delay=300.0, max_attempts=20):
+        super().__init__(name="survey-sync", daemon=True)
+        self.store = store
+        self.supabase = supabase
+        self.batch_size = batch_size
+        self.interval = interval
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self._stopping = threading.Event()
+        self.synced = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last_sync_at = None
+    
+    def retry_delay(self, attempts):
+        """지수 백오프 + 지터 (초)"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+    
+    def sync_once(self):
+        """대기열에서 한 묶음 전송 (전송 성공 건수 반환)"""
+        items = self.store.due_items(self.batch_size)
+        if not items:
+            return 0
+        
+        try:
+            response = self.supabase.rpc('submit_surveys_batch', {
+                'p_items': [
+                    {'id': item['id'], 'survey': item['survey'], 'payload': item['payload'],
+                     'queued_at': kst_timestamp(item['created_at'])}
+                    for item in items
+                ]
+            }).execute()
+            results = {result['id']: result for result in (response.data or [])}
+        except Exception as e:
+            self.failures += len(items)
+            if is_network_error(e):
+                self.store.mark_failed(items, str(e), self.retry_delay, self.max_attempts)
+            else:
+                self.store.mark_rejected(items, str(e))
+            return 0
+        
+        synced, failed, rejected = [], [], []
+        for item in items:
+            result = results.get(item['id'])
+            if result is None:
+                failed.append(dict(item, error="응답 없음"))
+            elif result.get('ok'):
+                synced.append(item)
+            else:
+                rejected.append(dict(item, error=result.get('error') or "서버 거부"))
+        
+        if synced:
+            # 더 최근 내용이 있어 건너뛴 항목도 다시 보낼 필요가 없으므로 대기열에서 삭제
+            self.store.mark_synced(synced)
+            self.skipped += sum(1 for item in synced if results[item['id']].get('skipped'))
+            self.synced += len(synced)
+            self.last_sync_at = time.time()
+        if failed:
+            self.failures += len(failed)
+            self.store.mark_failed(failed, None, self.retry_delay, self.max_attempts)
+        if rejected:
+            self.failures += len(rejected)
+            self.store.mark_rejected(rejected, None)
+        return len(synced)
+    
+    def drain(self):
+        """전송할 차례인 항목이 없을 때까지 반복 전송"""
+        while not self._stopping.is_set():
+            if self.sync_once() < self.batch_size:
+                return
+    
+    def wake(self):
+        self.store.enqueued.set()
+    
+    def stop(self):
+        self._stopping.set()
+        self.wake()
+    
+    def run(self):
+        while not self._stopping.is_set():
+            self.store.enqueued.clear()
+            try:
+                self.drain()
+            except Exception:
+                # 로컬 파일 오류 등으로 작업자가 멈추지 않도록 다음 주기에 다시 시도
+                pass
+            self.store.enqueued.wait(self.interval)
+
+def restore_session(store, survey, elderly_id, server_updated_at=None):
+    """로컬에 저장된 작성 중 답변을 세션 상태로 복원 (복원했으면 True)
+    
+    server_updated_at(서버 행의 updated_at)보다 오래된 로컬 답변은 복원하지 않습니다.
+    (다른 기기에서 이어서 작성/제출한 내용을 덮어쓰지 않도록)
+    """
+    if store is None:
+        return False
+    try:
+        draft = store.load_draft(survey, elderly_id)
+    except Exception:
+        return False
+    if draft is None:
+        return False
+    
+    page_key, state_keys = survey_state_keys(survey)
+    state, page, updated_at = draft
+    server_time = server_timestamp(server_updated_at)
+    if server_time is not None and updated_at <= server_time:
+        return False
+    for key in state_keys:
+        if key in state:
+            st.session_state[key] = state[key]
+    if page:
+        st.session_state[page_key] = page
+    return state_keys[0] in state
+
+def autosave(store, survey, elderly_id):
+    """현재 세션의 답변을 로컬에 기록 (저장 실패는 화면 진행을 막지 않음)"""
+    if store is None:
+        return
+    page_key, state_keys = survey_state_keys(survey)
+    if state_keys[0] not in st.session_state:
+        return
+    state = {key: st.session_state[key] for key in state_keys if key in st.session_state}
+    try:
+        store.save_draft(survey, elderly_id, state, st.session_state.get(page_key))
+    except Exception as e:
+        st.warning(f"⚠️ 임시 저장 실패: {str(e)}")
+
+def submit_or_queue(supabase, store, survey, elderly_id, payload):
+    """설문 제출 (submit_survey 함수로 바로 저장하고 갱신된 진행 상황 반환)
+    
+    서버에 닿지 못한 경우에만, 로컬 저장소가 있으면 전송 대기열에 넣고 None을 반환합니다(동기화 작업자가 전송).
+    그 외 오류(잘못된 값 등)와 로컬 저장소가 없을 때의 연결 오류는 그대로 발생합니다.
+    """
+    try:
+        response = supabase.rpc('submit_survey', {'p_survey': survey, 'p_payload': payload}).execute()
+    except Exception as e:
+        if store is None or not is_network_error(e):
+            raise
+        store.enqueue(survey, elderly_id, payload)
+        return None
+    
+    if store is not None:
+        # 이전에 대기열에 넣은 제출이 나중에 전송되어 이번 저장을 덮어쓰지 않도록 삭제
+        try:
+            store.discard(survey, elderly_id)
+        except Exception:
+            pass
+    return response.data or {}
@@ -1,153 +1,234 @@
 import streamlit as st
 import json
-from datetime import datetime
-from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
 
-KST = ZoneInfo('Asia/Seoul')
+from surveys.visual_assets import GUIDE_HTML, inject_styles, selector_header_html
+from surveys.draft_store import autosave
+from surveys.survey_engine import show_survey, survey_block
 
-def get_kst_now():
-    """현재 한국 시간 반환"""
-    return datetime.now(KST).strftime('%Y-%m-%d %H:%M:%S')
+# 조사 일수
+SURVEY_DAYS = 5
 
-def show_nutrition_survey(supabase, elderly_id, surveyor_id, nursing_home_id):
-    st.title("🥗 2. 영양 조사표")
-    
-    # 진행 상태 초기화
-    if 'nutrition_page' not in st.session_state:
-        st.session_state.nutrition_page = 1
+# 끼니 구성: (끼니 키, 이름, 아이콘, [(음식 칸 키, 이름), ...])
+# 간식처럼 칸이 하나인 끼니는 칸 키를 None으로 두며, 저장 키는 끼니 키만 사용합니다.
+MEALS = [
+    ('breakfast', '아침', '🌅', [('rice', '밥/죽'), ('soup', '국/탕'), ('main', '주찬'),
+                                ('side1', '부찬1'), ('side2', '부찬2'), ('kimchi', '김치')]),
+    ('snack1', '간식1', '🍪', [(None, '간식')]),
+    ('lunch', '점심', '☀️', [('rice', '밥/죽'), ('soup', '국/탕'), ('main', '주찬'),
+                            ('side1', '부찬1'), ('side2', '부찬2'), ('kimchi', '김치')]),
+    ('snack2', '간식2', '🍪', [(None, '간식')]),
+    ('dinner', '저녁', '🌙', [('rice', '밥/죽'), ('soup', '국/탕'), ('main', '주찬'),
+                             ('side1', '부찬1'), ('side2', '부찬2'), ('kimchi', '김치')]),
+]
+
+class MealGrid:
+    """식사 조사 격자 (일차 × 음식 칸)
+    
+    끼니별 음식 칸을 하나의 축으로 펼쳐 (일차, 칸) 모양의 NumPy 배열로 다룹니다.
+    저장 키는 기존과 같은 'day{일차}_{끼니}_{칸}' 형식입니다.
+    """
+    
+    def __init__(self, days=SURVEY_DAYS, meals=MEALS):
+        self.days = days
+        self.meals = meals
+        self.item_keys = []     # 칸별 저장 키 (일차 제외), 예: 'breakfast_rice', 'snack1'
+        self.item_labels = []   # 칸별 이름
+        meal_index = []
+        self.meal_starts = []   # 끼니별 첫 칸 위치
+        for m, (meal_key, _, _, slots) in enumerate(meals):
+            self.meal_starts.append(len(self.item_keys))
+            for slot_key, slot_label in slots:
+                self.item_keys.append(f"{meal_key}_{slot_key}" if slot_key else meal_key)
+                self.item_labels.append(slot_label)
+                meal_index.append(m)
+        self.meal_index = np.array(meal_index)
+        self.slot_count = len(self.item_keys)
+        self.shape = (days, self.slot_count)
+    
+    def key(self, day_index, slot_index, suffix=''):
+        """저장 키 (day_index는 0부터)"""
+        return f"day{day_index + 1}_{self.item_keys[slot_index]}{suffix}"
+    
+    def keys(self, suffix=''):
+        """모든 저장 키 (일차 → 칸 순서)"""
+        return [self.key(d, i, suffix) for d in range(self.days) for i in range(self.slot_count)]
+    
+    def meal_slots(self, meal_position):
+        """끼니의 칸 위치 범위"""
+        start = self.meal_starts[meal_position]
+        return range(start, start + len(self.meals[meal_position][3]))
+    
+    def zeros(self, dtype=float):
+        return np.zeros(self.shape, dtype=dtype)
+    
+    def to_array(self, values, suffix='', dtype=float):
+        """{저장 키: 값} → (일차, 칸) 배열 (없는 키는 0)"""
+        if isinstance(values, str):
+            values = json.loads(values) if values else {}
+        values = values or {}
+        flat = [values.get(key) or 0 for key in self.keys(suffix)]
+        return np.array(flat, dtype=dtype).reshape(self.shape)
+    
+    def to_dict(self, array, suffix=''):
+        """(일차, 칸) 배열 → {저장 키: 값}"""
+        return dict(zip(self.keys(suffix), np.asarray(array).ravel().tolist()))
+    
+    def meal_totals(self, array):
+        """칸 축을 끼니별로 합산 (..., 일차, 끼니)"""
+        return np.add.reduceat(np.asarray(array), self.meal_starts, axis=-1)
+
+# 프로세스당 1회 생성
+MEAL_GRID = MealGrid()
+
+# 목측법 잔반 단계(0~4)별 남긴 비율
+VISUAL_RATIOS = np.array([0.0, 0.25, 0.50, 0.75, 1.0])
+
+def summarize_intake(portions, waste_grams, grid=MEAL_GRID):
+    """제공량과 잔반량(g)으로 칸/끼니/일/전체 단위 섭취량과 섭취율 계산
+    
+    portions, waste_grams: (..., 일차, 칸) 배열. 앞쪽 축은 어르신 등 임의의 묶음 축입니다.
+    섭취율(%)은 제공량이 0인 곳에서 NaN입니다.
+    """
+    portions = np.asarray(portions, dtype=float)
+    waste_grams = np.asarray(waste_grams, dtype=float)
+    intake = portions - waste_grams
+    
+    def rate(eaten, served):
+        return np.divide(eaten * 100, served, out=np.full(np.shape(served), np.nan), where=served > 0)
+    
+    result = {
+        'portion_g': portions,
+        'waste_g': waste_grams,
+        'intake_g': intake,
+        'intake_rate': rate(intake, portions)
+    }
+    for level, reduce in (('meal', grid.meal_totals),
+                          ('day', lambda a: a.sum(axis=-1)),
+                          ('total', lambda a: a.sum(axis=(-2, -1)))):
+        served = reduce(portions)
+        eaten = reduce(intake)
+        result[f'{level}_portion_g'] = served
+        result[f'{level}_waste_g'] = reduce(waste_grams)
+        result[f'{level}_intake_g'] = eaten
+        result[f'{level}_intake_rate'] = rate(eaten, served)
+    return result
+
+def stored_waste_levels(data, portions=None, grid=MEAL_GRID):
+    """저장된 목측 단계 (일차, 칸) 정수 배열
+    
+    plate_waste_levels(저장 키 순서의 정수 목록)를 읽고, 없으면(이전 응답) 잔반량(g)/제공량 비율로 복원합니다.
+    portions: 잔반량(g)을 계산할 때 쓴 제공량 (없으면 data의 meal_portions)
+    잔반 데이터가 전혀 없으면 None을 반환합니다.
+    """
+    top = len(VISUAL_RATIOS) - 1
+    values = data.get('plate_waste_levels')
+    if isinstance(values, str):
+        values = json.loads(values) if values else None
+    if isinstance(values, list) and len(values) == grid.days * grid.slot_count:
+        return np.clip(np.array([v or 0 for v in values], dtype=int), 0, top).reshape(grid.shape)
+    
+    if not data.get('plate_waste'):
+        return None
+    if portions is None:
+        portions = grid.to_array(data.get('meal_portions', {}))
+    waste_grams = grid.to_array(data.get('plate_waste'), '_waste')
+    ratio = np.divide(waste_grams, portions, out=np.zeros(grid.shape), where=portions > 0)
+    return np.clip(np.rint(ratio * top), 0, top).astype(int)
+
+def compute_plate_waste(portions, levels, grid=MEAL_GRID):
+    """제공량과 목측 단계(0~4)로 잔반량/섭취량/섭취율을 한 번에 계산
+    
+    portions, levels: (..., 일차, 칸) 배열 (한 명이면 (일차, 칸), 여러 명이면 (명, 일차, 칸)).
+    반환값은 summarize_intake()와 같습니다.
+    """
+    waste_grams = np.asarray(portions, dtype=float) * VISUAL_RATIOS[np.asarray(levels, dtype=int)]
+    return summarize_intake(portions, waste_grams, grid)
+
+def cohort_arrays(rows, grid=MEAL_GRID):
+    """nutrition_survey 행 목록(또는 DataFrame) → (어르신 ID 목록, 제공량 배열, 잔반량 배열)
+    
+    배열 모양은 (명, 일차, 칸)이며 meal_portions/plate_waste JSON을 그대로 읽습니다.
+    """
+    if hasattr(rows, 'to_dict'):
+        rows = rows.to_dict('records')
+    rows = list(rows)
+    elderly_ids = [row.get('elderly_id') for row in rows]
+    portions = np.stack([grid.to_array(row.get('meal_portions')) for row in rows]) if rows else np.zeros((0,) + grid.shape)
+    waste_grams = np.stack([grid.to_array(row.get('plate_waste'), '_waste') for row in rows]) if rows else np.zeros((0,) + grid.shape)
+    return elderly_ids, portions, waste_grams
+
+def compute_cohort_intake(rows, grid=MEAL_GRID):
+    """여러 어르신의 저장된 영양 조사 행으로 섭취량을 일괄 계산
     
-    # 기존 데이터 불러오기
-    if 'nutrition_data' not in st.session_state:
-        try:
-            response = supabase.table('nutrition_survey').select('*').eq('elderly_id', elderly_id).execute()
-            if response.data:
-                st.session_state.nutrition_data = response.data[0]
-            else:
-                st.session_state.nutrition_data = {}
-        except:
-            st.session_state.nutrition_data = {}
-    
-    # 페이지 진행 표시 (3페이지로 변경)
-    total_pages = 3
-    st.progress(st.session_state.nutrition_page / total_pages)
-    st.caption(f"페이지 {st.session_state.nutrition_page} / {total_pages}")
-    
-    # 페이지별 내용
-    if st.session_state.nutrition_page == 1:
-        show_page1_meal_portions()  # 5일 식사량 조사
-    elif st.session_state.nutrition_page == 2:
-        show_page2_plate_waste_visual()  # 5일 잔반량 조사 (목측법)
-    elif st.session_state.nutrition_page == 3:
-        show_page3_submit(supabase, elderly_id, surveyor_id, nursing_home_id)  # 제출
+    (어르신 ID 목록, summarize_intake() 결과) 튜플을 반환합니다.
+    """
+    elderly_ids, portions, waste_grams = cohort_arrays(rows, grid)
+    return elderly_ids, summarize_intake(portions, waste_grams, grid)
+
+def cohort_intake_frame(rows, grid=MEAL_GRID):
+    """어르신별 일차/전체 섭취 요약 DataFrame"""
+    elderly_ids, result = compute_cohort_intake(rows, grid)
+    frame = {'elderly_id': elderly_ids}
+    for day in range(grid.days):
+        frame[f'day{day + 1}_intake_g'] = result['day_intake_g'][:, day]
+        frame[f'day{day + 1}_intake_rate'] = result['day_intake_rate'][:, day]
+    for name in ('portion_g', 'waste_g', 'intake_g', 'intake_rate'):
+        frame[f'total_{name}'] = result[f'total_{name}']
+    return pd.DataFrame(frame)
+
+def fetch_meal_item_stats(supabase, day, meal, nursing_home_id=None):
+    """일차/끼니의 칸별 섭취 집계 DataFrame (nutrition_meal_item_stats 뷰, 서버에서 인덱스로 집계)
+    
+    요양원을 지정하지 않으면 요양원별 합계 컬럼을 더해 전체 섭취율을 계산합니다.
+    """
+    query = supabase.table('nutrition_meal_item_stats').select(
+        'slot,served,portion_g_sum,waste_g_sum,avg_waste_level'
+    ).eq('day', day).eq('meal', meal)
+    if nursing_home_id:
+        query = query.eq('nursing_home_id', nursing_home_id)
+    rows = query.execute().data or []
+    if not rows:
+        return pd.DataFrame()
+    
+    df = pd.DataFrame(rows)
+    for column in ('served', 'portion_g_sum', 'waste_g_sum', 'avg_waste_level'):
+        df[column] = pd.to_numeric(df[column])
+    # 요양원별 평균 잔반 단계는 제공 인원으로 가중 합산
+    df['waste_level_sum'] = df['avg_waste_level'].fillna(0) * df['served']
+    df = df.groupby('slot', sort=False)[['served', 'portion_g_sum', 'waste_g_sum', 'waste_level_sum']].sum()
+    
+    # 화면의 칸 순서로 정렬하고 칸 이름 추가
+    slot_labels = next({slot_key or '': label for slot_key, label in slots}
+                       for meal_key, _, _, slots in MEALS if meal_key == meal)
+    df = df.reindex([slot for slot in slot_labels if slot in df.index])
+    df.insert(0, 'label', [slot_labels[slot] for slot in df.index])
+    df['avg_waste_level'] = (df['waste_level_sum'] / df['served'].where(df['served'] > 0)).round(2)
+    df['intake_rate'] = ((df['portion_g_sum'] - df['waste_g_sum']) * 100
+                         / df['portion_g_sum'].where(df['portion_g_sum'] > 0)).round(1)
+    return df.drop(columns=['waste_level_sum']).reset_index()
+
+def show_nutrition_survey(supabase, elderly_id, surveyor_id, nursing_home_id, drafts=None):
+    """영양 조사표 (페이지 구성은 surveys/questionnaires/nutrition.json, 각 페이지는 아래 블록)"""
+    show_survey('nutrition', supabase, elderly_id, surveyor_id, nursing_home_id, drafts)
+
+@survey_block('meal_portions')
+def meal_portions_block(context):
+    show_page1_meal_portions()
+
+@survey_block('plate_waste')
+def plate_waste_block(context):
+    show_page2_plate_waste_visual(context.drafts, context.elderly_id)
 
 def create_visual_guide():
     """목측법 원형 가이드 생성"""
-    st.markdown("""
-    <style>
-    .visual-guide {
-        display: flex;
-        justify-content: space-around;
-        align-items: center;
-        padding: 20px;
-        background-color: #f0f2f6;
-        border-radius: 10px;
-        margin-bottom: 20px;
-    }
-    .visual-item {
-        text-align: center;
-        flex: 1;
-    }
-    .visual-item svg {
-        width: 80px;
-        height: 80px;
-    }
-    .visual-label {
-        margin-top: 10px;
-        font-size: 12px;
-        font-weight: bold;
-    }
-    </style>
-    
-    <div class="visual-guide">
-        <div class="visual-item">
-            <svg viewBox="0 0 100 100">
-                <circle cx="50" cy="50" r="45" fill="white" stroke="#333" stroke-width="2"/>
-            </svg>
-            <div class="visual-label">0. 다 먹음</div>
-        </div>
-        <div class="visual-item">
-            <svg viewBox="0 0 100 100">
-                <circle cx="50" cy="50" r="45" fill="white" stroke="#333" stroke-width="2"/>
-                <path d="M 50 50 L 50 5 A 45 45 0 0 1 95 50 Z" fill="#2c3e50"/>
-            </svg>
-            <div class="visual-label">1. 조금 남김<br/>(약 25%)</div>
-        </div>
-        <div class="visual-item">
-            <svg viewBox="0 0 100 100">
-                <circle cx="50" cy="50" r="45" fill="white" stroke="#333" stroke-width="2"/>
-                <path d="M 50 50 L 50 5 A 45 45 0 0 1 50 95 Z" fill="#2c3e50"/>
-            </svg>
-            <div class="visual-label">2. 반 정도 남김<br/>(약 50%)</div>
-        </div>
-        <div class="visual-item">
-            <svg viewBox="0 0 100 100">
-                <circle cx="50" cy="50" r="45" fill="white" stroke="#333" stroke-width="2"/>
-                <path d="M 50 50 L 50 5 A 45 45 0 1 1 5 50 Z" fill="#2c3e50"/>
-            </svg>
-            <div class="visual-label">3. 대부분 남김<br/>(약 75%)</div>
-        </div>
-        <div class="visual-item">
-            <svg viewBox="0 0 100 100">
-                <circle cx="50" cy="50" r="45" fill="#2c3e50" stroke="#333" stroke-width="2"/>
-            </svg>
-            <div class="visual-label">4. 모두 남김<br/>(100%)</div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(GUIDE_HTML, unsafe_allow_html=True)
 
 def create_food_waste_selector(label, key, default_value=0):
     """음식별 잔반량 선택기 (원형 이미지 포함)"""
-    st.markdown(f"**{label}**")
-    
-    # SVG 원형 이미지 정의
-    circles = [
-        # 0. 다 먹음
-        """<svg viewBox="0 0 100 100" style="width:60px;height:60px">
-            <circle cx="50" cy="50" r="45" fill="white" stroke="#333" stroke-width="2"/>
-        </svg>""",
-        # 1. 조금 남김 (25%) - 1/4만 칠하기
-        """<svg viewBox="0 0 100 100" style="width:60px;height:60px">
-            <circle cx="50" cy="50" r="45" fill="white" stroke="#333" stroke-width="2"/>
-            <path d="M 50 50 L 50 5 A 45 45 0 0 1 95 50 Z" fill="#2c3e50"/>
-        </svg>""",
-        # 2. 반 정도 남김 (50%) - 1/2만 칠하기
-        """<svg viewBox="0 0 100 100" style="width:60px;height:60px">
-            <circle cx="50" cy="50" r="45" fill="white" stroke="#333" stroke-width="2"/>
-            <path d="M 50 50 L 50 5 A 45 45 0 0 1 50 95 Z" fill="#2c3e50"/>
-        </svg>""",
-        # 3. 대부분 남김 (75%) - 3/4만 칠하기
-        """<svg viewBox="0 0 100 100" style="width:60px;height:60px">
-            <circle cx="50" cy="50" r="45" fill="white" stroke="#333" stroke-width="2"/>
-            <path d="M 50 50 L 50 5 A 45 45 0 1 1 5 50 Z" fill="#2c3e50"/>
-        </svg>""",
-        # 4. 모두 남김 (100%)
-        """<svg viewBox="0 0 100 100" style="width:60px;height:60px">
-            <circle cx="50" cy="50" r="45" fill="#2c3e50" stroke="#333" stroke-width="2"/>
-        </svg>"""
-    ]
-    
-    labels = ["0. 다 먹음", "1. 조금", "2. 반", "3. 대부분", "4. 모두"]
-    
-    # 5개 컬럼으로 원형 이미지 배치
-    cols = st.columns(5)
-    for i, (col, circle, label_text) in enumerate(zip(cols, circles, labels)):
-        with col:
-            st.markdown(f"""
-            <div style="text-align: center; margin-bottom: 8px;">
-                {circle}
-                <div style="font-size: 11px; margin-top: 5px; color: #666;">{label_text}</div>
-            </div>
-            """, unsafe_allow_html=True)
+    # 제목과 원형 이미지 5개를 한 번에 표시 (이미지는 공통 스타일시트의 CSS 클래스)
+    st.markdown(selector_header_html(label), unsafe_allow_html=True)
     
     # 라디오 버튼을 5개 컬럼으로 나누어 배치
     radio_cols = st.columns(5)
@@ -156,363 +237,237 @@ def create_food_waste_selector(label, key, default_value=0):
     if f"{key}_selected" not in st.session_state:
         st.session_state[f"{key}_selected"] = default_value
     
+    # 선택은 콜백에서 반영되므로 버튼 색이 바로 맞게 그려짐 (추가 st.rerun 불필요)
     for i, col in enumerate(radio_cols):
         with col:
             button_type = "primary" if st.session_state[f"{key}_selected"] == i else "secondary"
-            if st.button(f"{i}", 
-                        key=f"{key}_radio_{i}", 
-                        use_container_width=True,
-                        type=button_type):
-                st.session_state[f"{key}_selected"] = i
-                st.rerun()
+            st.button(f"{i}", 
+                      key=f"{key}_radio_{i}", 
+                      use_container_width=True,
+                      type=button_type,
+                      on_click=select_waste_level,
+                      args=(key, i))
     
     return st.session_state[f"{key}_selected"]
 
+def select_waste_level(key, level):
+    """잔반 단계 버튼 콜백"""
+    st.session_state[f"{key}_selected"] = level
+
 def show_page1_meal_portions():
     """1페이지: 1인 분량 음식 질량 조사 (5일)"""
-    st.subheader("1인 분량 음식 질량 조사 (5일)")
+    st.subheader(f"1인 분량 음식 질량 조사 ({MEAL_GRID.days}일)")
     
-    st.info("📝 5일간 제공된 음식의 질량을 측정하여 기록해주세요. (단위: g)")
+    st.info(f"📝 {MEAL_GRID.days}일간 제공된 음식의 질량을 측정하여 기록해주세요. (단위: g)")
     
-    # 탭 크기 조정 CSS
-    st.markdown("""
-    <style>
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 8px;
-    }
-    .stTabs [data-baseweb="tab"] {
-        height: 60px;
-        padding: 10px 24px;
-        font-size: 18px;
-        font-weight: 600;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # 공통 스타일시트 (탭 크기)
+    inject_styles()
     
     data = st.session_state.nutrition_data
     
     # 기존 데이터 불러오기
-    existing_portions = data.get('meal_portions', {})
-    if isinstance(existing_portions, str):
-        existing_portions = json.loads(existing_portions) if existing_portions else {}
-    
-    meal_portions = {}
+    grid = MEAL_GRID
+    existing_portions = grid.to_array(data.get('meal_portions', {}))
+    portions = grid.zeros()
     
     # 탭 생성
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📅 1일차", "📅 2일차", "📅 3일차", "📅 4일차", "📅 5일차"])
-    
-    # 1일차
-    with tab1:
-        day = 1
-        col1, col2, col3, col4, col5 = st.columns(5)
-        
-        with col1:
-            st.write("**아침**")
-            breakfast_rice = st.number_input("밥/죽 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_breakfast_rice', 0)), step=1.0, key=f"day{day}_breakfast_rice")
-            breakfast_soup = st.number_input("국/탕 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_breakfast_soup', 0)), step=1.0, key=f"day{day}_breakfast_soup")
-            breakfast_main = st.number_input("주찬 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_breakfast_main', 0)), step=1.0, key=f"day{day}_breakfast_main")
-            breakfast_side1 = st.number_input("부찬1 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_breakfast_side1', 0)), step=1.0, key=f"day{day}_breakfast_side1")
-            breakfast_side2 = st.number_input("부찬2 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_breakfast_side2', 0)), step=1.0, key=f"day{day}_breakfast_side2")
-            breakfast_kimchi = st.number_input("김치 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_breakfast_kimchi', 0)), step=1.0, key=f"day{day}_breakfast_kimchi")
-        with col2:
-            st.write("**간식1**")
-            snack1 = st.number_input("간식 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_snack1', 0)), step=1.0, key=f"day{day}_snack1")
-        with col3:
-            st.write("**점심**")
-            lunch_rice = st.number_input("밥/죽 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_lunch_rice', 0)), step=1.0, key=f"day{day}_lunch_rice")
-            lunch_soup = st.number_input("국/탕 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_lunch_soup', 0)), step=1.0, key=f"day{day}_lunch_soup")
-            lunch_main = st.number_input("주찬 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_lunch_main', 0)), step=1.0, key=f"day{day}_lunch_main")
-            lunch_side1 = st.number_input("부찬1 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_lunch_side1', 0)), step=1.0, key=f"day{day}_lunch_side1")
-            lunch_side2 = st.number_input("부찬2 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_lunch_side2', 0)), step=1.0, key=f"day{day}_lunch_side2")
-            lunch_kimchi = st.number_input("김치 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_lunch_kimchi', 0)), step=1.0, key=f"day{day}_lunch_kimchi")
-        with col4:
-            st.write("**간식2**")
-            snack2 = st.number_input("간식 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_snack2', 0)), step=1.0, key=f"day{day}_snack2")
-        with col5:
-            st.write("**저녁**")
-            dinner_rice = st.number_input("밥/죽 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_dinner_rice', 0)), step=1.0, key=f"day{day}_dinner_rice")
-            dinner_soup = st.number_input("국/탕 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_dinner_soup', 0)), step=1.0, key=f"day{day}_dinner_soup")
-            dinner_main = st.number_input("주찬 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_dinner_main', 0)), step=1.0, key=f"day{day}_dinner_main")
-            dinner_side1 = st.number_input("부찬1 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_dinner_side1', 0)), step=1.0, key=f"day{day}_dinner_side1")
-            dinner_side2 = st.number_input("부찬2 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_dinner_side2', 0)), step=1.0, key=f"day{day}_dinner_side2")
-            dinner_kimchi = st.number_input("김치 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_dinner_kimchi', 0)), step=1.0, key=f"day{day}_dinner_kimchi")
-        
-        meal_portions.update({
-            f'day{day}_breakfast_rice': breakfast_rice, f'day{day}_breakfast_soup': breakfast_soup, f'day{day}_breakfast_main': breakfast_main,
-            f'day{day}_breakfast_side1': breakfast_side1, f'day{day}_breakfast_side2': breakfast_side2, f'day{day}_breakfast_kimchi': breakfast_kimchi,
-            f'day{day}_snack1': snack1, f'day{day}_lunch_rice': lunch_rice, f'day{day}_lunch_soup': lunch_soup,
-            f'day{day}_lunch_main': lunch_main, f'day{day}_lunch_side1': lunch_side1, f'day{day}_lunch_side2': lunch_side2,
-            f'day{day}_lunch_kimchi': lunch_kimchi, f'day{day}_snack2': snack2, f'day{day}_dinner_rice': dinner_rice,
-            f'day{day}_dinner_soup': dinner_soup, f'day{day}_dinner_main': dinner_main, f'day{day}_dinner_side1': dinner_side1,
-            f'day{day}_dinner_side2': dinner_side2, f'day{day}_dinner_kimchi': dinner_kimchi
-        })
-        
-        daily_total = breakfast_rice + breakfast_soup + breakfast_main + breakfast_side1 + breakfast_side2 + breakfast_kimchi + snack1 + lunch_rice + lunch_soup + lunch_main + lunch_side1 + lunch_side2 + lunch_kimchi + snack2 + dinner_rice + dinner_soup + dinner_main + dinner_side1 + dinner_side2 + dinner_kimchi
-        st.markdown("---")
-        st.metric(f"{day}일차 총 제공량", f"{daily_total:.0f}g")
-    
-    # 2일차부터 5일차까지 동일한 구조로 반복
-    for day, tab in [(2, tab2), (3, tab3), (4, tab4), (5, tab5)]:
+    tabs = st.tabs([f"📅 {day + 1}일차" for day in range(grid.days)])
+    
+    for day, tab in enumerate(tabs):
         with tab:
-            col1, col2, col3, col4, col5 = st.columns(5)
-            
-            with col1:
-                st.write("**아침**")
-                breakfast_rice = st.number_input("밥/죽 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_breakfast_rice', 0)), step=1.0, key=f"day{day}_breakfast_rice")
-                breakfast_soup = st.number_input("국/탕 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_breakfast_soup', 0)), step=1.0, key=f"day{day}_breakfast_soup")
-                breakfast_main = st.number_input("주찬 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_breakfast_main', 0)), step=1.0, key=f"day{day}_breakfast_main")
-                breakfast_side1 = st.number_input("부찬1 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_breakfast_side1', 0)), step=1.0, key=f"day{day}_breakfast_side1")
-                breakfast_side2 = st.number_input("부찬2 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_breakfast_side2', 0)), step=1.0, key=f"day{day}_breakfast_side2")
-                breakfast_kimchi = st.number_input("김치 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_breakfast_kimchi', 0)), step=1.0, key=f"day{day}_breakfast_kimchi")
-            with col2:
-                st.write("**간식1**")
-                snack1 = st.number_input("간식 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_snack1', 0)), step=1.0, key=f"day{day}_snack1")
-            with col3:
-                st.write("**점심**")
-                lunch_rice = st.number_input("밥/죽 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_lunch_rice', 0)), step=1.0, key=f"day{day}_lunch_rice")
-                lunch_soup = st.number_input("국/탕 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_lunch_soup', 0)), step=1.0, key=f"day{day}_lunch_soup")
-                lunch_main = st.number_input("주찬 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_lunch_main', 0)), step=1.0, key=f"day{day}_lunch_main")
-                lunch_side1 = st.number_input("부찬1 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_lunch_side1', 0)), step=1.0, key=f"day{day}_lunch_side1")
-                lunch_side2 = st.number_input("부찬2 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_lunch_side2', 0)), step=1.0, key=f"day{day}_lunch_side2")
-                lunch_kimchi = st.number_input("김치 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_lunch_kimchi', 0)), step=1.0, key=f"day{day}_lunch_kimchi")
-            with col4:
-                st.write("**간식2**")
-                snack2 = st.number_input("간식 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_snack2', 0)), step=1.0, key=f"day{day}_snack2")
-            with col5:
-                st.write("**저녁**")
-                dinner_rice = st.number_input("밥/죽 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_dinner_rice', 0)), step=1.0, key=f"day{day}_dinner_rice")
-                dinner_soup = st.number_input("국/탕 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_dinner_soup', 0)), step=1.0, key=f"day{day}_dinner_soup")
-                dinner_main = st.number_input("주찬 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_dinner_main', 0)), step=1.0, key=f"day{day}_dinner_main")
-                dinner_side1 = st.number_input("부찬1 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_dinner_side1', 0)), step=1.0, key=f"day{day}_dinner_side1")
-                dinner_side2 = st.number_input("부찬2 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_dinner_side2', 0)), step=1.0, key=f"day{day}_dinner_side2")
-                dinner_kimchi = st.number_input("김치 (g)", min_value=0.0, max_value=1000.0, value=float(existing_portions.get(f'day{day}_dinner_kimchi', 0)), step=1.0, key=f"day{day}_dinner_kimchi")
-            
-            meal_portions.update({
-                f'day{day}_breakfast_rice': breakfast_rice, f'day{day}_breakfast_soup': breakfast_soup, f'day{day}_breakfast_main': breakfast_main,
-                f'day{day}_breakfast_side1': breakfast_side1, f'day{day}_breakfast_side2': breakfast_side2, f'day{day}_breakfast_kimchi': breakfast_kimchi,
-                f'day{day}_snack1': snack1, f'day{day}_lunch_rice': lunch_rice, f'day{day}_lunch_soup': lunch_soup,
-                f'day{day}_lunch_main': lunch_main, f'day{day}_lunch_side1': lunch_side1, f'day{day}_lunch_side2': lunch_side2,
-                f'day{day}_lunch_kimchi': lunch_kimchi, f'day{day}_snack2': snack2, f'day{day}_dinner_rice': dinner_rice,
-                f'day{day}_dinner_soup': dinner_soup, f'day{day}_dinner_main': dinner_main, f'day{day}_dinner_side1': dinner_side1,
-                f'day{day}_dinner_side2': dinner_side2, f'day{day}_dinner_kimchi': dinner_kimchi
-            })
+            cols = st.columns(len(grid.meals))
+            for m, (col, (_, meal_label, _, _)) in enumerate(zip(cols, grid.meals)):
+                with col:
+                    st.write(f"**{meal_label}**")
+                    for i in grid.meal_slots(m):
+                        portions[day, i] = st.number_input(
+                            f"{grid.item_labels[i]} (g)",
+                            min_value=0.0,
+                            max_value=1000.0,
+                            value=float(existing_portions[day, i]),
+                            step=1.0,
+                            key=grid.key(day, i)
+                        )
             
-            daily_total = breakfast_rice + breakfast_soup + breakfast_main + breakfast_side1 + breakfast_side2 + breakfast_kimchi + snack1 + lunch_rice + lunch_soup + lunch_main + lunch_side1 + lunch_side2 + lunch_kimchi + snack2 + dinner_rice + dinner_soup + dinner_main + dinner_side1 + dinner_side2 + dinner_kimchi
             st.markdown("---")
-            st.metric(f"{day}일차 총 제공량", f"{daily_total:.0f}g")
-    
-    # 5일 총량 계산
-    total_portions = sum(meal_portions.values())
+            st.metric(f"{day + 1}일차 총 제공량", f"{portions[day].sum():.0f}g")
+    
+    # 제공량을 고친 칸만 저장된 목측 단계로 잔반량(g)을 다시 계산
+    changed = portions != existing_portions
+    if changed.any():
+        levels = stored_waste_levels(data, existing_portions, grid)
+        if levels is not None:
+            waste_grams = grid.to_array(data.get('plate_waste', {}), '_waste')
+            waste_grams[changed] = portions[changed] * VISUAL_RATIOS[levels[changed]]
+            data['plate_waste'] = json.dumps(grid.to_dict(waste_grams, '_waste'), ensure_ascii=False)
+            data['plate_waste_levels'] = levels.ravel().tolist()
+    
+    # 전체 기간 총량 계산
+    total_portions = portions.sum()
     st.markdown("---")
-    st.subheader("📊 5일간 총 제공량")
+    st.subheader(f"📊 {grid.days}일간 총 제공량")
     st.metric("총계", f"{total_portions:.0f}g", 
-             delta=f"1일 평균 {total_portions/5:.0f}g")
+             delta=f"1일 평균 {total_portions/grid.days:.0f}g")
     
     # 데이터 저장
-    st.session_state.nutrition_data['meal_portions'] = json.dumps(meal_portions, ensure_ascii=False)
-    
-    navigation_buttons()
+    st.session_state.nutrition_data['meal_portions'] = json.dumps(grid.to_dict(portions), ensure_ascii=False)
+
+# 일차별 잔반량 합계 (g, 전체 실행에서 계산, 일차 블록만 다시 실행될 때 해당 일차만 갱신)
+DAY_WASTE_KEY = 'nutrition_day_waste'
+# 페이지 전체 실행 중 표시 (일차 블록만 다시 실행될 때는 False)
+FULL_RUN_KEY = 'nutrition_waste_full_run'
 
-def show_page2_plate_waste_visual():
-    """2페이지: 잔반량 조사 (5일) - 목측법"""
-    st.subheader("잔반량 조사 (5일) - 목측법")
+def show_page2_plate_waste_visual(drafts=None, elderly_id=None):
+    """2페이지: 잔반량 조사 (5일) - 목측법
     
-    st.info("📝 5일간 남긴 음식의 양을 원형 이미지를 보고 선택해주세요.")
+    전체 일차의 잔반량은 실행마다 한 번만 계산하고, 일차 블록에는 해당 일차 값만 넘깁니다.
+    임시 저장은 설문 화면(show_survey)이 실행당 한 번 합니다.
+    """
+    st.subheader(f"잔반량 조사 ({MEAL_GRID.days}일) - 목측법")
     
-    # 탭 크기 조정 CSS
-    st.markdown("""
-    <style>
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 8px;
-    }
-    .stTabs [data-baseweb="tab"] {
-        height: 60px;
-        padding: 10px 24px;
-        font-size: 18px;
-        font-weight: 600;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    st.info(f"📝 {MEAL_GRID.days}일간 남긴 음식의 양을 원형 이미지를 보고 선택해주세요.")
+    
+    # 공통 스타일시트 (탭 크기, 목측 이미지)
+    inject_styles(waste_images=True)
     
     # 상단에 가이드 표시
     create_visual_guide()
     
-    # 목측법 비율 정의
-    visual_ratios = [0.0, 0.25, 0.50, 0.75, 1.0]
-    
     data = st.session_state.nutrition_data
+    grid = MEAL_GRID
     
     # 제공량 데이터 불러오기
-    meal_portions_data = data.get('meal_portions', {})
-    if isinstance(meal_portions_data, str):
-        meal_portions_data = json.loads(meal_portions_data) if meal_portions_data else {}
-    
-    # 기존 잔반 데이터 불러오기 (목측 레벨은 세션 임시 저장소에서)
-    existing_waste = st.session_state.get('plate_waste_visual_temp', {})
-    
-    plate_waste_visual = {}
-    plate_waste_grams = {}
-    
-    # 탭 생성
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📅 1일차", "📅 2일차", "📅 3일차", "📅 4일차", "📅 5일차"])
-    
-    # 각 탭 처리 함수
-    def process_day_waste(day, tab):
-        with tab:
-            # 아침 식사
-            st.markdown("#### 🌅 아침")
-            breakfast_rice_waste = create_food_waste_selector("밥/죽", f"day{day}_breakfast_rice_waste", int(existing_waste.get(f'day{day}_breakfast_rice_waste', 0)))
-            breakfast_soup_waste = create_food_waste_selector("국/탕", f"day{day}_breakfast_soup_waste", int(existing_waste.get(f'day{day}_breakfast_soup_waste', 0)))
-            breakfast_main_waste = create_food_waste_selector("주찬", f"day{day}_breakfast_main_waste", int(existing_waste.get(f'day{day}_breakfast_main_waste', 0)))
-            breakfast_side1_waste = create_food_waste_selector("부찬1", f"day{day}_breakfast_side1_waste", int(existing_waste.get(f'day{day}_breakfast_side1_waste', 0)))
-            breakfast_side2_waste = create_food_waste_selector("부찬2", f"day{day}_breakfast_side2_waste", int(existing_waste.get(f'day{day}_breakfast_side2_waste', 0)))
-            breakfast_kimchi_waste = create_food_waste_selector("김치", f"day{day}_breakfast_kimchi_waste", int(existing_waste.get(f'day{day}_breakfast_kimchi_waste', 0)))
-            
-            st.markdown("---")
-            st.markdown("#### 🍪 간식1")
-            snack1_waste = create_food_waste_selector("간식", f"day{day}_snack1_waste", int(existing_waste.get(f'day{day}_snack1_waste', 0)))
-            
-            st.markdown("---")
-            st.markdown("#### ☀️ 점심")
-            lunch_rice_waste = create_food_waste_selector("밥/죽", f"day{day}_lunch_rice_waste", int(existing_waste.get(f'day{day}_lunch_rice_waste', 0)))
-            lunch_soup_waste = create_food_waste_selector("국/탕", f"day{day}_lunch_soup_waste", int(existing_waste.get(f'day{day}_lunch_soup_waste', 0)))
-            lunch_main_waste = create_food_waste_selector("주찬", f"day{day}_lunch_main_waste", int(existing_waste.get(f'day{day}_lunch_main_waste', 0)))
-            lunch_side1_waste = create_food_waste_selector("부찬1", f"day{day}_lunch_side1_waste", int(existing_waste.get(f'day{day}_lunch_side1_waste', 0)))
-            lunch_side2_waste = create_food_waste_selector("부찬2", f"day{day}_lunch_side2_waste", int(existing_waste.get(f'day{day}_lunch_side2_waste', 0)))
-            lunch_kimchi_waste = create_food_waste_selector("김치", f"day{day}_lunch_kimchi_waste", int(existing_waste.get(f'day{day}_lunch_kimchi_waste', 0)))
-            
-            st.markdown("---")
-            st.markdown("#### 🍪 간식2")
-            snack2_waste = create_food_waste_selector("간식", f"day{day}_snack2_waste", int(existing_waste.get(f'day{day}_snack2_waste', 0)))
-            
-            st.markdown("---")
-            st.markdown("#### 🌙 저녁")
-            dinner_rice_waste = create_food_waste_selector("밥/죽", f"day{day}_dinner_rice_waste", int(existing_waste.get(f'day{day}_dinner_rice_waste', 0)))
-            dinner_soup_waste = create_food_waste_selector("국/탕", f"day{day}_dinner_soup_waste", int(existing_waste.get(f'day{day}_dinner_soup_waste', 0)))
-            dinner_main_waste = create_food_waste_selector("주찬", f"day{day}_dinner_main_waste", int(existing_waste.get(f'day{day}_dinner_main_waste', 0)))
-            dinner_side1_waste = create_food_waste_selector("부찬1", f"day{day}_dinner_side1_waste", int(existing_waste.get(f'day{day}_dinner_side1_waste', 0)))
-            dinner_side2_waste = create_food_waste_selector("부찬2", f"day{day}_dinner_side2_waste", int(existing_waste.get(f'day{day}_dinner_side2_waste', 0)))
-            dinner_kimchi_waste = create_food_waste_selector("김치", f"day{day}_dinner_kimchi_waste", int(existing_waste.get(f'day{day}_dinner_kimchi_waste', 0)))
-            
-            # 목측 레벨 저장
-            plate_waste_visual.update({
-                f'day{day}_breakfast_rice_waste': breakfast_rice_waste, f'day{day}_breakfast_soup_waste': breakfast_soup_waste,
-                f'day{day}_breakfast_main_waste': breakfast_main_waste, f'day{day}_breakfast_side1_waste': breakfast_side1_waste,
-                f'day{day}_breakfast_side2_waste': breakfast_side2_waste, f'day{day}_breakfast_kimchi_waste': breakfast_kimchi_waste,
-                f'day{day}_snack1_waste': snack1_waste, f'day{day}_lunch_rice_waste': lunch_rice_waste,
-                f'day{day}_lunch_soup_waste': lunch_soup_waste, f'day{day}_lunch_main_waste': lunch_main_waste,
-                f'day{day}_lunch_side1_waste': lunch_side1_waste, f'day{day}_lunch_side2_waste': lunch_side2_waste,
-                f'day{day}_lunch_kimchi_waste': lunch_kimchi_waste, f'day{day}_snack2_waste': snack2_waste,
-                f'day{day}_dinner_rice_waste': dinner_rice_waste, f'day{day}_dinner_soup_waste': dinner_soup_waste,
-                f'day{day}_dinner_main_waste': dinner_main_waste, f'day{day}_dinner_side1_waste': dinner_side1_waste,
-                f'day{day}_dinner_side2_waste': dinner_side2_waste, f'day{day}_dinner_kimchi_waste': dinner_kimchi_waste
-            })
-            
-            # 그램 단위로 변환
-            waste_items = {
-                'breakfast_rice': (breakfast_rice_waste, f'day{day}_breakfast_rice'),
-                'breakfast_soup': (breakfast_soup_waste, f'day{day}_breakfast_soup'),
-                'breakfast_main': (breakfast_main_waste, f'day{day}_breakfast_main'),
-                'breakfast_side1': (breakfast_side1_waste, f'day{day}_breakfast_side1'),
-                'breakfast_side2': (breakfast_side2_waste, f'day{day}_breakfast_side2'),
-                'breakfast_kimchi': (breakfast_kimchi_waste, f'day{day}_breakfast_kimchi'),
-                'snack1': (snack1_waste, f'day{day}_snack1'),
-                'lunch_rice': (lunch_rice_waste, f'day{day}_lunch_rice'),
-                'lunch_soup': (lunch_soup_waste, f'day{day}_lunch_soup'),
-                'lunch_main': (lunch_main_waste, f'day{day}_lunch_main'),
-                'lunch_side1': (lunch_side1_waste, f'day{day}_lunch_side1'),
-                'lunch_side2': (lunch_side2_waste, f'day{day}_lunch_side2'),
-                'lunch_kimchi': (lunch_kimchi_waste, f'day{day}_lunch_kimchi'),
-                'snack2': (snack2_waste, f'day{day}_snack2'),
-                'dinner_rice': (dinner_rice_waste, f'day{day}_dinner_rice'),
-                'dinner_soup': (dinner_soup_waste, f'day{day}_dinner_soup'),
-                'dinner_main': (dinner_main_waste, f'day{day}_dinner_main'),
-                'dinner_side1': (dinner_side1_waste, f'day{day}_dinner_side1'),
-                'dinner_side2': (dinner_side2_waste, f'day{day}_dinner_side2'),
-                'dinner_kimchi': (dinner_kimchi_waste, f'day{day}_dinner_kimchi')
-            }
-            
-            daily_waste_g = 0
-            for item_name, (waste_level, portion_key) in waste_items.items():
-                portion_amount = meal_portions_data.get(portion_key, 0)
-                waste_ratio = visual_ratios[waste_level]
-                waste_g = portion_amount * waste_ratio
-                plate_waste_grams[f'day{day}_{item_name}_waste'] = waste_g
-                daily_waste_g += waste_g
-            
+    portions = grid.to_array(data.get('meal_portions', {}))
+    
+    # 저장된 목측 단계 불러오기 (제출한 설문을 고칠 때도 이전 선택이 그대로 표시됨)
+    levels = stored_waste_levels(data, portions, grid)
+    if levels is None:
+        levels = grid.zeros(dtype=int)
+    
+    # 이미 누른 선택기 반영 후 전체 일차를 한 번에 계산
+    for d in range(grid.days):
+        for i in range(grid.slot_count):
+            selected = st.session_state.get(f"{grid.key(d, i, '_waste')}_selected")
+            if selected is not None:
+                levels[d, i] = selected
+    result = compute_plate_waste(portions, levels, grid)
+    data['plate_waste'] = json.dumps(grid.to_dict(result['waste_g'], '_waste'), ensure_ascii=False)
+    data['plate_waste_levels'] = levels.ravel().tolist()
+    st.session_state[DAY_WASTE_KEY] = result['day_waste_g'].tolist()
+    total_portion = float(result['total_portion_g'])
+    
+    # 탭 생성 (일차별 블록은 fragment로 분리되어 선택 시 해당 일차만 다시 그림)
+    tabs = st.tabs([f"📅 {day + 1}일차" for day in range(grid.days)])
+    
+    st.session_state[FULL_RUN_KEY] = True
+    try:
+        for day, tab in enumerate(tabs):
+            with tab:
+                show_waste_day(day, portions[day], levels[day], total_portion, drafts, elderly_id)
+    finally:
+        st.session_state[FULL_RUN_KEY] = False
+
+@st.fragment
+def show_waste_day(day, day_portions, day_levels, total_portion, drafts=None, elderly_id=None):
+    """일차별 잔반량 입력 블록
+    
+    day_portions, day_levels: 해당 일차의 칸별 제공량과 목측 단계.
+    선택기 버튼을 누르면 전체 페이지 대신 이 블록만 다시 실행되며,
+    이때는 이 일차의 잔반량만 다시 계산해 세션 데이터에 반영하고 임시 저장합니다.
+    """
+    grid = MEAL_GRID
+    
+    for m, (_, meal_label, meal_icon, _) in enumerate(grid.meals):
+        if m > 0:
             st.markdown("---")
-            st.metric(f"{day}일차 총 잔반량", f"{daily_waste_g:.0f}g")
-    
-    # 각 탭 처리
-    process_day_waste(1, tab1)
-    process_day_waste(2, tab2)
-    process_day_waste(3, tab3)
-    process_day_waste(4, tab4)
-    process_day_waste(5, tab5)
+        st.markdown(f"#### {meal_icon} {meal_label}")
+        for i in grid.meal_slots(m):
+            create_food_waste_selector(
+                grid.item_labels[i],
+                grid.key(day, i, '_waste'),
+                int(day_levels[i])
+            )
+    
+    # 이 일차의 목측 단계와 잔반량 (g)
+    levels = np.array([st.session_state[f"{grid.key(day, i, '_waste')}_selected"]
+                       for i in range(grid.slot_count)], dtype=int)
+    waste_grams = np.asarray(day_portions, dtype=float) * VISUAL_RATIOS[levels]
+    day_waste = st.session_state.setdefault(DAY_WASTE_KEY, [0.0] * grid.days)
+    day_waste[day] = float(waste_grams.sum())
+    
+    if not st.session_state.get(FULL_RUN_KEY):
+        store_day_waste(st.session_state.nutrition_data, day, waste_grams, levels, grid)
+        # fragment만 다시 실행될 때도 이 기기에 기록
+        autosave(drafts, 'nutrition', elderly_id)
     
-    # 5일 총 잔반량 계산
-    total_waste = sum(plate_waste_grams.values())
     st.markdown("---")
-    st.subheader("📊 5일간 총 잔반량")
-    st.metric("총계", f"{total_waste:.0f}g", delta=f"1일 평균 {total_waste/5:.0f}g")
-    
-    # 섭취율 계산
-    if meal_portions_data:
-        total_portions = sum(meal_portions_data.values())
-        intake_rate = ((total_portions - total_waste) / total_portions * 100) if total_portions > 0 else 0
-        st.metric("평균 섭취율", f"{intake_rate:.1f}%")
-    
-    # 데이터 저장 (그램 단위만 DB에 저장)
-    st.session_state.nutrition_data['plate_waste'] = json.dumps(plate_waste_grams, ensure_ascii=False)
-    
-    # 목측 레벨은 세션에만 임시 저장 (UI 상태 유지용, DB에는 저장하지 않음)
-    if 'plate_waste_visual_temp' not in st.session_state:
-        st.session_state['plate_waste_visual_temp'] = {}
-    st.session_state['plate_waste_visual_temp'] = plate_waste_visual
-    
-    navigation_buttons()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(f"{day + 1}일차 총 잔반량", f"{day_waste[day]:.0f}g")
+    with col2:
+        total_waste = sum(day_waste)
+        st.metric(f"{grid.days}일간 총 잔반량", f"{total_waste:.0f}g", delta=f"1일 평균 {total_waste/grid.days:.0f}g")
+    with col3:
+        if total_portion > 0:
+            st.metric("평균 섭취율", f"{(total_portion - total_waste) * 100 / total_portion:.1f}%")
 
-def show_page3_submit(supabase, elderly_id, surveyor_id, nursing_home_id):
-    """3페이지: 데이터 요약 및 제출"""
-    st.subheader("영양 조사 데이터 요약")
-    
-    data = st.session_state.nutrition_data
+def store_day_waste(data, day, waste_grams, levels, grid=MEAL_GRID):
+    """한 일차의 잔반량(g)과 목측 단계를 저장 데이터에 반영
+    
+    목측 단계는 제공량을 고쳤을 때 g를 다시 계산하는 데 사용합니다.
+    """
+    waste = data.get('plate_waste') or {}
+    if isinstance(waste, str):
+        waste = json.loads(waste)
+    for i in range(grid.slot_count):
+        waste[grid.key(day, i, '_waste')] = float(waste_grams[i])
+    data['plate_waste'] = json.dumps(waste, ensure_ascii=False)
+    
+    all_levels = data.get('plate_waste_levels') or [0] * (grid.days * grid.slot_count)
+    if isinstance(all_levels, str):
+        all_levels = json.loads(all_levels)
+    all_levels = list(all_levels)
+    start = day * grid.slot_count
+    all_levels[start:start + grid.slot_count] = [int(level) for level in levels]
+    data['plate_waste_levels'] = all_levels
+
+@survey_block('intake_summary')
+def show_intake_summary(context):
+    """3페이지: 5일 섭취 현황 요약 (제출 버튼은 공통 이동 버튼)"""
+    data = context.data
     
-    # 제공량 데이터
-    meal_portions_data = data.get('meal_portions', {})
-    if isinstance(meal_portions_data, str):
-        meal_portions_data = json.loads(meal_portions_data) if meal_portions_data else {}
+    grid = MEAL_GRID
+    days = grid.days
     
-    # 잔반량 데이터
-    plate_waste_data = data.get('plate_waste', {})
-    if isinstance(plate_waste_data, str):
-        plate_waste_data = json.loads(plate_waste_data) if plate_waste_data else {}
+    # 제공량/잔반량 데이터
+    portions = grid.to_array(data.get('meal_portions', {}))
+    waste_grams = grid.to_array(data.get('plate_waste', {}), '_waste')
     
     # 통계 계산
-    total_portions = sum(meal_portions_data.values()) if meal_portions_data else 0
-    total_waste = sum(plate_waste_data.values()) if plate_waste_data else 0
-    total_intake = total_portions - total_waste
-    intake_rate = (total_intake / total_portions * 100) if total_portions > 0 else 0
+    result = summarize_intake(portions, waste_grams, grid)
+    total_portions = result['total_portion_g']
+    total_waste = result['total_waste_g']
+    total_intake = result['total_intake_g']
+    intake_rate = result['total_intake_rate'] if total_portions > 0 else 0
     
     # 요약 표시
-    st.markdown("### 📊 5일간 섭취 현황")
+    st.markdown(f"### 📊 {days}일간 섭취 현황")
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         st.metric("총 제공량", f"{total_portions:.0f}g", 
-                 delta=f"1일 평균 {total_portions/5:.0f}g")
+                 delta=f"1일 평균 {total_portions/days:.0f}g")
     
     with col2:
         st.metric("총 잔반량", f"{total_waste:.0f}g", 
-                 delta=f"1일 평균 {total_waste/5:.0f}g")
+                 delta=f"1일 평균 {total_waste/days:.0f}g")
     
     with col3:
         st.metric("총 섭취량", f"{total_intake:.0f}g", 
-                 delta=f"1일 평균 {total_intake/5:.0f}g")
+                 delta=f"1일 평균 {total_intake/days:.0f}g")
     
     with col4:
-        color = "normal" if intake_rate >= 75 else "inverse" if intake_rate >= 50 else "off"
         st.metric("평균 섭취율", f"{intake_rate:.1f}%")
     
     st.markdown("---")
@@ -524,105 +479,3 @@ def show_page3_submit(supabase, elderly_id, surveyor_id, nursing_home_id):
         st.warning("⚠️ **주의 필요**: 섭취량이 다소 부족합니다. 식사량 증가를 고려해주세요.")
     else:
         st.error("🚨 **개선 필요**: 섭취량이 매우 부족합니다. 영양 상담을 권장합니다.")
-    
-    st.markdown("---")
-    
-    # 제출 버튼
-    col1, col2, col3 = st.columns([1, 1, 1])
-    
-    with col1:
-        if st.button("⬅️ 이전", use_container_width=True):
-            st.session_state.nutrition_page -= 1
-            st.rerun()
-    
-    with col2:
-        if st.button("🏠 대시보드", use_container_width=True):
-            # 세션 초기화
-            if 'nutrition_data' in st.session_state:
-                del st.session_state.nutrition_data
-            if 'nutrition_page' in st.session_state:
-                del st.session_state.nutrition_page
-            if 'plate_waste_visual_temp' in st.session_state:
-                del st.session_state['plate_waste_visual_temp']
-            st.session_state.current_survey = None
-            st.rerun()
-    
-    with col3:
-        if st.button("✅ 제출", use_container_width=True, type="primary"):
-            save_nutrition_survey(supabase, elderly_id, surveyor_id, nursing_home_id)
-
-def save_nutrition_survey(supabase, elderly_id, surveyor_id, nursing_home_id):
-    """설문 데이터 저장"""
-    try:
-        data = st.session_state.nutrition_data.copy()
-        
-        # DB에 존재하지 않는 컬럼 제거
-        if 'plate_waste_visual' in data:
-            del data['plate_waste_visual']
-        
-        data.update({
-            'elderly_id': elderly_id,
-            'surveyor_id': surveyor_id,
-            'nursing_home_id': nursing_home_id,
-            'updated_at': get_kst_now()
-        })
-        
-        # 기존 데이터 확인
-        response = supabase.table('nutrition_survey').select('id').eq('elderly_id', elderly_id).execute()
-        
-        if response.data:
-            # 업데이트
-            supabase.table('nutrition_survey').update(data).eq('elderly_id', elderly_id).execute()
-        else:
-            # 새로 추가
-            supabase.table('nutrition_survey').insert(data).execute()
-        
-        # 진행 상황 업데이트
-        supabase.table('survey_progress').update({
-            'nutrition_survey_completed': True,
-            'last_updated': get_kst_now()
-        }).eq('elderly_id', elderly_id).execute()
-        
-        st.success("✅ 영양 조사표가 저장되었습니다!")
-        
-        # 세션 초기화
-        del st.session_state.nutrition_data
-        del st.session_state.nutrition_page
-        if 'plate_waste_visual_temp' in st.session_state:
-            del st.session_state['plate_waste_visual_temp']
-        st.session_state.current_survey = None
-        
-        
-        if st.button("대시보드로 돌아가기"):
-            st.rerun()
-        
-    except Exception as e:
-        st.error(f"저장 중 오류가 발생했습니다: {str(e)}")
-
-def navigation_buttons():
-    """페이지 이동 버튼"""
-    col1, col2, col3 = st.columns([1, 1, 1])
-    
-    with col1:
-        if st.session_state.nutrition_page > 1:
-            if st.button("⬅️ 이전", use_container_width=True):
-                st.session_state.nutrition_page -= 1
-                st.rerun()
-    
-    with col2:
-        if st.button("🏠 대시보드", use_container_width=True):
-            # 세션 초기화
-            if 'nutrition_data' in st.session_state:
-                del st.session_state.nutrition_data
-            if 'nutrition_page' in st.session_state:
-                del st.session_state.nutrition_page
-            if 'plate_waste_visual_temp' in st.session_state:
-                del st.session_state['plate_waste_visual_temp']
-            st.session_state.current_survey = None
-            st.rerun()
-    
-    with col3:
-        if st.session_state.nutrition_page < 3:
-            if st.button("다음 ➡️", use_container_width=True, type="primary"):
-                st.session_state.nutrition_page += 1
-                st.rerun()
@@ -0,0 +1,64 @@
+"""작성 중인 설문의 부분 저장 (서버)
+
+페이지를 넘길 때마다 마지막 서버 저장 이후 바뀐 항목만 save_survey_draft 함수로 보내
+설문 테이블의 같은 행에 upsert하고 updated_at을 갱신합니다(완료 표시는 하지 않음).
+바뀐 항목이 없으면 보내지 않으며, 저장에 실패하면 경고를 표시하고 저장하지 못한 항목은 다음 저장에 함께 보냅니다.
+다시 들어오면 기존처럼 설문 테이블의 행 하나를 조회하여 이어서 작성합니다.
+"""
+import streamlit as st
+
+# 변경 비교에서 제외하는 항목 (매 저장마다 함께 보냄)
+IDENTITY_FIELDS = ('elderly_id', 'surveyor_id', 'nursing_home_id', 'updated_at')
+
+def _state(survey):
+    key = f"{survey}_partial_save"
+    if key not in st.session_state:
+        st.session_state[key] = {'saved': {}, 'error': None}
+    return st.session_state[key]
+
+def mark_saved(survey, row):
+    """서버에 이미 있는 값 기록 (불러온 행 그대로면 다시 보내지 않음)"""
+    _state(survey)['saved'] = dict(row or {})
+
+def reset_partial_save(survey):
+    """설문 세션 종료 시 부분 저장 상태 삭제"""
+    st.session_state.pop(f"{survey}_partial_save", None)
+
+def changed_fields(payload, saved):
+    """마지막 서버 저장 이후 바뀐 항목"""
+    return {
+        k: v for k, v in payload.items()
+        if k not in IDENTITY_FIELDS and (k not in saved or saved[k] != v)
+    }
+
+def save_partial(supabase, survey, payload):
+    """바뀐 항목만 서버에 부분 저장 (저장한 항목 수, 실패하면 None 반환)
+    
+    실패는 화면 진행을 막지 않도록 기록만 하고(show_partial_save_warning으로 표시),
+    저장하지 못한 항목은 다음 저장에 함께 보냅니다.
+    """
+    state = _state(survey)
+    changes = changed_fields(payload, state['saved'])
+    if not changes:
+        return 0
+    
+    partial = {k: payload[k] for k in IDENTITY_FIELDS if k in payload}
+    partial.update(changes)
+    try:
+        supabase.rpc('save_survey_draft', {
+            'p_survey': survey,
+            'p_payload': partial
+        }).execute()
+    except Exception as e:
+        state['error'] = str(e)
+        return None
+    
+    state['saved'].update(changes)
+    state['error'] = None
+    return len(changes)
+
+def show_partial_save_warning(survey):
+    """마지막 부분 저장이 실패했으면 경고 표시"""
+    error = _state(survey)['error']
+    if error:
+        st.warning(f"⚠️ 작성 중인 답변을 서버에 저장하지 못했습니다. 다음 페이지 이동 때 다시 저장합니다: {error}")
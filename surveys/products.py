@@ -0,0 +1,103 @@
+"""고령친화우수식품 제품 목록과 제품 평가 (만족도 조사표 3페이지, 관리자 제품 순위)
+
+제품 목록은 products 테이블에서 읽어 프로세스당 CATALOG_TTL초 동안 캐시하고,
+평가는 satisfaction_survey.product_evaluations에 {제품 ID: {항목: 점수}}로 저장합니다.
+저장하면 서버 트리거가 어르신·제품마다 한 행인 product_ratings와
+요양원·제품별 합계 product_rating_totals를 바뀐 만큼만 갱신하므로,
+제품 순위는 합계 테이블의 작은 결과만 읽어 계산합니다.
+"""
+import json
+import threading
+import time
+
+import pandas as pd
+
+# 평가 항목 (저장 키, 이름)
+RATING_FIELDS = {
+    'taste': "맛",
+    'chewing': "씹기",
+    'swallowing': "삼키기",
+    'satisfaction': "만족도",
+    'repurchase': "재구매"
+}
+
+# products 테이블을 읽지 못할 때 사용하는 기본 제품 목록 (이전 스키마의 product_1 ~ product_4)
+DEFAULT_PRODUCTS = [
+    {'product_id': 'product_1', 'name': '고운오징어젓', 'short_name': '고운오징어젓', 'display_order': 1, 'active': True},
+    {'product_id': 'product_2', 'name': '화덕에 미치다 500도 고등어구이', 'short_name': '화덕에 미치다', 'display_order': 2, 'active': True},
+    {'product_id': 'product_3', 'name': '오쉐프 간편 고등어구이', 'short_name': '오쉐프 고등어', 'display_order': 3, 'active': True},
+    {'product_id': 'product_4', 'name': '해물동그랑땡 행복한맛남', 'short_name': '해물동그랑땡', 'display_order': 4, 'active': True}
+]
+
+# 제품 목록 캐시 유지 시간(초)
+CATALOG_TTL = 300
+
+_catalog = None
+_lock = threading.Lock()
+
+def get_product_catalog(supabase, clock=time.monotonic):
+    """전체 제품 목록 (표시 순서, 숨긴 제품 포함, CATALOG_TTL초 동안 캐시)"""
+    global _catalog
+    with _lock:
+        if _catalog is not None and clock() - _catalog[0] < CATALOG_TTL:
+            return _catalog[1]
+
+    try:
+        rows = supabase.table('products').select('product_id,name,short_name,display_order,active').execute().data
+    except Exception:
+        rows = None
+    products = sorted(rows or DEFAULT_PRODUCTS, key=lambda row: (row.get('display_order') or 0, row['product_id']))
+
+    with _lock:
+        _catalog = (clock(), products)
+    return products
+
+def active_products(supabase):
+    """조사표에 표시할 제품 목록"""
+    return [product for product in get_product_catalog(supabase) if product.get('active', True)]
+
+def refresh_product_catalog():
+    """제품 목록 캐시 비우기"""
+    global _catalog
+    with _lock:
+        _catalog = None
+
+def load_evaluations(data):
+    """저장된 product_evaluations(JSON 문자열 또는 객체) → {제품 ID: {항목: 점수}}"""
+    value = data.get('product_evaluations')
+    if isinstance(value, str):
+        try:
+            value = json.loads(value) if value else {}
+        except ValueError:
+            value = {}
+    if not isinstance(value, dict):
+        return {}
+    return {product_id: scores for product_id, scores in value.items() if isinstance(scores, dict)}
+
+def fetch_product_ranking(supabase, nursing_home_id=None):
+    """제품 순위 DataFrame (product_rating_totals, 요양원을 지정하지 않으면 요양원별 합계를 더함)
+
+    컬럼: rank, product_id, name, responses, 항목별 평균, avg_score (다섯 항목 평균, 높은 순)
+    """
+    query = supabase.table('product_rating_totals').select('product_id,responses,' + ','.join(
+        f"{field}_sum" for field in RATING_FIELDS))
+    if nursing_home_id:
+        query = query.eq('nursing_home_id', nursing_home_id)
+    rows = query.execute().data or []
+    if not rows:
+        return pd.DataFrame()
+
+    df = pd.DataFrame(rows).groupby('product_id').sum()
+    df = df[df['responses'] > 0]
+    if df.empty:
+        return pd.DataFrame()
+
+    names = {product['product_id']: product['name'] for product in get_product_catalog(supabase)}
+    df.insert(0, 'name', [names.get(product_id, product_id) for product_id in df.index])
+    sums = [f"{field}_sum" for field in RATING_FIELDS]
+    for field in RATING_FIELDS:
+        df[field] = (df[f"{field}_sum"] / df['responses']).round(2)
+    df['avg_score'] = (df[sums].sum(axis=1) / (df['responses'] * len(RATING_FIELDS))).round(2)
+    df = df.drop(columns=sums).sort_values(['avg_score', 'responses'], ascending=False).reset_index()
+    df.insert(0, 'rank', df['avg_score'].rank(method='min', ascending=False).astype(int))
+    return df
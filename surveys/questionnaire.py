@@ -0,0 +1,336 @@
+"""설문지 정의 (surveys/questionnaires/*.json) 읽기와 검증
+
+설문지마다 JSON 파일 하나에 제목, 페이지, 문항, 선택지를 적습니다.
+load_questionnaire()가 프로세스당 한 번 읽어 검증한 뒤 바꿀 수 없는 구조(namedtuple/tuple)로 만들어 캐시하고,
+화면 표시와 저장은 surveys.survey_engine이 이 구조만 보고 처리합니다.
+일반 문항만으로 된 설문지는 JSON 파일만 추가하면 됩니다. (저장 테이블 '<이름>_survey'와
+save_survey_draft/submit_survey 서버 함수의 설문 이름은 database_schema.sql에 추가)
+
+문항 종류 (type)
+- 입력: radio, select, number, text, textarea, checkboxes (복수 선택, JSON 배열 문자열로 저장)
+- 표시: markdown, info, caption, divider
+- 배치: columns (items: [[문항, ...], [문항, ...]] 열마다 문항 목록)
+- block: 이름으로 등록한 Python 함수 (점수 계산·요약처럼 선언으로 표현할 수 없는 부분)
+"""
+import functools
+import json
+import os
+from collections import namedtuple
+from types import MappingProxyType
+
+QUESTIONNAIRE_DIR = os.path.join(os.path.dirname(__file__), 'questionnaires')
+
+INPUT_TYPES = ('radio', 'select', 'number', 'text', 'textarea', 'checkboxes')
+DISPLAY_TYPES = ('markdown', 'info', 'caption', 'divider')
+ITEM_TYPES = INPUT_TYPES + DISPLAY_TYPES + ('columns', 'block')
+
+# 설문지/페이지/문항에 쓸 수 있는 키 (오타를 검증 오류로 알림)
+QUESTIONNAIRE_KEYS = ('name', 'order', 'title', 'icon', 'subtitle', 'messages', 'required',
+                      'option_sets', 'saved_block', 'pages')
+PAGE_KEYS = ('title', 'info', 'items')
+ITEM_KEYS = {
+    'radio': ('field', 'key', 'label', 'title', 'options', 'values', 'default', 'horizontal',
+              'label_visibility', 'help', 'heading', 'caption', 'questions'),
+    'number': ('field', 'key', 'label', 'title', 'min_value', 'max_value', 'step', 'default',
+               'label_visibility', 'help', 'heading', 'caption', 'questions'),
+    'text': ('field', 'key', 'label', 'title', 'default', 'label_visibility', 'help',
+             'heading', 'caption', 'questions'),
+    'checkboxes': ('field', 'key', 'label', 'title', 'options', 'columns', 'other',
+                   'heading', 'caption', 'questions'),
+    'markdown': ('text',),
+    'columns': ('items',),
+    'block': ('name',)
+}
+ITEM_KEYS['select'] = ITEM_KEYS['radio']
+ITEM_KEYS['textarea'] = ITEM_KEYS['text'] + ('height',)
+ITEM_KEYS['info'] = ITEM_KEYS['caption'] = ITEM_KEYS['markdown']
+ITEM_KEYS['divider'] = ()
+
+# 메시지 키 (saved: 서버 저장 완료, queued: 서버 연결 실패로 앱 서버의 전송 대기열에 보관)
+MESSAGE_KEYS = ('saved', 'queued')
+DEFAULT_MESSAGES = {
+    'saved': "✅ 저장되었습니다!",
+    'queued': "⚠️ 서버에 연결할 수 없어 전송 대기열에 보관했습니다. 연결되면 자동으로 전송됩니다."
+}
+
+Questionnaire = namedtuple('Questionnaire', [
+    'name', 'order', 'title', 'icon', 'subtitle', 'table', 'messages', 'required',
+    'saved_block', 'pages', 'fields', 'blocks'
+])
+Page = namedtuple('Page', ['number', 'title', 'info', 'items'])
+Item = namedtuple('Item', [
+    'type', 'field', 'key', 'label', 'title', 'text', 'name', 'items',
+    'options', 'values', 'lookup', 'default', 'horizontal', 'label_visibility', 'help',
+    'min_value', 'max_value', 'step', 'height', 'columns', 'other',
+    'heading', 'caption', 'questions'
+], defaults=(None,) * 23)
+# 체크박스의 직접 입력 (option을 고르면 label 입력란 표시, "option: 입력" 형식으로 함께 저장)
+OtherInput = namedtuple('OtherInput', ['option', 'label', 'key'])
+
+class QuestionnaireError(ValueError):
+    """설문지 정의 오류 (파일 이름과 위치 포함)"""
+
+def stored_list(value):
+    """저장된 복수 선택 값(JSON 배열 문자열 또는 목록) → 목록"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value) if value else []
+        except ValueError:
+            return []
+    return list(value) if isinstance(value, (list, tuple)) else []
+
+def choice_index(item, value):
+    """저장된 값 → 선택지 위치 (저장 값, 선택지 이름 순서로 찾고 없으면 기본 위치)"""
+    try:
+        return item.lookup.get(value, item.lookup.get(('option', value), item.default))
+    except TypeError:
+        return item.default
+
+class _Compiler:
+    """JSON 정의 → Questionnaire (위치를 붙인 오류 메시지, 필드/위젯 키 중복 검사)"""
+    
+    def __init__(self, source, option_sets):
+        self.source = source
+        self.option_sets = option_sets
+        self.fields = {}
+        self.keys = set()
+        self.blocks = set()
+    
+    def fail(self, where, message):
+        raise QuestionnaireError(f"{self.source} {where}: {message}")
+    
+    def check_keys(self, where, spec, allowed):
+        unknown = sorted(set(spec) - set(allowed))
+        if unknown:
+            self.fail(where, f"알 수 없는 키 {', '.join(unknown)}")
+    
+    def text(self, where, spec, name, required=False):
+        value = spec.get(name)
+        if value is None:
+            if required:
+                self.fail(where, f"'{name}'이(가) 필요합니다")
+            return None
+        if not isinstance(value, str) or not value:
+            self.fail(where, f"'{name}'은(는) 빈 문자열이 아닌 문자열이어야 합니다")
+        return value
+    
+    def claim_key(self, where, key):
+        if key in self.keys:
+            self.fail(where, f"위젯 키 '{key}'이(가) 중복됩니다")
+        self.keys.add(key)
+    
+    def options(self, where, spec):
+        options = spec.get('options')
+        if isinstance(options, str):
+            if options not in self.option_sets:
+                self.fail(where, f"선택지 목록 '{options}'이(가) option_sets에 없습니다")
+            options = self.option_sets[options]
+        if not isinstance(options, list) or not options or not all(isinstance(o, str) and o for o in options):
+            self.fail(where, "'options'는 문자열 선택지 목록(또는 option_sets 이름)이어야 합니다")
+        if len(set(options)) != len(options):
+            self.fail(where, "선택지가 중복됩니다")
+        return tuple(options)
+    
+    def items(self, where, specs):
+        if not isinstance(specs, list):
+            self.fail(where, "'items'는 목록이어야 합니다")
+        return tuple(self.item(f"{where}[{i}]", spec) for i, spec in enumerate(specs))
+    
+    def item(self, where, spec):
+        if not isinstance(spec, dict):
+            self.fail(where, "문항은 객체여야 합니다")
+        kind = spec.get('type')
+        if kind not in ITEM_TYPES:
+            self.fail(where, f"알 수 없는 문항 종류 {kind!r} (가능: {', '.join(ITEM_TYPES)})")
+        self.check_keys(where, spec, ('type',) + ITEM_KEYS[kind])
+        
+        if kind in ('markdown', 'info', 'caption'):
+            return Item(kind, text=self.text(where, spec, 'text', required=True))
+        if kind == 'divider':
+            return Item(kind)
+        if kind == 'block':
+            name = self.text(where, spec, 'name', required=True)
+            self.blocks.add(name)
+            return Item(kind, name=name)
+        if kind == 'columns':
+            groups = spec.get('items')
+            if not isinstance(groups, list) or not groups:
+                self.fail(where, "'items'는 열마다 문항 목록을 담은 목록이어야 합니다")
+            return Item(kind, items=tuple(self.items(f"{where}.items[{i}]", group)
+                                          for i, group in enumerate(groups)))
+        return self.input_item(where, kind, spec)
+    
+    def input_item(self, where, kind, spec):
+        field = self.text(where, spec, 'field', required=True)
+        if field in self.fields:
+            self.fail(where, f"필드 '{field}'이(가) 중복됩니다")
+        key = self.text(where, spec, 'key') or field
+        questions = spec.get('questions', [])
+        if not isinstance(questions, list) or not all(isinstance(q, str) for q in questions):
+            self.fail(where, "'questions'는 문자열 목록이어야 합니다")
+        label_visibility = spec.get('label_visibility', 'visible')
+        if label_visibility not in ('visible', 'hidden', 'collapsed'):
+            self.fail(where, "'label_visibility'는 visible, hidden, collapsed 중 하나여야 합니다")
+        common = dict(
+            field=field, key=key,
+            label=self.text(where, spec, 'label', required=kind != 'checkboxes') or "",
+            title=self.text(where, spec, 'title'),
+            heading=self.text(where, spec, 'heading'),
+            caption=self.text(where, spec, 'caption'),
+            questions=tuple(questions),
+            help=self.text(where, spec, 'help'),
+            label_visibility=label_visibility
+        )
+        
+        if kind in ('radio', 'select'):
+            options = self.options(where, spec)
+            values = spec.get('values', list(options))
+            if not isinstance(values, list) or len(values) != len(options):
+                self.fail(where, "'values'는 선택지와 개수가 같은 목록이어야 합니다")
+            if any(isinstance(v, (dict, list)) for v in values) or len(set(map(json.dumps, values))) != len(values):
+                self.fail(where, "'values'는 중복 없는 문자열/숫자/참거짓이어야 합니다")
+            default = spec.get('default', 0)
+            if not isinstance(default, int) or isinstance(default, bool) or not 0 <= default < len(options):
+                self.fail(where, f"'default'는 선택지 위치(0 ~ {len(options) - 1})여야 합니다")
+            # 저장 값 → 위치, ('option', 선택지 이름) → 위치 (이전 형식으로 저장된 값 복원용)
+            lookup = {('option', option): i for i, option in enumerate(options)}
+            for i, value in enumerate(values):
+                lookup.setdefault(value, i)
+            item = Item(kind, options=options, values=tuple(values), lookup=MappingProxyType(lookup),
+                        default=default, horizontal=bool(spec.get('horizontal', False)), **common)
+        elif kind == 'number':
+            bounds = [spec.get(name) for name in ('min_value', 'max_value', 'step', 'default')]
+            if not all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in bounds):
+                self.fail(where, "'min_value', 'max_value', 'step', 'default'는 숫자여야 합니다")
+            # 하나라도 소수면 소수 입력 (st.number_input은 인자의 형식이 모두 같아야 함)
+            cast = float if any(isinstance(v, float) for v in bounds) else int
+            min_value, max_value, step, default = (None if v is None else cast(v) for v in bounds)
+            if default is None:
+                default = cast(min_value or 0)
+            if min_value is not None and max_value is not None and min_value > max_value:
+                self.fail(where, "'min_value'가 'max_value'보다 큽니다")
+            if (min_value is not None and default < min_value) or (max_value is not None and default > max_value):
+                self.fail(where, "'default'가 입력 범위를 벗어납니다")
+            item = Item(kind, min_value=min_value, max_value=max_value, step=step, default=default, **common)
+        elif kind in ('text', 'textarea'):
+            height = spec.get('height')
+            if height is not None and (not isinstance(height, int) or height <= 0):
+                self.fail(where, "'height'는 양의 정수여야 합니다")
+            item = Item(kind, default=spec.get('default', ''), height=height, **common)
+        else:
+            options = self.options(where, spec)
+            columns = spec.get('columns', 1)
+            if not isinstance(columns, int) or isinstance(columns, bool) or columns < 1:
+                self.fail(where, "'columns'는 1 이상의 정수여야 합니다")
+            other = spec.get('other')
+            if other is not None:
+                if not isinstance(other, dict):
+                    self.fail(where, "'other'는 객체여야 합니다")
+                self.check_keys(f"{where}.other", other, OtherInput._fields)
+                other = OtherInput(self.text(where, other, 'option', required=True),
+                                   self.text(where, other, 'label', required=True),
+                                   self.text(where, other, 'key') or f"{key}_other")
+                if other.option not in options:
+                    self.fail(where, f"직접 입력 선택지 '{other.option}'이(가) 선택지에 없습니다")
+                self.claim_key(where, other.key)
+            for i in range(len(options)):
+                self.claim_key(where, f"{key}_{i}")
+            item = Item(kind, options=options, columns=columns, other=other, **common)
+        
+        if kind != 'checkboxes':
+            self.claim_key(where, key)
+        self.fields[field] = item
+        return item
+    
+    def page(self, number, spec):
+        where = f"pages[{number - 1}]"
+        if not isinstance(spec, dict):
+            self.fail(where, "페이지는 객체여야 합니다")
+        self.check_keys(where, spec, PAGE_KEYS)
+        items = self.items(f"{where}.items", spec.get('items'))
+        if not items:
+            self.fail(where, "문항이 없습니다")
+        return Page(number, self.text(where, spec, 'title'), self.text(where, spec, 'info'), items)
+
+def compile_questionnaire(spec, source='<questionnaire>'):
+    """JSON 정의(dict) → 검증한 Questionnaire (오류는 QuestionnaireError)"""
+    if not isinstance(spec, dict):
+        raise QuestionnaireError(f"{source}: 설문지 정의는 객체여야 합니다")
+    
+    option_sets = spec.get('option_sets', {})
+    if not isinstance(option_sets, dict):
+        raise QuestionnaireError(f"{source}: 'option_sets'는 {{이름: 선택지 목록}} 객체여야 합니다")
+    compiler = _Compiler(source, option_sets)
+    compiler.check_keys("", spec, QUESTIONNAIRE_KEYS)
+    name = compiler.text("", spec, 'name', required=True)
+    title = compiler.text("", spec, 'title', required=True)
+    order = spec.get('order', 0)
+    if not isinstance(order, int) or isinstance(order, bool):
+        compiler.fail("", "'order'는 정수여야 합니다")
+    
+    pages = spec.get('pages')
+    if not isinstance(pages, list) or not pages:
+        compiler.fail("", "'pages'는 페이지 목록이어야 합니다")
+    pages = tuple(compiler.page(number, page) for number, page in enumerate(pages, 1))
+    
+    messages = spec.get('messages', {})
+    if not isinstance(messages, dict):
+        compiler.fail("", "'messages'는 객체여야 합니다")
+    compiler.check_keys("messages", messages, MESSAGE_KEYS)
+    messages = dict(DEFAULT_MESSAGES, **{key: compiler.text("messages", messages, key)
+                                         for key in messages})
+    
+    required = spec.get('required', [])
+    if not isinstance(required, list) or not all(isinstance(field, str) for field in required):
+        compiler.fail("", "'required'는 필드 이름 목록이어야 합니다")
+    saved_block = compiler.text("", spec, 'saved_block')
+    if saved_block:
+        compiler.blocks.add(saved_block)
+    
+    return Questionnaire(
+        name=name,
+        order=order,
+        title=title,
+        icon=compiler.text("", spec, 'icon') or "📝",
+        subtitle=compiler.text("", spec, 'subtitle'),
+        table=f"{name}_survey",
+        messages=MappingProxyType(messages),
+        required=tuple(required),
+        saved_block=saved_block,
+        pages=pages,
+        fields=MappingProxyType(compiler.fields),
+        blocks=frozenset(compiler.blocks)
+    )
+
+@functools.lru_cache(maxsize=None)
+def load_questionnaire(name):
+    """설문지 정의 (프로세스당 한 번 읽고 검증한 뒤 캐시)"""
+    source = f"{name}.json"
+    path = os.path.join(QUESTIONNAIRE_DIR, source)
+    try:
+        with open(path, encoding='utf-8') as f:
+            spec = json.load(f)
+    except FileNotFoundError:
+        raise QuestionnaireError(f"{source}: 설문지 정의 파일이 없습니다") from None
+    except ValueError as e:
+        raise QuestionnaireError(f"{source}: JSON 형식 오류 ({e})") from None
+    
+    questionnaire = compile_questionnaire(spec, source)
+    if questionnaire.name != name:
+        raise QuestionnaireError(f"{source}: 'name'({questionnaire.name})이 파일 이름과 다릅니다")
+    return questionnaire
+
+@functools.lru_cache(maxsize=None)
+def list_questionnaires():
+    """등록된 설문지 이름 (order 순서)"""
+    names = [os.path.splitext(file)[0] for file in os.listdir(QUESTIONNAIRE_DIR) if file.endswith('.json')]
+    return tuple(sorted(names, key=lambda name: (load_questionnaire(name).order, name)))
+
+def field_options(name, field):
+    """설문지 문항의 선택지 (내보내기 등 화면 밖에서 선택지 목록이 필요할 때)"""
+    return load_questionnaire(name).fields[field].options
+
+def refresh_questionnaires():
+    """설문지 정의 캐시 비우기 (JSON 파일을 고친 뒤 프로세스를 다시 시작하지 않고 반영)"""
+    load_questionnaire.cache_clear()
+    list_questionnaires.cache_clear()
@@ -1,194 +1,45 @@
+"""만족도 및 선호도 조사표
+
+문항과 페이지는 surveys/questionnaires/satisfaction.json에 정의되어 있고 surveys.survey_engine이 표시/저장합니다.
+이 모듈은 선언으로 표현할 수 없는 블록(제품 평가, 응답 요약)만 그립니다.
+"""
 import streamlit as st
 import json
-from datetime import datetime
-from zoneinfo import ZoneInfo
 
-KST = ZoneInfo('Asia/Seoul')
+from surveys.products import RATING_FIELDS, active_products, load_evaluations
+from surveys.questionnaire import field_options, stored_list
+from surveys.survey_engine import show_survey, survey_block
 
-def get_kst_now():
-    """현재 한국 시간 반환"""
-    return datetime.now(KST).strftime('%Y-%m-%d %H:%M:%S')
+# 선호 식품군 / 조리 방법 선택지 (응답 내보내기에서 선택지별 컬럼으로 펼침)
+FOOD_GROUP_OPTIONS = list(field_options('satisfaction', 'preferred_food_groups'))
+COOKING_METHOD_OPTIONS = list(field_options('satisfaction', 'preferred_cooking_methods'))
 
-def show_satisfaction_survey(supabase, elderly_id, surveyor_id, nursing_home_id):
-    st.title("😊 3. 만족도 및 선호도 조사표")
-    
-    # 진행 상태 초기화
-    if 'satisfaction_page' not in st.session_state:
-        st.session_state.satisfaction_page = 1
-    
-    # 기존 데이터 불러오기
-    if 'satisfaction_data' not in st.session_state:
-        try:
-            response = supabase.table('satisfaction_survey').select('*').eq('elderly_id', elderly_id).execute()
-            if response.data:
-                st.session_state.satisfaction_data = response.data[0]
-            else:
-                st.session_state.satisfaction_data = {}
-        except:
-            st.session_state.satisfaction_data = {}
-    
-    # 페이지 진행 표시
-    total_pages = 4
-    st.progress(st.session_state.satisfaction_page / total_pages)
-    st.caption(f"페이지 {st.session_state.satisfaction_page} / {total_pages}")
-    
-    # 페이지별 내용
-    if st.session_state.satisfaction_page == 1:
-        show_page1()
-    elif st.session_state.satisfaction_page == 2:
-        show_page2()
-    elif st.session_state.satisfaction_page == 3:
-        show_page3()
-    elif st.session_state.satisfaction_page == 4:
-        show_page4(supabase, elderly_id, surveyor_id, nursing_home_id)
+# 역문항: 선택지는 "매우 어려움"부터지만 쉬울수록 높은 점수로 저장
+REVERSED_RATINGS = ('chewing', 'swallowing')
 
-def show_page1():
-    """1페이지: 급식 만족도"""
-    st.subheader("급식 만족도")
-    
-    data = st.session_state.satisfaction_data
-    
-    st.info("📝 현재 제공받는 급식에 대한 만족도를 평가해주세요.")
-    
-    st.markdown("### 1. 전반적인 급식 만족도")
-    overall_satisfaction = st.radio(
-        "급식에 대해 전반적으로 얼마나 만족하십니까?",
-        options=[
-            "1 = 매우 불만족",
-            "2 = 불만족",
-            "3 = 보통",
-            "4 = 만족",
-            "5 = 매우 만족"
-        ],
-        index=int(data.get('overall_satisfaction', 3)) - 1 if data.get('overall_satisfaction') else 2,
-        key="overall_satisfaction",
-        horizontal=True
-    )
-    
-    st.markdown("### 2. 급식 양의 적절성")
-    portion_adequacy = st.radio(
-        "제공되는 급식의 양은 적절합니까?",
-        options=[
-            "1 = 매우 부족",
-            "2 = 부족",
-            "3 = 적당",
-            "4 = 많음",
-            "5 = 매우 많음"
-        ],
-        index=int(data.get('portion_adequacy', 3)) - 1 if data.get('portion_adequacy') else 2,
-        key="portion_adequacy",
-        horizontal=True
-    )
-    
-    st.markdown("### 3. 급식 품질 만족도")
-    food_quality = st.radio(
-        "급식의 맛과 품질에 만족하십니까?",
-        options=[
-            "1 = 매우 불만족",
-            "2 = 불만족",
-            "3 = 보통",
-            "4 = 만족",
-            "5 = 매우 만족"
-        ],
-        index=int(data.get('food_quality', 3)) - 1 if data.get('food_quality') else 2,
-        key="food_quality",
-        horizontal=True
-    )
-    
-    # 데이터 저장
-    st.session_state.satisfaction_data.update({
-        'overall_satisfaction': int(overall_satisfaction.split('=')[0].strip()),
-        'portion_adequacy': int(portion_adequacy.split('=')[0].strip()),
-        'food_quality': int(food_quality.split('=')[0].strip())
-    })
-    
-    navigation_buttons()
+def rating_index(saved, field):
+    """저장된 점수(1~5) → 선택지 위치 (역문항은 뒤집어서, 없으면 가운데 '보통')"""
+    if not saved.get(field):
+        return 2
+    score = min(max(int(saved[field]), 1), 5)
+    return 5 - score if field in REVERSED_RATINGS else score - 1
 
-def show_page2():
-    """2페이지: 식품 선호도"""
-    st.subheader("식품 선호도")
-    
-    data = st.session_state.satisfaction_data
-    
-    st.markdown("### 1. 선호하는 식품군 (복수 선택 가능)")
-    
-    food_groups = [
-        "밥⸳죽류",
-        "국⸳찌개류",
-        "고기류",
-        "생선⸳해산물류",
-        "채소⸳나물류",
-        "두부⸳콩류",
-        "채소류",
-        "과일",
-        "기타",
-    ]
-    
-    existing_food_groups = data.get('preferred_food_groups', [])
-    if isinstance(existing_food_groups, str):
-        existing_food_groups = json.loads(existing_food_groups) if existing_food_groups else []
-    
-    selected_food_groups = []
-    col1, col2 = st.columns(2)
-    
-    for i, food_group in enumerate(food_groups):
-        with [col1, col2][i % 2]:
-            if st.checkbox(food_group, value=food_group in existing_food_groups, key=f"food_group_{i}"):
-                selected_food_groups.append(food_group)
-    
-    st.markdown("---")
-    st.markdown("### 2. 선호하는 조리 방법 (복수 선택 가능)")
-    
-    cooking_methods = [
-        "찌기",
-        "삶기",
-        "굽기",
-        "볶기",
-        "튀기기",
-        "조림",
-        "무침",
-        "국/탕/찌개",
-        "생식 (회, 샐러드 등)"
-    ]
-    
-    existing_cooking = data.get('preferred_cooking_methods', [])
-    if isinstance(existing_cooking, str):
-        existing_cooking = json.loads(existing_cooking) if existing_cooking else []
-    
-    selected_cooking = []
-    col1, col2 = st.columns(2)
-    
-    for i, method in enumerate(cooking_methods):
-        with [col1, col2][i % 2]:
-            if st.checkbox(method, value=method in existing_cooking, key=f"cooking_{i}"):
-                selected_cooking.append(method)
-    
-    st.markdown("---")
-    st.markdown("### 3. 급식 개선 사항")
-    
-    improvement_suggestions = st.text_area(
-        "급식에서 개선되었으면 하는 점이 있다면 자유롭게 작성해주세요.",
-        value=data.get('improvement_suggestions', ''),
-        height=150,
-        key="improvement_suggestions"
-    )
-    
-    # 데이터 저장
-    st.session_state.satisfaction_data.update({
-        'preferred_food_groups': json.dumps(selected_food_groups, ensure_ascii=False),
-        'preferred_cooking_methods': json.dumps(selected_cooking, ensure_ascii=False),
-        'improvement_suggestions': improvement_suggestions
-    })
-    
-    navigation_buttons()
+def rating_score(options, choice, field):
+    """고른 선택지 → 저장할 점수(1~5) (rating_index의 반대)"""
+    position = options.index(choice)
+    return 5 - position if field in REVERSED_RATINGS else position + 1
 
-def show_page3():
-    """3페이지: 고령친화우수식품 평가"""
-    st.subheader("고령친화우수식품 평가")
-    
-    st.info("📝 다음 4가지 제품을 시식하고 평가해주세요.")
+def show_satisfaction_survey(supabase, elderly_id, surveyor_id, nursing_home_id, drafts=None):
+    show_survey('satisfaction', supabase, elderly_id, surveyor_id, nursing_home_id, drafts)
+
+@survey_block('product_evaluations')
+def show_product_evaluations(context):
+    """3페이지: 고령친화우수식품 평가 (제품마다 5개 항목, 제품 목록은 products 테이블)"""
+    # 제품 목록 (products 테이블, 프로세스 공유 캐시)
+    products = active_products(context.supabase)
+    evaluations = load_evaluations(context.data)
     
-    data = st.session_state.satisfaction_data
+    st.info(f"📝 다음 {len(products)}가지 제품을 시식하고 평가해주세요.")
     
     # 평가 척도 정의
     taste_options = ["매우 맛없음", "맛없음", "보통", "맛있음", "매우 맛있음"]
@@ -196,25 +47,6 @@ def show_page3():
     satisfaction_options = ["매우 불만족", "불만족", "보통", "만족", "매우 만족"]
     repurchase_options = ["매우 낮음", "낮음", "보통", "높음", "매우 높음"]
     
-    products = [
-        {
-            'name': '고운오징어젓',
-            'prefix': 'product_1'
-        },
-        {
-            'name': '화덕에 미치다 500도 고등어구이',
-            'prefix': 'product_2'
-        },
-        {
-            'name': '오쉐프 간편 고등어구이',
-            'prefix': 'product_3'
-        },
-        {
-            'name': '해물동그랑땡 행복한맛남',
-            'prefix': 'product_4'
-        }
-    ]
-    
     # CSS 스타일
     st.markdown("""
     <style>
@@ -237,6 +69,8 @@ def show_page3():
     """, unsafe_allow_html=True)
     
     for i, product in enumerate(products):
+        product_id = product['product_id']
+        saved = evaluations.get(product_id, {})
         st.markdown(f'<div class="product-card">제품 {i+1}: {product["name"]}</div>', unsafe_allow_html=True)
         
         with st.container():
@@ -247,12 +81,12 @@ def show_page3():
             taste = st.radio(
                 "맛 평가",
                 options=taste_options,
-                index=int(data.get(f"{product['prefix']}_taste", 3)) - 1 if data.get(f"{product['prefix']}_taste") else 2,
-                key=f"{product['prefix']}_taste_radio",
+                index=rating_index(saved, 'taste'),
+                key=f"{product_id}_taste_radio",
                 horizontal=True,
                 label_visibility="collapsed"
             )
-            taste_score = taste_options.index(taste) + 1
+            taste_score = rating_score(taste_options, taste, 'taste')
             
             st.markdown("---")
             
@@ -261,13 +95,13 @@ def show_page3():
             chewing = st.radio(
                 "씹기 평가",
                 options=ease_options,
-                index=int(data.get(f"{product['prefix']}_chewing", 3)) - 1 if data.get(f"{product['prefix']}_chewing") else 2,
-                key=f"{product['prefix']}_chewing_radio",
+                index=rating_index(saved, 'chewing'),
+                key=f"{product_id}_chewing_radio",
                 horizontal=True,
                 label_visibility="collapsed"
             )
             # 쉬움이 높은 점수가 되도록 역변환
-            chewing_score = 6 - (ease_options.index(chewing) + 1)
+            chewing_score = rating_score(ease_options, chewing, 'chewing')
             
             st.markdown("---")
             
@@ -276,13 +110,13 @@ def show_page3():
             swallowing = st.radio(
                 "삼키기 평가",
                 options=ease_options,
-                index=int(data.get(f"{product['prefix']}_swallowing", 3)) - 1 if data.get(f"{product['prefix']}_swallowing") else 2,
-                key=f"{product['prefix']}_swallowing_radio",
+                index=rating_index(saved, 'swallowing'),
+                key=f"{product_id}_swallowing_radio",
                 horizontal=True,
                 label_visibility="collapsed"
             )
             # 쉬움이 높은 점수가 되도록 역변환
-            swallowing_score = 6 - (ease_options.index(swallowing) + 1)
+            swallowing_score = rating_score(ease_options, swallowing, 'swallowing')
             
             st.markdown("---")
             
@@ -291,12 +125,12 @@ def show_page3():
             satisfaction = st.radio(
                 "만족도 평가",
                 options=satisfaction_options,
-                index=int(data.get(f"{product['prefix']}_satisfaction", 3)) - 1 if data.get(f"{product['prefix']}_satisfaction") else 2,
-                key=f"{product['prefix']}_satisfaction_radio",
+                index=rating_index(saved, 'satisfaction'),
+                key=f"{product_id}_satisfaction_radio",
                 horizontal=True,
                 label_visibility="collapsed"
             )
-            satisfaction_score = satisfaction_options.index(satisfaction) + 1
+            satisfaction_score = rating_score(satisfaction_options, satisfaction, 'satisfaction')
             
             st.markdown("---")
             
@@ -305,12 +139,12 @@ def show_page3():
             repurchase = st.radio(
                 "재구매 의향",
                 options=repurchase_options,
-                index=int(data.get(f"{product['prefix']}_repurchase", 3)) - 1 if data.get(f"{product['prefix']}_repurchase") else 2,
-                key=f"{product['prefix']}_repurchase_radio",
+                index=rating_index(saved, 'repurchase'),
+                key=f"{product_id}_repurchase_radio",
                 horizontal=True,
                 label_visibility="collapsed"
             )
-            repurchase_score = repurchase_options.index(repurchase) + 1
+            repurchase_score = rating_score(repurchase_options, repurchase, 'repurchase')
             
             st.markdown('</div>', unsafe_allow_html=True)
             
@@ -339,108 +173,25 @@ def show_page3():
             </div>
             """, unsafe_allow_html=True)
             
-            # 데이터 저장 (점수로 변환하여 저장)
-            st.session_state.satisfaction_data.update({
-                f"{product['prefix']}_taste": taste_score,
-                f"{product['prefix']}_chewing": chewing_score,
-                f"{product['prefix']}_swallowing": swallowing_score,
-                f"{product['prefix']}_satisfaction": satisfaction_score,
-                f"{product['prefix']}_repurchase": repurchase_score
-            })
+            # 점수로 변환하여 저장
+            evaluations[product_id] = {
+                'taste': taste_score,
+                'chewing': chewing_score,
+                'swallowing': swallowing_score,
+                'satisfaction': satisfaction_score,
+                'repurchase': repurchase_score
+            }
             
             st.markdown("<br>", unsafe_allow_html=True)
     
-    navigation_buttons()
+    # 데이터 저장 (제품 ID별 점수, 저장하면 서버가 제품 평가 테이블로 펼침)
+    context.data['product_evaluations'] = json.dumps(evaluations, ensure_ascii=False)
 
-def show_page4(supabase, elderly_id, surveyor_id, nursing_home_id):
-    """4페이지: 종합 평가 및 제출"""
-    st.subheader("종합 평가")
-    
-    data = st.session_state.satisfaction_data
-    
-    st.markdown("### 1. 고령친화우수식품 전반적 만족도")
-    
-    satisfaction_options = ["매우 불만족", "불만족", "보통", "만족", "매우 만족"]
-    
-    overall_product_satisfaction = st.radio(
-        "시식한 고령친화우수식품에 대해 전반적으로 얼마나 만족하십니까?",
-        options=satisfaction_options,
-        index=int(data.get('overall_product_satisfaction', 3)) - 1 if data.get('overall_product_satisfaction') else 2,
-        key="overall_product_satisfaction_radio",
-        horizontal=True
-    )
-    
-    overall_product_satisfaction_score = satisfaction_options.index(overall_product_satisfaction) + 1
-    
-    st.markdown("---")
-    st.markdown("### 2. 드시고 싶은 조리 형태의 수산물 활용 고령친화우수식품을 모두 선택해주세요. (복수 선택 가능)")
+@survey_block('satisfaction_summary')
+def show_satisfaction_summary(context):
+    """4페이지: 응답 요약 (급식 만족도, 제품별 평균, 선호도)"""
+    data = context.data
     
-    cooking_types = [
-        "구이",
-        "조림",
-        "찜",
-        "튀김",
-        "무침",
-        "회",
-        "국/탕/찌개",
-        "볶음",
-        "젓갈",
-        "기타"
-    ]
-    
-    existing_cooking_types = data.get('desired_cooking_types', [])
-    if isinstance(existing_cooking_types, str):
-        existing_cooking_types = json.loads(existing_cooking_types) if existing_cooking_types else []
-    
-    selected_cooking_types = []
-    col1, col2, col3 = st.columns(3)
-    
-    for i, cooking_type in enumerate(cooking_types):
-        with [col1, col2, col3][i % 3]:
-            if st.checkbox(cooking_type, value=cooking_type in existing_cooking_types, key=f"cooking_type_{i}"):
-                selected_cooking_types.append(cooking_type)
-    
-    st.markdown("---")
-    st.markdown("### 3. 드시고 싶은 종류의 수산물 활용 고령친화우수식품을 모두 선택해주세요. (복수 선택 가능)")
-    
-    seafood_types = [
-        "고등어",
-        "갈치",
-        "삼치",
-        "연어",
-        "광어",
-        "오징어",
-        "낙지",
-        "문어",
-        "새우",
-        "조개류",
-        "멸치",
-        "명란",
-        "기타"
-    ]
-    
-    existing_seafood = data.get('desired_seafood_types', [])
-    if isinstance(existing_seafood, str):
-        existing_seafood = json.loads(existing_seafood) if existing_seafood else []
-    
-    selected_seafood = []
-    col1, col2, col3 = st.columns(3)
-    
-    for i, seafood in enumerate(seafood_types):
-        with [col1, col2, col3][i % 3]:
-            if st.checkbox(seafood, value=seafood in existing_seafood, key=f"seafood_{i}"):
-                selected_seafood.append(seafood)
-    
-    # 데이터 저장
-    st.session_state.satisfaction_data.update({
-        'overall_product_satisfaction': overall_product_satisfaction_score,
-        'desired_cooking_types': json.dumps(selected_cooking_types, ensure_ascii=False),
-        'desired_seafood_types': json.dumps(selected_seafood, ensure_ascii=False)
-    })
-    
-    st.markdown("---")
-    
-    # 응답 요약
     st.subheader("📊 응답 요약")
     
     col1, col2 = st.columns(2)
@@ -461,32 +212,23 @@ def show_page4(supabase, elderly_id, surveyor_id, nursing_home_id):
     with col2:
         st.markdown("#### 제품 평가")
         
-        product_names = [
-            "고운오징어젓",
-            "화덕에 미치다",
-            "오쉐프 고등어",
-            "해물동그랑땡"
-        ]
-        
         # 각 제품의 평균 점수 계산
-        for i in range(1, 5):
-            prefix = f"product_{i}"
-            scores = [
-                data.get(f"{prefix}_taste", 0),
-                data.get(f"{prefix}_chewing", 0),
-                data.get(f"{prefix}_swallowing", 0),
-                data.get(f"{prefix}_satisfaction", 0),
-                data.get(f"{prefix}_repurchase", 0)
-            ]
-            avg = sum(scores) / len(scores) if scores else 0
-            st.metric(product_names[i-1], f"{avg:.1f}점")
+        evaluations = load_evaluations(data)
+        for product in active_products(context.supabase):
+            saved = evaluations.get(product['product_id'], {})
+            scores = [saved.get(field) or 0 for field in RATING_FIELDS]
+            avg = sum(scores) / len(scores)
+            st.metric(product.get('short_name') or product['name'], f"{avg:.1f}점")
         
-        st.info(f"전반적 만족도: **{overall_product_satisfaction_score}점**")
+        st.info(f"전반적 만족도: **{data.get('overall_product_satisfaction', 0)}점**")
     
     # 선호도 요약
     st.markdown("---")
     st.markdown("#### 선호도 요약")
     
+    selected_cooking_types = stored_list(data.get('desired_cooking_types'))
+    selected_seafood = stored_list(data.get('desired_seafood_types'))
+    
     col1, col2 = st.columns(2)
     with col1:
         if selected_cooking_types:
@@ -499,106 +241,3 @@ def show_page4(supabase, elderly_id, surveyor_id, nursing_home_id):
             st.write("**선호 수산물:**", ", ".join(selected_seafood))
         else:
             st.write("**선호 수산물:** 선택 안 함")
-    
-    st.markdown("---")
-    
-    # 제출 버튼
-    col1, col2, col3 = st.columns([1, 1, 1])
-    
-    with col1:
-        if st.button("⬅️ 이전", use_container_width=True):
-            st.session_state.satisfaction_page -= 1
-            st.rerun()
-    
-    with col2:
-        if st.button("🏠 대시보드", use_container_width=True):
-            # 세션 초기화
-            if 'satisfaction_data' in st.session_state:
-                del st.session_state.satisfaction_data
-            if 'satisfaction_page' in st.session_state:
-                del st.session_state.satisfaction_page
-            st.session_state.current_survey = None
-            st.rerun()
-    
-    with col3:
-        if st.button("✅ 제출", use_container_width=True, type="primary"):
-            save_satisfaction_survey(supabase, elderly_id, surveyor_id, nursing_home_id)
-
-def save_satisfaction_survey(supabase, elderly_id, surveyor_id, nursing_home_id):
-    """설문 데이터 저장"""
-    try:
-        data = st.session_state.satisfaction_data.copy()
-        data.update({
-            'elderly_id': elderly_id,
-            'surveyor_id': surveyor_id,
-            'nursing_home_id': nursing_home_id,
-            'updated_at': get_kst_now()
-        })
-        
-        # 기존 데이터 확인
-        response = supabase.table('satisfaction_survey').select('id').eq('elderly_id', elderly_id).execute()
-        
-        if response.data:
-            # 업데이트
-            supabase.table('satisfaction_survey').update(data).eq('elderly_id', elderly_id).execute()
-        else:
-            # 새로 추가
-            supabase.table('satisfaction_survey').insert(data).execute()
-        
-        # 진행 상황 업데이트
-        progress_update = {
-            'satisfaction_survey_completed': True,
-            'last_updated': get_kst_now()
-        }
-        
-        # 모든 설문 완료 여부 확인
-        progress_response = supabase.table('survey_progress').select('*').eq('elderly_id', elderly_id).execute()
-        if progress_response.data:
-            progress = progress_response.data[0]
-            if progress.get('basic_survey_completed') and progress.get('nutrition_survey_completed'):
-                progress_update['all_surveys_completed'] = True
-        
-        supabase.table('survey_progress').update(progress_update).eq('elderly_id', elderly_id).execute()
-        
-        st.success("✅ 만족도 및 선호도 조사표가 저장되었습니다!")
-        
-        if progress_update.get('all_surveys_completed'):
-            st.success("🎉 모든 설문이 완료되었습니다! 수고하셨습니다!")
-        
-        # 세션 초기화
-        del st.session_state.satisfaction_data
-        del st.session_state.satisfaction_page
-        st.session_state.current_survey = None
-        
-        
-        if st.button("대시보드로 돌아가기"):
-            st.rerun()
-        
-    except Exception as e:
-        st.error(f"저장 중 오류가 발생했습니다: {str(e)}")
-
-def navigation_buttons():
-    """페이지 이동 버튼"""
-    col1, col2, col3 = st.columns([1, 1, 1])
-    
-    with col1:
-        if st.session_state.satisfaction_page > 1:
-            if st.button("⬅️ 이전", use_container_width=True):
-                st.session_state.satisfaction_page -= 1
-                st.rerun()
-    
-    with col2:
-        if st.button("🏠 대시보드", use_container_width=True):
-            # 세션 초기화
-            if 'satisfaction_data' in st.session_state:
-                del st.session_state.satisfaction_data
-            if 'satisfaction_page' in st.session_state:
-                del st.session_state.satisfaction_page
-            st.session_state.current_survey = None
-            st.rerun()
-    
-    with col3:
-        if st.session_state.satisfaction_page < 4:
-            if st.button("다음 ➡️", use_container_width=True, type="primary"):
-                st.session_state.satisfaction_page += 1
-                st.rerun()
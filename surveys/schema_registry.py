@@ -0,0 +1,76 @@
+"""설문 테이블 컬럼 정보 (프로세스당 1회 조회 후 캐시)
+
+저장 시 DB에 없는 컬럼을 걸러내기 위해 매 제출마다 테이블을 조회하던 방식을 대신합니다.
+스키마가 바뀌면 refresh_table_columns()로 캐시를 비웁니다.
+조회에 실패하면 기본 컬럼 목록을 FAILURE_TTL초 동안만 사용하고 그 뒤에 다시 조회합니다.
+"""
+import threading
+import time
+
+# survey_table_columns 함수 호출이 실패할 때 사용하는 기본 컬럼 목록
+FALLBACK_COLUMNS = {
+    'basic_survey': {
+        'elderly_id', 'surveyor_id', 'nursing_home_id', 'updated_at',
+        'gender', 'age', 'care_grade', 'residence_duration', 'education',
+        'drinking_smoking', 'diseases', 'medications', 'medication_count',
+        'chewing_difficulty', 'swallowing_difficulty', 'food_preparation_method',
+        'eating_independence', 'meal_type', 'height', 'weight',
+        'waist_circumference', 'systolic_bp', 'diastolic_bp',
+        'facility_capacity', 'facility_location', 'nutritionist_present',
+        # IPAQ-SF 필드
+        'vigorous_activity_days', 'vigorous_activity_time',
+        'moderate_activity_days', 'moderate_activity_time',
+        'walking_days', 'walking_time', 'sitting_time',
+        # MNA-SF 필드
+        'mna_appetite_change', 'mna_weight_change', 'mna_mobility',
+        'mna_stress_illness', 'mna_neuropsychological_problem',
+        'mna_bmi_category', 'mna_score'
+    }
+}
+
+# 조회 실패 후 기본 컬럼 목록을 쓰는 시간 (초)
+FAILURE_TTL = 30
+
+_columns = {}
+_failures = {}
+_lock = threading.Lock()
+
+def get_table_columns(supabase, table_name):
+    """테이블 컬럼 이름 집합 (알 수 없으면 None)"""
+    with _lock:
+        if table_name in _columns:
+            return _columns[table_name]
+        if table_name in _failures and _failures[table_name] > time.monotonic():
+            return FALLBACK_COLUMNS.get(table_name)
+    
+    try:
+        response = supabase.rpc('survey_table_columns', {'p_table': table_name}).execute()
+        columns = set(response.data) if response.data else None
+    except Exception:
+        columns = None
+    
+    with _lock:
+        if columns is None:
+            # 실패는 잠시만 기억 (매 제출마다 다시 호출하지 않도록)
+            _failures[table_name] = time.monotonic() + FAILURE_TTL
+            return FALLBACK_COLUMNS.get(table_name)
+        _failures.pop(table_name, None)
+        _columns[table_name] = columns
+    return columns
+
+def filter_payload(supabase, table_name, payload):
+    """테이블에 있는 컬럼만 남긴 저장 데이터 (컬럼 정보가 없으면 그대로 반환)"""
+    columns = get_table_columns(supabase, table_name)
+    if columns is None:
+        return dict(payload)
+    return {k: v for k, v in payload.items() if k in columns}
+
+def refresh_table_columns(table_name=None):
+    """컬럼 캐시 비우기 (table_name이 없으면 전체)"""
+    with _lock:
+        if table_name is None:
+            _columns.clear()
+            _failures.clear()
+        else:
+            _columns.pop(table_name, None)
+            _failures.pop(table_name, None)
@@ -0,0 +1,272 @@
+"""임상 척도 점수 계산 (IPAQ-SF / MNA-SF / K-MBI / MMSE-K)
+
+화면과 무관한 순수 함수 모음입니다. 기초 조사표 화면과 저장된 응답의 일괄 채점이 같은 코드를 사용합니다.
+- compute_*: 문항 점수 배열 (..., 문항)을 받아 총점/분류 코드를 배열로 계산 (앞쪽 축은 어르신 등 임의의 묶음 축)
+- score_*: 어르신 한 명의 답변 dict (basic_data 또는 basic_survey 행) → 점수와 분류 이름
+- score_frame: basic_survey 행 목록(또는 DataFrame) → 어르신별 점수 DataFrame
+- derived_scores: 어르신 한 명의 답변 dict → basic_survey 파생 컬럼 값 (저장 시 함께 기록하여 코호트 조회에 인덱스 사용)
+
+답변이 없거나 숫자가 아닌 문항은 0점으로 계산합니다. (화면의 기본값과 같음)
+"""
+import numpy as np
+import pandas as pd
+
+# IPAQ-SF: (일수, 하루 시간(분)) 필드와 MET 값
+IPAQ_FIELDS = ('vigorous_activity_days', 'vigorous_activity_time',
+               'moderate_activity_days', 'moderate_activity_time',
+               'walking_days', 'walking_time')
+MET_VALUES = {'vigorous': 8.0, 'moderate': 4.0, 'walking': 3.3}
+IPAQ_LEVELS = ("낮음 (Low)", "중간 (Moderate)", "높음 (High)")
+IPAQ_CODES = ('low', 'moderate', 'high')
+
+# MNA-SF: 문항별 점수 필드 (합계 14점)
+MNA_FIELDS = ('mna_appetite_change', 'mna_weight_change', 'mna_mobility',
+              'mna_stress_illness', 'mna_neuropsychological_problem', 'mna_bmi_category')
+MNA_MAX = 14
+MNA_THRESHOLDS = (8, 12)
+MNA_STATUS = ("영양불량", "영양불량 위험", "정상 영양 상태")
+MNA_CODES = ('malnourished', 'at_risk', 'normal')
+# BMI 분류 경계 (19 미만 0점, 21 미만 1점, 23 미만 2점, 그 이상 3점)
+MNA_BMI_BOUNDS = (19, 21, 23)
+
+# K-MBI: 5단계 수행 수준 (0~4점) × 11개 항목 → 100점 만점 환산
+KMBI_OPTIONS = [
+    "과제를 수행할 수 없는 경우",
+    "최대의 도움이 필요한 경우",
+    "중등도의 도움이 필요한 경우",
+    "최소한의 도움이 필요하거나 감시가 필요한 경우",
+    "완전히 독립적인 경우"
+]
+KMBI_SCORE_MAPPING = {option: score for score, option in enumerate(KMBI_OPTIONS)}
+KMBI_FIELDS = tuple(f'kmbi_{i}' for i in range(1, 12))
+KMBI_RAW_MAX = 4 * len(KMBI_FIELDS)
+KMBI_THRESHOLDS = (40, 60, 75, 90)
+KMBI_STATUS = ("완전 의존", "중증 의존", "중등도 의존", "경도 의존", "독립")
+KMBI_CODES = ('total', 'severe', 'moderate', 'mild', 'independent')
+
+# MMSE-K: 영역별 최대 점수 (합계 30점)
+MMSE_DOMAINS = {
+    'mmse_time_orientation': 5,
+    'mmse_place_orientation': 5,
+    'mmse_registration': 3,
+    'mmse_attention_calculation': 5,
+    'mmse_recall': 3,
+    'mmse_naming': 2,
+    'mmse_comprehension': 3,
+    'mmse_drawing': 1,
+    'mmse_repetition': 1,
+    'mmse_reading': 1,
+    'mmse_writing': 1
+}
+MMSE_FIELDS = tuple(MMSE_DOMAINS)
+# 교육 수준별 정상 기준 (학력 문자열에 포함된 단어 → 기준 점수, 그 외 24점)
+MMSE_CUTOFFS = (('무학', 19), ('초등학교', 22))
+MMSE_DEFAULT_CUTOFF = 24
+# 기준 점수보다 이만큼 낮은 점수까지 경도 인지장애 의심
+MMSE_MILD_MARGIN = 4
+MMSE_STATUS = ("인지장애 의심", "경도 인지장애 의심", "정상 인지기능")
+MMSE_CODES = ('impaired', 'mild', 'normal')
+
+def option_score(option):
+    """'점수 = 설명' 형식의 선택지 → 점수 (이미 숫자면 그대로)"""
+    if isinstance(option, str):
+        return int(option.split('=')[0].strip())
+    return int(option)
+
+def to_number(value):
+    """답변 값 → 숫자 (K-MBI 수행 수준 문자열은 점수로, 없거나 숫자가 아니면 0)"""
+    if isinstance(value, str):
+        if value in KMBI_SCORE_MAPPING:
+            return KMBI_SCORE_MAPPING[value]
+        try:
+            return float(value)
+        except ValueError:
+            return 0
+    if value is None or value != value:
+        return 0
+    return value
+
+def answer_vector(data, fields):
+    """답변 dict → 문항 순서의 숫자 배열"""
+    return np.array([to_number(data.get(field)) for field in fields], dtype=float)
+
+def classify(values, thresholds):
+    """점수 → 분류 코드 (경계값 이상이면 다음 단계, 0부터)"""
+    return np.searchsorted(np.asarray(thresholds), np.asarray(values), side='right')
+
+def compute_ipaq(values):
+    """IPAQ-SF MET-분/주와 활동 수준 코드 (0 낮음, 1 중간, 2 높음)
+    
+    values: (..., 6) 배열 (IPAQ_FIELDS 순서)
+    """
+    values = np.asarray(values, dtype=float)
+    vigorous_days, vigorous_time, moderate_days, moderate_time, walking_days, walking_time = np.moveaxis(values, -1, 0)
+    vigorous = vigorous_days * vigorous_time * MET_VALUES['vigorous']
+    moderate = moderate_days * moderate_time * MET_VALUES['moderate']
+    walking = walking_days * walking_time * MET_VALUES['walking']
+    total = vigorous + moderate + walking
+    
+    high = (total >= 3000) | ((vigorous_days >= 3) & (vigorous >= 1500))
+    moderate_level = ((total >= 600) | (vigorous_days >= 3)
+                      | ((moderate_days + walking_days >= 5) & (moderate + walking >= 600)))
+    level = np.where(high, 2, np.where(moderate_level, 1, 0))
+    return {
+        'vigorous_met': vigorous,
+        'moderate_met': moderate,
+        'walking_met': walking,
+        'total_met': total,
+        'level': level
+    }
+
+def compute_mna(values):
+    """MNA-SF 총점과 분류 코드 (0 영양불량, 1 영양불량 위험, 2 정상)
+    
+    values: (..., 6) 배열 (MNA_FIELDS 순서)
+    """
+    total = np.asarray(values, dtype=float).sum(axis=-1)
+    return total, classify(total, MNA_THRESHOLDS)
+
+def body_mass_index(height, weight):
+    """키(cm)와 몸무게(kg) → BMI (반올림하지 않은 값, 값이 없거나 0이면 None)
+    
+    MNA-SF BMI 분류는 이 값으로 하고, 표시와 저장할 때만 소수 둘째 자리로 반올림합니다.
+    (반올림한 값으로 분류하면 18.9992가 19.0이 되어 경계를 넘음)
+    """
+    height, weight = to_number(height), to_number(weight)
+    if not height or not weight or height <= 0 or weight <= 0:
+        return None
+    return weight / (height / 100) ** 2
+
+def mna_bmi_category(bmi):
+    """BMI → MNA-SF BMI 문항 점수 (0~3, 스칼라 또는 배열)"""
+    return classify(bmi, MNA_BMI_BOUNDS)
+
+def compute_kmbi(values):
+    """K-MBI 원점수(0~44), 100점 환산 점수(소수 첫째 자리), 의존도 코드 (0 완전 의존 ~ 4 독립)
+    
+    values: (..., 11) 배열 (KMBI_FIELDS 순서, 항목별 0~4점)
+    """
+    raw = np.asarray(values, dtype=float).sum(axis=-1)
+    scaled = np.round(raw / KMBI_RAW_MAX * 100, 1)
+    return raw, scaled, classify(scaled, KMBI_THRESHOLDS)
+
+def mmse_cutoff(education):
+    """학력 문자열 → MMSE-K 정상 기준 점수"""
+    education = education or ''
+    for word, cutoff in MMSE_CUTOFFS:
+        if word in education:
+            return cutoff
+    return MMSE_DEFAULT_CUTOFF
+
+def compute_mmse(values, cutoffs):
+    """MMSE-K 총점과 분류 코드 (0 인지장애 의심, 1 경도 인지장애 의심, 2 정상)
+    
+    values: (..., 11) 배열 (MMSE_FIELDS 순서), cutoffs: 교육 수준별 기준 점수 (스칼라 또는 (...) 배열)
+    """
+    total = np.asarray(values, dtype=float).sum(axis=-1)
+    cutoffs = np.asarray(cutoffs)
+    status = (total >= cutoffs - MMSE_MILD_MARGIN).astype(int) + (total >= cutoffs)
+    return total, status
+
+def score_ipaq(data):
+    """어르신 한 명의 IPAQ-SF 점수 {vigorous_met, moderate_met, walking_met, total_met, level, level_name}"""
+    result = {name: value.item() for name, value in compute_ipaq(answer_vector(data, IPAQ_FIELDS)).items()}
+    result['level_name'] = IPAQ_LEVELS[result['level']]
+    return result
+
+def score_mna(data):
+    """어르신 한 명의 MNA-SF (총점, 분류 이름)"""
+    total, status = compute_mna(answer_vector(data, MNA_FIELDS))
+    return int(total), MNA_STATUS[int(status)]
+
+def score_kmbi(data):
+    """어르신 한 명의 K-MBI (원점수, 100점 환산 점수, 의존도 이름)"""
+    raw, scaled, status = compute_kmbi(answer_vector(data, KMBI_FIELDS))
+    return int(raw), float(scaled), KMBI_STATUS[int(status)]
+
+def score_mmse(data):
+    """어르신 한 명의 MMSE-K (총점, 정상 기준 점수, 분류 이름)"""
+    cutoff = mmse_cutoff(data.get('education'))
+    total, status = compute_mmse(answer_vector(data, MMSE_FIELDS), cutoff)
+    return int(total), cutoff, MMSE_STATUS[int(status)]
+
+def frame_values(frame, fields):
+    """DataFrame → (명, 문항) 숫자 배열 (없는 컬럼/빈 값/숫자가 아닌 값은 0, K-MBI 수행 수준 문자열은 점수로)"""
+    columns = []
+    for field in fields:
+        if field not in frame:
+            columns.append(np.zeros(len(frame)))
+            continue
+        column = frame[field]
+        if pd.api.types.is_numeric_dtype(column):
+            numbers = column.astype(float)
+        else:
+            # 수행 수준 문자열을 먼저 점수로 바꾸고 나머지 값만 숫자로 변환 (문자열 전체 변환보다 빠름)
+            numbers = column.map(KMBI_SCORE_MAPPING).astype(float)
+            rest = numbers.isna() & column.notna()
+            if rest.any():
+                numbers[rest] = pd.to_numeric(column[rest].astype(object), errors='coerce')
+        columns.append(numbers.fillna(0).to_numpy(dtype=float))
+    return np.column_stack(columns) if columns else np.zeros((len(frame), 0))
+
+def score_frame(rows):
+    """basic_survey 행 목록(또는 DataFrame) → 어르신별 IPAQ-SF/MNA-SF/K-MBI/MMSE-K 점수 DataFrame
+    
+    저장된 문항 점수로 다시 계산하므로 총점 컬럼(mna_score 등)이 비었거나 예전 기준으로 저장된 응답도 같은 기준으로 채점합니다.
+    """
+    frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+    result = pd.DataFrame(index=frame.index)
+    if 'elderly_id' in frame:
+        result['elderly_id'] = frame['elderly_id']
+    
+    ipaq = compute_ipaq(frame_values(frame, IPAQ_FIELDS))
+    for name in ('vigorous_met', 'moderate_met', 'walking_met', 'total_met'):
+        result[f'ipaq_{name}'] = ipaq[name]
+    result['ipaq_level'] = np.asarray(IPAQ_LEVELS, dtype=object)[ipaq['level']]
+    
+    mna_total, mna_status = compute_mna(frame_values(frame, MNA_FIELDS))
+    result['mna_score'] = mna_total.astype(int)
+    result['mna_status'] = np.asarray(MNA_STATUS, dtype=object)[mna_status]
+    
+    kmbi_raw, kmbi_scaled, kmbi_status = compute_kmbi(frame_values(frame, KMBI_FIELDS))
+    result['k_mbi_raw'] = kmbi_raw.astype(int)
+    result['k_mbi_score'] = kmbi_scaled
+    result['k_mbi_status'] = np.asarray(KMBI_STATUS, dtype=object)[kmbi_status]
+    
+    education = frame['education'] if 'education' in frame else pd.Series('', index=frame.index)
+    education = education.fillna('').astype(str)
+    cutoffs = np.full(len(frame), MMSE_DEFAULT_CUTOFF)
+    # 앞의 단어가 우선 (mmse_cutoff와 같은 순서)
+    for word, cutoff in reversed(MMSE_CUTOFFS):
+        cutoffs = np.where(education.str.contains(word, regex=False).to_numpy(), cutoff, cutoffs)
+    mmse_total, mmse_status = compute_mmse(frame_values(frame, MMSE_FIELDS), cutoffs)
+    result['mmse_score'] = mmse_total.astype(int)
+    result['mmse_cutoff'] = cutoffs
+    result['mmse_status'] = np.asarray(MMSE_STATUS, dtype=object)[mmse_status]
+    return result
+
+def derived_scores(data):
+    """어르신 한 명의 답변 dict → basic_survey 파생 컬럼 값
+    
+    BMI, IPAQ-SF MET-분/주와 활동 수준, MNA-SF/K-MBI/MMSE-K 분류를 영문 코드(*_CODES)로 돌려줍니다.
+    문항을 하나도 답하지 않은 척도는 빼므로 작성 중 부분 저장에서 0점 분류가 저장되지 않습니다.
+    """
+    derived = {}
+    bmi = body_mass_index(data.get('height'), data.get('weight'))
+    if bmi is not None:
+        derived['bmi'] = round(bmi, 2)
+    if any(field in data for field in IPAQ_FIELDS):
+        ipaq = score_ipaq(data)
+        for name in ('vigorous_met', 'moderate_met', 'walking_met', 'total_met'):
+            derived[f'ipaq_{name}'] = round(ipaq[name], 1)
+        derived['activity_level'] = IPAQ_CODES[ipaq['level']]
+    if any(field in data for field in MNA_FIELDS):
+        _, status = compute_mna(answer_vector(data, MNA_FIELDS))
+        derived['mna_status'] = MNA_CODES[int(status)]
+    if any(field in data for field in KMBI_FIELDS):
+        _, _, status = compute_kmbi(answer_vector(data, KMBI_FIELDS))
+        derived['k_mbi_status'] = KMBI_CODES[int(status)]
+    if any(field in data for field in MMSE_FIELDS):
+        _, status = compute_mmse(answer_vector(data, MMSE_FIELDS), mmse_cutoff(data.get('education')))
+        derived['mmse_status'] = MMSE_CODES[int(status)]
+    return derived
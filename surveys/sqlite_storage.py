@@ -0,0 +1,643 @@
+"""SQLite 저장소 어댑터 (Supabase 없이 앱 실행/부하 측정)
+
+database_schema.sql의 CREATE TABLE/INDEX와 컬럼 추가 문을 SQLite 문법으로 바꿔 실행하고,
+PL/pgSQL 서버 함수는 같은 동작의 파이썬 메서드(rpc_<함수 이름>)로,
+뷰와 nutrition_meal_items/product_ratings 트리거는 SQLite용 SQL로 다시 정의합니다.
+제품 목록처럼 스키마에 있는 INSERT ... VALUES 기본 행은 그대로 넣습니다.
+
+JSONB/배열 컬럼은 JSON 문자열로, BOOLEAN은 0/1로 저장하고 조회할 때 원래 값으로 되돌립니다.
+연결 하나를 잠금으로 공유하므로 메모리 데이터베이스도 모든 세션과 동기화 작업자가 함께 씁니다.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from surveys.analytics import summarize_residents
+from surveys.storage import SqlStorage, StorageError, StorageResponse, dumps, quote_identifier
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_PATH = os.path.join(PACKAGE_DIR, 'database_schema.sql')
+SAMPLE_DATA_PATH = os.path.join(PACKAGE_DIR, 'sample_data.sql')
+
+SURVEYS = ('basic', 'nutrition', 'satisfaction')
+
+# PostgreSQL 자료형 → information_schema.columns.data_type (survey_table_column_types 결과)
+DATA_TYPES = {
+    'TEXT': 'text', 'INTEGER': 'integer', 'SERIAL': 'integer', 'SMALLINT': 'smallint', 'BIGINT': 'bigint',
+    'BOOLEAN': 'boolean', 'DECIMAL': 'numeric', 'NUMERIC': 'numeric', 'REAL': 'real',
+    'JSONB': 'jsonb', 'JSON': 'json',
+    'TIMESTAMP': 'timestamp without time zone', 'TIMESTAMP WITH TIME ZONE': 'timestamp with time zone',
+}
+
+COLUMN_DEFINITION = re.compile(
+    r'^\s*([a-z_][a-z0-9_]*)\s+([A-Z]+(?:\s+WITH(?:OUT)?\s+TIME\s+ZONE)?(?:\[\])?)', re.MULTILINE)
+
+# 뷰 컬럼 중 변환이 필요한 컬럼의 자료형
+VIEW_COLUMN_TYPES = {
+    'survey_progress_stats': {'is_total': 'BOOLEAN'},
+}
+
+# 일차 안의 칸 순서 (plate_waste_levels 배열 위치, database_schema.sql의 nutrition_level_index와 같음)
+MEAL_SLOTS = (
+    'breakfast_rice', 'breakfast_soup', 'breakfast_main', 'breakfast_side1', 'breakfast_side2', 'breakfast_kimchi',
+    'snack1',
+    'lunch_rice', 'lunch_soup', 'lunch_main', 'lunch_side1', 'lunch_side2', 'lunch_kimchi',
+    'snack2',
+    'dinner_rice', 'dinner_soup', 'dinner_main', 'dinner_side1', 'dinner_side2', 'dinner_kimchi',
+)
+SLOT_POSITION = "CASE rest " + " ".join(f"WHEN '{slot}' THEN {i}" for i, slot in enumerate(MEAL_SLOTS)) + " END"
+
+# nutrition_survey 행(n)에서 끼니 칸 행을 만드는 SELECT (database_schema.sql의 refresh_nutrition_meal_items와 같은 규칙)
+# 목측 단계는 저장된 plate_waste_levels를 쓰고, 없는 이전 응답만 잔반량/제공량 비율로 환산
+MEAL_ITEMS_INSERT = f"""
+INSERT INTO nutrition_meal_items (elderly_id, nursing_home_id, day, meal, slot, portion_g, waste_level, waste_g)
+SELECT
+    elderly_id,
+    nursing_home_id,
+    CAST(day AS INTEGER),
+    CASE WHEN instr(rest, '_') = 0 THEN rest ELSE substr(rest, 1, instr(rest, '_') - 1) END,
+    CASE WHEN instr(rest, '_') = 0 THEN '' ELSE substr(rest, instr(rest, '_') + 1) END,
+    portion_g,
+    CASE WHEN portion_g > 0 THEN COALESCE(
+        json_extract(levels, '$[' || ((CAST(day AS INTEGER) - 1) * {len(MEAL_SLOTS)} + {SLOT_POSITION}) || ']'),
+        MIN(4, MAX(0, ROUND(waste_g * 4.0 / portion_g)))
+    ) END,
+    waste_g
+FROM (
+    SELECT
+        n.elderly_id,
+        n.nursing_home_id,
+        n.plate_waste_levels AS levels,
+        substr(p.key, 4, instr(p.key, '_') - 4) AS day,
+        substr(p.key, instr(p.key, '_') + 1) AS rest,
+        CASE WHEN p.type IN ('integer', 'real') THEN p.value ELSE 0 END AS portion_g,
+        CASE WHEN json_type(survey_json_object(n.plate_waste), '$."' || p.key || '_waste"') IN ('integer', 'real')
+             THEN json_extract(survey_json_object(n.plate_waste), '$."' || p.key || '_waste"') ELSE 0 END AS waste_g
+    FROM nutrition_survey n
+    CROSS JOIN json_each(survey_json_object(n.meal_portions)) p
+    WHERE n.submitted_at IS NOT NULL AND ({{condition}})
+)
+WHERE day GLOB '[0-9]*' AND day NOT GLOB '*[^0-9]*'
+  AND instr(substr(rest, instr(rest, '_') + 1), '_') = 0
+"""
+
+# 끼니 칸 행에서 어르신별 섭취 합계를 만드는 INSERT (refresh_nutrition_meal_items의 nutrition_intake 갱신과 같은 규칙)
+INTAKE_INSERT = """
+INSERT INTO nutrition_intake (elderly_id, nursing_home_id, portion_g, waste_g, intake_rate)
+SELECT
+    elderly_id,
+    MIN(nursing_home_id),
+    SUM(portion_g),
+    SUM(waste_g),
+    ROUND(100.0 * (SUM(portion_g) - SUM(waste_g)) / NULLIF(SUM(portion_g), 0), 1)
+FROM nutrition_meal_items
+WHERE {condition}
+GROUP BY elderly_id
+"""
+
+# satisfaction_survey 행(s)에서 제품 평가 행을 만드는 INSERT (database_schema.sql의 survey_product_ratings와 같은 규칙)
+RATINGS_INSERT = """
+INSERT INTO product_ratings (elderly_id, product_id, nursing_home_id, taste, chewing, swallowing, satisfaction, repurchase)
+SELECT elderly_id, product_id, nursing_home_id, taste, chewing, swallowing, satisfaction, repurchase
+FROM (
+    SELECT
+        s.elderly_id,
+        e.key AS product_id,
+        s.nursing_home_id,
+        CASE WHEN json_type(e.value, '$.taste') IN ('integer', 'real') THEN json_extract(e.value, '$.taste') END AS taste,
+        CASE WHEN json_type(e.value, '$.chewing') IN ('integer', 'real') THEN json_extract(e.value, '$.chewing') END AS chewing,
+        CASE WHEN json_type(e.value, '$.swallowing') IN ('integer', 'real') THEN json_extract(e.value, '$.swallowing') END AS swallowing,
+        CASE WHEN json_type(e.value, '$.satisfaction') IN ('integer', 'real') THEN json_extract(e.value, '$.satisfaction') END AS satisfaction,
+        CASE WHEN json_type(e.value, '$.repurchase') IN ('integer', 'real') THEN json_extract(e.value, '$.repurchase') END AS repurchase
+    FROM satisfaction_survey s
+    CROSS JOIN json_each(survey_json_object(s.product_evaluations)) e
+    WHERE e.type = 'object' AND s.submitted_at IS NOT NULL AND ({condition})
+)
+WHERE taste IN (1, 2, 3, 4, 5) AND chewing IN (1, 2, 3, 4, 5) AND swallowing IN (1, 2, 3, 4, 5)
+  AND satisfaction IN (1, 2, 3, 4, 5) AND repurchase IN (1, 2, 3, 4, 5)
+"""
+
+# 이전 product_N_* 컬럼의 평가를 product_evaluations로 옮기는 UPDATE (아직 옮기지 않은 행만)
+LEGACY_PRODUCT_SCORES = """
+        SELECT 'product_{n}' AS product_id, product_{n}_taste AS taste,
+               json_object('taste', product_{n}_taste, 'chewing', product_{n}_chewing, 'swallowing', product_{n}_swallowing,
+                           'satisfaction', product_{n}_satisfaction, 'repurchase', product_{n}_repurchase) AS scores"""
+LEGACY_EVALUATIONS_UPDATE = """
+UPDATE satisfaction_survey
+SET product_evaluations = (
+    SELECT json_group_object(product_id, json(scores))
+    FROM ({products}
+    )
+    WHERE typeof(taste) IN ('integer', 'real')
+)
+WHERE product_evaluations IS NULL
+  AND (typeof(product_1_taste) IN ('integer', 'real') OR typeof(product_2_taste) IN ('integer', 'real')
+       OR typeof(product_3_taste) IN ('integer', 'real') OR typeof(product_4_taste) IN ('integer', 'real'))
+""".format(products="\n        UNION ALL".join(LEGACY_PRODUCT_SCORES.format(n=n) for n in range(1, 5)))
+
+SQLITE_OBJECTS = [
+    """CREATE VIEW IF NOT EXISTS survey_progress_stats AS
+    SELECT
+        sp.nursing_home_id,
+        nh.name AS nursing_home_name,
+        0 AS is_total,
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE sp.basic_survey_completed) AS basic_completed,
+        COUNT(*) FILTER (WHERE sp.nutrition_survey_completed) AS nutrition_completed,
+        COUNT(*) FILTER (WHERE sp.satisfaction_survey_completed) AS satisfaction_completed,
+        COUNT(*) FILTER (WHERE sp.all_surveys_completed) AS all_completed
+    FROM survey_progress sp
+    LEFT JOIN nursing_homes nh ON nh.id = sp.nursing_home_id
+    GROUP BY sp.nursing_home_id, nh.name
+    UNION ALL
+    SELECT
+        NULL, NULL, 1, COUNT(*),
+        COUNT(*) FILTER (WHERE basic_survey_completed),
+        COUNT(*) FILTER (WHERE nutrition_survey_completed),
+        COUNT(*) FILTER (WHERE satisfaction_survey_completed),
+        COUNT(*) FILTER (WHERE all_surveys_completed)
+    FROM survey_progress""",
+    """CREATE VIEW IF NOT EXISTS nutrition_meal_item_stats AS
+    SELECT
+        nursing_home_id,
+        day,
+        meal,
+        slot,
+        COUNT(*) FILTER (WHERE portion_g > 0) AS served,
+        SUM(portion_g) AS portion_g_sum,
+        SUM(waste_g) AS waste_g_sum,
+        ROUND(AVG(waste_level), 2) AS avg_waste_level,
+        ROUND(100.0 * (SUM(portion_g) - SUM(waste_g)) / NULLIF(SUM(portion_g), 0), 1) AS intake_rate
+    FROM nutrition_meal_items
+    GROUP BY nursing_home_id, day, meal, slot""",
+    # 섭취 합계 갱신을 더하기 전에 만든 데이터베이스 파일도 새 트리거를 쓰도록 다시 만듦
+    "DROP TRIGGER IF EXISTS trg_nutrition_meal_items_insert",
+    "DROP TRIGGER IF EXISTS trg_nutrition_meal_items_update",
+    "DROP TRIGGER IF EXISTS trg_nutrition_meal_items_delete",
+    f"""CREATE TRIGGER trg_nutrition_meal_items_insert
+    AFTER INSERT ON nutrition_survey
+    BEGIN
+        DELETE FROM nutrition_meal_items WHERE elderly_id = NEW.elderly_id;
+        DELETE FROM nutrition_intake WHERE elderly_id = NEW.elderly_id;
+        {MEAL_ITEMS_INSERT.format(condition="n.elderly_id = NEW.elderly_id")};
+        {INTAKE_INSERT.format(condition="elderly_id = NEW.elderly_id")};
+    END""",
+    f"""CREATE TRIGGER trg_nutrition_meal_items_update
+    AFTER UPDATE ON nutrition_survey
+    WHEN NEW.meal_portions IS NOT OLD.meal_portions
+      OR NEW.plate_waste IS NOT OLD.plate_waste
+      OR NEW.plate_waste_levels IS NOT OLD.plate_waste_levels
+      OR NEW.submitted_at IS NOT OLD.submitted_at
+      OR NEW.nursing_home_id IS NOT OLD.nursing_home_id
+      OR NEW.elderly_id IS NOT OLD.elderly_id
+    BEGIN
+        DELETE FROM nutrition_meal_items WHERE elderly_id IN (OLD.elderly_id, NEW.elderly_id);
+        DELETE FROM nutrition_intake WHERE elderly_id IN (OLD.elderly_id, NEW.elderly_id);
+        {MEAL_ITEMS_INSERT.format(condition="n.elderly_id IN (OLD.elderly_id, NEW.elderly_id)")};
+        {INTAKE_INSERT.format(condition="elderly_id IN (OLD.elderly_id, NEW.elderly_id)")};
+    END""",
+    """CREATE TRIGGER trg_nutrition_meal_items_delete
+    AFTER DELETE ON nutrition_survey
+    BEGIN
+        DELETE FROM nutrition_meal_items WHERE elderly_id = OLD.elderly_id;
+        DELETE FROM nutrition_intake WHERE elderly_id = OLD.elderly_id;
+    END""",
+    # 섭취 합계 테이블 이전에 펼친 어르신의 합계 채우기
+    INTAKE_INSERT.format(condition="elderly_id NOT IN (SELECT elderly_id FROM nutrition_intake)"),
+    # 제품 평가 합계 (평가 행이 생기거나 지워질 때 더하고 뺌)
+    """CREATE TRIGGER IF NOT EXISTS trg_product_rating_totals_insert
+    AFTER INSERT ON product_ratings
+    BEGIN
+        INSERT INTO product_rating_totals (
+            nursing_home_id, product_id, responses,
+            taste_sum, chewing_sum, swallowing_sum, satisfaction_sum, repurchase_sum
+        )
+        VALUES (
+            COALESCE(NEW.nursing_home_id, ''), NEW.product_id, 1,
+            NEW.taste, NEW.chewing, NEW.swallowing, NEW.satisfaction, NEW.repurchase
+        )
+        ON CONFLICT (nursing_home_id, product_id) DO UPDATE SET
+            responses = responses + 1,
+            taste_sum = taste_sum + excluded.taste_sum,
+            chewing_sum = chewing_sum + excluded.chewing_sum,
+            swallowing_sum = swallowing_sum + excluded.swallowing_sum,
+            satisfaction_sum = satisfaction_sum + excluded.satisfaction_sum,
+            repurchase_sum = repurchase_sum + excluded.repurchase_sum;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_product_rating_totals_delete
+    AFTER DELETE ON product_ratings
+    BEGIN
+        UPDATE product_rating_totals SET
+            responses = responses - 1,
+            taste_sum = taste_sum - OLD.taste,
+            chewing_sum = chewing_sum - OLD.chewing,
+            swallowing_sum = swallowing_sum - OLD.swallowing,
+            satisfaction_sum = satisfaction_sum - OLD.satisfaction,
+            repurchase_sum = repurchase_sum - OLD.repurchase
+        WHERE nursing_home_id = COALESCE(OLD.nursing_home_id, '') AND product_id = OLD.product_id;
+    END""",
+    # 제출 완료 표시 이전에 만든 데이터베이스 파일도 새 트리거를 쓰도록 다시 만듦
+    "DROP TRIGGER IF EXISTS trg_product_ratings_insert",
+    "DROP TRIGGER IF EXISTS trg_product_ratings_update",
+    f"""CREATE TRIGGER trg_product_ratings_insert
+    AFTER INSERT ON satisfaction_survey
+    BEGIN
+        DELETE FROM product_ratings WHERE elderly_id = NEW.elderly_id;
+        {RATINGS_INSERT.format(condition="s.elderly_id = NEW.elderly_id")};
+    END""",
+    f"""CREATE TRIGGER trg_product_ratings_update
+    AFTER UPDATE ON satisfaction_survey
+    WHEN NEW.product_evaluations IS NOT OLD.product_evaluations
+      OR NEW.submitted_at IS NOT OLD.submitted_at
+      OR NEW.nursing_home_id IS NOT OLD.nursing_home_id
+      OR NEW.elderly_id IS NOT OLD.elderly_id
+    BEGIN
+        DELETE FROM product_ratings WHERE elderly_id IN (OLD.elderly_id, NEW.elderly_id);
+        {RATINGS_INSERT.format(condition="s.elderly_id IN (OLD.elderly_id, NEW.elderly_id)")};
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_product_ratings_delete
+    AFTER DELETE ON satisfaction_survey
+    BEGIN
+        DELETE FROM product_ratings WHERE elderly_id = OLD.elderly_id;
+    END""",
+    # 이전 컬럼의 평가 옮기기 (트리거가 평가 행을 만듦)
+    LEGACY_EVALUATIONS_UPDATE,
+] + [
+    # 제출 완료 표시 이전의 행: 진행 상황에서 완료된 설문은 제출한 것으로 채움 (트리거가 끼니 칸/평가 행을 만듦)
+    f"""UPDATE {survey}_survey
+    SET submitted_at = COALESCE(updated_at,
+        (SELECT p.last_updated FROM survey_progress p WHERE p.elderly_id = {survey}_survey.elderly_id))
+    WHERE submitted_at IS NULL
+      AND elderly_id IN (SELECT elderly_id FROM survey_progress WHERE {survey}_survey_completed)"""
+    for survey in ('basic', 'nutrition', 'satisfaction')
+] + [
+    # 작성 중인 행에서 이미 만든 끼니 칸/평가 행 지우기 (평가 합계는 트리거가 뺌)
+    "DELETE FROM nutrition_meal_items WHERE elderly_id IN (SELECT elderly_id FROM nutrition_survey WHERE submitted_at IS NULL)",
+    "DELETE FROM nutrition_intake WHERE elderly_id IN (SELECT elderly_id FROM nutrition_survey WHERE submitted_at IS NULL)",
+    "DELETE FROM product_ratings WHERE elderly_id IN (SELECT elderly_id FROM satisfaction_survey WHERE submitted_at IS NULL)",
+]
+
+# 코호트 분석용 어르신별 지표 (database_schema.sql의 cohort_analytics와 같은 행)
+COHORT_RESIDENTS = """
+SELECT
+    COALESCE(b.nursing_home_id, i.nursing_home_id) AS nursing_home_id,
+    COALESCE(NULLIF(b.care_grade, ''), '미입력') AS care_grade,
+    COALESCE(NULLIF(b.meal_type, ''), '미입력') AS meal_type,
+    b.mna_score, b.mmse_score, b.k_mbi_score, b.bmi, i.intake_rate
+FROM (SELECT * FROM basic_survey WHERE submitted_at IS NOT NULL AND ({condition})) b
+FULL JOIN (SELECT * FROM nutrition_intake WHERE {condition}) i ON i.elderly_id = b.elderly_id
+"""
+
+def split_statements(sql):
+    """SQL 스크립트를 문장 단위로 분리 (주석 제거, $$ 본문 안의 ;는 무시)"""
+    sql = re.sub(r'--[^\n]*', '', sql)
+    statements, current, in_body = [], [], False
+    for part in re.split(r'(\$\$|;)', sql):
+        if part == '$$':
+            in_body = not in_body
+        if part == ';' and not in_body:
+            statement = ''.join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(part)
+    return statements
+
+def sqlite_type(pg_type):
+    """PostgreSQL 자료형 → SQLite 선언 자료형"""
+    if pg_type.endswith('[]') or pg_type in ('JSONB', 'JSON') or pg_type.startswith('TIMESTAMP'):
+        return 'TEXT'
+    return pg_type
+
+def translate_table(statement):
+    """CREATE TABLE 문 → (SQLite 문, {컬럼: PostgreSQL 자료형})"""
+    body = statement[statement.index('(') + 1:statement.rindex(')')]
+    types = {}
+    for name, pg_type in COLUMN_DEFINITION.findall(body):
+        if name not in types:
+            types[name] = re.sub(r'\s+', ' ', pg_type)
+    statement = re.sub(r'^CREATE TABLE (IF NOT EXISTS )?', 'CREATE TABLE IF NOT EXISTS ', statement)
+    statement = statement.replace('SERIAL PRIMARY KEY', 'INTEGER PRIMARY KEY AUTOINCREMENT')
+    statement = statement.replace('DEFAULT NOW()', 'DEFAULT CURRENT_TIMESTAMP')
+    statement = re.sub(r'\b(TIMESTAMP(?: WITH(?:OUT)? TIME ZONE)?|JSONB|\w+\[\])', lambda m: sqlite_type(m.group(1)), statement)
+    return statement, types
+
+def survey_json_object(value):
+    """저장된 JSON 텍스트 → 객체 JSON 텍스트 (JSON 문자열 안의 객체도 풀어냄, 객체가 아니면 '{}')"""
+    if value is None:
+        return '{}'
+    try:
+        decoded = json.loads(value)
+        if isinstance(decoded, str) and decoded.lstrip().startswith('{'):
+            decoded = json.loads(decoded)
+    except ValueError:
+        return '{}'
+    return json.dumps(decoded) if isinstance(decoded, dict) else '{}'
+
+class SqliteStorage(SqlStorage):
+    """SQLite 어댑터 (path=':memory:'면 프로세스 안 메모리 데이터베이스)"""
+    
+    placeholder = '?'
+    
+    def __init__(self, path=':memory:', schema_path=SCHEMA_PATH, sample_data=False):
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # PostgreSQL처럼 외래키 확인 (SQLite 기본값은 꺼짐, 없는 어르신 ID로 제출하면 오류)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.create_function('survey_json_object', 1, survey_json_object, deterministic=True)
+        self.lock = threading.RLock()
+        # 테이블 → {컬럼: PostgreSQL 자료형} (컬럼 순서 유지)
+        self.column_types = {}
+        with open(schema_path, encoding='utf-8') as f:
+            self.load_schema(f.read())
+        if sample_data:
+            with open(SAMPLE_DATA_PATH, encoding='utf-8') as f:
+                with self.transaction() as conn:
+                    for statement in split_statements(f.read()):
+                        conn.execute(statement)
+    
+    def load_schema(self, sql):
+        """테이블/인덱스/컬럼 추가/기본 행 문만 실행 (함수, 트리거, 뷰는 SQLITE_OBJECTS로 대체)"""
+        with self.transaction() as conn:
+            for statement in split_statements(sql):
+                if statement.startswith('CREATE TABLE'):
+                    statement, types = translate_table(statement)
+                    table = re.match(r'CREATE TABLE IF NOT EXISTS (\w+)', statement).group(1)
+                    self.column_types[table] = types
+                    conn.execute(statement)
+                elif statement.startswith('CREATE INDEX'):
+                    statement = re.sub(r'^CREATE INDEX (IF NOT EXISTS )?', 'CREATE INDEX IF NOT EXISTS ', statement)
+                    conn.execute(re.sub(r'\s+INCLUDE\s*\([^)]*\)', '', statement))
+                elif re.match(r'INSERT INTO \w+ \([^)]*\) VALUES', statement):
+                    conn.execute(statement)
+                elif statement.startswith('ALTER TABLE'):
+                    match = re.match(r'ALTER TABLE (\w+) ADD COLUMN IF NOT EXISTS (\w+) ([A-Z]+(?:\[\])?)', statement)
+                    if match:
+                        self.add_column(conn, *match.groups())
+            for statement in SQLITE_OBJECTS:
+                conn.execute(statement)
+    
+    def add_column(self, conn, table, column, pg_type):
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table)})")}
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {quote_identifier(table)} ADD COLUMN {quote_identifier(column)} {sqlite_type(pg_type)}")
+        self.column_types[table].setdefault(column, pg_type)
+    
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+    
+    def close(self):
+        self.conn.close()
+    
+    def types_of(self, table):
+        return self.column_types.get(table) or VIEW_COLUMN_TYPES.get(table, {})
+    
+    def encode(self, table, column, value):
+        pg_type = self.types_of(table).get(column, '')
+        if value is None:
+            return None
+        if pg_type in ('JSONB', 'JSON') or pg_type.endswith('[]'):
+            return dumps(value)
+        if isinstance(value, (dict, list)):
+            return dumps(value)
+        return value
+    
+    def fetch_rows(self, cursor, table):
+        """커서 결과 → 행 dict 목록 (JSON/배열/BOOLEAN 컬럼 복원)"""
+        types = self.types_of(table)
+        names = [d[0] for d in cursor.description]
+        rows = []
+        for values in cursor.fetchall():
+            row = {}
+            for name, value in zip(names, values):
+                pg_type = types.get(name, '')
+                if value is not None and (pg_type in ('JSONB', 'JSON') or pg_type.endswith('[]')):
+                    value = json.loads(value)
+                elif value is not None and pg_type == 'BOOLEAN':
+                    value = bool(value)
+                row[name] = value
+            rows.append(row)
+        return rows
+    
+    def run_query(self, query):
+        with self.transaction() as conn:
+            if query.operation == 'select':
+                sql, params = self.select_sql(query)
+                data = self.fetch_rows(conn.execute(sql, params), query.table_name)
+                count = conn.execute(*self.count_sql(query)).fetchone()[0] if query.count else None
+                return StorageResponse(data, count)
+            
+            data = []
+            if query.operation == 'update':
+                data = self.update_rows(conn, query.table_name, query.payload, query)
+            else:
+                for row in query.rows():
+                    data.extend(self.insert_row(conn, query.table_name, row, query))
+            return StorageResponse(data if query.returning != 'minimal' else [],
+                                   len(data) if query.count else None)
+    
+    def insert_row(self, conn, table, row, query=None):
+        columns = list(row)
+        names = ', '.join(quote_identifier(c) for c in columns)
+        sql = (f"INSERT INTO {quote_identifier(table)} ({names}) VALUES ({', '.join('?' * len(columns))})"
+               f"{self.conflict_sql(query, columns) if query else ''} RETURNING *")
+        params = [self.encode(table, c, row[c]) for c in columns]
+        return self.fetch_rows(conn.execute(sql, params), table)
+    
+    def update_rows(self, conn, table, payload, query):
+        assignments = ', '.join(f"{quote_identifier(c)} = ?" for c in payload)
+        where, params = self.where_sql(query)
+        sql = f"UPDATE {quote_identifier(table)} SET {assignments}{where} RETURNING *"
+        values = [self.encode(table, c, v) for c, v in payload.items()]
+        return self.fetch_rows(conn.execute(sql, values + params), table)
+    
+    def call_function(self, name, params):
+        function = getattr(self, f"rpc_{name}", None)
+        if function is None:
+            raise StorageError(f"SQLite 저장소에서 지원하지 않는 서버 함수입니다: {name}")
+        with self.transaction() as conn:
+            return function(conn, **params)
+    
+    def find_row(self, conn, table, column, value):
+        cursor = conn.execute(f"SELECT * FROM {quote_identifier(table)} WHERE {quote_identifier(column)} = ?", (value,))
+        rows = self.fetch_rows(cursor, table)
+        return rows[0] if rows else None
+    
+    # === 서버 함수 (database_schema.sql의 같은 이름 함수와 같은 동작) ===
+    
+    def rpc_survey_login(self, conn, p_nursing_home_id, p_surveyor_id, p_elderly_id, p_include_roster=False):
+        if conn.execute("SELECT 1 FROM nursing_homes WHERE id = ?", (p_nursing_home_id,)).fetchone() is None:
+            return {'ok': False, 'error': 'nursing_home'}
+        if conn.execute("SELECT 1 FROM surveyors WHERE id = ? AND nursing_home_id = ?",
+                        (p_surveyor_id, p_nursing_home_id)).fetchone() is None:
+            return {'ok': False, 'error': 'surveyor'}
+        if conn.execute("SELECT 1 FROM elderly_residents WHERE id = ? AND nursing_home_id = ?",
+                        (p_elderly_id, p_nursing_home_id)).fetchone() is None:
+            return {'ok': False, 'error': 'elderly'}
+        
+        conn.execute(
+            "INSERT INTO survey_progress (elderly_id, surveyor_id, nursing_home_id) VALUES (?, ?, ?) "
+            "ON CONFLICT (elderly_id) DO NOTHING",
+            (p_elderly_id, p_surveyor_id, p_nursing_home_id)
+        )
+        result = {'ok': True, 'progress': self.find_row(conn, 'survey_progress', 'elderly_id', p_elderly_id)}
+        if p_include_roster:
+            result['roster'] = self.rpc_get_facility_roster(conn, p_nursing_home_id)
+        return result
+    
+    def rpc_get_facility_roster(self, conn, p_nursing_home_id):
+        def members(table):
+            cursor = conn.execute(
+                f"SELECT * FROM {table} WHERE nursing_home_id = ? ORDER BY id", (p_nursing_home_id,))
+            return self.fetch_rows(cursor, table)
+        
+        return {
+            'nursing_home': self.find_row(conn, 'nursing_homes', 'id', p_nursing_home_id),
+            'surveyors': members('surveyors'),
+            'residents': members('elderly_residents'),
+        }
+    
+    def survey_table(self, survey):
+        if survey not in SURVEYS:
+            raise StorageError(f"unknown survey: {survey}")
+        return f"{survey}_survey"
+    
+    def rpc_save_survey_draft(self, conn, p_survey, p_payload):
+        table = self.survey_table(p_survey)
+        row = {c: p_payload[c] for c in self.column_types[table]
+               if c not in ('id', 'created_at', 'submitted_at') and c in p_payload}
+        columns = list(row)
+        names = ', '.join(quote_identifier(c) for c in columns)
+        updates = ', '.join(f"{quote_identifier(c)} = excluded.{quote_identifier(c)}" for c in columns)
+        conn.execute(
+            f"INSERT INTO {table} ({names}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT (elderly_id) DO UPDATE SET {updates}",
+            [self.encode(table, c, row[c]) for c in columns]
+        )
+        return None
+    
+    def rpc_submit_survey(self, conn, p_survey, p_payload):
+        self.rpc_save_survey_draft(conn, p_survey, p_payload)
+        elderly_id = p_payload.get('elderly_id')
+        updated_at = p_payload.get('updated_at') or datetime.now().isoformat()
+        conn.execute(f"UPDATE {self.survey_table(p_survey)} SET submitted_at = ? WHERE elderly_id = ?",
+                     (updated_at, elderly_id))
+        conn.execute(
+            "INSERT INTO survey_progress (elderly_id, surveyor_id, nursing_home_id) VALUES (?, ?, ?) "
+            "ON CONFLICT (elderly_id) DO NOTHING",
+            (elderly_id, p_payload.get('surveyor_id'), p_payload.get('nursing_home_id'))
+        )
+        conn.execute(
+            f"UPDATE survey_progress SET {p_survey}_survey_completed = 1, last_updated = ? WHERE elderly_id = ?",
+            (updated_at, elderly_id)
+        )
+        conn.execute(
+            "UPDATE survey_progress SET all_surveys_completed = basic_survey_completed "
+            "AND nutrition_survey_completed AND satisfaction_survey_completed WHERE elderly_id = ?",
+            (elderly_id,)
+        )
+        return self.find_row(conn, 'survey_progress', 'elderly_id', elderly_id)
+    
+    def rpc_submit_surveys_batch(self, conn, p_items):
+        results = []
+        for item in p_items:
+            conn.execute("SAVEPOINT batch_item")
+            try:
+                payload = item.get('payload') or {}
+                # 대기열에 넣은 뒤 다른 기기에서 저장한 행은 덮어쓰지 않음
+                newer = item.get('queued_at') and conn.execute(
+                    f"SELECT 1 FROM {self.survey_table(item.get('survey'))} "
+                    "WHERE elderly_id = ? AND datetime(updated_at) > datetime(?)",
+                    (payload.get('elderly_id'), item['queued_at'])
+                ).fetchone()
+                if newer:
+                    conn.execute("RELEASE batch_item")
+                    results.append({'id': item.get('id'), 'ok': True, 'skipped': 'stale'})
+                    continue
+                self.rpc_submit_survey(conn, item.get('survey'), payload)
+                conn.execute("RELEASE batch_item")
+                results.append({'id': item.get('id'), 'ok': True})
+            except Exception as e:
+                conn.execute("ROLLBACK TO batch_item")
+                conn.execute("RELEASE batch_item")
+                results.append({'id': item.get('id'), 'ok': False, 'error': str(e)})
+        return results
+    
+    def rpc_survey_table_columns(self, conn, p_table):
+        return list(self.column_types[p_table]) if p_table in self.column_types else None
+    
+    def rpc_survey_table_column_types(self, conn, p_table):
+        return [
+            {'column_name': column, 'data_type': 'ARRAY' if pg_type.endswith('[]') else DATA_TYPES.get(pg_type, pg_type.lower())}
+            for column, pg_type in self.column_types.get(p_table, {}).items()
+        ]
+    
+    def rpc_init_survey_progress(self, conn, p_elderly_ids):
+        cursor = conn.execute(
+            "INSERT INTO survey_progress (elderly_id, surveyor_id, nursing_home_id) "
+            "SELECT e.id, MIN(s.id), e.nursing_home_id "
+            "FROM elderly_residents e JOIN surveyors s ON e.nursing_home_id = s.nursing_home_id "
+            "WHERE e.id IN (SELECT value FROM json_each(?)) GROUP BY e.id "
+            "ON CONFLICT (elderly_id) DO NOTHING",
+            (dumps(list(p_elderly_ids)),)
+        )
+        return cursor.rowcount
+    
+    def rpc_refresh_nutrition_meal_items(self, conn, p_elderly_ids=None):
+        if p_elderly_ids is None:
+            conn.execute("DELETE FROM nutrition_meal_items")
+            condition, params = "1 = 1", ()
+        else:
+            conn.execute("DELETE FROM nutrition_meal_items WHERE elderly_id IN (SELECT value FROM json_each(?))",
+                         (dumps(list(p_elderly_ids)),))
+            condition, params = "n.elderly_id IN (SELECT value FROM json_each(?))", (dumps(list(p_elderly_ids)),)
+        created = conn.execute(MEAL_ITEMS_INSERT.format(condition=condition), params).rowcount
+        if p_elderly_ids is None:
+            conn.execute("DELETE FROM nutrition_intake")
+            conn.execute(INTAKE_INSERT.format(condition="1 = 1"))
+        else:
+            conn.execute("DELETE FROM nutrition_intake WHERE elderly_id IN (SELECT value FROM json_each(?))", params)
+            conn.execute(INTAKE_INSERT.format(condition="elderly_id IN (SELECT value FROM json_each(?))"), params)
+        return created
+    
+    def rpc_refresh_product_ratings(self, conn, p_elderly_ids=None):
+        # 평가 행을 지우고 만들면 product_ratings 트리거가 합계를 함께 갱신
+        if p_elderly_ids is None:
+            p_elderly_ids = [row[0] for row in conn.execute(
+                "SELECT elderly_id FROM satisfaction_survey UNION SELECT elderly_id FROM product_ratings")]
+        params = (dumps(list(p_elderly_ids)),)
+        conn.execute("DELETE FROM product_ratings WHERE elderly_id IN (SELECT value FROM json_each(?))", params)
+        return conn.execute(RATINGS_INSERT.format(condition="s.elderly_id IN (SELECT value FROM json_each(?))"),
+                            params).rowcount
+    
+    def rpc_cohort_analytics_version(self, conn, p_nursing_home_id=None):
+        parts = []
+        for table in ('basic_survey', 'nutrition_survey'):
+            updated_at, rows = conn.execute(
+                f"SELECT MAX(submitted_at), COUNT(submitted_at) FROM {table} WHERE ? IS NULL OR nursing_home_id = ?",
+                (p_nursing_home_id, p_nursing_home_id)
+            ).fetchone()
+            parts += [updated_at, rows]
+        return '/'.join(str(part) for part in parts if part is not None)
+    
+    def rpc_cohort_analytics(self, conn, p_nursing_home_id=None, p_version=None, p_bins=None):
+        version = self.rpc_cohort_analytics_version(conn, p_nursing_home_id)
+        if p_version == version:
+            return {'version': version, 'unchanged': True}
+        cursor = conn.execute(COHORT_RESIDENTS.format(condition="? IS NULL OR nursing_home_id = ?"),
+                              (p_nursing_home_id, p_nursing_home_id) * 2)
+        names = [d[0] for d in cursor.description]
+        residents = [dict(zip(names, values)) for values in cursor.fetchall()]
+        return dict(summarize_residents(residents, p_bins or {}), version=version)
@@ -0,0 +1,314 @@
+"""저장소 어댑터 (Supabase / PostgreSQL 직접 연결 / SQLite)
+
+앱의 모든 모듈은 supabase 클라이언트의 다음 기능만 사용합니다.
+- table(이름).select(컬럼, count=) / insert / update / upsert(on_conflict=, ignore_duplicates=, returning=, count=)
+  에 eq / gt / in_ / order / limit 조건을 붙여 execute() → 결과의 data, count
+- rpc(함수 이름, 인자).execute() → 결과의 data
+
+같은 메서드를 가진 어댑터를 supabase 대신 넘기면 나머지 코드를 고치지 않고 저장소를 바꿀 수 있습니다.
+- PostgresStorage: database_schema.sql을 적용한 PostgreSQL에 연결 풀로 직접 연결 (사내 설치용)
+- SqliteStorage(surveys.sqlite_storage): database_schema.sql의 테이블을 SQLite에 만들어 사용 (오프라인 실행/부하 측정용)
+
+행 값은 Supabase(PostgREST)와 같은 JSON 변환 규칙으로 저장/조회합니다.
+(JSONB 컬럼에 문자열을 보내면 JSON 문자열로 저장되고, 조회하면 보낸 값 그대로 돌아옴)
+"""
+import json
+import re
+from contextlib import contextmanager
+
+from surveys.connection_pool import ConnectionSlots
+
+STORAGE_BACKENDS = ['supabase', 'postgres', 'sqlite']
+
+IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+class StorageError(Exception):
+    """저장소 설정/요청 오류 (지원하지 않는 이름, 패키지 누락 등)"""
+
+def quote_identifier(name):
+    """테이블/컬럼 이름 따옴표 처리 (영문/숫자/밑줄 이름만 허용)"""
+    if not IDENTIFIER.match(name):
+        raise StorageError(f"허용하지 않는 이름입니다: {name}")
+    return f'"{name}"'
+
+def column_list(columns):
+    """select 컬럼 문자열('*' 또는 'a, b') → SQL 컬럼 목록"""
+    if columns.strip() == '*':
+        return '*'
+    return ', '.join(quote_identifier(column.strip()) for column in columns.split(','))
+
+def dumps(value):
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+class StorageResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+class SqlQuery:
+    """supabase.table(...) 쿼리 빌더와 같은 메서드로 요청을 기록하고 execute() 때 어댑터가 SQL로 실행"""
+    
+    def __init__(self, storage, table_name):
+        self.storage = storage
+        self.table_name = table_name
+        self.operation = 'select'
+        self.columns = '*'
+        self.filters = []
+        self.payload = None
+        self.row_limit = None
+        self.order_column = None
+        self.count = None
+        self.on_conflict = 'id'
+        self.ignore_duplicates = False
+        self.returning = 'representation'
+    
+    def select(self, columns='*', count=None):
+        self.operation = 'select'
+        self.columns = columns
+        self.count = count
+        return self
+    
+    def insert(self, payload, returning='representation', count=None):
+        self.operation = 'insert'
+        self.payload = payload
+        self.returning = returning
+        self.count = count
+        return self
+    
+    def update(self, payload, returning='representation', count=None):
+        self.operation = 'update'
+        self.payload = payload
+        self.returning = returning
+        self.count = count
+        return self
+    
+    def upsert(self, payload, on_conflict='id', ignore_duplicates=False, returning='representation', count=None):
+        self.operation = 'upsert'
+        self.payload = payload
+        self.on_conflict = on_conflict
+        self.ignore_duplicates = ignore_duplicates
+        self.returning = returning
+        self.count = count
+        return self
+    
+    def eq(self, column, value):
+        self.filters.append((column, '=', value))
+        return self
+    
+    def gt(self, column, value):
+        self.filters.append((column, '>', value))
+        return self
+    
+    def in_(self, column, values):
+        self.filters.append((column, 'in', list(values)))
+        return self
+    
+    def order(self, column, desc=False):
+        self.order_column = (column, desc)
+        return self
+    
+    def limit(self, count):
+        self.row_limit = count
+        return self
+    
+    def rows(self):
+        """insert/upsert 행 목록 (행 하나도 목록으로)"""
+        return self.payload if isinstance(self.payload, list) else [self.payload]
+    
+    def execute(self):
+        return self.storage.run_query(self)
+
+class SqlRpc:
+    def __init__(self, storage, name, params):
+        self.storage = storage
+        self.name = name
+        self.params = params
+    
+    def execute(self):
+        return StorageResponse(self.storage.call_function(self.name, self.params))
+
+class SqlStorage:
+    """SQL 어댑터 공통 부분 (쿼리 빌더 → SELECT/WHERE 문)"""
+    
+    placeholder = '%s'
+    
+    def table(self, table_name):
+        return SqlQuery(self, table_name)
+    
+    def rpc(self, name, params=None):
+        return SqlRpc(self, name, params or {})
+    
+    def where_sql(self, query):
+        """(WHERE 절, 인자 목록)"""
+        parts, params = [], []
+        for column, op, value in query.filters:
+            name = quote_identifier(column)
+            if op == 'in':
+                if not value:
+                    parts.append("1 = 0")
+                    continue
+                parts.append(f"{name} IN ({', '.join([self.placeholder] * len(value))})")
+                params.extend(value)
+            elif value is None:
+                parts.append(f"{name} IS NULL")
+            else:
+                parts.append(f"{name} {op} {self.placeholder}")
+                params.append(value)
+        return (" WHERE " + " AND ".join(parts) if parts else ""), params
+    
+    def select_sql(self, query):
+        where, params = self.where_sql(query)
+        sql = f"SELECT {column_list(query.columns)} FROM {quote_identifier(query.table_name)}{where}"
+        if query.order_column:
+            column, desc = query.order_column
+            sql += f" ORDER BY {quote_identifier(column)}{' DESC' if desc else ''}"
+        if query.row_limit is not None:
+            sql += f" LIMIT {int(query.row_limit)}"
+        return sql, params
+    
+    def count_sql(self, query):
+        where, params = self.where_sql(query)
+        return f"SELECT COUNT(*) FROM {quote_identifier(query.table_name)}{where}", params
+    
+    def conflict_sql(self, query, columns):
+        """upsert의 ON CONFLICT 절 (ignore_duplicates면 건너뜀, 아니면 보낸 컬럼 갱신)"""
+        if query.operation != 'upsert':
+            return ""
+        keys = [key.strip() for key in query.on_conflict.split(',')]
+        target = ', '.join(quote_identifier(key) for key in keys)
+        updates = [c for c in columns if c not in keys]
+        if query.ignore_duplicates or not updates:
+            return f" ON CONFLICT ({target}) DO NOTHING"
+        assignments = ', '.join(f"{quote_identifier(c)} = EXCLUDED.{quote_identifier(c)}" for c in updates)
+        return f" ON CONFLICT ({target}) DO UPDATE SET {assignments}"
+
+class PostgresStorage(SqlStorage):
+    """PostgreSQL 직접 연결 어댑터 (스레드 공유 연결 풀)
+    
+    행은 json_populate_recordset으로 넣고 json_agg로 꺼내 PostgREST와 같은 값 변환을 따릅니다.
+    서버 함수는 database_schema.sql에 정의된 함수를 그대로 호출합니다.
+    풀의 연결이 모두 사용 중이면 반환될 때까지 기다립니다.
+    """
+    
+    def __init__(self, dsn, min_connections=1, max_connections=10):
+        try:
+            from psycopg2.pool import ThreadedConnectionPool
+            from psycopg2.extras import Json
+        except ImportError:
+            raise StorageError("PostgreSQL에 직접 연결하려면 psycopg2 패키지가 필요합니다. (pip install psycopg2-binary)")
+        self.Json = Json
+        self.pool = ThreadedConnectionPool(min_connections, max_connections, dsn)
+        self.slots = ConnectionSlots(max_connections)
+        # 함수 이름 → (집합 반환 여부, void 반환 여부)
+        self.functions = {}
+    
+    @contextmanager
+    def cursor(self):
+        """풀에서 연결을 빌려 한 트랜잭션 실행 (오류 시 롤백)"""
+        with self.slots:
+            conn = self.pool.getconn()
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        yield cur
+            finally:
+                self.pool.putconn(conn)
+    
+    def close(self):
+        self.pool.closeall()
+    
+    def stats(self):
+        """연결 풀 사용 현황 (surveys.connection_pool.ConnectionSlots.stats)"""
+        return self.slots.stats()
+    
+    def json_param(self, value):
+        return self.Json(value, dumps=dumps)
+    
+    def run_query(self, query):
+        with self.cursor() as cur:
+            if query.operation == 'select':
+                sql, params = self.select_sql(query)
+                cur.execute(f"SELECT COALESCE(json_agg(t), '[]'::json) FROM ({sql}) t", params)
+                data = cur.fetchone()[0]
+                count = None
+                if query.count:
+                    cur.execute(*self.count_sql(query))
+                    count = cur.fetchone()[0]
+                return StorageResponse(data, count)
+            
+            sql, params = self.write_sql(query)
+            cur.execute(f"WITH t AS ({sql} RETURNING *) SELECT COALESCE(json_agg(t), '[]'::json), COUNT(*) FROM t",
+                        params)
+            data, count = cur.fetchone()
+            return StorageResponse(data if query.returning != 'minimal' else [],
+                                   count if query.count else None)
+    
+    def write_sql(self, query):
+        table = quote_identifier(query.table_name)
+        if query.operation == 'update':
+            columns = list(query.payload)
+            names = ', '.join(quote_identifier(c) for c in columns)
+            where, params = self.where_sql(query)
+            sql = (f"UPDATE {table} SET ({names}) = "
+                   f"(SELECT {names} FROM json_populate_record(NULL::{table}, %s)){where}")
+            return sql, [self.json_param(query.payload)] + params
+        
+        rows = query.rows()
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        names = ', '.join(quote_identifier(c) for c in columns)
+        sql = (f"INSERT INTO {table} ({names}) "
+               f"SELECT {names} FROM json_populate_recordset(NULL::{table}, %s)"
+               f"{self.conflict_sql(query, columns)}")
+        return sql, [self.json_param(rows)]
+    
+    def function_info(self, cur, name):
+        if name not in self.functions:
+            cur.execute(
+                "SELECT p.proretset, p.prorettype = 'void'::regtype FROM pg_proc p "
+                "JOIN pg_namespace n ON n.oid = p.pronamespace "
+                "WHERE n.nspname = 'public' AND p.proname = %s LIMIT 1",
+                (name,)
+            )
+            row = cur.fetchone()
+            if row is None:
+                raise StorageError(f"서버 함수가 없습니다: {name}")
+            self.functions[name] = row
+        return self.functions[name]
+    
+    def call_function(self, name, params):
+        # 객체(또는 객체 목록)는 JSONB 인자로, 문자열 목록은 배열 인자로 전달
+        values = [
+            self.json_param(value) if isinstance(value, dict)
+            or (isinstance(value, list) and any(isinstance(v, (dict, list)) for v in value))
+            else value
+            for value in params.values()
+        ]
+        arguments = ', '.join(f"{quote_identifier(p)} := %s" for p in params)
+        call = f"{quote_identifier(name)}({arguments})"
+        with self.cursor() as cur:
+            returns_set, returns_void = self.function_info(cur, name)
+            if returns_set:
+                cur.execute(f"SELECT COALESCE(json_agg(r), '[]'::json) FROM {call} r", values)
+            elif returns_void:
+                cur.execute(f"SELECT {call}", values)
+                return None
+            else:
+                cur.execute(f"SELECT to_json({call})", values)
+            return cur.fetchone()[0]
+
+def create_storage(backend='supabase', url=None, key=None, database_url=None, pool_size=10,
+                   sqlite_path=':memory:', sample_data=False):
+    """설정에 맞는 저장소 생성 (backend: STORAGE_BACKENDS 중 하나)"""
+    if backend == 'supabase':
+        from supabase import create_client
+        if not url or not key:
+            raise StorageError("SUPABASE_URL과 SUPABASE_KEY가 필요합니다.")
+        return create_client(url, key)
+    if backend == 'postgres':
+        if not database_url:
+            raise StorageError("DATABASE_URL이 필요합니다.")
+        return PostgresStorage(database_url, max_connections=pool_size)
+    if backend == 'sqlite':
+        from surveys.sqlite_storage import SqliteStorage
+        return SqliteStorage(sqlite_path, sample_data=sample_data)
+    raise StorageError(f"지원하지 않는 저장소입니다: {backend} (가능: {', '.join(STORAGE_BACKENDS)})")
@@ -0,0 +1,337 @@
+"""설문지 정의(surveys.questionnaire)로 설문 화면 표시와 저장을 처리하는 공통 엔진
+
+세 설문(기초/영양/만족도)이 같은 흐름을 사용합니다.
+- 답변 불러오기: 이 기기의 작성 중 답변 → 없으면 설문 테이블의 행 하나 (부분 저장 비교 기준으로 기록)
+- 페이지 표시: 문항 종류별 위젯 (저장된 값으로 복원), 바뀐 값은 세션의 '<설문>_data'에 기록
+- 페이지 이동: 이전/대시보드/다음 버튼 (이동할 때 바뀐 항목만 부분 저장), 마지막 페이지는 제출 버튼
+- 제출: 필수 항목 확인 → 저장 형식으로 변환 → submit_survey 함수 호출 또는 전송 대기열
+
+선언으로 표현할 수 없는 부분(점수 요약, 식사량 표 등)은 @survey_block으로 등록한 함수가 그리고,
+저장 형식 변환이 필요한 설문은 @survey_payload로 변환 함수를 등록합니다.
+"""
+import json
+from collections import namedtuple
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import streamlit as st
+
+from surveys.draft_store import autosave, restore_session, submit_or_queue
+from surveys.partial_save import mark_saved, reset_partial_save, save_partial, show_partial_save_warning
+from surveys.questionnaire import QuestionnaireError, choice_index, load_questionnaire, stored_list
+from surveys.schema_registry import filter_payload
+
+KST = ZoneInfo('Asia/Seoul')
+
+def get_kst_now():
+    """현재 한국 시간 반환"""
+    return datetime.now(KST).strftime('%Y-%m-%d %H:%M:%S')
+
+# 블록/저장 변환 함수에 넘기는 현재 설문 정보 (payload는 제출 후 표시 블록에만 채움)
+SurveyContext = namedtuple('SurveyContext', [
+    'questionnaire', 'supabase', 'elderly_id', 'surveyor_id', 'nursing_home_id', 'drafts', 'data', 'payload'
+], defaults=(None,))
+
+# 블록 이름 → 함수(context), 설문 이름 → 저장 형식 변환 함수(context)
+BLOCKS = {}
+PAYLOAD_BUILDERS = {}
+
+# 등록된 블록을 모두 확인한 설문지 이름
+_checked = set()
+
+def survey_block(name):
+    """설문지의 {"type": "block", "name": ...} 문항을 그리는 함수 등록"""
+    def register(func):
+        BLOCKS[name] = func
+        return func
+    return register
+
+def survey_payload(survey):
+    """설문의 저장 형식 변환 함수 등록 (등록하지 않으면 답변에 ID/시각을 붙이고 테이블 컬럼만 남김)"""
+    def register(func):
+        PAYLOAD_BUILDERS[survey] = func
+        return func
+    return register
+
+def page_key(survey):
+    return f"{survey}_page"
+
+def data_key(survey):
+    return f"{survey}_data"
+
+def get_questionnaire(survey):
+    """설문지 정의 (처음 사용할 때 한 번 등록되지 않은 블록 확인)"""
+    questionnaire = load_questionnaire(survey)
+    if survey not in _checked:
+        missing = sorted(questionnaire.blocks - set(BLOCKS))
+        if missing:
+            raise QuestionnaireError(f"{survey}.json: 등록되지 않은 블록 {', '.join(missing)}")
+        _checked.add(survey)
+    return questionnaire
+
+def show_survey(survey, supabase, elderly_id, surveyor_id, nursing_home_id, drafts=None):
+    """설문 화면 (제목, 진행 표시, 현재 페이지, 이동/제출 버튼)"""
+    questionnaire = get_questionnaire(survey)
+    heading = f"{questionnaire.icon} {questionnaire.title}"
+    if questionnaire.subtitle:
+        heading += f" ({questionnaire.subtitle})"
+    st.title(heading)
+    
+    # 진행 상태 초기화
+    if page_key(survey) not in st.session_state:
+        st.session_state[page_key(survey)] = 1
+    
+    context = SurveyContext(questionnaire, supabase, elderly_id, surveyor_id, nursing_home_id, drafts,
+                            load_survey_data(questionnaire, supabase, elderly_id, drafts))
+    
+    # 페이지 진행 표시
+    total_pages = len(questionnaire.pages)
+    page_number = min(max(st.session_state[page_key(survey)], 1), total_pages)
+    st.progress(page_number / total_pages)
+    st.caption(f"페이지 {page_number} / {total_pages}")
+    show_partial_save_warning(survey)
+    
+    render_page(questionnaire.pages[page_number - 1], context)
+    
+    # 작성 중인 답변을 이 기기에 기록
+    autosave(drafts, survey, elderly_id)
+    
+    navigation_buttons(context, page_number)
+
+def load_survey_data(questionnaire, supabase, elderly_id, drafts=None):
+    """세션의 답변 dict (없으면 서버의 행, 로컬 저장소의 작성 중 답변이 더 최근이면 그것으로 채움)
+    
+    서버에서 불러온 행(작성 중 부분 저장 포함)은 부분 저장의 비교 기준으로 기록합니다.
+    """
+    survey = questionnaire.name
+    if data_key(survey) not in st.session_state:
+        try:
+            response = supabase.table(questionnaire.table).select('*').eq('elderly_id', elderly_id).execute()
+            row = response.data[0] if response.data else {}
+        except Exception:
+            row = None
+        # 로컬 답변은 서버 행보다 최근일 때만 복원 (서버를 읽지 못하면 로컬 답변 사용)
+        if not restore_session(drafts, survey, elderly_id, (row or {}).get('updated_at')):
+            st.session_state[data_key(survey)] = row or {}
+        mark_saved(survey, row or {})
+    return st.session_state[data_key(survey)]
+
+def render_page(page, context):
+    """페이지 제목/안내와 문항"""
+    if page.title:
+        st.subheader(page.title)
+    if page.info:
+        st.info(page.info)
+    render_items(page.items, context)
+
+def render_items(items, context):
+    for item in items:
+        RENDERERS[item.type](item, context)
+
+def render_prompt(item):
+    """입력 문항 앞의 제목/설명/질문 목록"""
+    if item.heading:
+        st.markdown(item.heading)
+    if item.caption:
+        st.caption(item.caption)
+    for question in item.questions:
+        st.write(f"• {question}")
+
+def render_choice(item, context):
+    """radio/select: 선택지를 고르면 해당 위치의 저장 값(values)을 기록"""
+    render_prompt(item)
+    widget = st.radio if item.type == 'radio' else st.selectbox
+    options = {'horizontal': item.horizontal} if item.type == 'radio' else {}
+    choice = widget(
+        item.label,
+        options=item.options,
+        index=choice_index(item, context.data.get(item.field)),
+        key=item.key,
+        help=item.help,
+        label_visibility=item.label_visibility,
+        **options
+    )
+    context.data[item.field] = item.values[item.lookup[('option', choice)]]
+
+def render_number(item, context):
+    render_prompt(item)
+    cast = type(item.default)
+    value = context.data.get(item.field)
+    try:
+        value = cast(value) if value not in (None, '') else item.default
+    except (TypeError, ValueError):
+        value = item.default
+    if item.min_value is not None:
+        value = max(value, item.min_value)
+    if item.max_value is not None:
+        value = min(value, item.max_value)
+    context.data[item.field] = st.number_input(
+        item.label,
+        min_value=item.min_value,
+        max_value=item.max_value,
+        value=value,
+        step=item.step,
+        key=item.key,
+        help=item.help,
+        label_visibility=item.label_visibility
+    )
+
+def render_text(item, context):
+    render_prompt(item)
+    widget = st.text_area if item.type == 'textarea' else st.text_input
+    options = {'height': item.height} if item.height else {}
+    context.data[item.field] = widget(
+        item.label,
+        value=context.data.get(item.field) or item.default,
+        key=item.key,
+        help=item.help,
+        label_visibility=item.label_visibility,
+        **options
+    )
+
+def render_checkboxes(item, context):
+    """복수 선택: 선택지별 체크박스 (JSON 배열 문자열로 기록, 직접 입력은 "선택지: 입력")"""
+    render_prompt(item)
+    existing = stored_list(context.data.get(item.field))
+    columns = st.columns(item.columns)
+    selected = []
+    for i, option in enumerate(item.options):
+        with columns[i % item.columns]:
+            if st.checkbox(option, value=option in existing, key=f"{item.key}_{i}"):
+                selected.append(option)
+    
+    other = item.other
+    if other and other.option in selected:
+        prefix = f"{other.option}: "
+        previous = next((value[len(prefix):] for value in existing
+                         if isinstance(value, str) and value.startswith(prefix)), "")
+        text = st.text_input(other.label, value=previous, key=other.key)
+        if text:
+            selected.append(prefix + text)
+    
+    context.data[item.field] = json.dumps(selected, ensure_ascii=False)
+
+def render_columns(item, context):
+    for column, items in zip(st.columns(len(item.items)), item.items):
+        with column:
+            render_items(items, context)
+
+def render_block(item, context):
+    BLOCKS[item.name](context)
+
+RENDERERS = {
+    'radio': render_choice,
+    'select': render_choice,
+    'number': render_number,
+    'text': render_text,
+    'textarea': render_text,
+    'checkboxes': render_checkboxes,
+    'markdown': lambda item, context: st.markdown(item.text),
+    'info': lambda item, context: st.info(item.text),
+    'caption': lambda item, context: st.caption(item.text),
+    'divider': lambda item, context: st.markdown("---"),
+    'columns': render_columns,
+    'block': render_block
+}
+
+def build_payload(context):
+    """세션 답변 → 설문 테이블 저장 형식 (제출과 부분 저장에 공통 사용)"""
+    builder = PAYLOAD_BUILDERS.get(context.questionnaire.name)
+    if builder is not None:
+        return builder(context)
+    
+    data = dict(context.data)
+    data.update({
+        'elderly_id': context.elderly_id,
+        'surveyor_id': context.surveyor_id,
+        'nursing_home_id': context.nursing_home_id,
+        'updated_at': get_kst_now()
+    })
+    
+    # DB에 존재하지 않는 컬럼 제거
+    return filter_payload(context.supabase, context.questionnaire.table, data)
+
+def save_survey_partial(context):
+    """페이지 이동 시 바뀐 항목만 서버에 부분 저장 (저장한 항목 수, 실패하면 None)"""
+    if data_key(context.questionnaire.name) not in st.session_state:
+        return 0
+    return save_partial(context.supabase, context.questionnaire.name, build_payload(context))
+
+def clear_survey_session(survey):
+    """설문 세션 종료 (답변/페이지/부분 저장 상태 삭제 후 대시보드로)"""
+    st.session_state.pop(data_key(survey), None)
+    st.session_state.pop(page_key(survey), None)
+    reset_partial_save(survey)
+    st.session_state.current_survey = None
+
+def leave_survey(context):
+    """대시보드로 나가기 (남은 변경을 저장한 뒤 세션 초기화, 저장에 실패하면 경고와 함께 설문에 남음)"""
+    if save_survey_partial(context) is not None:
+        clear_survey_session(context.questionnaire.name)
+
+def navigation_buttons(context, page_number):
+    """페이지 이동 버튼 (이동할 때 바뀐 항목을 서버에 부분 저장, 마지막 페이지는 제출 버튼)"""
+    survey = context.questionnaire.name
+    last_page = page_number == len(context.questionnaire.pages)
+    if last_page:
+        st.markdown("---")
+    col1, col2, col3 = st.columns([1, 1, 1])
+    
+    with col1:
+        if page_number > 1:
+            if st.button("⬅️ 이전", use_container_width=True):
+                save_survey_partial(context)
+                st.session_state[page_key(survey)] = page_number - 1
+                st.rerun()
+    
+    with col2:
+        if st.button("🏠 대시보드", use_container_width=True):
+            leave_survey(context)
+            st.rerun()
+    
+    with col3:
+        if not last_page:
+            if st.button("다음 ➡️", use_container_width=True, type="primary"):
+                save_survey_partial(context)
+                st.session_state[page_key(survey)] = page_number + 1
+                st.rerun()
+        elif st.button("✅ 제출", use_container_width=True, type="primary"):
+            submit_survey(context)
+
+def submit_survey(context):
+    """설문 제출 (필수 항목 확인 후 upsert + 진행 상황 갱신, 서버에 닿지 못하면 로컬 저장소의 전송 대기열로)"""
+    questionnaire = context.questionnaire
+    missing = [field for field in questionnaire.required if not context.data.get(field)]
+    if missing:
+        st.error(f"필수 항목을 입력해주세요: {', '.join(missing)}")
+        return
+    
+    payload = {}
+    try:
+        payload = build_payload(context)
+        progress = submit_or_queue(context.supabase, context.drafts, questionnaire.name, context.elderly_id, payload)
+        
+        if progress is None:
+            st.warning(questionnaire.messages['queued'])
+        else:
+            st.success(questionnaire.messages['saved'])
+        
+        if progress and progress.get('all_surveys_completed'):
+            st.success("🎉 모든 설문이 완료되었습니다! 수고하셨습니다!")
+        
+        if questionnaire.saved_block:
+            BLOCKS[questionnaire.saved_block](context._replace(payload=payload))
+        
+        clear_survey_session(questionnaire.name)
+        
+        if st.button("📊 대시보드로 돌아가기", type="primary"):
+            st.rerun()
+    
+    except Exception as e:
+        st.error(f"❌ 저장 중 오류 발생: {str(e)}")
+        
+        with st.expander("🔍 오류 상세 정보"):
+            st.write("**저장 시도한 데이터:**")
+            st.json({k: str(v) if isinstance(v, (list, dict)) else v for k, v in payload.items()})
+            st.write("**오류 메시지:**")
+            st.code(str(e))
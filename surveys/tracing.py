@@ -0,0 +1,225 @@
+"""데이터 호출 추적 (호출별 지연 시간 / 행 수 / 요청·응답 크기 / 호출 위치)
+
+TracedClient로 supabase 클라이언트(또는 surveys.storage 어댑터)를 감싸면
+table(...)...execute()와 rpc(...).execute() 호출마다 다음을 TraceRecorder에 기록합니다.
+- page: 호출 시점의 화면 (TraceRecorder에 넘긴 함수로 조회, 예: login / admin / basic:2)
+- call: 대상과 종류 (예: "surveyors select", "rpc survey_login")
+- caller: 호출한 모듈과 함수 (예: surveys.admin_tables.fetch_page)
+- ms / rows / request_bytes / response_bytes / error
+
+기록은 화면·호출·호출 위치별로 지연 시간 구간(LATENCY_BUCKETS) 히스토그램에 합산되고,
+최근 호출 max_events건은 JSON Lines로 내보낼 수 있습니다.
+요청/응답 크기는 JSON으로 직렬화한 UTF-8 바이트 수입니다.
+응답마다 직렬화 비용이 들므로 앱에서는 DB_TRACING=true일 때만 감쌉니다. (기본값 꺼짐)
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# 지연 시간 구간 상한 (ms), 마지막 구간은 상한 없음
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# 요청 본문을 보내는 쿼리 빌더 메서드
+WRITE_OPERATIONS = ('insert', 'update', 'upsert')
+OPERATIONS = ('select', 'delete') + WRITE_OPERATIONS
+
+def bucket_labels():
+    """히스토그램 구간 이름 (예: ~5ms, ..., 5000ms~)"""
+    return [f"~{bound}ms" for bound in LATENCY_BUCKETS] + [f"{LATENCY_BUCKETS[-1]}ms~"]
+
+def bucket_index(ms):
+    for i, bound in enumerate(LATENCY_BUCKETS):
+        if ms <= bound:
+            return i
+    return len(LATENCY_BUCKETS)
+
+def payload_size(value):
+    """JSON 직렬화 크기 (바이트)"""
+    if value is None:
+        return 0
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode('utf-8'))
+
+def row_count(data):
+    if data is None:
+        return 0
+    if isinstance(data, list):
+        return len(data)
+    return 1
+
+def caller_name(frame):
+    """프레임의 '모듈.함수' 이름 (streamlit으로 실행한 스크립트는 파일 이름을 모듈 이름으로)"""
+    module = frame.f_globals.get('__name__', '?')
+    if module == '__main__':
+        module = os.path.splitext(os.path.basename(frame.f_code.co_filename))[0]
+    return f"{module}.{frame.f_code.co_name}"
+
+class TraceRecorder:
+    """호출 기록 집계 (스레드 안전, 모든 세션이 공유)"""
+    
+    def __init__(self, page=None, max_events=5000, clock=time.time):
+        self.page = page
+        self.clock = clock
+        self.events = deque(maxlen=max_events)
+        self._calls = {}
+        self._lock = threading.Lock()
+    
+    def current_page(self):
+        if self.page is None:
+            return 'app'
+        try:
+            return self.page()
+        except Exception:
+            return 'unknown'
+    
+    def record(self, call, caller, elapsed, rows=0, request_bytes=0, response_bytes=0, error=None):
+        ms = elapsed * 1000
+        event = {
+            'ts': round(self.clock(), 3),
+            'page': self.current_page(),
+            'call': call,
+            'caller': caller,
+            'ms': round(ms, 2),
+            'rows': rows,
+            'request_bytes': request_bytes,
+            'response_bytes': response_bytes,
+            'error': error
+        }
+        key = (event['page'], call, caller)
+        with self._lock:
+            self.events.append(event)
+            stats = self._calls.get(key)
+            if stats is None:
+                stats = self._calls[key] = {
+                    'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'rows': 0, 'request_bytes': 0, 'response_bytes': 0,
+                    'buckets': [0] * (len(LATENCY_BUCKETS) + 1)
+                }
+            stats['count'] += 1
+            stats['errors'] += error is not None
+            stats['total_ms'] += ms
+            stats['max_ms'] = max(stats['max_ms'], ms)
+            stats['rows'] += rows
+            stats['request_bytes'] += request_bytes
+            stats['response_bytes'] += response_bytes
+            stats['buckets'][bucket_index(ms)] += 1
+        return event
+    
+    def summary(self):
+        """화면·호출·호출 위치별 집계 목록 (지연 시간 합계가 큰 순서)
+        
+        p95_ms는 히스토그램 구간 상한으로 추정한 값입니다. (최댓값보다 크면 최댓값)
+        """
+        with self._lock:
+            items = [(key, dict(stats, buckets=list(stats['buckets']))) for key, stats in self._calls.items()]
+        rows = []
+        for (page, call, caller), stats in items:
+            count = stats['count']
+            rows.append({
+                'page': page,
+                'call': call,
+                'caller': caller,
+                'count': count,
+                'errors': stats['errors'],
+                'total_ms': round(stats['total_ms'], 1),
+                'avg_ms': round(stats['total_ms'] / count, 1),
+                'p95_ms': round(min(percentile_bound(stats['buckets'], 0.95), stats['max_ms']), 1),
+                'max_ms': round(stats['max_ms'], 1),
+                'avg_rows': round(stats['rows'] / count, 1),
+                'avg_request_bytes': round(stats['request_bytes'] / count),
+                'avg_response_bytes': round(stats['response_bytes'] / count)
+            })
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
+    
+    def page_histograms(self):
+        """화면별 지연 시간 구간 호출 수 {화면: [구간별 호출 수]}"""
+        histograms = {}
+        with self._lock:
+            for (page, _, _), stats in self._calls.items():
+                histogram = histograms.setdefault(page, [0] * (len(LATENCY_BUCKETS) + 1))
+                for i, count in enumerate(stats['buckets']):
+                    histogram[i] += count
+        return histograms
+    
+    def export_jsonl(self):
+        """최근 호출 기록 (JSON Lines 문자열)"""
+        with self._lock:
+            events = list(self.events)
+        return "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+    
+    def reset(self):
+        with self._lock:
+            self.events.clear()
+            self._calls.clear()
+
+def percentile_bound(buckets, q):
+    """히스토그램에서 q 분위가 속한 구간의 상한 (ms, 마지막 구간이면 inf)"""
+    target = sum(buckets) * q
+    seen = 0
+    for i, count in enumerate(buckets):
+        seen += count
+        if count and seen >= target:
+            return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else float('inf')
+    return float('inf')
+
+class TracedQuery:
+    """쿼리 빌더 감싸기 (빌더 메서드는 그대로 전달하고 execute()만 시간 측정)"""
+    
+    def __init__(self, query, recorder, target, operation='select', request_bytes=0):
+        self.query = query
+        self.recorder = recorder
+        self.target = target
+        self.operation = operation
+        self.request_bytes = request_bytes
+    
+    def __getattr__(self, name):
+        attr = getattr(self.query, name)
+        if not callable(attr):
+            return attr
+        
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if not hasattr(result, 'execute'):
+                return result
+            operation, request_bytes = self.operation, self.request_bytes
+            if name in OPERATIONS:
+                operation = name
+            if name in WRITE_OPERATIONS:
+                request_bytes = payload_size(args[0] if args else kwargs.get('json', kwargs.get('payload')))
+            return TracedQuery(result, self.recorder, self.target, operation, request_bytes)
+        return call
+    
+    def execute(self):
+        caller = caller_name(sys._getframe(1))
+        call = self.target if self.target.startswith('rpc ') else f"{self.target} {self.operation}"
+        start = time.perf_counter()
+        try:
+            response = self.query.execute()
+        except Exception as e:
+            self.recorder.record(call, caller, time.perf_counter() - start,
+                                 request_bytes=self.request_bytes, error=type(e).__name__)
+            raise
+        elapsed = time.perf_counter() - start
+        data = getattr(response, 'data', None)
+        self.recorder.record(call, caller, elapsed, row_count(data), self.request_bytes, payload_size(data))
+        return response
+
+class TracedClient:
+    """supabase 클라이언트 감싸기 (table/rpc 호출만 추적하고 나머지 속성은 그대로 전달)"""
+    
+    def __init__(self, client, recorder):
+        self.client = client
+        self.recorder = recorder
+    
+    def table(self, table_name):
+        return TracedQuery(self.client.table(table_name), self.recorder, table_name)
+    
+    def rpc(self, name, params=None, *args, **kwargs):
+        return TracedQuery(self.client.rpc(name, params, *args, **kwargs), self.recorder,
+                           f"rpc {name}", request_bytes=payload_size(params))
+    
+    def __getattr__(self, name):
+        return getattr(self.client, name)
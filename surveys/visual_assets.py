@@ -0,0 +1,77 @@
+"""영양 조사표 화면 공통 자산 (목측법 원형 이미지, CSS)
+
+원형 SVG 5종은 프로세스당 한 번 data URI로 만들어 CSS 클래스(.pw-0 ~ .pw-4)의 배경으로 등록하고,
+각 선택기는 클래스 이름만 참조하는 짧은 HTML 한 줄로 그립니다.
+스타일시트는 페이지 실행마다 한 번만 주입합니다.
+"""
+from urllib.parse import quote
+
+import streamlit as st
+
+# 목측 단계별 잔반 영역 (None: 빈 접시, 'full': 전부 칠함)
+WASTE_SHAPES = [
+    None,
+    "M 50 50 L 50 5 A 45 45 0 0 1 95 50 Z",  # 25%
+    "M 50 50 L 50 5 A 45 45 0 0 1 50 95 Z",  # 50%
+    "M 50 50 L 50 5 A 45 45 0 1 1 5 50 Z",   # 75%
+    'full',
+]
+
+GUIDE_LABELS = ["0. 다 먹음", "1. 조금 남김<br/>(약 25%)", "2. 반 정도 남김<br/>(약 50%)",
+                "3. 대부분 남김<br/>(약 75%)", "4. 모두 남김<br/>(100%)"]
+SELECTOR_LABELS = ["0. 다 먹음", "1. 조금", "2. 반", "3. 대부분", "4. 모두"]
+
+FILL_COLOR = "#2c3e50"
+
+def waste_svg(level):
+    """목측 단계별 원형 SVG 문자열"""
+    shape = WASTE_SHAPES[level]
+    plate_fill = FILL_COLOR if shape == 'full' else "white"
+    svg = ('<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">'
+           f'<circle cx="50" cy="50" r="45" fill="{plate_fill}" stroke="#333" stroke-width="2"/>')
+    if shape not in (None, 'full'):
+        svg += f'<path d="{shape}" fill="{FILL_COLOR}"/>'
+    return svg + '</svg>'
+
+def _svg_data_uri(svg):
+    return "data:image/svg+xml," + quote(svg, safe=" =:/")
+
+TAB_CSS = """
+.stTabs [data-baseweb="tab-list"] { gap: 8px; }
+.stTabs [data-baseweb="tab"] { height: 60px; padding: 10px 24px; font-size: 18px; font-weight: 600; }
+"""
+
+@st.cache_resource
+def page_stylesheet(waste_images=False):
+    """영양 조사표 공통 스타일시트 (탭 크기 + 선택 시 목측 가이드/선택기 원형 이미지)"""
+    if not waste_images:
+        return f"<style>{TAB_CSS}</style>"
+    sprites = "\n".join(
+        f'.pw-{level} {{ background-image: url("{_svg_data_uri(waste_svg(level))}"); }}'
+        for level in range(len(WASTE_SHAPES))
+    )
+    return f"""<style>{TAB_CSS}
+.pw {{ background-repeat: no-repeat; background-position: top center; text-align: center; }}
+{sprites}
+.visual-guide {{ display: flex; justify-content: space-around; align-items: flex-start; padding: 20px;
+    background-color: #f0f2f6; border-radius: 10px; margin-bottom: 20px; }}
+.visual-guide .pw {{ flex: 1; background-size: 80px 80px; padding-top: 90px; font-size: 12px; font-weight: bold; }}
+.pw-title {{ font-weight: 600; margin-bottom: 6px; }}
+.pw-row {{ display: grid; grid-template-columns: repeat(5, 1fr); gap: 1rem; margin-bottom: 8px; }}
+.pw-row .pw {{ background-size: 60px 60px; padding-top: 65px; font-size: 11px; color: #666; }}
+</style>"""
+
+def _image_row(css_class, labels):
+    cells = "".join(f'<div class="pw pw-{level}">{text}</div>' for level, text in enumerate(labels))
+    return f'<div class="{css_class}">{cells}</div>'
+
+GUIDE_HTML = _image_row("visual-guide", GUIDE_LABELS)
+SELECTOR_ROW_HTML = _image_row("pw-row", SELECTOR_LABELS)
+
+def inject_styles(waste_images=False):
+    """공통 스타일시트 주입 (페이지 실행마다 한 번)"""
+    st.markdown(page_stylesheet(waste_images), unsafe_allow_html=True)
+
+def selector_header_html(label):
+    """선택기 제목 + 원형 이미지 5개 (클래스 참조만 포함)"""
+    return f'<div class="pw-title">{label}</div>{SELECTOR_ROW_HTML}'
@@ -0,0 +1,63 @@
+"""공통 픽스처
+
+SQLite 저장소와 PostgreSQL 저장소를 각각 테스트합니다.
+PostgreSQL은 TEST_DATABASE_URL의 데이터베이스를, 설정하지 않았으면 pgserver로 띄운 임시 서버를 사용하며
+둘 다 없을 때만 건너뜁니다. (public 스키마는 테스트마다 지우고 database_schema.sql과 sample_data.sql로 다시 만듦)
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from surveys.sqlite_storage import SqliteStorage
+
+SCHEMA_PATH = os.path.join(ROOT, 'database_schema.sql')
+SAMPLE_DATA_PATH = os.path.join(ROOT, 'sample_data.sql')
+
+@pytest.fixture(scope='session')
+def postgres_server(tmp_path_factory):
+    """테스트용 PostgreSQL 주소 (TEST_DATABASE_URL이 없으면 pgserver로 임시 서버를 띄움)"""
+    dsn = os.environ.get('TEST_DATABASE_URL')
+    if dsn:
+        yield dsn
+        return
+    pgserver = pytest.importorskip('pgserver', reason="TEST_DATABASE_URL이 없고 pgserver도 설치되지 않았습니다")
+    server = pgserver.get_server(tmp_path_factory.mktemp('pgdata'), cleanup_mode='stop')
+    yield server.get_uri()
+    server.cleanup()
+
+@pytest.fixture
+def postgres_dsn(postgres_server):
+    """예제 데이터를 넣은 빈 PostgreSQL 데이터베이스 주소"""
+    dsn = postgres_server
+    psycopg2 = pytest.importorskip('psycopg2')
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public;")
+            for path in (SCHEMA_PATH, SAMPLE_DATA_PATH):
+                with open(path, encoding='utf-8') as f:
+                    cur.execute(f.read())
+    finally:
+        conn.close()
+    return dsn
+
+@pytest.fixture
+def postgres_storage(postgres_dsn):
+    from surveys.storage import PostgresStorage
+    storage = PostgresStorage(postgres_dsn, max_connections=2)
+    yield storage
+    storage.close()
+
+@pytest.fixture(params=['sqlite', 'postgres'])
+def storage(request):
+    """예제 데이터를 넣은 저장소 (SQLite, PostgreSQL 각각)"""
+    if request.param == 'postgres':
+        return request.getfixturevalue('postgres_storage')
+    storage = SqliteStorage(sample_data=True)
+    request.addfinalizer(storage.close)
+    return storage
@@ -0,0 +1,87 @@
+"""명단 일괄 등록 (머리글 변환, 행 검증, upsert)"""
+import io
+
+import pytest
+
+from surveys.bulk_import import ImportFileError, import_rows, iter_file_rows, load_facility_index, normalize_header
+from surveys.sqlite_storage import SqliteStorage
+
+@pytest.fixture
+def supabase():
+    storage = SqliteStorage(sample_data=True)
+    yield storage
+    storage.close()
+
+def csv_rows(text, encoding='utf-8-sig'):
+    return iter_file_rows(io.BytesIO(text.encode(encoding)), 'roster.csv', encoding)
+
+def test_normalize_header():
+    assert normalize_header(['어르신 ID', '성명', '소속 요양원', '비고'], 'elderly_residents') == [
+        'id', 'name', 'nursing_home_id', None]
+    # 같은 컬럼이 두 번 나오면 두 번째는 무시
+    assert normalize_header(['id', 'ID', 'name', 'nursing_home_id'], 'surveyors') == [
+        'id', None, 'name', 'nursing_home_id']
+    with pytest.raises(ImportFileError, match="필수 머리글이 없습니다: nursing_home_id"):
+        normalize_header(['id', 'name'], 'surveyors')
+
+def test_file_formats():
+    assert list(csv_rows("요양원 ID,요양원명\nNH010,새요양원\n", 'cp949')) == [
+        ['요양원 ID', '요양원명'], ['NH010', '새요양원']]
+    with pytest.raises(ImportFileError, match="CSV 또는 XLSX"):
+        iter_file_rows(io.BytesIO(b''), 'roster.xls')
+    with pytest.raises(ImportFileError, match="빈 파일"):
+        import_rows(None, 'nursing_homes', iter([]))
+
+def test_rejects_invalid_rows(supabase):
+    rows = [
+        ['어르신 ID', '이름', '요양원 ID'],
+        ['EL100', '홍00', 'NH001'],
+        ['', '김00', 'NH001'],
+        ['EL101', '', ''],
+        ['EL100', '박00', 'NH002'],
+        ['EL102', '최00', 'NH999'],
+        ['', '', ''],
+        ['EL103', '', 'NH002'],
+    ]
+    report = import_rows(supabase, 'elderly_residents', rows)
+    assert report['rows'] == 6
+    assert report['valid'] == 2
+    assert report['invalid'] == 4
+    assert report['errors'] == [
+        {'행': 3, '오류': "필수 값 누락: id"},
+        {'행': 4, '오류': "필수 값 누락: nursing_home_id"},
+        {'행': 5, '오류': "파일 안에서 ID 중복: EL100"},
+        {'행': 6, '오류': "존재하지 않는 요양원 ID: NH999"},
+    ]
+    assert report['written'] == 2
+    assert report['progress_created'] == 2
+    stored = supabase.table('elderly_residents').select('id, name').in_('id', ['EL100', 'EL103']).order('id').execute()
+    assert stored.data == [{'id': 'EL100', 'name': '홍00'}, {'id': 'EL103', 'name': None}]
+
+def test_new_facilities_are_known_to_later_files(supabase):
+    index = load_facility_index(supabase, page_size=2)
+    assert index == {'NH001', 'NH002', 'NH003'}
+    homes = [['요양원 ID', '요양원명'], ['NH010', '새요양원']]
+    import_rows(supabase, 'nursing_homes', homes, facility_index=index)
+    assert 'NH010' in index
+    report = import_rows(supabase, 'surveyors', [['id', 'name', 'nursing_home_id'], ['SV010', '새조사', 'NH010']],
+                         facility_index=index)
+    assert report['invalid'] == 0 and report['written'] == 1
+
+def test_existing_ids_are_skipped_or_updated(supabase):
+    rows = [['id', 'name', 'nursing_home_id'], ['SV001', '새이름', 'NH002']]
+    import_rows(supabase, 'surveyors', rows, on_conflict='skip')
+    assert supabase.table('surveyors').select('name').eq('id', 'SV001').execute().data == [{'name': '김조사'}]
+    import_rows(supabase, 'surveyors', rows, on_conflict='update')
+    assert supabase.table('surveyors').select('name, nursing_home_id').eq('id', 'SV001').execute().data == [
+        {'name': '새이름', 'nursing_home_id': 'NH002'}]
+
+def test_dry_run_and_chunks(supabase):
+    rows = [['id', 'name']] + [[f'NH{i:03d}', f'요양원{i}'] for i in range(10, 25)]
+    seen = []
+    report = import_rows(supabase, 'nursing_homes', rows, chunk_size=4, dry_run=True, progress=seen.append)
+    assert report['valid'] == 15
+    assert report['chunks'] == 4
+    assert report['written'] == 0
+    assert seen == [4, 8, 12, 15]
+    assert supabase.table('nursing_homes').select('id', count='exact').execute().count == 3
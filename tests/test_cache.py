@@ -0,0 +1,131 @@
+"""프로세스 공유 캐시 (LRUTTLCache와 요양원 명단 캐시)"""
+from surveys.cache import (LRUTTLCache, cached_progress, facility_key, get_facility_roster, invalidate_roster,
+                           remember_progress, roster_contains, store_facility_roster, table_key)
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+def test_get_and_set():
+    cache = LRUTTLCache(max_size=4, ttl=10, clock=Clock())
+    assert cache.get('a') is None
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = LRUTTLCache(max_size=4, ttl=10, clock=clock)
+    cache.set('a', 1)
+    clock.now = 9.9
+    assert cache.get('a') == 1
+    # 유효 시간은 조회가 아니라 저장 시각부터
+    clock.now = 10
+    assert cache.get('a') is None
+    assert cache.stats()['size'] == 0
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUTTLCache(max_size=2, ttl=10, clock=Clock())
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+def test_set_refreshes_position_and_time():
+    clock = Clock()
+    cache = LRUTTLCache(max_size=2, ttl=10, clock=clock)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    clock.now = 5
+    cache.set('a', 3)
+    cache.set('c', 4)
+    assert cache.get('b') is None
+    clock.now = 14
+    assert cache.get('a') == 3
+
+def test_invalidate():
+    cache = LRUTTLCache(clock=Clock())
+    for key in (('facility', 'NH001'), ('facility', 'NH002'), ('table', 'surveyors', '*')):
+        cache.set(key, key)
+    cache.invalidate(('facility', 'NH001'))
+    assert cache.get(('facility', 'NH001')) is None
+    cache.invalidate_where(lambda key: key[0] == 'table')
+    assert cache.get(('table', 'surveyors', '*')) is None
+    assert cache.get(('facility', 'NH002')) is not None
+    cache.clear()
+    assert cache.stats()['size'] == 0
+
+ROSTER = {
+    'nursing_home': {'id': 'NH001', 'name': '서울요양원'},
+    'surveyors': [{'id': 'SV001', 'nursing_home_id': 'NH001'}],
+    'residents': [{'id': 'EL001', 'nursing_home_id': 'NH001'}],
+}
+
+class RosterClient:
+    """get_facility_roster 호출 횟수를 세는 저장소 대역"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def rpc(self, name, params):
+        assert name == 'get_facility_roster'
+        self.calls += 1
+        return self
+    
+    def execute(self):
+        return type('Response', (), {'data': ROSTER})()
+
+def test_facility_roster_is_loaded_once():
+    cache = LRUTTLCache(clock=Clock())
+    client = RosterClient()
+    roster = get_facility_roster(cache, client, 'NH001')
+    assert get_facility_roster(cache, client, 'NH001') is roster
+    assert client.calls == 1
+    assert roster_contains(roster, 'SV001', 'EL001')
+    assert not roster_contains(roster, 'SV001', 'EL002')
+
+def test_progress_is_remembered_in_roster():
+    cache = LRUTTLCache(clock=Clock())
+    roster = store_facility_roster(cache, 'NH001', ROSTER)
+    assert cached_progress(roster, 'EL001') is None
+    progress = {'elderly_id': 'EL001', 'basic_survey_completed': True}
+    remember_progress(cache, 'NH001', progress)
+    assert cached_progress(roster, 'EL001') == progress
+    # 명단이 캐시에 없으면 기록하지 않음
+    remember_progress(cache, 'NH002', {'elderly_id': 'EL004'})
+    assert cache.get(facility_key('NH002')) is None
+
+def test_invalidate_roster():
+    cache = LRUTTLCache(clock=Clock())
+    store_facility_roster(cache, 'NH001', ROSTER)
+    store_facility_roster(cache, 'NH002', ROSTER)
+    cache.set(table_key('surveyors') + ('*',), [])
+    cache.set(table_key('basic_survey') + ('*',), [])
+    invalidate_roster(cache, 'NH001')
+    assert cache.get(facility_key('NH001')) is None
+    assert cache.get(facility_key('NH002')) is not None
+    assert cache.get(table_key('surveyors') + ('*',)) is None
+    assert cache.get(table_key('basic_survey') + ('*',)) == []
+    invalidate_roster(cache)
+    assert cache.get(facility_key('NH002')) is None
+
+def test_invalidate_roster_clears_separate_page_cache():
+    cache, pages = LRUTTLCache(clock=Clock()), LRUTTLCache(max_size=2, clock=Clock())
+    store_facility_roster(cache, 'NH001', ROSTER)
+    pages.set(('page', 'elderly_residents', (), None, 20), [])
+    pages.set(('page', 'elderly_residents', (), 'EL020', 20), [])
+    # 목록 페이지가 캐시 크기를 넘어도 명단 캐시의 요양원 명단은 남음
+    pages.set(('page', 'surveyors', (), None, 20), [])
+    assert pages.stats()['evictions'] == 1
+    assert cache.get(facility_key('NH001')) is not None
+    
+    invalidate_roster(cache, 'NH001', page_cache=pages)
+    assert pages.stats()['size'] == 0
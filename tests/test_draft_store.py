@@ -0,0 +1,221 @@
+"""로컬 임시 저장소(DraftStore)의 전송 대기열과 동기화 작업자(SyncWorker) 재시도"""
+import sqlite3
+
+import httpx
+import pytest
+
+from surveys.draft_store import DraftStore, SyncWorker, is_network_error, kst_timestamp, server_timestamp
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+class Response:
+    def __init__(self, data):
+        self.data = data
+
+class BatchClient:
+    """submit_surveys_batch 대역 (fail: 연결 오류로 실패, rejected: 항목 오류로 거부할 elderly_id,
+    stale: 더 최근에 저장되어 건너뛸 elderly_id)"""
+    
+    def __init__(self, fail=False, rejected=(), stale=()):
+        self.fail = fail
+        self.rejected = set(rejected)
+        self.stale = set(stale)
+        self.batches = []
+    
+    def rpc(self, name, params):
+        assert name == 'submit_surveys_batch'
+        self.batches.append(params['p_items'])
+        self.params = params
+        return self
+    
+    def execute(self):
+        if self.fail:
+            raise httpx.ConnectError("연결 실패")
+        return Response([
+            {'id': item['id'], 'ok': False, 'error': 'elderly_id'}
+            if item['payload']['elderly_id'] in self.rejected else
+            {'id': item['id'], 'ok': True, 'skipped': 'stale'}
+            if item['payload']['elderly_id'] in self.stale else {'id': item['id'], 'ok': True}
+            for item in self.params['p_items']
+        ])
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+@pytest.fixture
+def store(clock):
+    store = DraftStore(':memory:', clock=clock)
+    yield store
+    store._conn.close()
+
+def test_draft_round_trip_skips_unchanged_writes(store):
+    assert store.load_draft('basic', 'EL001') is None
+    assert store.save_draft('basic', 'EL001', {'age': 80}, page=2)
+    assert not store.save_draft('basic', 'EL001', {'age': 80}, page=2)
+    assert store.save_draft('basic', 'EL001', {'age': 80}, page=3)
+    assert store.load_draft('basic', 'EL001') == ({'age': 80}, 3, 1000.0)
+
+def test_enqueue_keeps_latest_submission_per_survey(store):
+    store.enqueue('basic', 'EL001', {'elderly_id': 'EL001', 'age': 80})
+    store.enqueue('basic', 'EL001', {'elderly_id': 'EL001', 'age': 81})
+    store.enqueue('nutrition', 'EL001', {'elderly_id': 'EL001'})
+    items = store.due_items(10)
+    assert [(item['survey'], item['payload'].get('age')) for item in items] == [('basic', 81), ('nutrition', None)]
+    assert store.pending_surveys('EL001') == {'basic', 'nutrition'}
+    assert store.enqueued.is_set()
+
+def test_sync_sends_batches_and_clears_drafts(store, clock):
+    store.save_draft('basic', 'EL001', {'age': 80})
+    for elderly_id in ('EL001', 'EL002', 'EL003'):
+        store.enqueue('basic', elderly_id, {'elderly_id': elderly_id})
+    client = BatchClient()
+    worker = SyncWorker(store, client, batch_size=2)
+    worker.drain()
+    assert [len(batch) for batch in client.batches] == [2, 1]
+    assert worker.synced == 3
+    assert store.stats()['pending'] == 0
+    assert store.load_draft('basic', 'EL001') is None
+
+def test_sync_keeps_drafts_edited_after_submission(store, clock):
+    store.enqueue('basic', 'EL001', {'elderly_id': 'EL001'})
+    clock.now += 1
+    store.save_draft('basic', 'EL001', {'age': 82})
+    SyncWorker(store, BatchClient()).sync_once()
+    assert store.load_draft('basic', 'EL001')[0] == {'age': 82}
+
+def test_sync_sends_queue_time_and_counts_stale_items(store, clock):
+    store.enqueue('basic', 'EL001', {'elderly_id': 'EL001'})
+    store.enqueue('basic', 'EL002', {'elderly_id': 'EL002'})
+    client = BatchClient(stale={'EL002'})
+    worker = SyncWorker(store, client)
+    assert worker.sync_once() == 2
+    assert [item['queued_at'] for item in client.batches[0]] == [kst_timestamp(1000.0)] * 2
+    assert server_timestamp(kst_timestamp(1000.0)) == 1000.0
+    # 건너뛴 항목도 다시 보내지 않음
+    assert (worker.synced, worker.skipped) == (2, 1)
+    assert store.stats()['pending'] == 0
+
+def test_network_failure_retries_whole_batch_with_backoff(store, clock):
+    store.enqueue('basic', 'EL001', {'elderly_id': 'EL001'})
+    store.enqueue('basic', 'EL002', {'elderly_id': 'EL002'})
+    client = BatchClient(fail=True)
+    worker = SyncWorker(store, client, base_delay=2.0, max_delay=300.0)
+    assert worker.sync_once() == 0
+    assert worker.failures == 2
+    stats = store.stats()
+    assert stats['pending'] == stats['retrying'] == 2
+    assert "연결 실패" in stats['last_error']
+    # 다음 시도 시각 전에는 보내지 않음
+    assert store.due_items(10) == []
+    clock.now += 2.0
+    client.fail = False
+    assert worker.sync_once() == 2
+    assert store.stats()['pending'] == 0
+
+def test_rejected_item_moves_to_failed(store, clock):
+    store.save_draft('basic', 'EL999', {'age': 80})
+    store.enqueue('basic', 'EL001', {'elderly_id': 'EL001'})
+    store.enqueue('basic', 'EL999', {'elderly_id': 'EL999'})
+    client = BatchClient(rejected={'EL999'})
+    worker = SyncWorker(store, client)
+    assert worker.sync_once() == 1
+    assert store.pending_surveys('EL001') == set()
+    # 다시 보내도 같은 오류이므로 재시도하지 않고 전송 실패로 옮김
+    assert store.pending_surveys('EL999') == set()
+    assert store.pending_surveys('EL999', failed=True) == {'basic'}
+    stats = store.stats()
+    assert (stats['pending'], stats['failed'], stats['last_error']) == (0, 1, 'elderly_id')
+    clock.now += worker.max_delay
+    assert store.due_items(10) == []
+    failed, = store.failed_items()
+    assert (failed['elderly_id'], failed['attempts'], failed['last_error']) == ('EL999', 1, 'elderly_id')
+    
+    # 다시 작성: 대기열에서 지우고 작성 중 답변은 남김
+    store.reopen_failed([failed['id']])
+    assert store.stats()['failed'] == 0
+    assert store.load_draft('basic', 'EL999')[0] == {'age': 80}
+
+def test_network_failures_move_to_failed_after_max_attempts(store, clock):
+    store.enqueue('basic', 'EL001', {'elderly_id': 'EL001'})
+    client = BatchClient(fail=True)
+    worker = SyncWorker(store, client, max_attempts=3)
+    for _ in range(3):
+        clock.now += worker.max_delay
+        worker.sync_once()
+    assert len(client.batches) == 3
+    assert store.stats()['failed'] == 1
+    clock.now += worker.max_delay
+    assert worker.sync_once() == 0
+    assert len(client.batches) == 3
+    
+    # 다시 전송: 시도 횟수를 초기화하고 바로 보냄
+    client.fail = False
+    store.retry_failed([item['id'] for item in store.failed_items()])
+    item, = store.due_items(10)
+    assert item['attempts'] == 0
+    assert worker.sync_once() == 1
+    assert store.stats()['failed'] == 0
+
+def test_non_network_batch_error_moves_to_failed(store):
+    class BrokenClient(BatchClient):
+        def execute(self):
+            raise type('APIError', (Exception,), {'code': '42883'})("function does not exist")
+    store.enqueue('basic', 'EL001', {'elderly_id': 'EL001'})
+    SyncWorker(store, BrokenClient()).sync_once()
+    assert store.failed_items()[0]['last_error'] == "function does not exist"
+
+def test_resubmitting_replaces_failed_item(store):
+    store.enqueue('basic', 'EL999', {'elderly_id': 'EL999'})
+    SyncWorker(store, BatchClient(rejected={'EL999'})).sync_once()
+    store.enqueue('basic', 'EL999', {'elderly_id': 'EL999', 'age': 80})
+    assert store.stats()['failed'] == 0
+    assert store.pending_surveys('EL999') == {'basic'}
+
+def test_outbox_without_failed_column_is_upgraded(tmp_path):
+    path = str(tmp_path / 'drafts.db')
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, survey TEXT NOT NULL, elderly_id TEXT NOT NULL, "
+        "payload TEXT NOT NULL, created_at REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+        "next_attempt_at REAL NOT NULL, last_error TEXT, UNIQUE (survey, elderly_id))"
+    )
+    conn.execute("INSERT INTO outbox (survey, elderly_id, payload, created_at, next_attempt_at) "
+                 "VALUES ('basic', 'EL001', '{}', 0, 0)")
+    conn.commit()
+    conn.close()
+    store = DraftStore(path)
+    assert store.stats()['pending'] == 1
+    assert len(store.due_items(10)) == 1
+    store._conn.close()
+
+def test_retry_delay_grows_exponentially_up_to_limit():
+    worker = SyncWorker(None, None, base_delay=2.0, max_delay=60.0)
+    for attempts, limit in ((1, 2.0), (2, 4.0), (3, 8.0), (10, 60.0)):
+        delay = worker.retry_delay(attempts)
+        assert limit / 2 <= delay <= limit
+
+def test_discard_removes_draft_and_pending_submission(store):
+    store.save_draft('basic', 'EL001', {'age': 80})
+    store.enqueue('basic', 'EL001', {'elderly_id': 'EL001'})
+    store.discard('basic', 'EL001')
+    assert store.load_draft('basic', 'EL001') is None
+    assert store.pending_surveys('EL001') == set()
+    # 지운 뒤 같은 답변을 다시 기록
+    assert store.save_draft('basic', 'EL001', {'age': 80})
+
+@pytest.mark.parametrize('error, expected', [
+    (httpx.ConnectError("x"), True),
+    (httpx.ReadTimeout("x"), True),
+    (TimeoutError(), True),
+    (type('APIError', (Exception,), {'code': '503'})(), True),
+    (type('APIError', (Exception,), {'code': '23503'})(), False),
+    (ValueError("x"), False),
+])
+def test_is_network_error(error, expected):
+    assert is_network_error(error) is expected
@@ -0,0 +1,108 @@
+"""식사 조사 격자(MealGrid)와 목측법 잔반 계산"""
+import json
+
+import numpy as np
+import pytest
+
+from surveys.nutrition_survey import (MEAL_GRID, VISUAL_RATIOS, MealGrid, compute_plate_waste,
+                                      store_day_waste, stored_waste_levels, summarize_intake)
+
+def test_grid_layout():
+    assert MEAL_GRID.shape == (5, 20)
+    assert MEAL_GRID.item_keys[:7] == ['breakfast_rice', 'breakfast_soup', 'breakfast_main',
+                                       'breakfast_side1', 'breakfast_side2', 'breakfast_kimchi', 'snack1']
+    assert MEAL_GRID.meal_starts == [0, 6, 7, 13, 14]
+    assert list(MEAL_GRID.meal_slots(1)) == [6]
+    assert MEAL_GRID.key(0, 0) == 'day1_breakfast_rice'
+    assert MEAL_GRID.key(4, 19, '_waste') == 'day5_dinner_kimchi_waste'
+
+def test_keys_follow_day_then_slot_order():
+    keys = MEAL_GRID.keys()
+    assert len(keys) == len(set(keys)) == 100
+    assert keys[19] == 'day1_dinner_kimchi'
+    assert keys[20] == 'day2_breakfast_rice'
+
+def test_array_round_trip():
+    grid = MealGrid(days=2)
+    values = {key: i for i, key in enumerate(grid.keys('_waste'))}
+    array = grid.to_array(values, '_waste')
+    assert array.shape == (2, 20)
+    assert grid.to_dict(array, '_waste') == {key: float(i) for i, key in enumerate(grid.keys('_waste'))}
+    # JSON 문자열과 빈 값/없는 키는 0
+    assert grid.to_array(json.dumps({'day1_snack1': 30})).sum() == 30
+    assert not grid.to_array('').any()
+    assert not grid.to_array({'day1_snack1': None}).any()
+
+def test_meal_totals():
+    array = MEAL_GRID.zeros() + 1
+    assert MEAL_GRID.meal_totals(array)[0].tolist() == [6, 1, 6, 1, 6]
+
+def test_compute_plate_waste():
+    portions = MEAL_GRID.zeros()
+    levels = MEAL_GRID.zeros(dtype=int)
+    portions[0, :6] = 200
+    levels[0, :6] = [0, 1, 2, 3, 4, 4]
+    portions[1, 6] = 100
+    levels[1, 6] = 2
+    
+    result = compute_plate_waste(portions, levels)
+    assert result['waste_g'][0, :6].tolist() == [0, 50, 100, 150, 200, 200]
+    assert result['intake_rate'][0, :6].tolist() == [100, 75, 50, 25, 0, 0]
+    assert result['meal_waste_g'][0].tolist() == [700, 0, 0, 0, 0]
+    assert result['day_intake_g'].tolist() == [500, 50, 0, 0, 0]
+    assert result['total_intake_rate'] == pytest.approx(550 / 1300 * 100)
+    # 제공량이 0인 칸/끼니/일의 섭취율은 NaN
+    assert np.isnan(result['intake_rate'][0, 6])
+    assert np.isnan(result['meal_intake_rate'][0, 1])
+    assert np.isnan(result['day_intake_rate'][2])
+
+def test_compute_plate_waste_batches_residents():
+    portions = np.stack([MEAL_GRID.zeros() + 100, MEAL_GRID.zeros() + 200])
+    levels = np.stack([MEAL_GRID.zeros(dtype=int) + 1, MEAL_GRID.zeros(dtype=int) + 4])
+    result = compute_plate_waste(portions, levels)
+    assert result['total_intake_rate'].tolist() == [75, 0]
+    single = compute_plate_waste(portions[1], levels[1])
+    assert np.array_equal(result['waste_g'][1], single['waste_g'])
+
+def test_summarize_intake_matches_compute_plate_waste():
+    rng = np.random.default_rng(0)
+    portions = rng.integers(0, 300, MEAL_GRID.shape).astype(float)
+    levels = rng.integers(0, 5, MEAL_GRID.shape)
+    expected = summarize_intake(portions, portions * VISUAL_RATIOS[levels])
+    result = compute_plate_waste(portions, levels)
+    for name, value in expected.items():
+        assert np.array_equal(result[name], value, equal_nan=True), name
+
+def test_stored_waste_levels_prefers_saved_levels():
+    levels = [(i % 5) for i in range(100)]
+    data = {'plate_waste_levels': levels, 'plate_waste': json.dumps({'day1_breakfast_rice_waste': 999})}
+    assert stored_waste_levels(data).ravel().tolist() == levels
+    # 문자열로 저장된 목록과 범위를 벗어난 값
+    data = {'plate_waste_levels': json.dumps([7] + [None] * 99)}
+    assert stored_waste_levels(data).ravel().tolist() == [4] + [0] * 99
+
+def test_stored_waste_levels_from_grams():
+    """목측 단계가 없는 이전 응답은 잔반량/제공량 비율을 가장 가까운 단계로 환산"""
+    data = {
+        'meal_portions': {'day1_breakfast_rice': 200, 'day1_breakfast_soup': 200, 'day1_snack1': 0},
+        'plate_waste': {'day1_breakfast_rice_waste': 100, 'day1_breakfast_soup_waste': 140,
+                        'day1_snack1_waste': 50},
+    }
+    levels = stored_waste_levels(data)
+    assert levels[0, :2].tolist() == [2, 3]
+    assert levels[0, 6] == 0
+    assert stored_waste_levels({}) is None
+
+def test_store_day_waste_updates_one_day():
+    data = {'plate_waste': json.dumps({'day1_breakfast_rice_waste': 10.0})}
+    waste_grams = np.arange(20, dtype=float)
+    levels = np.full(20, 3)
+    store_day_waste(data, 2, waste_grams, levels)
+    
+    waste = json.loads(data['plate_waste'])
+    assert waste['day1_breakfast_rice_waste'] == 10.0
+    assert waste['day3_breakfast_rice_waste'] == 0.0
+    assert waste['day3_dinner_kimchi_waste'] == 19.0
+    assert data['plate_waste_levels'][40:60] == [3] * 20
+    assert data['plate_waste_levels'][:40] == [0] * 40
+    assert stored_waste_levels(data)[2].tolist() == [3] * 20
@@ -0,0 +1,90 @@
+"""설문지 정의 검증 (compile_questionnaire 오류 메시지)"""
+import copy
+
+import pytest
+
+from surveys.questionnaire import (QuestionnaireError, choice_index, compile_questionnaire, list_questionnaires,
+                                   load_questionnaire)
+
+SPEC = {
+    'name': 'sample',
+    'title': "예제 조사표",
+    'option_sets': {'scale': ["1 = 나쁨", "2 = 보통", "3 = 좋음"]},
+    'required': ['score'],
+    'pages': [{
+        'title': "첫 페이지",
+        'items': [
+            {'type': 'radio', 'field': 'score', 'label': "점수", 'options': 'scale', 'values': [1, 2, 3]},
+            {'type': 'number', 'field': 'age', 'label': "나이", 'min_value': 60, 'max_value': 110, 'default': 80},
+            {'type': 'checkboxes', 'field': 'foods', 'options': ["밥", "국", "기타"],
+             'other': {'option': "기타", 'label': "기타 음식"}},
+            {'type': 'block', 'name': 'summary'},
+        ],
+    }],
+}
+
+def compile_with(change):
+    spec = copy.deepcopy(SPEC)
+    change(spec)
+    return compile_questionnaire(spec, 'sample.json')
+
+def first_item(spec):
+    return spec['pages'][0]['items'][0]
+
+def test_compiles_valid_spec():
+    questionnaire = compile_questionnaire(SPEC, 'sample.json')
+    assert questionnaire.table == 'sample_survey'
+    assert questionnaire.icon == "📝"
+    assert questionnaire.required == ('score',)
+    assert questionnaire.blocks == frozenset({'summary'})
+    assert list(questionnaire.fields) == ['score', 'age', 'foods']
+    score = questionnaire.fields['score']
+    assert score.options == ("1 = 나쁨", "2 = 보통", "3 = 좋음")
+    # 저장 값과 선택지 이름 모두로 위치를 찾고, 모르는 값은 기본 위치
+    assert choice_index(score, 3) == 2
+    assert choice_index(score, "2 = 보통") == 1
+    assert choice_index(score, 9) == 0
+    assert choice_index(score, ['목록']) == 0
+    assert questionnaire.fields['foods'].other.key == 'foods_other'
+
+@pytest.mark.parametrize('change, message', [
+    (lambda s: s.pop('title'), "sample.json : 'title'이(가) 필요합니다"),
+    (lambda s: s.update(colour='red'), "알 수 없는 키 colour"),
+    (lambda s: s.update(order='1'), "'order'는 정수여야 합니다"),
+    (lambda s: s.update(pages=[]), "'pages'는 페이지 목록이어야 합니다"),
+    (lambda s: s.update(messages={'done': "끝"}), "sample.json messages: 알 수 없는 키 done"),
+    (lambda s: s.update(required='score'), "'required'는 필드 이름 목록이어야 합니다"),
+    (lambda s: s['pages'][0].update(items=[]), "sample.json pages[0]: 문항이 없습니다"),
+    (lambda s: first_item(s).update(type='slider'), "pages[0].items[0]: 알 수 없는 문항 종류 'slider'"),
+    (lambda s: first_item(s).update(options='grades'), "선택지 목록 'grades'이(가) option_sets에 없습니다"),
+    (lambda s: first_item(s).update(options=["가", "가"], values=[1, 2]), "선택지가 중복됩니다"),
+    (lambda s: first_item(s).update(values=[1, 2]), "'values'는 선택지와 개수가 같은 목록이어야 합니다"),
+    (lambda s: first_item(s).update(values=[1, 1, 2]), "'values'는 중복 없는 문자열/숫자/참거짓이어야 합니다"),
+    (lambda s: first_item(s).update(default=3), "'default'는 선택지 위치(0 ~ 2)여야 합니다"),
+    (lambda s: first_item(s).update(label=""), "'label'은(는) 빈 문자열이 아닌 문자열이어야 합니다"),
+    (lambda s: s['pages'][0]['items'][1].update(field='score'), "pages[0].items[1]: 필드 'score'이(가) 중복됩니다"),
+    (lambda s: s['pages'][0]['items'][1].update(min_value=120), "'min_value'가 'max_value'보다 큽니다"),
+    (lambda s: s['pages'][0]['items'][1].update(default=50), "'default'가 입력 범위를 벗어납니다"),
+    (lambda s: s['pages'][0]['items'][1].update(step='1'), "숫자여야 합니다"),
+    (lambda s: s['pages'][0]['items'][2]['other'].update(option="라면"), "직접 입력 선택지 '라면'이(가) 선택지에 없습니다"),
+    (lambda s: s['pages'][0]['items'][1].update(key='foods_1'), "위젯 키 'foods_1'이(가) 중복됩니다"),
+    (lambda s: s['pages'][0]['items'].append({'type': 'columns', 'items': []}),
+     "'items'는 열마다 문항 목록을 담은 목록이어야 합니다"),
+])
+def test_reports_errors_with_location(change, message):
+    with pytest.raises(QuestionnaireError) as error:
+        compile_with(change)
+    assert message in str(error.value)
+
+def test_rejects_non_object_spec():
+    with pytest.raises(QuestionnaireError, match="설문지 정의는 객체여야 합니다"):
+        compile_questionnaire([], 'sample.json')
+
+def test_missing_file():
+    with pytest.raises(QuestionnaireError, match="설문지 정의 파일이 없습니다"):
+        load_questionnaire('missing')
+
+def test_bundled_questionnaires_compile():
+    assert list_questionnaires() == ('basic', 'nutrition', 'satisfaction')
+    for name in list_questionnaires():
+        assert load_questionnaire(name).table == f"{name}_survey"
@@ -0,0 +1,49 @@
+"""만족도 조사표 제품 평가의 저장 점수 ↔ 선택지 복원"""
+import json
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from surveys.products import RATING_FIELDS
+from surveys.satisfaction_survey import rating_index, rating_score
+
+EASE_OPTIONS = ["매우 어려움", "어려움", "보통", "쉬움", "매우 쉬움"]
+
+@pytest.mark.parametrize('field', list(RATING_FIELDS))
+@pytest.mark.parametrize('score', [1, 2, 3, 4, 5])
+def test_rating_round_trip(field, score):
+    index = rating_index({field: score}, field)
+    assert rating_score(EASE_OPTIONS, EASE_OPTIONS[index], field) == score
+
+def test_reversed_items_restore_the_chosen_option():
+    # "매우 어려움"은 5점으로 저장되고 다시 "매우 어려움"으로 표시
+    assert rating_score(EASE_OPTIONS, "매우 어려움", 'chewing') == 5
+    assert EASE_OPTIONS[rating_index({'chewing': 5}, 'chewing')] == "매우 어려움"
+    assert EASE_OPTIONS[rating_index({'swallowing': 2}, 'swallowing')] == "쉬움"
+    assert rating_index({}, 'chewing') == 2
+
+def evaluation_page():
+    import json
+    from types import SimpleNamespace
+    import streamlit as st
+    from surveys.satisfaction_survey import show_product_evaluations
+    
+    context = SimpleNamespace(supabase=None, data={'product_evaluations': st.session_state['saved']})
+    show_product_evaluations(context)
+    st.session_state['result'] = json.loads(context.data['product_evaluations'])
+
+def test_saved_evaluations_survive_a_revisit():
+    """저장된 평가로 페이지를 다시 열고 아무것도 바꾸지 않으면 같은 점수가 저장됨"""
+    saved = {
+        'product_1': {'taste': 4, 'chewing': 5, 'swallowing': 1, 'satisfaction': 2, 'repurchase': 5},
+        'product_2': {'taste': 1, 'chewing': 2, 'swallowing': 4, 'satisfaction': 5, 'repurchase': 3},
+    }
+    at = AppTest.from_function(evaluation_page)
+    at.session_state['saved'] = json.dumps(saved)
+    at.run()
+    assert not at.exception
+    assert at.radio(key='product_1_chewing_radio').value == "매우 어려움"
+    assert at.radio(key='product_1_swallowing_radio').value == "매우 쉬움"
+    result = at.session_state['result']
+    for product_id, scores in saved.items():
+        assert result[product_id] == scores
@@ -0,0 +1,138 @@
+"""surveys/scoring.py 분류 기준과 database_schema.sql refresh_basic_survey_scores 기준 비교"""
+import re
+
+import pytest
+
+from surveys.scoring import (IPAQ_FIELDS, KMBI_THRESHOLDS, MET_VALUES, MMSE_CUTOFFS, MMSE_DEFAULT_CUTOFF,
+                             MMSE_MILD_MARGIN, MNA_THRESHOLDS, body_mass_index, derived_scores,
+                             mna_bmi_category)
+from conftest import SCHEMA_PATH
+
+def refresh_function_sql():
+    with open(SCHEMA_PATH, encoding='utf-8') as f:
+        sql = f.read()
+    match = re.search(r'CREATE OR REPLACE FUNCTION refresh_basic_survey_scores.*?\$\$(.*?)\$\$', sql, re.S)
+    return match.group(1)
+
+def numbers(pattern, text):
+    return tuple(float(value) for value in re.findall(pattern, text))
+
+def test_sql_thresholds_match_scoring_constants():
+    sql = refresh_function_sql()
+    assert numbers(r'mna_total < (\d+)', sql) == MNA_THRESHOLDS
+    assert numbers(r'kmbi_score < (\d+)', sql) == KMBI_THRESHOLDS
+    assert tuple((word, int(cutoff)) for word, cutoff in
+                 re.findall(r"education LIKE '%(\w+)%' THEN (\d+)", sql)) == MMSE_CUTOFFS
+    assert numbers(r'ELSE (\d+)\s+END AS mmse_cutoff', sql) == (MMSE_DEFAULT_CUTOFF,)
+    assert numbers(r'mmse_cutoff - (\d+)', sql) == (MMSE_MILD_MARGIN,)
+    assert numbers(r"->>'(?:vigorous_activity|moderate_activity|walking)_time'\)::NUMERIC \* ([\d.]+)", sql) == (
+        MET_VALUES['vigorous'], MET_VALUES['moderate'], MET_VALUES['walking'])
+    assert numbers(r'total_met >= (\d+)', sql) == (3000, 600)
+    assert numbers(r'vigorous_met >= (\d+)', sql) == (1500,)
+    assert numbers(r'vigorous_days >= (\d+)', sql) == (3, 3)
+    assert numbers(r'moderate_walking_days >= (\d+)', sql) == (5,)
+
+@pytest.mark.parametrize('total, status', [
+    (0, 'malnourished'), (7, 'malnourished'), (8, 'at_risk'), (11, 'at_risk'), (12, 'normal'), (14, 'normal'),
+])
+def test_mna_status_boundaries(total, status):
+    assert derived_scores({'mna_appetite_change': total})['mna_status'] == status
+
+@pytest.mark.parametrize('scaled, status', [
+    (0, 'total'), (39.9, 'total'), (40, 'severe'), (60, 'moderate'), (74.9, 'moderate'),
+    (75, 'mild'), (90, 'independent'), (100, 'independent'),
+])
+def test_kmbi_status_boundaries(scaled, status):
+    # 원점수 44점이 100점 (문항 하나에 원점수를 모두 넣어도 합계는 같음)
+    assert derived_scores({'kmbi_1': scaled * 44 / 100})['k_mbi_status'] == status
+
+@pytest.mark.parametrize('education, total, status', [
+    ('무학', 19, 'normal'), ('무학', 18, 'mild'), ('무학', 15, 'mild'), ('무학', 14, 'impaired'),
+    ('초등학교 졸업', 22, 'normal'), ('초등학교 졸업', 21, 'mild'), ('초등학교 졸업', 17, 'impaired'),
+    ('고등학교 졸업', 24, 'normal'), ('고등학교 졸업', 20, 'mild'), ('고등학교 졸업', 19, 'impaired'),
+    (None, 24, 'normal'),
+])
+def test_mmse_status_boundaries(education, total, status):
+    data = {'education': education, 'mmse_time_orientation': total}
+    assert derived_scores(data)['mmse_status'] == status
+
+@pytest.mark.parametrize('answers, level', [
+    # 격렬한 활동 3일 이상 + 1500 MET-분 이상
+    ((3, 63, 0, 0, 0, 0), 'high'),
+    ((3, 62, 0, 0, 0, 0), 'moderate'),
+    # 총 3000 MET-분 이상
+    ((0, 0, 7, 108, 0, 0), 'high'),
+    # 총 600 MET-분 이상
+    ((0, 0, 2, 75, 0, 0), 'moderate'),
+    # 중강도 + 걷기 5일 이상, 600 MET-분 이상 (총량 조건과 함께 충족)
+    ((0, 0, 0, 0, 5, 37), 'moderate'),
+    ((0, 0, 0, 0, 5, 36), 'low'),
+    ((0, 0, 0, 0, 0, 0), 'low'),
+])
+def test_ipaq_activity_levels(answers, level):
+    derived = derived_scores(dict(zip(IPAQ_FIELDS, answers)))
+    assert derived['activity_level'] == level
+
+def test_ipaq_met_minutes():
+    derived = derived_scores(dict(zip(IPAQ_FIELDS, (2, 30, 3, 20, 5, 40))))
+    assert derived['ipaq_vigorous_met'] == 480.0
+    assert derived['ipaq_moderate_met'] == 240.0
+    assert derived['ipaq_walking_met'] == 660.0
+    assert derived['ipaq_total_met'] == 1380.0
+
+@pytest.mark.parametrize('height, weight, category', [
+    # 반올림하면 경계값이 되는 BMI는 반올림 전 값으로 분류
+    (160, 48.638, 0),     # 18.9992
+    (179.7, 67.8, 1),     # 20.9959
+    (165, 62.6, 2),       # 22.9936
+    (150, 47.25, 2),      # 21.0000
+    (150, 51.75, 3),      # 23.0000
+])
+def test_mna_bmi_category_uses_unrounded_bmi(height, weight, category):
+    assert int(mna_bmi_category(body_mass_index(height, weight))) == category
+
+def test_unanswered_scales_are_left_out():
+    assert derived_scores({}) == {}
+    assert set(derived_scores({'height': 160, 'weight': 50})) == {'bmi'}
+
+def test_bmi():
+    assert body_mass_index(160, 51.2) == pytest.approx(20.0)
+    assert derived_scores({'height': 160, 'weight': 48.638})['bmi'] == 19.0
+    assert body_mass_index(0, 50) is None
+    assert body_mass_index('', None) is None
+    assert mna_bmi_category([18.9, 19, 20.9, 21, 22.9, 23]).tolist() == [0, 1, 1, 2, 2, 3]
+
+def test_refresh_basic_survey_scores_matches_derived_scores(postgres_storage):
+    """저장된 총점으로 서버가 다시 채점한 분류 = 같은 총점의 derived_scores 분류"""
+    cases = [
+        (mna, kmbi, mmse, education)
+        for mna, kmbi, mmse, education in zip(
+            (7, 8, 11, 12, 14, 0),
+            (39, 40, 59, 60, 75, 90),
+            (18, 19, 21, 22, 23, 24),
+            ('무학', '무학', '초등학교 졸업', '초등학교 졸업', '대학교 졸업', None),
+        )
+    ]
+    residents = ['EL001', 'EL002', 'EL003', 'EL004', 'EL005', 'EL006']
+    rows = [
+        {'elderly_id': elderly_id, 'mna_score': mna, 'k_mbi_score': kmbi, 'mmse_score': mmse,
+         'education': education, 'height': 155, 'weight': 48.5}
+        for elderly_id, (mna, kmbi, mmse, education) in zip(residents, cases)
+    ]
+    postgres_storage.table('basic_survey').insert(rows).execute()
+    postgres_storage.rpc('refresh_basic_survey_scores', {'p_elderly_ids': residents}).execute()
+    stored = {
+        row['elderly_id']: row for row in postgres_storage.table('basic_survey')
+        .select('elderly_id, bmi, mna_status, k_mbi_status, mmse_status').execute().data
+    }
+    
+    for elderly_id, (mna, kmbi, mmse, education) in zip(residents, cases):
+        expected = derived_scores({
+            'height': 155, 'weight': 48.5, 'education': education,
+            'mna_appetite_change': mna, 'kmbi_1': kmbi * 44 / 100, 'mmse_time_orientation': mmse,
+        })
+        row = stored[elderly_id]
+        assert float(row['bmi']) == expected['bmi']
+        assert row['mna_status'] == expected['mna_status']
+        assert row['k_mbi_status'] == expected['k_mbi_status']
+        assert row['mmse_status'] == expected['mmse_status']
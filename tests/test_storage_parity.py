@@ -0,0 +1,244 @@
+"""SqliteStorage 서버 함수(rpc_*)와 database_schema.sql 함수·트리거의 동작 비교
+
+같은 테스트를 SQLite와 PostgreSQL(TEST_DATABASE_URL 또는 pgserver 임시 서버) 저장소에서 각각 실행합니다.
+"""
+import re
+
+import pytest
+
+from surveys.nutrition_survey import MEAL_GRID
+from surveys.sqlite_storage import SqliteStorage
+from conftest import SCHEMA_PATH
+
+def rpc(storage, name, **params):
+    return storage.rpc(name, params).execute().data
+
+def progress_of(storage, elderly_id):
+    return storage.table('survey_progress').select('*').eq('elderly_id', elderly_id).execute().data[0]
+
+def survey_row(storage, survey, elderly_id, columns='*'):
+    rows = storage.table(f'{survey}_survey').select(columns).eq('elderly_id', elderly_id).execute().data
+    return rows[0] if rows else None
+
+def test_sqlite_functions_exist_in_schema():
+    with open(SCHEMA_PATH, encoding='utf-8') as f:
+        functions = set(re.findall(r'CREATE OR REPLACE FUNCTION (\w+)\(', f.read()))
+    implemented = {name[len('rpc_'):] for name in dir(SqliteStorage) if name.startswith('rpc_')}
+    assert implemented <= functions
+
+@pytest.mark.parametrize('ids, error', [
+    (('NH999', 'SV001', 'EL001'), 'nursing_home'),
+    (('NH001', 'SV003', 'EL001'), 'surveyor'),
+    (('NH001', 'SV001', 'EL004'), 'elderly'),
+])
+def test_survey_login_errors(storage, ids, error):
+    params = dict(zip(('p_nursing_home_id', 'p_surveyor_id', 'p_elderly_id'), ids))
+    assert rpc(storage, 'survey_login', **params) == {'ok': False, 'error': error}
+
+def test_survey_login(storage):
+    result = rpc(storage, 'survey_login', p_nursing_home_id='NH001', p_surveyor_id='SV002', p_elderly_id='EL001')
+    assert result['ok'] is True
+    assert 'roster' not in result
+    assert result['progress']['elderly_id'] == 'EL001'
+    assert result['progress']['basic_survey_completed'] is False
+    
+    result = rpc(storage, 'survey_login', p_nursing_home_id='NH001', p_surveyor_id='SV002', p_elderly_id='EL001',
+                 p_include_roster=True)
+    roster = result['roster']
+    assert roster == rpc(storage, 'get_facility_roster', p_nursing_home_id='NH001')
+    assert roster['nursing_home']['name'] == '서울요양원'
+    assert [row['id'] for row in roster['surveyors']] == ['SV001', 'SV002']
+    assert [row['id'] for row in roster['residents']] == ['EL001', 'EL002', 'EL003']
+
+def basic_payload(elderly_id='EL001', **answers):
+    return dict({'elderly_id': elderly_id, 'nursing_home_id': 'NH001', 'surveyor_id': 'SV001'}, **answers)
+
+def test_draft_is_not_submitted(storage):
+    version = rpc(storage, 'cohort_analytics_version')
+    assert rpc(storage, 'save_survey_draft', p_survey='basic', p_payload=basic_payload(age=80)) is None
+    assert survey_row(storage, 'basic', 'EL001', 'age, submitted_at') == {'age': 80, 'submitted_at': None}
+    assert progress_of(storage, 'EL001')['basic_survey_completed'] is False
+    assert rpc(storage, 'cohort_analytics_version') == version
+    
+    # 다시 저장하면 같은 행을 고침 (보낸 컬럼만)
+    rpc(storage, 'save_survey_draft', p_survey='basic', p_payload=basic_payload(gender='여'))
+    assert survey_row(storage, 'basic', 'EL001', 'age, gender') == {'age': 80, 'gender': '여'}
+
+def test_submit_survey(storage):
+    version = rpc(storage, 'cohort_analytics_version', p_nursing_home_id='NH001')
+    progress = rpc(storage, 'submit_survey', p_survey='basic',
+                   p_payload=basic_payload(age=81, updated_at='2026-10-01T09:00:00'))
+    assert progress['basic_survey_completed'] is True
+    assert progress['all_surveys_completed'] is False
+    assert survey_row(storage, 'basic', 'EL001', 'age')['age'] == 81
+    assert survey_row(storage, 'basic', 'EL001', 'submitted_at')['submitted_at'].startswith('2026-10-01')
+    assert rpc(storage, 'cohort_analytics_version', p_nursing_home_id='NH001') != version
+    assert rpc(storage, 'cohort_analytics_version', p_nursing_home_id='NH002') == \
+        rpc(storage, 'cohort_analytics_version', p_nursing_home_id='NH003')
+    
+    for survey in ('nutrition', 'satisfaction'):
+        progress = rpc(storage, 'submit_survey', p_survey=survey, p_payload=basic_payload())
+    assert progress['all_surveys_completed'] is True
+
+def test_submit_surveys_batch_isolates_failed_items(storage):
+    results = rpc(storage, 'submit_surveys_batch', p_items=[
+        {'id': 1, 'survey': 'basic', 'payload': basic_payload('EL001')},
+        {'id': 2, 'survey': 'basic', 'payload': basic_payload('EL999')},
+        {'id': 3, 'survey': 'basic', 'payload': basic_payload('EL002')},
+    ])
+    assert [(result['id'], result['ok']) for result in results] == [(1, True), (2, False), (3, True)]
+    assert results[1]['error']
+    assert progress_of(storage, 'EL002')['basic_survey_completed'] is True
+    assert survey_row(storage, 'basic', 'EL999') is None
+
+def test_submit_surveys_batch_skips_rows_saved_after_queueing(storage):
+    """대기열에 넣은 뒤 다른 기기에서 저장한 설문은 늦게 도착한 제출로 덮어쓰지 않음"""
+    rpc(storage, 'submit_survey', p_survey='basic', p_payload=basic_payload(age=82, updated_at='2026-10-01 10:00:00'))
+    queued = {'survey': 'basic', 'queued_at': '2026-10-01T09:00:05'}
+    results = rpc(storage, 'submit_surveys_batch', p_items=[
+        dict(queued, id=1, payload=basic_payload(age=80, updated_at='2026-10-01 09:00:00')),
+        dict(queued, id=2, payload=basic_payload('EL002', age=70, updated_at='2026-10-01 09:00:00')),
+    ])
+    assert results == [{'id': 1, 'ok': True, 'skipped': 'stale'}, {'id': 2, 'ok': True}]
+    assert survey_row(storage, 'basic', 'EL001', 'age')['age'] == 82
+    assert survey_row(storage, 'basic', 'EL002', 'age')['age'] == 70
+    
+    # 서버 행보다 나중에 넣은 제출(같은 제출을 다시 보낸 경우 포함)과 queued_at이 없는 항목은 저장
+    results = rpc(storage, 'submit_surveys_batch', p_items=[
+        {'id': 3, 'survey': 'basic', 'payload': basic_payload(age=83, updated_at='2026-10-01 10:00:00'),
+         'queued_at': '2026-10-01 10:00:00'},
+        {'id': 4, 'survey': 'basic', 'payload': basic_payload('EL002', age=71)},
+    ])
+    assert results == [{'id': 3, 'ok': True}, {'id': 4, 'ok': True}]
+    assert survey_row(storage, 'basic', 'EL001', 'age')['age'] == 83
+    assert survey_row(storage, 'basic', 'EL002', 'age')['age'] == 71
+
+def test_init_survey_progress(storage):
+    storage.table('elderly_residents').insert([
+        {'id': 'EL100', 'nursing_home_id': 'NH001'}, {'id': 'EL101', 'nursing_home_id': 'NH002'}
+    ]).execute()
+    assert rpc(storage, 'init_survey_progress', p_elderly_ids=['EL100', 'EL101', 'EL001']) == 2
+    assert progress_of(storage, 'EL100')['surveyor_id'] == 'SV001'
+    assert progress_of(storage, 'EL101')['surveyor_id'] == 'SV003'
+
+def test_survey_table_columns(storage):
+    columns = rpc(storage, 'survey_table_columns', p_table='nutrition_survey')
+    assert {'elderly_id', 'meal_portions', 'plate_waste', 'plate_waste_levels', 'submitted_at'} <= set(columns)
+    types = {row['column_name']: row['data_type'] for row in
+             rpc(storage, 'survey_table_column_types', p_table='nutrition_survey')}
+    assert types['plate_waste_levels'] == 'ARRAY'
+    assert types['meal_portions'] == 'jsonb'
+    assert rpc(storage, 'survey_table_columns', p_table='missing_table') is None
+
+def nutrition_payload(levels):
+    portions = MEAL_GRID.zeros()
+    portions[0, :7] = [200, 150, 100, 80, 80, 40, 120]
+    # 잔반량(g)은 목측 단계와 다르게 저장해 두어 waste_level이 단계에서 오는지 확인
+    waste = portions / 2
+    return basic_payload(
+        meal_portions=MEAL_GRID.to_dict(portions),
+        plate_waste=MEAL_GRID.to_dict(waste, '_waste'),
+        plate_waste_levels=levels,
+    )
+
+def test_meal_items_take_waste_level_from_levels(storage):
+    levels = [0] * (MEAL_GRID.days * MEAL_GRID.slot_count)
+    levels[:7] = [0, 1, 2, 3, 4, 4, 1]
+    rpc(storage, 'submit_survey', p_survey='nutrition', p_payload=nutrition_payload(levels))
+    items = storage.table('nutrition_meal_items').select('meal, slot, portion_g, waste_level, waste_g') \
+        .eq('elderly_id', 'EL001').eq('day', 1).execute().data
+    by_slot = {(row['meal'], row['slot']): row for row in items}
+    assert [by_slot[('breakfast', slot)]['waste_level'] for slot in
+            ('rice', 'soup', 'main', 'side1', 'side2', 'kimchi')] == [0, 1, 2, 3, 4, 4]
+    assert by_slot[('snack1', '')]['waste_level'] == 1
+    assert float(by_slot[('breakfast', 'rice')]['waste_g']) == 100
+    
+    # 목측 단계가 없는 이전 응답은 잔반량/제공량 비율로 환산
+    rpc(storage, 'submit_survey', p_survey='nutrition', p_payload=dict(nutrition_payload(None), elderly_id='EL002'))
+    items = storage.table('nutrition_meal_items').select('waste_level') \
+        .eq('elderly_id', 'EL002').eq('day', 1).eq('meal', 'breakfast').execute().data
+    assert {row['waste_level'] for row in items} == {2}
+
+def test_refresh_nutrition_meal_items(storage):
+    levels = [2] * (MEAL_GRID.days * MEAL_GRID.slot_count)
+    rpc(storage, 'submit_survey', p_survey='nutrition', p_payload=nutrition_payload(levels))
+    before = storage.table('nutrition_meal_items').select('*', count='exact').execute().count
+    assert before == MEAL_GRID.days * MEAL_GRID.slot_count
+    # 다시 만들어도 행 수는 같음 (지우고 다시 펼침)
+    assert rpc(storage, 'refresh_nutrition_meal_items', p_elderly_ids=['EL001']) == before
+    assert rpc(storage, 'refresh_nutrition_meal_items') == before
+
+def cohort_stats(result):
+    return {(row['dimension'], row['grp'], row['metric']): row['stats'] for row in result['summary']}
+
+def test_cohort_analytics(storage):
+    residents = {
+        'EL001': dict(mna_score=12, mmse_score=24, k_mbi_score=80, bmi=21.5, care_grade='3등급', meal_type='일반식'),
+        'EL002': dict(mna_score=8, mmse_score=18, k_mbi_score=50, bmi=19.0, care_grade='4등급', meal_type='일반식'),
+        'EL003': dict(mna_score=5, mmse_score=20, k_mbi_score=30, bmi=17.2),
+    }
+    for elderly_id, answers in residents.items():
+        rpc(storage, 'submit_survey', p_survey='basic', p_payload=basic_payload(elderly_id, **answers))
+    # 부분 저장만 된 응답은 집계하지 않음
+    rpc(storage, 'save_survey_draft', p_survey='basic',
+        p_payload=dict(basic_payload('EL004', mna_score=14), nursing_home_id='NH002'))
+    levels = [1] * (MEAL_GRID.days * MEAL_GRID.slot_count)
+    rpc(storage, 'submit_survey', p_survey='nutrition', p_payload=nutrition_payload(levels))
+    
+    result = rpc(storage, 'cohort_analytics', p_bins={'mna_score': [0, 8, 12], 'bmi': [0, 18.5, 23]})
+    stats = cohort_stats(result)
+    assert stats[('all', None, 'mna_score')] == {'n': 3, 'mean': 8.33, 'min': 5, 'max': 12, 'quartiles': [6.5, 8, 10]}
+    assert stats[('facility', 'NH001', 'bmi')] == {'n': 3, 'mean': 19.23, 'min': 17.2, 'max': 21.5,
+                                                   'quartiles': [18.1, 19, 20.25]}
+    assert stats[('care_grade', '미입력', 'k_mbi_score')]['n'] == 1
+    assert stats[('meal_type', '일반식', 'mmse_score')]['mean'] == 21
+    assert stats[('all', None, 'intake_rate')]['n'] == 1
+    assert ('facility', 'NH002', 'mna_score') not in stats
+    histograms = {(row['metric'], row['bucket']): row['n'] for row in result['histograms']}
+    assert {key: n for key, n in histograms.items() if key[0] in ('mna_score', 'bmi')} == {
+        ('mna_score', 1): 1, ('mna_score', 2): 1, ('mna_score', 3): 1, ('bmi', 1): 1, ('bmi', 2): 2,
+    }
+    
+    # 데이터 버전이 같으면 다시 집계하지 않음
+    version = result['version']
+    assert rpc(storage, 'cohort_analytics', p_version=version) == {'version': version, 'unchanged': True}
+    assert rpc(storage, 'cohort_analytics', p_nursing_home_id='NH002')['summary'] == []
+
+def rating_totals(storage):
+    rows = storage.table('product_rating_totals').select('*').execute().data
+    return {(row['nursing_home_id'], row['product_id']): (row['responses'], row['taste_sum'], row['chewing_sum'])
+            for row in rows if row['responses']}
+
+def evaluations(**products):
+    fields = ('taste', 'chewing', 'swallowing', 'satisfaction', 'repurchase')
+    return {product_id: dict(zip(fields, scores)) for product_id, scores in products.items()}
+
+def test_product_rating_totals_follow_submissions(storage):
+    rpc(storage, 'submit_survey', p_survey='satisfaction', p_payload=basic_payload(
+        product_evaluations=evaluations(product_1=(5, 4, 3, 2, 1), product_2=(3, 3, 3, 3, 3))))
+    rpc(storage, 'submit_survey', p_survey='satisfaction', p_payload=basic_payload('EL002',
+        product_evaluations=evaluations(product_1=(1, 2, 3, 4, 5), product_3=(6, 3, 3, 3, 3))))
+    rpc(storage, 'submit_survey', p_survey='satisfaction', p_payload=dict(basic_payload('EL004',
+        product_evaluations=evaluations(product_1=(2, 2, 2, 2, 2))), nursing_home_id='NH002'))
+    # 부분 저장만 된 응답과 1~5점이 아닌 평가는 합계에 넣지 않음
+    rpc(storage, 'save_survey_draft', p_survey='satisfaction', p_payload=basic_payload('EL003',
+        product_evaluations=evaluations(product_1=(5, 5, 5, 5, 5))))
+    assert rating_totals(storage) == {
+        ('NH001', 'product_1'): (2, 6, 6), ('NH001', 'product_2'): (1, 3, 3), ('NH002', 'product_1'): (1, 2, 2),
+    }
+    
+    # 다시 제출하면 이전 평가를 빼고 새 평가를 더함 (제품 평가와 관계없는 부분 저장은 그대로)
+    rpc(storage, 'submit_survey', p_survey='satisfaction', p_payload=basic_payload(
+        product_evaluations=evaluations(product_2=(1, 1, 1, 1, 1))))
+    rpc(storage, 'save_survey_draft', p_survey='satisfaction',
+        p_payload=basic_payload('EL002', overall_product_satisfaction=4))
+    totals = {
+        ('NH001', 'product_1'): (1, 1, 2), ('NH001', 'product_2'): (1, 1, 1), ('NH002', 'product_1'): (1, 2, 2),
+    }
+    assert rating_totals(storage) == totals
+    count = storage.table('product_ratings').select('*', count='exact').execute().count
+    assert count == 3
+    
+    # 처음부터 다시 만들어도 같은 합계
+    assert rpc(storage, 'refresh_product_ratings') == count
+    assert rating_totals(storage) == totals